@@ -6,12 +6,16 @@
 
 import errno
 import os
+import select
 import signal
 import time
 from random import Random
 from types import FrameType
 from typing import (
     IO,
+    Iterable,
+    Iterator,
+    List,
     Optional,
     Sequence,
     Tuple,
@@ -48,6 +52,11 @@ _nagios_command_pipe: Union[bool, IO[bytes], None] = None
 _checkresult_file_fd = None
 _checkresult_file_path = None
 
+# The results of a host are collected and written at once by finalize(). Hosts with thousands
+# of services would otherwise need thousands of write() calls per check cycle.
+_pending_command_pipe_messages: List[bytes] = []
+_pending_checkresult_file_records: List[bytes] = []
+
 
 def check_result(
     *,
@@ -85,6 +94,9 @@ def check_result(
 
 def finalize() -> None:
     global _checkresult_file_fd
+    _flush_command_pipe()
+    _flush_checkresult_file()
+
     if _checkresult_file_fd is not None and _checkresult_file_path is not None:
         os.close(_checkresult_file_fd)
         _checkresult_file_fd = None
@@ -176,10 +188,45 @@ def _submit_via_command_pipe(host: HostName, service: ServiceName, state: Servic
         # [<timestamp>] PROCESS_SERVICE_CHECK_RESULT;<host_name>;<svc_description>;<return_code>;<plugin_output>
         msg = "[%d] PROCESS_SERVICE_CHECK_RESULT;%s;%s;%d;%s\n" % (time.time(), host, service,
                                                                    state, output)
-        _nagios_command_pipe.write(ensure_binary(msg))
+        _pending_command_pipe_messages.append(ensure_binary(msg))
+
+
+def _flush_command_pipe() -> None:
+    messages = _pending_command_pipe_messages[:]
+    del _pending_command_pipe_messages[:]
+    if not messages or _nagios_command_pipe is None or isinstance(_nagios_command_pipe, bool):
+        return
+
+    num_writes = 0
+    for chunk in _command_pipe_chunks(messages):
+        _nagios_command_pipe.write(chunk)
         # Important: Nagios needs the complete command in one single write() block!
         # Python buffers and sends chunks of 4096 bytes, if we do not flush.
         _nagios_command_pipe.flush()
+        num_writes += 1
+    console.vverbose("Submitted %d check results to the command pipe with %d writes\n",
+                     len(messages), num_writes)
+
+
+def _command_pipe_chunks(messages: Iterable[bytes]) -> Iterator[bytes]:
+    """Join the messages to chunks the pipe writes atomically
+
+    Writes of up to PIPE_BUF bytes are not interleaved with the writes of other processes,
+    so the core always reads complete commands. A message that is larger on its own is
+    written alone, as it has always been.
+    """
+    chunk: List[bytes] = []
+    chunk_size = 0
+    for message in messages:
+        if chunk and chunk_size + len(message) > select.PIPE_BUF:
+            yield b"".join(chunk)
+            chunk = []
+            chunk_size = 0
+        chunk.append(message)
+        chunk_size += len(message)
+
+    if chunk:
+        yield b"".join(chunk)
 
 
 def _submit_via_check_result_file(host: HostName, service: ServiceName, state: ServiceState,
@@ -188,8 +235,7 @@ def _submit_via_check_result_file(host: HostName, service: ServiceName, state: S
     _open_checkresult_file()
     if _checkresult_file_fd:
         now = time.time()
-        os.write(
-            _checkresult_file_fd,
+        _pending_checkresult_file_records.append(
             ensure_binary("""host_name=%s
 service_description=%s
 check_type=1
@@ -204,6 +250,17 @@ output=%s
 """ % (ensure_str(host), ensure_str(service), now, now, state, ensure_str(output))))
 
 
+def _flush_checkresult_file() -> None:
+    records = _pending_checkresult_file_records[:]
+    del _pending_checkresult_file_records[:]
+    if not records or not _checkresult_file_fd:
+        return
+
+    os.write(_checkresult_file_fd, b"".join(records))
+    console.vverbose("Submitted %d check results to %s with 1 write\n", len(records),
+                     _checkresult_file_path)
+
+
 def _open_command_pipe() -> None:
     global _nagios_command_pipe
     if _nagios_command_pipe is None:
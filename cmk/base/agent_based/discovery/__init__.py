@@ -8,17 +8,21 @@ import itertools
 import os
 import socket
 import time
+from functools import partial
 from typing import (
     Callable,
     Container,
     Counter,
     Dict,
     Iterable,
+    Iterator,
     List,
+    NamedTuple,
     Optional,
     Sequence,
     Set,
     Tuple,
+    Union,
 )
 
 from six import ensure_binary
@@ -72,6 +76,7 @@ from cmk.base.check_utils import LegacyCheckParameters, Service, ServiceID
 from cmk.base.core_config import MonitoringCore
 from cmk.base.discovered_labels import HostLabel
 
+from ._bulk import BulkDiscoveryProgress, discover_concurrently, fetch_host_data, FetchedHostData
 from ._discovered_services import analyse_discovered_services
 from ._filters import ServiceFilters as _ServiceFilters
 from ._host_labels import analyse_cluster_host_labels, analyse_host_labels
@@ -165,6 +170,20 @@ def do_discovery(
     host_names = _preprocess_hostnames(arg_hostnames, config_cache, only_host_labels)
 
     mode = Mode.DISCOVERY if selected_sections is NO_SELECTION else Mode.FORCE_SECTIONS
+    file_cache_max_age = config.discovery_max_cachefile_age() if use_caches else 0
+
+    if config.discovery_concurrency > 1 and len(host_names) > 1:
+        _do_discovery_concurrently(
+            sorted(host_names),
+            mode=mode,
+            selected_sections=selected_sections,
+            file_cache_max_age=file_cache_max_age,
+            on_error=on_error,
+            run_plugin_names=run_plugin_names,
+            only_new=arg_only_new,
+            discovery_parameters=discovery_parameters,
+        )
+        return
 
     # Now loop through all hosts
     for host_name in sorted(host_names):
@@ -178,7 +197,7 @@ def do_discovery(
                 ip_address=ipaddress,
                 mode=mode,
                 selected_sections=selected_sections,
-                file_cache_max_age=config.discovery_max_cachefile_age() if use_caches else 0,
+                file_cache_max_age=file_cache_max_age,
                 fetcher_messages=(),
                 force_snmp_cache_refresh=False,
                 on_scan_error=on_error,
@@ -239,7 +258,42 @@ def _do_discovery_for(
     only_new: bool,
     discovery_parameters: DiscoveryParameters,
 ) -> None:
+    host_discovery = _discover_host(
+        host_name,
+        ipaddress,
+        parsed_sections_broker,
+        run_plugin_names,
+        only_new,
+        discovery_parameters,
+    )
+
+    # TODO (mo): for the labels the corresponding code is in _host_labels.
+    # We should put the persisting and logging in one place.
+    autochecks.save_autochecks_file(host_name, host_discovery.services)
+
+    _output_host_discovery(host_discovery, only_new)
+
+
+class _HostDiscovery(NamedTuple):
+    host_name: HostName
+    services: Sequence[Service]
+    new_services: Sequence[Service]
+    num_new_host_labels: int
+
 
+class _HostDiscoveryError(NamedTuple):
+    host_name: HostName
+    error: str
+
+
+def _discover_host(
+    host_name: HostName,
+    ipaddress: Optional[HostAddress],
+    parsed_sections_broker: ParsedSectionsBroker,
+    run_plugin_names: Container[CheckPluginName],
+    only_new: bool,
+    discovery_parameters: DiscoveryParameters,
+) -> _HostDiscovery:
     host_labels = analyse_host_labels(
         host_name=host_name,
         ipaddress=ipaddress,
@@ -256,22 +310,116 @@ def _do_discovery_for(
         only_new=only_new,
     )
 
-    # TODO (mo): for the labels the corresponding code is in _host_labels.
-    # We should put the persisting and logging in one place.
-    autochecks.save_autochecks_file(host_name, service_result.present)
+    return _HostDiscovery(
+        host_name,
+        service_result.present,
+        service_result.new,
+        len(host_labels.new),
+    )
+
 
-    new_per_plugin = Counter(s.check_plugin_name for s in service_result.new)
+def _output_host_discovery(host_discovery: _HostDiscovery, only_new: bool) -> None:
+    new_per_plugin = Counter(s.check_plugin_name for s in host_discovery.new_services)
     for name, count in sorted(new_per_plugin.items()):
         console.verbose("%s%3d%s %s\n" % (tty.green + tty.bold, count, tty.normal, name))
 
     section.section_success("%s, %s" % (
-        f"Found {len(service_result.new)} services"
-        if service_result.new else "Found no%s services" % (" new" if only_new else ""),
-        f"{len(host_labels.new)} host labels" if host_labels.new else "no%s host labels" %
-        (" new" if only_new else ""),
+        f"Found {len(host_discovery.new_services)} services" if host_discovery.new_services else
+        "Found no%s services" % (" new" if only_new else ""),
+        f"{host_discovery.num_new_host_labels} host labels" if host_discovery.num_new_host_labels
+        else "no%s host labels" % (" new" if only_new else ""),
     ))
 
 
+# The autochecks of the discovered hosts are written by the main process in batches of
+# this size, the worker processes only do the discovery
+_AUTOCHECKS_BATCH_SIZE = 100
+
+
+def _do_discovery_concurrently(
+    host_names: Sequence[HostName],
+    *,
+    mode: Mode,
+    selected_sections: SectionNameCollection,
+    file_cache_max_age: int,
+    on_error: str,
+    run_plugin_names: Container[CheckPluginName],
+    only_new: bool,
+    discovery_parameters: DiscoveryParameters,
+) -> None:
+    """cmk -I / -II for many hosts: fetch and discover them in worker processes"""
+    console.verbose("Discovering %d hosts, fetching up to %d hosts at the same time\n" %
+                    (len(host_names), config.discovery_concurrency))
+    config_cache = config.get_config_cache()
+
+    def discover(fetched: FetchedHostData) -> Union[_HostDiscovery, _HostDiscoveryError]:
+        if fetched.error is not None:
+            return _HostDiscoveryError(fetched.host_name, fetched.error)
+        try:
+            parsed_sections_broker, _results = make_broker(
+                config_cache=config_cache,
+                host_config=config_cache.get_host_config(fetched.host_name),
+                ip_address=fetched.ip_address,
+                mode=mode,
+                selected_sections=selected_sections,
+                file_cache_max_age=file_cache_max_age,
+                fetcher_messages=fetched.fetcher_messages,
+                force_snmp_cache_refresh=False,
+                on_scan_error=on_error,
+            )
+            return _discover_host(
+                fetched.host_name,
+                fetched.ip_address,
+                parsed_sections_broker,
+                run_plugin_names,
+                only_new,
+                discovery_parameters,
+            )
+        except Exception as e:
+            if cmk.utils.debug.enabled():
+                raise
+            return _HostDiscoveryError(fetched.host_name, str(e))
+
+    progress = BulkDiscoveryProgress(len(host_names))
+    pending_autochecks: List[_HostDiscovery] = []
+    try:
+        for result in discover_concurrently(
+                host_names,
+                fetch=partial(
+                    fetch_host_data,
+                    mode=mode,
+                    selected_sections=selected_sections,
+                    file_cache_max_age=file_cache_max_age,
+                    force_snmp_cache_refresh=False,
+                    on_scan_error=on_error,
+                ),
+                discover=discover,
+                concurrency=config.discovery_concurrency,
+        ):
+            section.section_begin(result.host_name)
+            if isinstance(result, _HostDiscoveryError):
+                section.section_error(result.error)
+                progress.host_done(failed=True)
+                continue
+
+            pending_autochecks.append(result)
+            if len(pending_autochecks) >= _AUTOCHECKS_BATCH_SIZE:
+                _save_autochecks_files(pending_autochecks)
+
+            _output_host_discovery(result, only_new)
+            progress.host_done()
+    finally:
+        _save_autochecks_files(pending_autochecks)
+
+    console.verbose("%s\n" % progress.summary())
+
+
+def _save_autochecks_files(host_discoveries: List[_HostDiscovery]) -> None:
+    for host_discovery in host_discoveries:
+        autochecks.save_autochecks_file(host_discovery.host_name, host_discovery.services)
+    host_discoveries.clear()
+
+
 # determine changed services on host.
 # param mode: can be one of "new", "remove", "fixall", "refresh", "only-host-labels"
 # param servic_filter: if a filter is set, it controls whether items are touched by the discovery.
@@ -286,6 +434,7 @@ def discover_on_host(
     on_error: str,
     use_cached_snmp_data: bool,
     max_cachefile_age: int,
+    fetched_host_data: Optional[FetchedHostData] = None,
 ) -> DiscoveryResult:
 
     console.verbose("  Doing discovery with mode '%s'...\n" % mode)
@@ -303,6 +452,10 @@ def discover_on_host(
         result.error_text = ""
         return result
 
+    if fetched_host_data is not None and fetched_host_data.error is not None:
+        result.error_text = fetched_host_data.error
+        return result
+
     _set_cache_opts_of_checkers(use_cached_snmp_data=use_cached_snmp_data)
 
     try:
@@ -324,7 +477,8 @@ def discover_on_host(
             mode=Mode.DISCOVERY,
             selected_sections=NO_SELECTION,
             file_cache_max_age=max_cachefile_age,
-            fetcher_messages=(),
+            fetcher_messages=(fetched_host_data.fetcher_messages
+                              if fetched_host_data is not None else ()),
             force_snmp_cache_refresh=not use_cached_snmp_data,
             on_scan_error=on_error,
         )
@@ -365,6 +519,72 @@ def discover_on_host(
     return result
 
 
+def discover_on_hosts(
+    host_names: Sequence[HostName],
+    *,
+    config_cache: config.ConfigCache,
+    mode: DiscoveryMode,
+    on_error: str,
+    use_cached_snmp_data: bool,
+    max_cachefile_age: int,
+) -> Iterator[Tuple[HostName, DiscoveryResult]]:
+    """Do discover_on_host() for all hosts, concurrently if configured
+
+    The results are yielded in the order the hosts are done. Clusters are discovered
+    after all other hosts in this process, as they change the autochecks of their nodes.
+    """
+    fetched_hosts = _concurrently_discoverable_hosts(config_cache, host_names)
+
+    def discover(host_name: HostName,
+                 fetched_host_data: Optional[FetchedHostData] = None) -> DiscoveryResult:
+        return discover_on_host(
+            config_cache=config_cache,
+            host_config=config_cache.get_host_config(host_name),
+            mode=mode,
+            service_filters=None,
+            on_error=on_error,
+            use_cached_snmp_data=use_cached_snmp_data,
+            max_cachefile_age=max_cachefile_age,
+            fetched_host_data=fetched_host_data,
+        )
+
+    if fetched_hosts:
+        # Set them before forking, the fetchers are using them
+        _set_cache_opts_of_checkers(use_cached_snmp_data=use_cached_snmp_data)
+        yield from discover_concurrently(
+            fetched_hosts,
+            fetch=partial(
+                fetch_host_data,
+                mode=Mode.DISCOVERY,
+                selected_sections=NO_SELECTION,
+                file_cache_max_age=max_cachefile_age,
+                force_snmp_cache_refresh=not use_cached_snmp_data,
+                on_scan_error=on_error,
+            ),
+            discover=lambda fetched: (fetched.host_name, discover(fetched.host_name, fetched)),
+            concurrency=config.discovery_concurrency,
+        )
+
+    done_hosts = set(fetched_hosts)
+    for host_name in host_names:
+        if host_name not in done_hosts:
+            yield host_name, discover(host_name)
+
+
+def _concurrently_discoverable_hosts(config_cache: config.ConfigCache,
+                                     host_names: Iterable[HostName]) -> List[HostName]:
+    """The hosts worth to be fetched and discovered in worker processes"""
+    if config.discovery_concurrency <= 1:
+        return []
+
+    active_hosts = config_cache.all_active_hosts()
+    host_names = [
+        host_name for host_name in host_names if host_name in active_hosts and
+        not config_cache.get_host_config(host_name).is_cluster
+    ]
+    return host_names if len(host_names) > 1 else []
+
+
 def _set_cache_opts_of_checkers(*, use_cached_snmp_data: bool) -> None:
     """Set caching options appropriate for discovery"""
     # TCP data sources should use the cache: Fetching live data may steal log
@@ -690,18 +910,10 @@ def discover_marked_hosts(core: MonitoringCore) -> None:
     rediscovery_reference_time = time.time()
 
     with TimeLimitFilter(limit=120, grace=10, label="hosts") as time_limited:
-        for host_name in time_limited(hosts):
-            host_config = config_cache.get_host_config(host_name)
-
-            if not _discover_marked_host_exists(config_cache, host_name):
-                continue
-
-            # Only try to discover hosts with UP state
-            if host_states and host_states.get(host_name) != 0:
-                continue
-
-            if _discover_marked_host(config_cache, host_config, rediscovery_reference_time,
-                                     oldest_queued):
+        for something_changed in time_limited(
+                _discover_marked_hosts(config_cache, hosts, host_states,
+                                       rediscovery_reference_time, oldest_queued)):
+            if something_changed:
                 activation_required = True
 
     if activation_required:
@@ -737,6 +949,64 @@ def _parse_row(row: livestatus.LivestatusRow) -> Tuple[HostName, HostState]:
     raise MKGeneralException("Invalid response from livestatus: %s" % row)
 
 
+def _discover_marked_hosts(config_cache: config.ConfigCache, host_names: Iterable[HostName],
+                           host_states: Dict[HostName, HostState], now_ts: float,
+                           oldest_queued: float) -> Iterator[bool]:
+    """Discover the marked hosts, yield for each host whether the configuration was changed
+
+    The hosts to be discovered are fetched and discovered in worker processes if configured,
+    the others are done in this process.
+    """
+    host_names = [
+        host_name for host_name in host_names
+        if _discover_marked_host_exists(config_cache, host_name) and
+        # Only try to discover hosts with UP state
+        not (host_states and host_states.get(host_name) != 0)
+    ]
+
+    fetched_hosts = []
+    for host_name in _concurrently_discoverable_hosts(config_cache, host_names):
+        params = config_cache.get_host_config(host_name).discovery_check_parameters
+        if params is not None and not _may_rediscover(params, now_ts, oldest_queued):
+            fetched_hosts.append(host_name)
+
+    if len(fetched_hosts) > 1:
+        # Set them before forking, the fetchers are using them
+        _set_cache_opts_of_checkers(use_cached_snmp_data=True)
+        yield from discover_concurrently(
+            fetched_hosts,
+            fetch=partial(
+                fetch_host_data,
+                mode=Mode.DISCOVERY,
+                selected_sections=NO_SELECTION,
+                file_cache_max_age=_MARKED_HOSTS_MAX_CACHEFILE_AGE,
+                force_snmp_cache_refresh=False,
+                on_scan_error="ignore",
+            ),
+            discover=lambda fetched: _discover_marked_host(
+                config_cache,
+                config_cache.get_host_config(fetched.host_name),
+                now_ts,
+                oldest_queued,
+                fetched_host_data=fetched,
+            ),
+            concurrency=config.discovery_concurrency,
+        )
+    else:
+        fetched_hosts = []
+
+    done_hosts = set(fetched_hosts)
+    for host_name in host_names:
+        if host_name not in done_hosts:
+            yield _discover_marked_host(config_cache, config_cache.get_host_config(host_name),
+                                        now_ts, oldest_queued)
+
+
+# autodiscovery is run every 5 minutes (see omd/packages/check_mk/skel/etc/cron.d/cmk_discovery)
+# make sure we may use the file the active discovery check left behind:
+_MARKED_HOSTS_MAX_CACHEFILE_AGE = 600
+
+
 def _discover_marked_host_exists(config_cache: config.ConfigCache, host_name: HostName) -> bool:
     if host_name in config_cache.all_configured_hosts():
         return True
@@ -751,8 +1021,13 @@ def _discover_marked_host_exists(config_cache: config.ConfigCache, host_name: Ho
     return False
 
 
-def _discover_marked_host(config_cache: config.ConfigCache, host_config: config.HostConfig,
-                          now_ts: float, oldest_queued: float) -> bool:
+def _discover_marked_host(
+    config_cache: config.ConfigCache,
+    host_config: config.HostConfig,
+    now_ts: float,
+    oldest_queued: float,
+    fetched_host_data: Optional[FetchedHostData] = None,
+) -> bool:
     host_name = host_config.hostname
     something_changed = False
 
@@ -773,10 +1048,8 @@ def _discover_marked_host(config_cache: config.ConfigCache, host_config: config.
             service_filters=_ServiceFilters.from_settings(_get_rediscovery_parameters(params)),
             on_error="ignore",
             use_cached_snmp_data=True,
-            # autodiscovery is run every 5 minutes (see
-            # omd/packages/check_mk/skel/etc/cron.d/cmk_discovery)
-            # make sure we may use the file the active discovery check left behind:
-            max_cachefile_age=600,
+            max_cachefile_age=_MARKED_HOSTS_MAX_CACHEFILE_AGE,
+            fetched_host_data=fetched_host_data,
         )
         if result.error_text is not None:
             if result.error_text:
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Discovery of many hosts at once
+
+Fetching the data of a host mostly waits for the network, while parsing the data and
+discovering the services needs the CPU. The hosts are fetched by a pool of (many) worker
+processes and the fetched data is handed over to a second pool with at most one process
+per CPU, which does the discovery. Only the host names, the fetched data and the results
+are passed between the processes: both pools are forked from the current process and
+share its configuration.
+
+Processes are used for fetching, because the fetchers keep per host state in global
+variables (e.g. the SNMP caches), which rules out threads.
+"""
+
+import multiprocessing
+import os
+import time
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple, TypeVar
+
+import cmk.utils.cleanup
+import cmk.utils.debug
+from cmk.utils.log import console
+from cmk.utils.type_defs import HostAddress, HostName
+
+from cmk.core_helpers.protocol import FetcherMessage
+from cmk.core_helpers.type_defs import Mode, SectionNameCollection
+
+import cmk.base.config as config
+from cmk.base.sources import fetch_all, make_nodes, make_sources
+
+_T = TypeVar("_T")
+
+
+class FetchedHostData(NamedTuple):
+    """The data fetched from all sources of a host, ready to be passed to another process"""
+    host_name: HostName
+    ip_address: Optional[HostAddress]
+    raw_fetcher_messages: Sequence[bytes]
+    error: Optional[str]
+
+    @property
+    def fetcher_messages(self) -> Sequence[FetcherMessage]:
+        return [FetcherMessage.from_bytes(raw) for raw in self.raw_fetcher_messages]
+
+
+def fetch_host_data(
+    host_name: HostName,
+    *,
+    mode: Mode,
+    selected_sections: SectionNameCollection,
+    file_cache_max_age: int,
+    force_snmp_cache_refresh: bool,
+    on_scan_error: str,
+) -> FetchedHostData:
+    """Fetch the data of a host (or the nodes of a cluster) like make_broker() does"""
+    config_cache = config.get_config_cache()
+    host_config = config_cache.get_host_config(host_name)
+    ip_address = None
+    try:
+        if not host_config.is_cluster:
+            ip_address = config.lookup_ip_address(host_config)
+
+        nodes = make_nodes(
+            config_cache,
+            host_config,
+            ip_address,
+            mode,
+            make_sources(
+                host_config,
+                ip_address,
+                mode=mode,
+                selected_sections=selected_sections,
+                force_snmp_cache_refresh=force_snmp_cache_refresh,
+                on_scan_error=on_scan_error,
+            ),
+        )
+        raw_fetcher_messages = [
+            b"".join(message)
+            for message in fetch_all(nodes=nodes, file_cache_max_age=file_cache_max_age)
+        ]
+    except Exception as e:
+        if cmk.utils.debug.enabled():
+            raise
+        return FetchedHostData(host_name, ip_address, [], str(e))
+    finally:
+        cmk.utils.cleanup.cleanup_globals()
+
+    return FetchedHostData(host_name, ip_address, raw_fetcher_messages, None)
+
+
+class BulkDiscoveryProgress:
+    """Report the progress and the throughput of a bulk discovery from time to time"""
+    def __init__(self, num_hosts: int, interval: float = 10.0) -> None:
+        super(BulkDiscoveryProgress, self).__init__()
+        self._num_hosts = num_hosts
+        self._interval = interval
+        self._start = self._last_report = time.monotonic()
+        self.num_done = 0
+        self.num_failed = 0
+
+    def host_done(self, failed: bool = False) -> None:
+        self.num_done += 1
+        if failed:
+            self.num_failed += 1
+
+        now = time.monotonic()
+        if now - self._last_report >= self._interval:
+            self._last_report = now
+            console.verbose("%s\n" % self.summary())
+
+    def summary(self) -> str:
+        duration = time.monotonic() - self._start
+        return "Discovered %d of %d hosts (%d failed) in %.1f s, %.1f hosts/s" % (
+            self.num_done,
+            self._num_hosts,
+            self.num_failed,
+            duration,
+            self.num_done / duration if duration else 0.0,
+        )
+
+
+# The functions called in the worker processes, inherited by them when they are forked
+_worker_functions: Optional[Tuple[Callable[[HostName], FetchedHostData],
+                                  Callable[[FetchedHostData], Any]]] = None
+
+
+def _fetch_in_worker(host_name: HostName) -> FetchedHostData:
+    assert _worker_functions is not None
+    return _worker_functions[0](host_name)
+
+
+def _discover_in_worker(fetched: FetchedHostData) -> Any:
+    assert _worker_functions is not None
+    try:
+        return _worker_functions[1](fetched)
+    finally:
+        cmk.utils.cleanup.cleanup_globals()
+
+
+def discover_concurrently(
+    host_names: Iterable[HostName],
+    *,
+    fetch: Callable[[HostName], FetchedHostData],
+    discover: Callable[[FetchedHostData], _T],
+    concurrency: int,
+) -> Iterator[_T]:
+    """Fetch and discover the hosts in worker processes, yield the results as they come in
+
+    At most `concurrency` hosts are fetched at the same time. The functions may be closures,
+    they are not passed to the workers but inherited by them. They must not raise exceptions
+    for single hosts but report them with their results, otherwise the whole run is aborted.
+    When the caller stops consuming the results, the workers are terminated.
+    """
+    global _worker_functions
+    if _worker_functions is not None:
+        raise RuntimeError("Bulk discoveries can not be nested")
+
+    context = multiprocessing.get_context("fork")
+    _worker_functions = fetch, discover
+    try:
+        with context.Pool(concurrency) as fetch_pool, \
+             context.Pool(min(concurrency, os.cpu_count() or 1)) as discovery_pool:
+            yield from discovery_pool.imap_unordered(
+                _discover_in_worker,
+                fetch_pool.imap_unordered(_fetch_in_worker, host_names),
+            )
+    finally:
+        _worker_functions = None
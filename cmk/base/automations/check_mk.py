@@ -23,6 +23,7 @@ import cmk.utils.debug
 import cmk.utils.log as log
 import cmk.utils.man_pages as man_pages
 import cmk.utils.paths
+import cmk.utils.piggyback as piggyback
 from cmk.utils.check_utils import maincheckify
 from cmk.utils.diagnostics import deserialize_cl_parameters, DiagnosticsCLParameters
 from cmk.utils.encoding import ensure_str_with_fallback
@@ -136,24 +137,24 @@ class AutomationDiscovery(DiscoveryAutomation):
 
         results: Dict[HostName, DiscoveryResult] = {}
 
-        for hostname in hostnames:
-            host_config = config_cache.get_host_config(hostname)
-            results[hostname] = discovery.discover_on_host(
+        for hostname, result in discovery.discover_on_hosts(
+                hostnames,
                 config_cache=config_cache,
-                host_config=host_config,
                 mode=mode,
-                service_filters=None,
                 on_error=on_error,
                 use_cached_snmp_data=use_cached_snmp_data,
                 max_cachefile_age=config.discovery_max_cachefile_age(),
-            )
+        ):
+            results[hostname] = result
 
-            if results[hostname].error_text is None:
+            if result.error_text is None:
                 # Trigger the discovery service right after performing the discovery to
                 # make the service reflect the new state as soon as possible.
-                self._trigger_discovery_check(config_cache, host_config)
+                self._trigger_discovery_check(config_cache, config_cache.get_host_config(hostname))
 
-        return AutomationDiscoveryResponse(results).serialize()
+        return AutomationDiscoveryResponse({
+            hostname: results[hostname] for hostname in hostnames
+        }).serialize()
 
 
 automations.register(AutomationDiscovery())
@@ -362,9 +363,16 @@ class AutomationRenameHosts(Automation):
             actions.append("host-labels")
 
         # Rename temporary files of the host
-        for d in ["cache", "counters"]:
-            if self._rename_host_file(cmk.utils.paths.tmp_dir + "/" + d + "/", oldname, newname):
-                actions.append(d)
+        if self._rename_host_file(cmk.utils.paths.tmp_dir + "/cache/", oldname, newname):
+            actions.append("cache")
+
+        # The item states are in one of the counters directories, depending on the storage format
+        renamed_counters = False
+        for counters_dir in [cmk.utils.paths.counters_dir, cmk.utils.paths.counters_journal_dir]:
+            if self._rename_host_file(counters_dir, oldname, newname):
+                renamed_counters = True
+        if renamed_counters:
+            actions.append("counters")
 
         if self._rename_host_dir(cmk.utils.paths.tmp_dir + "/piggyback/", oldname, newname):
             actions.append("piggyback-load")
@@ -376,6 +384,8 @@ class AutomationRenameHosts(Automation):
                 if self._rename_host_file(piggybase + piggydir, oldname, newname):
                     actions.append("piggyback-pig")
 
+        piggyback.rename_host_in_index(oldname, newname)
+
         # Logwatch
         if self._rename_host_dir(cmk.utils.paths.logwatch_dir, oldname, newname):
             actions.append("logwatch")
@@ -765,6 +775,7 @@ class AutomationDeleteHosts(Automation):
                 "%s/%s.py" % (cmk.utils.paths.precompiled_hostchecks_dir, hostname),
                 "%s/%s.mk" % (cmk.utils.paths.autochecks_dir, hostname),
                 "%s/%s" % (cmk.utils.paths.counters_dir, hostname),
+                "%s/%s" % (cmk.utils.paths.counters_journal_dir, hostname),
                 "%s/%s" % (cmk.utils.paths.tcp_cache_dir, hostname),
                 "%s/persisted/%s" % (cmk.utils.paths.var_dir, hostname),
                 "%s/inventory/%s" % (cmk.utils.paths.var_dir, hostname),
@@ -803,6 +814,7 @@ class AutomationDeleteHosts(Automation):
             except OSError as e:
                 if e.errno != errno.ENOENT:
                     raise
+        piggyback.remove_piggybacked_host_from_index(hostname)
 
     def _delete_if_exists(self, path: str) -> None:
         """Delete the given file in case it exists"""
@@ -101,11 +101,14 @@ from cmk.utils.type_defs import (
 from cmk.snmplib.type_defs import (  # noqa: F401 # pylint: disable=unused-import; these are required in the modules' namespace to load the configuration!
     SNMPScanFunction, SNMPCredentials, SNMPHostConfig, SNMPTiming, SNMPBackendEnum)
 
+import cmk.core_helpers.cache
+
 import cmk.base.api.agent_based.register as agent_based_register
 import cmk.base.autochecks as autochecks
 import cmk.base.check_utils
 import cmk.base.default_config as default_config
 import cmk.base.ip_lookup as ip_lookup
+import cmk.base.item_state as item_state
 from cmk.base.api.agent_based.checking_classes import CheckPlugin
 from cmk.base.api.agent_based.register.check_plugins_legacy import create_check_plugin_from_legacy
 from cmk.base.api.agent_based.register.section_plugins_legacy import (
@@ -244,9 +247,12 @@ def load(with_conf_d: bool = True,
 
     vars_before_config = all_nonfunction_vars()
 
-    _load_config(with_conf_d, exclude_parents_mk)
-    _transform_mgmt_config_vars_from_140_to_150()
-    _initialize_derived_config_variables()
+    if not _load_config_snapshot(with_conf_d, exclude_parents_mk):
+        config_files = _config_file_fingerprints(with_conf_d)
+        _load_config(with_conf_d, exclude_parents_mk)
+        _transform_mgmt_config_vars_from_140_to_150()
+        _initialize_derived_config_variables()
+        _prepare_config_snapshot(vars_before_config, with_conf_d, exclude_parents_mk, config_files)
 
     _perform_post_config_loading_actions()
 
@@ -290,6 +296,9 @@ def _perform_post_config_loading_actions() -> None:
     _collect_parameter_rulesets_from_globals(global_dict)
     _transform_plugin_names_from_160_to_170(global_dict)
 
+    item_state.set_storage_format(item_state_storage_format)
+    cmk.core_helpers.cache.set_memory_cache_size(cache_file_memory_size)
+
     get_config_cache().initialize()
 
     # In case the checks are not loaded yet it seems the current mode
@@ -743,6 +752,139 @@ class PackedConfigStore:
             return pickle.load(f)
 
 
+class ConfigSnapshot(NamedTuple):
+    """The configuration variables as they result from the configuration files
+
+    Evaluating the configuration files is the most expensive part of loading the
+    configuration. The snapshot of the resulting variables is valid as long as the
+    configuration files, which are identified by their inode, size and mtime, are
+    unchanged. The variables stay pickled until the snapshot has been found valid.
+    """
+    key: Tuple[Any, ...]
+    files: Tuple[Tuple[str, int, int, int], ...]
+    variables: bytes
+
+
+_CONFIG_SNAPSHOT_FORMAT = 1
+
+# The snapshot of the configuration loaded by this process, written on activation
+_prepared_config_snapshot: Optional[ConfigSnapshot] = None
+
+
+def _config_snapshot_key(with_conf_d: bool, exclude_parents_mk: bool) -> Tuple[Any, ...]:
+    return (_CONFIG_SNAPSHOT_FORMAT, cmk_version.__version__, with_conf_d, exclude_parents_mk)
+
+
+def _config_file_fingerprints(with_conf_d: bool) -> Tuple[Tuple[str, int, int, int], ...]:
+    fingerprints = []
+    for path in _get_config_file_paths(with_conf_d):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            fingerprints.append((str(path), 0, 0, 0))
+            continue
+        fingerprints.append((str(path), stat.st_ino, stat.st_size, stat.st_mtime_ns))
+    return tuple(fingerprints)
+
+
+def _load_config_snapshot(with_conf_d: bool, exclude_parents_mk: bool) -> bool:
+    """Take over the configuration variables from the snapshot, in case it is valid"""
+    global _prepared_config_snapshot
+    _prepared_config_snapshot = None
+
+    snapshot = ConfigSnapshotStore().read()
+    if snapshot is None or snapshot.key != _config_snapshot_key(with_conf_d, exclude_parents_mk):
+        return False
+    if snapshot.files != _config_file_fingerprints(with_conf_d):
+        console.vverbose("Configuration files have changed, not using the snapshot\n")
+        return False
+
+    globals().update(pickle.loads(snapshot.variables))
+    console.vverbose("Loaded configuration from snapshot\n")
+    return True
+
+
+def _prepare_config_snapshot(vars_before_config: Set[str], with_conf_d: bool,
+                             exclude_parents_mk: bool,
+                             config_files: Tuple[Tuple[str, int, int, int], ...]) -> None:
+    """Keep the just loaded configuration variables for save_config_snapshot()
+
+    They have to be pickled now, before they are modified by the post loading actions.
+    """
+    global _prepared_config_snapshot
+    if not config_snapshot:
+        return
+
+    variable_defaults = get_default_config()
+    derived_config_variable_names = get_derived_config_variable_names()
+    global_variables = globals()
+
+    variables = {}
+    for varname in (set(get_variable_names()) | derived_config_variable_names |
+                    (all_nonfunction_vars() - vars_before_config)):
+        val = global_variables[varname]
+        if varname not in derived_config_variable_names and varname in variable_defaults \
+           and val == variable_defaults[varname]:
+            continue
+        variables[varname] = val
+
+    try:
+        pickled_variables = pickle.dumps(variables, pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        # E.g. functions defined in main.mk can not be pickled
+        console.vverbose("Not creating a configuration snapshot: %s\n", e)
+        return
+
+    _prepared_config_snapshot = ConfigSnapshot(
+        key=_config_snapshot_key(with_conf_d, exclude_parents_mk),
+        files=config_files,
+        variables=pickled_variables,
+    )
+
+
+def save_config_snapshot() -> None:
+    """Store the configuration loaded by this process for the following calls
+
+    This is done during activation, when the configuration files are not expected
+    to change soon. Nothing is stored when the configuration has been loaded from
+    a valid snapshot already.
+    """
+    if not config_snapshot:
+        ConfigSnapshotStore().remove()
+    elif _prepared_config_snapshot is not None:
+        ConfigSnapshotStore().write(_prepared_config_snapshot)
+
+
+class ConfigSnapshotStore:
+    """Caring about persistence of the configuration snapshot"""
+    def __init__(self) -> None:
+        self.path: Final[Path] = Path(cmk.utils.paths.var_dir, "config_snapshot")
+
+    def write(self, snapshot: ConfigSnapshot) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".new")
+        with tmp_path.open("wb") as f:
+            pickle.dump(tuple(snapshot), f, pickle.HIGHEST_PROTOCOL)
+        tmp_path.rename(self.path)
+
+    def read(self) -> Optional[ConfigSnapshot]:
+        try:
+            with self.path.open("rb") as f:
+                return ConfigSnapshot(*pickle.load(f))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # E.g. written by an incompatible version. It will be replaced on activation.
+            console.vverbose("Cannot read the configuration snapshot: %s\n", e)
+            return None
+
+    def remove(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
 def make_core_autochecks_dir(serial: OptionalConfigSerial) -> Path:
     return cmk.utils.paths.make_helper_config_path(serial) / "autochecks"
 
@@ -5,12 +5,14 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import abc
+import hashlib
 import numbers
 import os
 import socket
 import sys
 import shutil
-from typing import AnyStr, Callable, Dict, List, Optional, Tuple, Union, Iterator, Final, Iterable
+from typing import (Any, AnyStr, Callable, Dict, List, Optional, Set, Tuple, Union, Iterator, Final,
+                    Iterable)
 from contextlib import contextmanager, suppress
 from pathlib import Path
 
@@ -335,6 +337,7 @@ def do_create_config(core: MonitoringCore) -> None:
     out.output("Generating configuration for core (type %s)..." % core.name())
     try:
         _create_core_config(core)
+        config.save_config_snapshot()
         out.output(tty.ok + "\n")
     except Exception as e:
         if cmk.utils.debug.enabled():
@@ -836,3 +839,162 @@ def replace_macros(s: str, macros: ObjectMacros) -> str:
                     raise
 
     return s
+
+
+#   .--Fingerprints--------------------------------------------------------.
+#   | Detecting the hosts whose core configuration may have changed        |
+#   '----------------------------------------------------------------------'
+
+
+def host_config_fingerprints(config_cache: ConfigCache,
+                             hostnames: Iterable[HostName]) -> Dict[HostName, str]:
+    """Fingerprints of everything the core configuration of the hosts is created from
+
+    The fingerprint of a host covers the settings that apply to all hosts, the entries of the
+    configuration variables indexed by host name, the rules matching the host (in their order),
+    its effective labels, its addresses in the IP lookup cache, its autochecks and its existing
+    parents. Clusters and their nodes include each others fingerprints. As long as the fingerprint
+    of a host is unchanged, the objects created for the host before can be used again.
+    """
+    hostnames = set(hostnames)
+    related_hosts = {
+        hostname: sorted(set(config_cache.clusters_of(hostname)) |
+                         set(config_cache.nodes_of(hostname) or [])) for hostname in hostnames
+    }
+    host_hashes = {
+        hostname: hashlib.sha256()
+        for hostname in hostnames.union(*related_hosts.values())
+    }
+
+    global_hash = hashlib.sha256()
+    for item in _global_fingerprint_items():
+        global_hash.update(_fingerprint_repr(item).encode("utf-8"))
+
+    all_configured_hosts = config_cache.all_configured_hosts()
+    for varname, value in _config_variables_for_fingerprints():
+        if _is_ruleset(value):
+            _update_host_hashes_by_rules(config_cache, host_hashes, value)
+        elif isinstance(value, dict) and value and all(_is_ruleset(v) for v in value.values()):
+            for ruleset in value.values():
+                _update_host_hashes_by_rules(config_cache, host_hashes, ruleset)
+        elif _is_indexed_by_host(value, all_configured_hosts):
+            _update_host_hashes_by_entries(host_hashes, varname, value)
+        elif isinstance(value, dict) and value and all(
+                _is_indexed_by_host(v, all_configured_hosts) for v in value.values()):
+            for key, entries in value.items():
+                _update_host_hashes_by_entries(host_hashes, (varname, key), entries)
+        else:
+            global_hash.update(_fingerprint_repr((varname, value)).encode("utf-8"))
+
+    for hostname, host_hash in host_hashes.items():
+        host_hash.update(_fingerprint_repr(_effective_host_settings(config_cache,
+                                                                    hostname)).encode("utf-8"))
+
+    fingerprints = {}
+    for hostname in hostnames:
+        fingerprint = global_hash.copy()
+        fingerprint.update(host_hashes[hostname].digest())
+        for related_host in related_hosts[hostname]:
+            fingerprint.update(host_hashes[related_host].digest())
+        fingerprints[hostname] = fingerprint.hexdigest()
+    return fingerprints
+
+
+def _global_fingerprint_items() -> Iterator[Any]:
+    yield cmk_version.__version__
+    yield sorted(str(plugin.name) for plugin in agent_based_register.iter_all_check_plugins())
+    for plugin_dir in [
+            cmk.utils.paths.local_checks_dir,
+            cmk.utils.paths.local_agent_based_plugins_dir,
+    ]:
+        for path in sorted(Path(plugin_dir).glob("**/*")):
+            with suppress(OSError):
+                stat = path.stat()
+                yield str(path), stat.st_size, stat.st_mtime_ns
+    yield sorted(config.get_check_variables().items())
+
+
+def _config_variables_for_fingerprints() -> Iterator[Tuple[str, Any]]:
+    for varname in sorted(set(config.get_variable_names()) |
+                          config.get_derived_config_variable_names()):
+        yield varname, getattr(config, varname)
+
+
+def _is_ruleset(value: Any) -> bool:
+    return (isinstance(value, list) and bool(value) and
+            all(isinstance(rule, dict) and "condition" in rule for rule in value))
+
+
+def _is_indexed_by_host(value: Any, all_configured_hosts: Set[HostName]) -> bool:
+    """Whether the value is a dict or list of host names, maybe followed by "|" and tags"""
+    if not isinstance(value, (dict, list)) or not value:
+        return False
+    return all(
+        isinstance(key, str) and key.split("|", 1)[0] in all_configured_hosts for key in value)
+
+
+def _update_host_hashes_by_rules(config_cache: ConfigCache, host_hashes: Dict[HostName, Any],
+                                 ruleset: List[Dict[str, Any]]) -> None:
+    ruleset_optimizer = config_cache.ruleset_matcher.ruleset_optimizer
+    for rule in ruleset:
+        if "options" in rule and "disabled" in rule["options"]:
+            continue
+
+        rule_repr = _fingerprint_repr(rule).encode("utf-8")
+        for hostname in ruleset_optimizer.all_matching_hosts(rule["condition"],
+                                                             with_foreign_hosts=True):
+            host_hash = host_hashes.get(hostname)
+            if host_hash is not None:
+                host_hash.update(rule_repr)
+
+
+def _update_host_hashes_by_entries(host_hashes: Dict[HostName, Any], name: Any,
+                                   entries: Union[Dict, List]) -> None:
+    for key in entries:
+        host_hash = host_hashes.get(key.split("|", 1)[0])
+        if host_hash is not None:
+            value = entries[key] if isinstance(entries, dict) else None
+            host_hash.update(_fingerprint_repr((name, key, value)).encode("utf-8"))
+
+
+def _effective_host_settings(config_cache: ConfigCache, hostname: HostName) -> Tuple[Any, ...]:
+    host_config = config_cache.get_host_config(hostname)
+
+    # The configured addresses are part of the configuration variables. Looking up the others
+    # here would hide failed lookups from the creation of the configuration.
+    addresses = [
+        ip_lookup.cached_ip_address(hostname, family)
+        for family in [socket.AF_INET, socket.AF_INET6]
+    ]
+
+    try:
+        stat = Path(cmk.utils.paths.autochecks_dir, hostname + ".mk").stat()
+        autochecks: Tuple[int, ...] = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    except FileNotFoundError:
+        autochecks = ()
+
+    # Only the parents which are monitored hosts are used, and clusters leave out nodes which
+    # are not. So whether these hosts exist is part of the configuration of the host.
+    parents = sorted(host_config.parents)
+    is_active_realhost = hostname in config_cache.all_active_realhosts()
+
+    return host_config.labels, addresses, autochecks, parents, is_active_realhost
+
+
+_SCALAR_TYPES = {str, int, float, bool, type(None)}
+
+
+def _fingerprint_repr(value: Any) -> str:
+    """Like repr(), but independent of the (randomized) iteration order of sets"""
+    if type(value) in _SCALAR_TYPES:
+        return repr(value)
+    if isinstance(value, dict):
+        return "{%s}" % ", ".join(
+            "%s: %s" % (_fingerprint_repr(k), _fingerprint_repr(v)) for k, v in value.items())
+    if isinstance(value, (set, frozenset)):
+        return "{%s}" % ", ".join(sorted(_fingerprint_repr(v) for v in value))
+    if isinstance(value, list):
+        return "[%s]" % ", ".join(_fingerprint_repr(v) for v in value)
+    if isinstance(value, tuple):
+        return "(%s)" % ", ".join(_fingerprint_repr(v) for v in value)
+    return repr(value)
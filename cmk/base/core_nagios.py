@@ -6,13 +6,19 @@
 """Code for support of Nagios (and compatible) cores"""
 
 import base64
+import multiprocessing
 import os
+import pickle
 import py_compile
+import re
 import socket
 import sys
+import time
+from contextlib import contextmanager
 from io import StringIO
 from pathlib import Path
-from typing import Any, Dict, IO, Iterable, List, Optional, Set, Tuple, Union
+from typing import (Any, Dict, Final, IO, Iterable, Iterator, List, NamedTuple, Optional, Set,
+                    Tuple, Union)
 
 from six import ensure_binary, ensure_str
 
@@ -122,6 +128,47 @@ class NagiosConfig:
         # TODO: Something seems to be mixed up in our call sites...
         self._outfile.write(ensure_str(x))
 
+    def add_host_objects(self, host_objects: "_HostObjects") -> None:
+        """Add the objects created separately for a host"""
+        text = host_objects.text
+        hostcheck_commands = host_objects.hostcheck_commands_to_define
+        # The host check commands of the host were numbered starting at 1
+        offset = len(self.hostcheck_commands_to_define)
+        if offset and hostcheck_commands:
+
+            def renumber(match: 're.Match[str]') -> str:
+                return "check-mk-host-custom-%d" % (int(match.group(1)) + offset)
+
+            text = _HOSTCHECK_COMMAND_NAME.sub(renumber, text)
+            hostcheck_commands = [(_HOSTCHECK_COMMAND_NAME.sub(renumber, command), command_line)
+                                  for command, command_line in hostcheck_commands]
+
+        self.write(text)
+        self.hostgroups_to_define.update(host_objects.hostgroups_to_define)
+        self.servicegroups_to_define.update(host_objects.servicegroups_to_define)
+        self.contactgroups_to_define.update(host_objects.contactgroups_to_define)
+        self.checknames_to_define.update(host_objects.checknames_to_define)
+        self.active_checks_to_define.update(host_objects.active_checks_to_define)
+        self.custom_commands_to_define.update(host_objects.custom_commands_to_define)
+        self.hostcheck_commands_to_define.extend(hostcheck_commands)
+
+
+_HOSTCHECK_COMMAND_NAME = re.compile(r"\bcheck-mk-host-custom-(\d+)\b")
+
+
+class _HostObjects(NamedTuple):
+    """The host and service objects of a host, created separately from the other hosts"""
+    text: str
+    hostgroups_to_define: Set[HostgroupName]
+    servicegroups_to_define: Set[ServicegroupName]
+    contactgroups_to_define: Set[ContactgroupName]
+    checknames_to_define: Set[CheckPluginName]
+    active_checks_to_define: Set[CheckPluginNameStr]
+    custom_commands_to_define: Set[CoreCommandName]
+    hostcheck_commands_to_define: List[Tuple[CoreCommand, str]]
+    configuration_warnings: core_config.ConfigurationWarnings
+    failed_ip_lookups: List[HostName]
+
 
 def create_config(outfile: IO[str], hostnames: Optional[List[HostName]]) -> None:
     if config.host_notification_periods != []:
@@ -145,6 +192,7 @@ def create_config(outfile: IO[str], hostnames: Optional[List[HostName]]) -> None
 
     config_cache = config.get_config_cache()
 
+    all_hosts = hostnames is None
     if hostnames is None:
         hostnames = list(config_cache.all_active_hosts())
 
@@ -152,21 +200,176 @@ def create_config(outfile: IO[str], hostnames: Optional[List[HostName]]) -> None
 
     _output_conf_header(cfg)
 
-    for hostname in sorted(hostnames):
-        _create_nagios_config_host(cfg, config_cache, hostname)
+    with _timed_phase("Hosts and services"):
+        if config.core_config_incremental:
+            _create_nagios_config_hosts_incremental(cfg,
+                                                    config_cache,
+                                                    sorted(hostnames),
+                                                    all_hosts=all_hosts)
+        elif config.core_config_processes > 1:
+            for host_objects in _iter_host_objects(sorted(hostnames)):
+                _add_host_objects(cfg, host_objects)
+        else:
+            for hostname in sorted(hostnames):
+                _create_nagios_config_host(cfg, config_cache, hostname)
+
+    with _timed_phase("Contacts and groups"):
+        _create_nagios_config_contacts(cfg, hostnames)
+        _create_nagios_config_hostgroups(cfg)
+        _create_nagios_config_servicegroups(cfg)
+        _create_nagios_config_contactgroups(cfg)
 
-    _create_nagios_config_contacts(cfg, hostnames)
-    _create_nagios_config_hostgroups(cfg)
-    _create_nagios_config_servicegroups(cfg)
-    _create_nagios_config_contactgroups(cfg)
-    _create_nagios_config_commands(cfg)
-    _create_nagios_config_timeperiods(cfg)
+    with _timed_phase("Commands and timeperiods"):
+        _create_nagios_config_commands(cfg)
+        _create_nagios_config_timeperiods(cfg)
 
     if config.extra_nagios_conf:
         cfg.write("\n# extra_nagios_conf\n\n")
         cfg.write(config.extra_nagios_conf)
 
 
+@contextmanager
+def _timed_phase(title: str) -> Iterator[None]:
+    start = time.time()
+    yield
+    console.verbose("\n%s: %.2fs", title, time.time() - start)
+
+
+def _create_nagios_config_hosts_incremental(cfg: NagiosConfig, config_cache: ConfigCache,
+                                            hostnames: List[HostName], all_hosts: bool) -> None:
+    """Create the objects of the hosts whose configuration has changed, reuse the others"""
+    store = HostObjectsStore()
+    with _timed_phase("Host fingerprints"):
+        fingerprints = core_config.host_config_fingerprints(config_cache, hostnames)
+
+    host_objects: Dict[HostName, _HostObjects] = {}
+    for hostname in hostnames:
+        stored_host_objects = store.read(hostname, fingerprints[hostname])
+        # The address of a host may be resolvable by now
+        if stored_host_objects is not None and not stored_host_objects.failed_ip_lookups:
+            host_objects[hostname] = stored_host_objects
+
+    changed_hosts = [hostname for hostname in hostnames if hostname not in host_objects]
+    console.verbose("\nReusing the objects of %d hosts, creating the objects of %d hosts",
+                    len(host_objects), len(changed_hosts))
+    for hostname, objects in zip(changed_hosts, _iter_host_objects(changed_hosts)):
+        store.write(hostname, fingerprints[hostname], objects)
+        host_objects[hostname] = objects
+
+    for hostname in hostnames:
+        _add_host_objects(cfg, host_objects[hostname])
+
+    if all_hosts:
+        store.remove_other_hosts(hostnames)
+
+
+def _add_host_objects(cfg: NagiosConfig, host_objects: _HostObjects) -> None:
+    cfg.add_host_objects(host_objects)
+    core_config.g_configuration_warnings.extend(host_objects.configuration_warnings)
+    core_config.failed_ip_lookups().extend(host_objects.failed_ip_lookups)
+
+
+# Each worker process gets several shards, which evens out hosts with many services
+_SHARDS_PER_PROCESS = 4
+_MIN_HOSTS_PER_SHARD = 50
+
+
+def _iter_host_objects(hostnames: List[HostName]) -> Iterator[_HostObjects]:
+    """Create the objects of the hosts, in a pool of worker processes if configured
+
+    The workers are forked from this process, so they share the already initialized
+    configuration cache. The hosts are split into consecutive shards and the objects
+    are returned in the order of the hosts, which results in the same file as
+    creating them one host after the other.
+    """
+    processes = min(config.core_config_processes, len(hostnames) // _MIN_HOSTS_PER_SHARD)
+    if processes <= 1:
+        yield from _create_nagios_config_hosts(hostnames)
+        return
+
+    console.verbose("\nCreating the objects of %d hosts in %d processes", len(hostnames),
+                    processes)
+    num_shards = min(processes * _SHARDS_PER_PROCESS, len(hostnames) // _MIN_HOSTS_PER_SHARD)
+    shard_size = -(-len(hostnames) // num_shards)
+    shards = [hostnames[start:start + shard_size] for start in range(0, len(hostnames), shard_size)]
+
+    with multiprocessing.get_context("fork").Pool(processes) as pool:
+        for shard_host_objects in pool.imap(_create_nagios_config_hosts, shards):
+            yield from shard_host_objects
+
+
+def _create_nagios_config_hosts(hostnames: List[HostName]) -> List[_HostObjects]:
+    """Create the objects of each of the hosts (also in the worker processes)
+
+    The warnings and failed IP lookups are returned with the objects of the host and
+    are added to the global ones together with the objects.
+    """
+    config_cache = config.get_config_cache()
+    num_warnings = len(core_config.g_configuration_warnings)
+    num_failed_ip_lookups = len(core_config.failed_ip_lookups())
+
+    host_objects = []
+    for hostname in hostnames:
+        outfile = StringIO()
+        cfg = NagiosConfig(outfile, [hostname])
+        _create_nagios_config_host(cfg, config_cache, hostname)
+
+        host_objects.append(
+            _HostObjects(
+                text=outfile.getvalue(),
+                hostgroups_to_define=cfg.hostgroups_to_define,
+                servicegroups_to_define=cfg.servicegroups_to_define,
+                contactgroups_to_define=cfg.contactgroups_to_define,
+                checknames_to_define=cfg.checknames_to_define,
+                active_checks_to_define=cfg.active_checks_to_define,
+                custom_commands_to_define=cfg.custom_commands_to_define,
+                hostcheck_commands_to_define=cfg.hostcheck_commands_to_define,
+                configuration_warnings=core_config.g_configuration_warnings[num_warnings:],
+                failed_ip_lookups=core_config.failed_ip_lookups()[num_failed_ip_lookups:],
+            ))
+        del core_config.g_configuration_warnings[num_warnings:]
+        del core_config.failed_ip_lookups()[num_failed_ip_lookups:]
+
+    return host_objects
+
+
+class HostObjectsStore:
+    """The objects created for each host, together with the fingerprint of its configuration"""
+    def __init__(self) -> None:
+        self.path: Final[Path] = Path(cmk.utils.paths.var_dir, "core", "host_objects")
+
+    def read(self, hostname: HostName, fingerprint: str) -> Optional[_HostObjects]:
+        """The stored objects of the host, in case they were created from the same configuration"""
+        try:
+            with (self.path / hostname).open("rb") as f:
+                if pickle.load(f) != fingerprint:
+                    return None
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Broken or written by another version: The objects are simply created again
+            return None
+
+    def write(self, hostname: HostName, fingerprint: str, host_objects: _HostObjects) -> None:
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path / (".%s.new" % hostname)
+        with tmp_path.open("wb") as f:
+            pickle.dump(fingerprint, f, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(host_objects, f, pickle.HIGHEST_PROTOCOL)
+        tmp_path.rename(self.path / hostname)
+
+    def remove_other_hosts(self, hostnames: Iterable[HostName]) -> None:
+        hostnames = set(hostnames)
+        try:
+            paths = list(self.path.iterdir())
+        except FileNotFoundError:
+            return
+        for path in paths:
+            if path.name not in hostnames:
+                path.unlink()
+
+
 def _output_conf_header(cfg: NagiosConfig) -> None:
     cfg.write("""#
 # Created by Check_MK. Do not edit.
@@ -30,12 +30,17 @@ use_dns_cache = True  # prevent DNS by using own cache file
 delay_precompile = False  # delay Python compilation to Nagios execution
 restart_locking = "abort"  # also possible: "wait", None
 check_submission = "file"  # alternative: "pipe"
+item_state_storage_format = "standard"  # alternative: "journal"
+config_snapshot = True  # reuse the loaded configuration until a config file changes
+core_config_processes = 1  # number of processes creating the host objects of the core config
+core_config_incremental = True  # only create the objects of hosts whose configuration changed
 agent_min_version = 0  # warn, if plugin has not at least version
 default_host_group = 'check_mk'
 
 check_max_cachefile_age = 0  # per default do not use cache files when checking
 cluster_max_cachefile_age = 90  # secs.
 piggyback_max_cachefile_age = 3600  # secs
+cache_file_memory_size = 0  # bytes of cache files kept in memory per process, 0: off
 # Ruleset for translating piggyback host names
 piggyback_translation: _List = []
 # Ruleset for translating service descriptions
@@ -108,6 +113,7 @@ inventory_check_interval = None  # Nagios intervals (4h = 240)
 inventory_check_severity = 1  # warning
 inventory_max_cachefile_age = 120  # seconds
 inventory_check_autotrigger = True  # Automatically trigger inv-check after automation-inventory
+discovery_concurrency = 1  # number of hosts fetched at the same time by a bulk discovery
 # TODO: Remove this already deprecated option
 always_cleanup_autochecks = None  # For compatiblity with old configuration
 
@@ -185,6 +185,11 @@ def cached_dns_lookup(
         ))
 
 
+def cached_ip_address(hostname: HostName, family: socket.AddressFamily) -> Optional[str]:
+    """The address of the host in the persisted IP lookup cache, without looking it up"""
+    return _get_ip_lookup_cache().get((hostname, family))
+
+
 class IPLookupCache:
     def __init__(self, cache: cmk.utils.caching.DictCache) -> None:
         super().__init__()
@@ -17,9 +17,18 @@ item. The value is free form.
 Note: The item state is kept in tmpfs and not reboot-persistant.
 Do not store long-time things here. Also do not store complex
 structures like log files or stuff.
+
+The item states are stored per host in one of two storage formats,
+see set_storage_format():
+
+ * "standard": the repr() of all values, rewritten on every save.
+ * "journal": an append-only log of the changes, see _JournalValueStore.
 """
 
+import marshal
+import os
 from pathlib import Path
+import struct
 import traceback
 from typing import (
     Any,
@@ -33,6 +42,7 @@ from typing import (
     Optional,
     Set,
     Tuple,
+    Type,
     Union,
 )
 import cmk.utils.cleanup
@@ -162,6 +172,196 @@ class _StaticValueStore(Mapping[_ValueStoreKey, Any]):
             store.release_lock(self._path)
 
 
+class _JournalValueStore(Mapping[_ValueStoreKey, Any]):
+    """Represents the values stored on disk in an append-only journal
+
+    The journal is a sequence of frames.  Each frame holds the changes of
+    one store() call: the marshalled tuple (removed keys, updated values),
+    prefixed by its size.  Only keys that really changed are written.
+    Once the journal has grown large compared to the data it represents, it
+    is compacted into a single frame.
+
+    The journal is only ever appended to or replaced by renaming a new file
+    into place, so it can be read without the lock.  An incomplete frame at
+    the end (e.g. after a crash) is ignored and cut off on the next store().
+
+    The values are read on first access, as many callers never look at them.
+    A file of the "standard" format is used as long as there is no journal,
+    and it is removed once its values have been written to the journal.
+    """
+
+    STORAGE_PATH = Path(cmk.utils.paths.counters_journal_dir)
+    STANDARD_STORAGE_PATH = _StaticValueStore.STORAGE_PATH
+
+    # Compact once the journal is this much larger than its first frame
+    COMPACTION_FACTOR = 4
+    COMPACTION_MIN_SIZE = 64 * 1024
+
+    _frame_header = struct.Struct("<I")
+
+    def __init__(self, host_name: HostName, log_debug: Callable[[str], None]) -> None:
+        self._path: Final = self.STORAGE_PATH / host_name
+        self._standard_path: Final = self.STANDARD_STORAGE_PATH / host_name
+        self._log_debug = log_debug
+        self._is_loaded = False
+        self._is_migrating = False
+        self._data: Dict[_ValueStoreKey, Any] = {}
+        # Where we are in the journal
+        self._inode: Optional[int] = None
+        self._offset = 0
+        self._snapshot_size = 0
+
+    @property
+    def _values(self) -> Mapping[_ValueStoreKey, Any]:
+        if not self._is_loaded:
+            self._load()
+        return self._data
+
+    def __getitem__(self, key: _ValueStoreKey) -> Any:
+        return self._values.__getitem__(key)
+
+    def __iter__(self) -> Iterator[_ValueStoreKey]:
+        return self._values.__iter__()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def load(self) -> None:
+        self._log_debug("Loading item states (deferred)")
+        self._is_loaded = False
+
+    def _load(self) -> None:
+        self._is_loaded = True
+        journal_mtime = 0.0
+        try:
+            with self._path.open("rb") as journal:
+                stat = os.fstat(journal.fileno())
+                journal_mtime = stat.st_mtime
+                if stat.st_ino != self._inode:
+                    # New or compacted journal: start over
+                    self._data = {}
+                    self._inode = stat.st_ino
+                    self._offset = self._snapshot_size = 0
+                journal.seek(self._offset)
+                self._read_frames(journal.read())
+        except FileNotFoundError:
+            self._data = {}
+            self._inode = None
+            self._offset = self._snapshot_size = 0
+
+        try:
+            standard_mtime: Optional[float] = self._standard_path.stat().st_mtime
+        except FileNotFoundError:
+            standard_mtime = None
+
+        # Take over the file of the "standard" format if there is no journal yet (or only the
+        # empty file created by locking), or if the "standard" format has been used after the
+        # journal has been written.
+        self._is_migrating = standard_mtime is not None and (self._offset == 0 or
+                                                             standard_mtime > journal_mtime)
+        if self._is_migrating:
+            self._data = self._load_standard_format()
+
+    def _load_standard_format(self) -> Dict[_ValueStoreKey, Any]:
+        self._log_debug("Migrating item states from %s" % self._standard_path)
+        return store.load_object_from_file(self._standard_path, default={}, lock=False)
+
+    def _read_frames(self, raw: bytes) -> None:
+        view = memoryview(raw)
+        offset = 0
+        header_size = self._frame_header.size
+        while offset + header_size <= len(view):
+            size, = self._frame_header.unpack_from(view, offset)
+            end = offset + header_size + size
+            if end > len(view):
+                break  # incomplete frame
+            try:
+                removed, updated = marshal.loads(view[offset + header_size:end])
+            except (EOFError, ValueError, TypeError):
+                break
+            for key in removed:
+                self._data.pop(key, None)
+            self._data.update(updated)
+            if self._offset == 0 and offset == 0:
+                self._snapshot_size = end
+            offset = end
+        self._offset += offset
+
+    def store(
+        self,
+        *,
+        removed: Set[_ValueStoreKey],
+        updated: Mapping[_ValueStoreKey, Any],
+    ) -> None:
+        """Append the changes of the item state to the journal
+
+        Make sure the object is in sync with the file after writing.
+        """
+        self._log_debug("Storing item states")
+        if not (removed or updated):
+            return
+
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            store.aquire_lock(self._path)
+            # Read what others have written in the meantime.
+            self._load()
+            migrate = self._is_migrating
+
+            removed_keys = tuple(k for k in removed if k in self._data)
+            updated_values = {
+                k: v for k, v in updated.items() if k not in self._data or self._data[k] != v
+            }
+            for key in removed_keys:
+                del self._data[key]
+            self._data.update(updated_values)
+
+            if migrate or self._needs_compaction():
+                self._compact()
+            elif removed_keys or updated_values:
+                self._append(self._frame((removed_keys, updated_values)))
+        except Exception:
+            # Our view of the journal may be off now: read it again next time.
+            self._inode = None
+            raise MKGeneralException(f"Cannot write to {self._path}: {traceback.format_exc()}")
+        finally:
+            store.release_lock(self._path)
+
+        if migrate:
+            self._standard_path.unlink(missing_ok=True)
+            self._is_migrating = False
+
+    def _frame(self, obj: Any) -> bytes:
+        payload = marshal.dumps(obj)
+        return self._frame_header.pack(len(payload)) + payload
+
+    def _needs_compaction(self) -> bool:
+        if self._offset < self.COMPACTION_MIN_SIZE:
+            return False
+        return self._offset > self.COMPACTION_FACTOR * self._snapshot_size
+
+    def _append(self, frame: bytes) -> None:
+        # aquire_lock() has created the file, if it was missing.
+        with self._path.open("r+b") as journal:
+            # Cut off an incomplete frame from a previous writer
+            journal.truncate(self._offset)
+            journal.seek(self._offset)
+            journal.write(frame)
+            self._inode = os.fstat(journal.fileno()).st_ino
+        if self._offset == 0:
+            self._snapshot_size = len(frame)
+        self._offset += len(frame)
+
+    def _compact(self) -> None:
+        self._log_debug("Compacting item state journal")
+        frame = self._frame(((), self._data))
+        # Replaces the file and releases the lock: aquire_lock() deals with the renamed file.
+        store.save_bytes_to_file(self._path, frame)
+        # We don't know which file is in place once the lock is gone: read it again next time.
+        self._inode = None
+
+
 class MKCounterWrapped(MKException):
     pass
 
@@ -174,11 +374,11 @@ class CachedItemStates:
 
     def reset(self) -> None:
         self._item_state_prefix: Optional[ServicePrefix] = None
-        self._static_values: Optional[_StaticValueStore] = None
+        self._static_values: Optional[Union[_StaticValueStore, _JournalValueStore]] = None
         self._dynamic_values = _DynamicValueStore()
 
     def load(self, hostname: HostName) -> None:
-        self._static_values = _StaticValueStore(hostname, logger.debug)
+        self._static_values = _STORAGE_FORMATS[_storage_format](hostname, logger.debug)
         self._static_values.load()
 
     def save(self) -> None:
@@ -245,9 +445,29 @@ class CachedItemStates:
         return self._item_state_prefix + (user_key,)
 
 
+_STORAGE_FORMATS: Mapping[str, Type[Union[_StaticValueStore, _JournalValueStore]]] = {
+    "standard": _StaticValueStore,
+    "journal": _JournalValueStore,
+}
+_storage_format = "standard"
+
 _cached_item_states = CachedItemStates()
 
 
+def set_storage_format(storage_format: str) -> None:
+    """Select how the item states are stored on disk: "standard" or "journal"
+
+    Both formats read the files of the "standard" format, so switching
+    to "journal" keeps the current item states. A journal is replaced by
+    a newer file of the "standard" format.
+    """
+    if storage_format not in _STORAGE_FORMATS:
+        raise MKGeneralException("Invalid item state storage format %r. Must be one of %s" %
+                                 (storage_format, ", ".join(sorted(_STORAGE_FORMATS))))
+    global _storage_format
+    _storage_format = storage_format
+
+
 def load(hostname: HostName) -> None:
     _cached_item_states.load(hostname)
 
@@ -1009,12 +1009,16 @@ def mode_flush(hosts: List[HostName]) -> None:
         flushed = False
 
         # counters
-        try:
-            os.remove(cmk.utils.paths.counters_dir + "/" + host)
+        flushed_counters = False
+        for counters_dir in [cmk.utils.paths.counters_dir, cmk.utils.paths.counters_journal_dir]:
+            try:
+                os.remove(counters_dir + "/" + host)
+                flushed_counters = True
+            except OSError:
+                pass
+        if flushed_counters:
             out.output(tty.bold + tty.blue + " counters")
             flushed = True
-        except OSError:
-            pass
 
         # cache files
         d = 0
@@ -13,6 +13,7 @@ from typing import (
     final,
     Final,
     Iterable,
+    Iterator,
     List,
     MutableMapping,
     NamedTuple,
@@ -242,6 +243,29 @@ class SectionMarker(NamedTuple):
         return None
 
 
+# What bytes.strip() removes, for stripping decoded lines the same way
+_ASCII_WHITESPACE: Final = " \t\n\r\x0b\x0c"
+
+
+def _iter_marker_lines(raw_data: bytes) -> Iterator[Tuple[int, int]]:
+    """Yield start and end of all lines starting with `<<<` and ending with `>>>`
+
+    These are all the section and piggyback headers and footers (ignoring surrounding
+    whitespace, as the markers do). The end does not include the newline.
+    """
+    find = raw_data.find
+    position = find(b"<<<")
+    while position != -1:
+        line_start = raw_data.rfind(b"\n", 0, position) + 1
+        line_end = find(b"\n", position)
+        if line_end == -1:
+            line_end = len(raw_data)
+        line = raw_data[line_start:line_end].strip()
+        if line.startswith(b"<<<") and line.endswith(b">>>"):
+            yield line_start, line_end
+        position = find(b"<<<", line_end)
+
+
 class ParserState(abc.ABC):
     """Base class for the state machine.
 
@@ -392,6 +416,11 @@ class ParserState(abc.ABC):
             logger=self._logger,
         )
 
+    @property
+    def consumes_data(self) -> bool:
+        """Whether the state does anything with the lines between the markers"""
+        return True
+
     def to_error(self, line: bytes) -> "ParserState":
         self._logger.warning(
             "%s: Ignoring invalid data %r",
@@ -421,8 +450,25 @@ class ParserState(abc.ABC):
 
         return self
 
+    def feed(self, data: bytes) -> "ParserState":
+        """Process the lines between two markers at once"""
+        parser = self
+        for line in data.split(b"\n"):
+            line = line.rstrip(b"\r")
+            if not line.strip():
+                continue
+            try:
+                parser = parser.do_action(line)
+            except Exception:
+                parser = parser.to_error(line)
+        return parser
+
 
 class NOOPParser(ParserState):
+    @property
+    def consumes_data(self) -> bool:
+        return False
+
     def do_action(self, line: bytes) -> "ParserState":
         return self
 
@@ -537,6 +583,10 @@ class PiggybackSectionParser(ParserState):
                 [],
             ).append(str(self.section_header).encode("utf8"))
 
+    @property
+    def consumes_data(self) -> bool:
+        return self.selected
+
     def do_action(self, line: bytes) -> "ParserState":
         if not self.selected:
             return self
@@ -597,6 +647,10 @@ class HostSectionParser(ParserState):
             self.host_sections.sections.setdefault(self.section_header.name, [])
             self.section_info[self.section_header.name] = self.section_header
 
+    @property
+    def consumes_data(self) -> bool:
+        return self.selected
+
     def do_action(self, line: bytes) -> "ParserState":
         if not self.selected:
             return self
@@ -612,6 +666,25 @@ class HostSectionParser(ParserState):
             ).split(self.section_header.separator))
         return self
 
+    def feed(self, data: bytes) -> "ParserState":
+        # Decoding the lines one by one gives the same result for these encodings,
+        # as long as all of them can be decoded.
+        if not self.selected or self.section_header.encoding not in ("utf-8", "ascii"):
+            return super().feed(data)
+        try:
+            text = data.decode(self.section_header.encoding)
+        except UnicodeDecodeError:
+            return super().feed(data)
+
+        section = self.host_sections.sections[self.section_header.name]
+        nostrip = self.section_header.nostrip
+        separator = self.section_header.separator
+        for line in text.split("\n"):
+            stripped = line.strip(_ASCII_WHITESPACE)
+            if stripped:
+                section.append((line.rstrip("\r") if nostrip else stripped).split(separator))
+        return self
+
     def on_piggyback_header(self, line: bytes) -> "ParserState":
         piggyback_header = PiggybackMarker.from_headerline(
             line,
@@ -706,7 +779,14 @@ class AgentParser(Parser[AgentRawData, AgentHostSections]):
         *,
         selection: SectionNameCollection,
     ) -> ParserState:
-        """Split agent output in chunks, splits lines by whitespaces."""
+        """Split agent output in chunks, splits lines by whitespaces.
+
+        Only the markers are passed to the state machine line by line. They are found
+        by scanning the raw data once, the data in between is handed to the current
+        state as a whole. It is neither copied nor split into lines if the state ignores
+        it, e.g. for the sections not in `selection`.
+
+        """
         parser: ParserState = NOOPParser(
             self.hostname,
             AgentHostSections(),
@@ -716,8 +796,15 @@ class AgentParser(Parser[AgentRawData, AgentHostSections]):
             encoding_fallback=self.encoding_fallback,
             logger=self._logger,
         )
-        for line in raw_data.split(b"\n"):
-            parser = parser(line.rstrip(b"\r"))
+        data_start = 0
+        for marker_start, marker_end in _iter_marker_lines(raw_data):
+            if parser.consumes_data:
+                parser = parser.feed(raw_data[data_start:marker_start])
+            parser = parser(raw_data[marker_start:marker_end].rstrip(b"\r"))
+            data_start = marker_end + 1
+
+        if parser.consumes_data:
+            parser = parser.feed(raw_data[data_start:])
 
         return parser
 
@@ -6,8 +6,11 @@
 """Persisted sections type and store."""
 
 import abc
+import collections
 import itertools
 import logging
+import os
+import time
 from pathlib import Path
 from typing import (
     Any,
@@ -17,6 +20,7 @@ from typing import (
     Iterator,
     Mapping,
     MutableMapping,
+    NamedTuple,
     Optional,
     Tuple,
     Type,
@@ -24,7 +28,6 @@ from typing import (
     Union,
 )
 
-import cmk.utils
 import cmk.utils.store as _store
 from cmk.utils.log import VERBOSE
 from cmk.utils.exceptions import MKGeneralException, MKFetcherError
@@ -36,9 +39,11 @@ __all__ = [
     "ABCRawDataSection",
     "FileCache",
     "FileCacheFactory",
+    "MemoryCache",
     "PersistedSections",
     "SectionStore",
     "set_cache_opts",
+    "set_memory_cache_size",
     "TRawDataSection",
 ]
 
@@ -218,7 +223,9 @@ class FileCache(Generic[TRawData], abc.ABC):
         return raw_data
 
     def _read(self) -> Optional[TRawData]:
-        if not self.path.exists():
+        try:
+            stat_result = self.path.stat()
+        except FileNotFoundError:
             self._logger.debug("Not using cache (Does not exist)")
             return None
 
@@ -227,7 +234,7 @@ class FileCache(Generic[TRawData], abc.ABC):
             return None
 
         may_use_outdated = self.simulation or self.use_outdated
-        cachefile_age = cmk.utils.cachefile_age(self.path)
+        cachefile_age = time.time() - stat_result.st_mtime
         if not may_use_outdated and cachefile_age > self.max_age:
             self._logger.debug(
                 "Not using cache (Too old. Age is %d sec, allowed is %s sec)",
@@ -236,9 +243,15 @@ class FileCache(Generic[TRawData], abc.ABC):
             )
             return None
 
-        # TODO: Use some generic store file read function to generalize error handling,
-        # but there is currently no function that simply reads data from the file
-        cache_file = self.path.read_bytes()
+        cache_file = MemoryCache.instance.get(self.path, stat_result)
+        if cache_file is None:
+            # TODO: Use some generic store file read function to generalize error handling,
+            # but there is currently no function that simply reads data from the file
+            cache_file = self.path.read_bytes()
+            MemoryCache.instance.put(self.path, stat_result, cache_file)
+        else:
+            self._logger.debug("Cache file %s found in memory", self.path)
+
         if not cache_file:
             self._logger.debug("Not using cache (Empty)")
             return None
@@ -263,6 +276,117 @@ class FileCache(Generic[TRawData], abc.ABC):
             raise MKGeneralException("Cannot write cache file %s: %s" % (self.path, e))
 
 
+class _MemoryCacheEntry(NamedTuple):
+    # Identifies the version of the cache file the content has been read from. The cache
+    # files are replaced by renaming, so a new version always comes with a new inode.
+    version: Tuple[int, int, int]
+    mtime: float
+    content: bytes
+
+
+class MemoryCache:
+    """Process wide memory tier in front of the cache files
+
+    The content of the recently used cache files is kept in memory, so that processes
+    reading the same cache files again and again (the keepalive helpers, the automation
+    calls of the GUI, discovery and inventory of clusters) need only a single stat() call
+    to serve them. The cache files remain the persistent and the shared tier: every entry
+    is checked against the current version of its file, so data written by other processes
+    is never hidden.
+
+    The tier only pays off if the cache files of all hosts read by a process fit into it.
+    Otherwise reading round robin evicts each entry before it is used again. It is therefore
+    disabled (max_size 0) unless configured, see set_memory_cache_size().
+
+    Entries are evicted least recently used first when the content of all entries exceeds
+    max_size bytes, or when their file is older than max_age seconds.
+    """
+
+    instance: "MemoryCache"
+
+    def __init__(self, *, max_size: int, max_age: int) -> None:
+        super().__init__()
+        self.max_size: Final = max_size
+        self.max_age: Final = max_age
+        self._entries: "collections.OrderedDict[Path, _MemoryCacheEntry]" = (
+            collections.OrderedDict())
+        self._size = 0
+
+    def __repr__(self) -> str:
+        return "%s(max_size=%r, max_age=%r)" % (type(self).__name__, self.max_size, self.max_age)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _version(stat_result: os.stat_result) -> Tuple[int, int, int]:
+        return stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size
+
+    def get(self, path: Path, stat_result: os.stat_result) -> Optional[bytes]:
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+
+        if entry.version != self._version(stat_result) or self._is_expired(entry):
+            self.discard(path)
+            return None
+
+        self._entries.move_to_end(path)
+        return entry.content
+
+    def put(self, path: Path, stat_result: os.stat_result, content: bytes) -> None:
+        self.discard(path)
+        if len(content) > self.max_size:
+            return
+
+        self._entries[path] = _MemoryCacheEntry(
+            version=self._version(stat_result),
+            mtime=stat_result.st_mtime,
+            content=content,
+        )
+        self._size += len(content)
+        self._evict()
+
+    def discard(self, path: Path) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._size -= len(entry.content)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    def _is_expired(self, entry: _MemoryCacheEntry) -> bool:
+        return entry.mtime < time.time() - self.max_age
+
+    def _evict(self) -> None:
+        # Expired entries which are used again are discarded by get(). The others end up as
+        # the least recently used ones.
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if self._size <= self.max_size and not self._is_expired(entry):
+                return
+            _path, entry = self._entries.popitem(last=False)
+            self._size -= len(entry.content)
+
+
+MemoryCache.instance = MemoryCache(max_size=0, max_age=15 * 60)
+
+
+def set_memory_cache_size(max_size: int) -> None:
+    """Set the size of the memory tier of the cache files in bytes, 0 disables it
+
+    Please note that every process has its own memory tier, and that there may be many
+    helper processes."""
+    if max_size != MemoryCache.instance.max_size:
+        MemoryCache.instance = MemoryCache(max_size=max_size,
+                                           max_age=MemoryCache.instance.max_age)
+
+
 class FileCacheFactory(Generic[TRawData], abc.ABC):
     """Factory / configuration to FileCache."""
 
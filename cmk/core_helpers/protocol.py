@@ -17,18 +17,22 @@ We call "message" a header followed by the corresponding payload.
 +---------------+----------------+---------------+----------------+
 |               |                |      AgentResultMessage        |
 | Result Layer  | ResultMessage  |      SNMPResultMessage         |
+|               |                |      SNMPBinaryResultMessage   |
 |               |                |      ErrorResultMessage        |
 +---------------+----------------+--------------------------------+
 
 """
 
 import abc
+import array
 import enum
+import itertools
 import json
 import logging
 import pickle
 import struct
-from typing import Final, Iterator, Sequence, Type, Union
+import sys
+from typing import Final, Iterable, Iterator, List, Optional, Sequence, Tuple, Type, Union
 
 import cmk.utils.log as log
 from cmk.utils.cpu_tracking import Snapshot
@@ -36,13 +40,14 @@ from cmk.utils.exceptions import MKFetcherError, MKTimeout
 from cmk.utils.type_defs import AgentRawData, result, SectionName
 from cmk.utils.type_defs.protocol import Protocol
 
-from cmk.snmplib.type_defs import AbstractRawData, SNMPRawData
+from cmk.snmplib.type_defs import AbstractRawData, SNMPRawData, SNMPTable
 
 from . import FetcherType
 
 __all__ = [
     "ResultMessage",
     "PayloadType",
+    "SNMPBinaryResultMessage",
     "FetcherHeader",
     "FetcherMessage",
     "CMCHeader",
@@ -120,6 +125,7 @@ class PayloadType(enum.Enum):
     ERROR = enum.auto()
     AGENT = enum.auto()
     SNMP = enum.auto()
+    SNMP_BINARY = enum.auto()
 
     def make(self) -> Type[ResultMessage]:
         # This typing error is a false positive.  There are tests to demonstrate that.
@@ -127,6 +133,7 @@ class PayloadType(enum.Enum):
             PayloadType.ERROR: ErrorResultMessage,
             PayloadType.AGENT: AgentResultMessage,
             PayloadType.SNMP: SNMPResultMessage,
+            PayloadType.SNMP_BINARY: SNMPBinaryResultMessage,
         }[self]
 
 
@@ -166,10 +173,17 @@ class AgentResultMessage(ResultMessage):
 
 
 class SNMPResultMessage(ResultMessage):
+    """SNMP payload serialized as JSON.
+
+    This is the fallback for data that :class:`SNMPBinaryResultMessage`
+    cannot represent.
+
+    """
     payload_type = PayloadType.SNMP
 
     def __init__(self, value: SNMPRawData) -> None:
         self._value: Final[SNMPRawData] = value
+        self._payload: Optional[bytes] = None
 
     def __repr__(self) -> str:
         return "%s(%r)" % (type(self).__name__, self._value)
@@ -184,7 +198,11 @@ class SNMPResultMessage(ResultMessage):
 
     @property
     def payload(self) -> bytes:
-        return self._serialize(self._value)
+        # The payload is needed for the header as well as for the message itself.
+        # Serialize it only once.
+        if self._payload is None:
+            self._payload = self._serialize(self._value)
+        return self._payload
 
     @classmethod
     def from_bytes(cls, data: bytes) -> "SNMPResultMessage":
@@ -212,6 +230,205 @@ class SNMPResultMessage(ResultMessage):
             raise ValueError(repr(data))
 
 
+class SNMPBinaryResultMessage(SNMPResultMessage):
+    """SNMP payload in a versioned, length-prefixed binary encoding.
+
+    The sections are sent as lists of tables and the tables are stored
+    column by column, so that encoding and decoding works on whole columns
+    instead of on single values::
+
+        payload := VERSION:u8 NUM_SECTIONS:u32 SECTION*
+        section := NAME_SIZE:u16 NAME NUM_TABLES:u32 TABLE*
+        table   := NUM_ROWS:u32 NUM_COLUMNS:u32 COLUMN*
+        column  := TEXT         SIZE:u32 DATA
+                 | TEXT_LENGTHS LENGTHS:u32[NUM_ROWS] SIZE:u32 DATA
+                 | BINARY       LENGTHS:u32[NUM_ROWS] SIZE:u32 DATA
+
+    The column type is one byte and all the integers are little endian.
+    The values of a text column are joined with NUL characters and UTF-8
+    encoded.  If one of the values contains a NUL character, the values are
+    joined without separator and their lengths (in characters) are sent as
+    well.  The values of a binary column are concatenated.
+
+    The decoder reads the payload through a `memoryview` and decodes every
+    text column at once.
+
+    Data that cannot be represented raises a `ValueError` on serialization.
+    Use :class:`SNMPResultMessage` in that case.  This applies to sections
+    that are not lists of tables, to tables with rows of different lengths,
+    to columns mixing text and binary values and to binary values that are
+    not bytes.
+
+    """
+    payload_type = PayloadType.SNMP_BINARY
+    version: Final = 1
+
+    class ColumnType(enum.IntEnum):
+        TEXT = 0
+        TEXT_LENGTHS = 1
+        BINARY = 2
+
+    _header_fmt: Final = "<BI"
+    _table_fmt: Final = "<II"
+
+    @staticmethod
+    def _serialize(value: SNMPRawData) -> bytes:
+        chunks: List[bytes] = [
+            struct.pack(
+                SNMPBinaryResultMessage._header_fmt,
+                SNMPBinaryResultMessage.version,
+                len(value),
+            )
+        ]
+        for section_name, section in value.items():
+            if not isinstance(section, list) or not all(
+                    map(isinstance, section, itertools.repeat(list))):
+                raise ValueError(section_name)
+            chunks.append(_pack_str(str(section_name)))
+            chunks.append(_pack_uint32(len(section)))
+            for table in section:
+                try:
+                    chunks.extend(SNMPBinaryResultMessage._serialize_table(table))
+                except TypeError as exc:
+                    raise ValueError(section_name) from exc
+        return b"".join(chunks)
+
+    @staticmethod
+    def _serialize_table(table: SNMPTable) -> Iterator[bytes]:
+        if not all(map(isinstance, table, itertools.repeat(list))):
+            raise TypeError(table)
+        widths = set(map(len, table))
+        if len(widths) > 1:
+            raise TypeError(widths)
+
+        width = widths.pop() if widths else 0
+        cells = list(itertools.chain.from_iterable(table))
+        columns = [cells[index::width] for index in range(width)]
+        yield struct.pack(SNMPBinaryResultMessage._table_fmt, len(table), width)
+        for column in columns:
+            if isinstance(column[0], str):
+                # Raises a TypeError if some value is not a str.
+                text = "\0".join(column)
+                if text.count("\0") == len(column) - 1:
+                    yield bytes((SNMPBinaryResultMessage.ColumnType.TEXT,))
+                else:
+                    yield bytes((SNMPBinaryResultMessage.ColumnType.TEXT_LENGTHS,))
+                    yield _pack_uint32s(map(len, column))
+                    text = "".join(column)
+                data = text.encode("utf8")
+            elif set(map(type, column)) == {list}:
+                yield bytes((SNMPBinaryResultMessage.ColumnType.BINARY,))
+                yield _pack_uint32s(map(len, column))
+                # `bytes()` raises a ValueError for values that do not fit into a byte.
+                data = b"".join(map(bytes, column))
+            else:
+                raise TypeError(column)
+            yield _pack_uint32(len(data))
+            yield data
+
+    @staticmethod
+    def _deserialize(data: bytes) -> SNMPRawData:
+        view = memoryview(data)
+        try:
+            version, num_sections = struct.unpack_from(SNMPBinaryResultMessage._header_fmt, view)
+            if version != SNMPBinaryResultMessage.version:
+                raise ValueError("unsupported version: %r" % version)
+            offset = struct.calcsize(SNMPBinaryResultMessage._header_fmt)
+            sections = {}
+            for _ in range(num_sections):
+                section_name, offset = _unpack_str(view, offset)
+                num_tables, offset = _unpack_uint32(view, offset)
+                section: List[SNMPTable] = []
+                for _ in range(num_tables):
+                    table, offset = SNMPBinaryResultMessage._deserialize_table(view, offset)
+                    section.append(table)
+                sections[SectionName(section_name)] = section
+        except (struct.error, UnicodeError, IndexError) as exc:
+            raise ValueError(repr(data)) from exc
+        if offset != len(view):
+            raise ValueError(repr(data))
+        return sections
+
+    @staticmethod
+    def _deserialize_table(view: memoryview, offset: int) -> Tuple[SNMPTable, int]:
+        num_rows, num_columns = struct.unpack_from(
+            SNMPBinaryResultMessage._table_fmt,
+            view,
+            offset,
+        )
+        offset += struct.calcsize(SNMPBinaryResultMessage._table_fmt)
+        if not num_columns:
+            return [[] for _ in range(num_rows)], offset
+
+        columns: List[list] = []
+        for _ in range(num_columns):
+            column_type = SNMPBinaryResultMessage.ColumnType(view[offset])
+            offset += 1
+            if column_type is not SNMPBinaryResultMessage.ColumnType.TEXT:
+                lengths, offset = _unpack_uint32s(view, offset, num_rows)
+            size, offset = _unpack_uint32(view, offset)
+            if offset + size > len(view):
+                raise IndexError(offset + size)
+            if column_type is SNMPBinaryResultMessage.ColumnType.BINARY:
+                # Slicing `bytes` is much cheaper than slicing a `memoryview`: copy once.
+                column: list = list(map(list, _slice(bytes(view[offset:offset + size]),
+                                                     lengths)))
+            elif column_type is SNMPBinaryResultMessage.ColumnType.TEXT_LENGTHS:
+                column = _slice(str(view[offset:offset + size], "utf8"), lengths)
+            else:
+                column = str(view[offset:offset + size], "utf8").split("\0") if num_rows else []
+            offset += size
+            if len(column) != num_rows:
+                raise ValueError("corrupt column")
+            columns.append(column)
+
+        return list(map(list, zip(*columns))), offset
+
+
+def _pack_uint32(value: int) -> bytes:
+    return struct.pack("<I", value)
+
+
+def _pack_uint32s(values: Iterable[int]) -> bytes:
+    packed = array.array("I", values)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _pack_str(value: str) -> bytes:
+    encoded = value.encode("utf8")
+    return struct.pack("<H", len(encoded)) + encoded
+
+
+def _unpack_uint32(view: memoryview, offset: int) -> Tuple[int, int]:
+    return struct.unpack_from("<I", view, offset)[0], offset + 4
+
+
+def _unpack_uint32s(view: memoryview, offset: int, count: int) -> Tuple[Sequence[int], int]:
+    end = offset + 4 * count
+    if end > len(view):
+        raise IndexError(end)
+    if sys.byteorder == "little":
+        # No copy.
+        return view[offset:end].cast("I"), end
+    values = array.array("I", view[offset:end])
+    values.byteswap()
+    return values, end
+
+
+def _unpack_str(view: memoryview, offset: int) -> Tuple[str, int]:
+    size, = struct.unpack_from("<H", view, offset)
+    offset += 2
+    return str(view[offset:offset + size], "utf8"), offset + size
+
+
+def _slice(seq: Sequence, lengths: Iterable[int]) -> list:
+    """Cut `seq` into consecutive slices of the given `lengths`"""
+    stops = list(itertools.accumulate(lengths))
+    return [seq[start:stop] for start, stop in zip(itertools.chain((0,), stops), stops)]
+
+
 class ErrorResultMessage(ResultMessage):
     payload_type = PayloadType.ERROR
 
@@ -385,11 +602,11 @@ class FetcherMessage(Protocol):
 
         if fetcher_type is FetcherType.SNMP:
             assert isinstance(raw_data.ok, dict)
-            snmp_payload = SNMPResultMessage(raw_data.ok)
+            snmp_payload = cls._make_snmp_payload(raw_data.ok)
             return cls(
                 FetcherHeader(
                     fetcher_type,
-                    payload_type=PayloadType.SNMP,
+                    payload_type=snmp_payload.payload_type,
                     status=0,
                     payload_length=len(snmp_payload),
                     stats_length=len(stats),
@@ -412,6 +629,16 @@ class FetcherMessage(Protocol):
             stats,
         )
 
+    @staticmethod
+    def _make_snmp_payload(value: SNMPRawData) -> SNMPResultMessage:
+        snmp_payload = SNMPBinaryResultMessage(value)
+        try:
+            # Serialize now (the result is cached) to know if we must fall back.
+            _payload = snmp_payload.payload
+        except ValueError:
+            return SNMPResultMessage(value)
+        return snmp_payload
+
     @classmethod
     def error(cls, fetcher_type: FetcherType, exc: Exception) -> "FetcherMessage":
         stats = ResultStats(Snapshot.null())
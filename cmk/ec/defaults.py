@@ -34,6 +34,7 @@ def default_config() -> Dict[str, Any]:
         "actions": [],
         "debug_rules": False,
         "rule_optimizer": True,
+        "event_workers": 0,  # parse and match messages in the main process
         "log_level": {
             "cmk.mkeventd": logging.INFO,
             "cmk.mkeventd.EventServer": logging.INFO,
@@ -45,6 +46,7 @@ def default_config() -> Dict[str, Any]:
         "log_rulehits": False,
         "log_messages": False,
         "retention_interval": 60,
+        "status_persistence": "snapshot",  # alternative: "journal"
         "housekeeping_interval": 60,
         "statistics_interval": 5,
         "history_lifetime": 365,  # days
@@ -55,7 +57,7 @@ def default_config() -> Dict[str, Any]:
         "eventsocket_queue_len": 10,
         "hostname_translation": {},
         "archive_orphans": False,
-        "archive_mode": "file",
+        "archive_mode": "file",  # alternatives: "mongodb", "sqlite"
         "translate_snmptraps": False,
         "snmp_credentials": [v1_v2_credential],
         "event_limit": {
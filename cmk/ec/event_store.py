@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""The open events, indexed by ID, rule and host
+
+Cancelling messages, counting and the event limits only care about the events
+of one rule or one host, and these are found here without looking at all
+other events. Each index keeps the events in the order they were added, so the
+oldest event of a rule or a host is the first one of its index.
+"""
+
+import itertools
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+Event = Dict[str, Any]
+HostKey = Tuple[str, str]
+
+
+class EventStore:
+    def __init__(self, events: Iterable[Event] = ()) -> None:
+        super().__init__()
+        self._by_id: 'OrderedDict[int, Event]' = OrderedDict()
+        self._by_rule: Dict[str, 'OrderedDict[int, Event]'] = {}
+        self._by_host: Dict[HostKey, 'OrderedDict[int, Event]'] = {}
+        # The index keys of each event as it was added. The host of an event
+        # may change later, e.g. when counting events of several hosts.
+        self._keys: Dict[int, Tuple[str, HostKey]] = {}
+        for event in events:
+            self.add(event)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(self._by_id.values())
+
+    def __contains__(self, event: Event) -> bool:
+        return self._by_id.get(event["id"]) is event
+
+    def get(self, event_id: int) -> Optional[Event]:
+        return self._by_id.get(event_id)
+
+    def add(self, event: Event) -> None:
+        """Add an event or replace the event with the same ID in place
+
+        A replaced event keeps its position in all indexes, even when its rule or host changed."""
+        event_id = event["id"]
+        keys = (event["rule_id"], (event["host"], event["core_host"]))
+        previous_keys = self._keys.get(event_id)
+        self._by_id[event_id] = event
+        if keys == previous_keys:
+            self._by_rule[keys[0]][event_id] = event
+            self._by_host[keys[1]][event_id] = event
+            return
+
+        if previous_keys is not None:
+            self._unindex(event_id)
+        self._keys[event_id] = keys
+        for index, key in [(self._by_rule, keys[0]), (self._by_host, keys[1])]:
+            events = index.setdefault(key, OrderedDict())
+            events[event_id] = event
+            if previous_keys is not None:
+                self._move_later_events_to_end(events, event_id)
+
+    def _move_later_events_to_end(self, events: 'OrderedDict[int, Event]', event_id: int) -> None:
+        # Looks at all events, but only needed when replacing an event changes its keys
+        later_ids = itertools.dropwhile(lambda other_id: other_id != event_id, self._by_id)
+        next(later_ids)  # the event itself
+        for later_id in later_ids:
+            if later_id in events:
+                events.move_to_end(later_id)
+
+    def remove(self, event: Event) -> bool:
+        """Remove the event, returns False if it is not present"""
+        if event not in self:
+            return False
+        del self._by_id[event["id"]]
+        self._unindex(event["id"])
+        return True
+
+    def _unindex(self, event_id: int) -> None:
+        rule_id, host_key = self._keys.pop(event_id)
+        for index, key in [(self._by_rule, rule_id), (self._by_host, host_key)]:
+            events = index[key]
+            del events[event_id]
+            if not events:
+                del index[key]
+
+    def oldest(self) -> Optional[Event]:
+        return next(iter(self._by_id.values()), None)
+
+    def oldest_of_rule(self, rule_id: str) -> Optional[Event]:
+        return next(iter(self._by_rule.get(rule_id, {}).values()), None)
+
+    def oldest_of_host(self, host_key: HostKey) -> Optional[Event]:
+        return next(iter(self._by_host.get(host_key, {}).values()), None)
+
+    def of_rule(self, rule_id: str) -> List[Event]:
+        """The events of the rule, oldest first"""
+        return list(self._by_rule.get(rule_id, {}).values())
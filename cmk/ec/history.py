@@ -5,19 +5,20 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import os
+import sqlite3
 import struct
 import subprocess
 import threading
 import time
 from logging import Logger
 from pathlib import Path
-from typing import Any, AnyStr, Dict, Iterable, List, Optional, Tuple, Union
+from typing import Any, AnyStr, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 from cmk.utils.log import VERBOSE
 from cmk.utils.render import date_and_time
 
 from .actions import quote_shell_string
-from .query import QueryGET
+from .query import QueryGET, operator_for
 from .settings import Settings
 
 # TODO: As one can see clearly below, we should really have a class hierarchy here...
@@ -35,6 +36,7 @@ class History:
         self._history_columns = history_columns
         self._lock = threading.Lock()
         self._mongodb = MongoDB()
+        self._sqlite = SQLiteDB()
         self._active_history_period = ActiveHistoryPeriod()
         self.reload_configuration(config)
 
@@ -42,29 +44,39 @@ class History:
         self._config = config
         if self._config['archive_mode'] == 'mongodb':
             _reload_configuration_mongodb(self)
+        elif self._config['archive_mode'] == 'sqlite':
+            _reload_configuration_sqlite(self)
         else:
             _reload_configuration_files(self)
 
     def flush(self) -> None:
         if self._config['archive_mode'] == 'mongodb':
             _flush_mongodb(self)
+        elif self._config['archive_mode'] == 'sqlite':
+            _flush_sqlite(self)
         else:
             _flush_files(self)
 
     def add(self, event: Dict[str, Any], what: str, who: str = "", addinfo: str = "") -> None:
         if self._config['archive_mode'] == 'mongodb':
             _add_mongodb(self, event, what, who, addinfo)
+        elif self._config['archive_mode'] == 'sqlite':
+            _add_sqlite(self, event, what, who, addinfo)
         else:
             _add_files(self, event, what, who, addinfo)
 
     def get(self, query: QueryGET) -> Iterable[Any]:
         if self._config['archive_mode'] == 'mongodb':
             return _get_mongodb(self, query)
+        if self._config['archive_mode'] == 'sqlite':
+            return _get_sqlite(self, query)
         return _get_files(self, self._logger, query)
 
     def housekeeping(self) -> None:
         if self._config['archive_mode'] == 'mongodb':
             _housekeeping_mongodb(self)
+        elif self._config['archive_mode'] == 'sqlite':
+            _housekeeping_sqlite(self)
         else:
             _housekeeping_files(self)
 
@@ -277,6 +289,240 @@ def _get_mongodb(history: History, query: QueryGET) -> Iterable[Any]:
     return history_entries
 
 
+#.
+#   .--SQLite--------------------------------------------------------------.
+#   |                    ____   ___  _     _ _                             |
+#   |                   / ___| / _ \| |   (_) |_ ___                       |
+#   |                   \___ \| | | | |   | | __/ _ \                      |
+#   |                    ___) | |_| | |___| | ||  __/                      |
+#   |                   |____/ \__\_\_____|_|\__\___|                      |
+#   |                                                                      |
+#   +----------------------------------------------------------------------+
+#   | The Event Log Archive can be stored in a local SQLite database. It   |
+#   | has indexes on the columns most queries filter on, so neither whole  |
+#   | files have to be read nor every entry has to be parsed.              |
+#   '----------------------------------------------------------------------'
+
+# Columns we have an index on, additionally to history_line
+_SQLITE_INDEXED_COLUMNS = ['history_time', 'event_id', 'event_host', 'event_rule_id']
+
+# Columns holding sequences or None. They are stored like in the history files.
+_SQLITE_SPLIT_COLUMNS = {
+    'event_match_groups',
+    'event_contact_groups',
+    'event_match_groups_syslog_application',
+}
+
+_SQLITE_COMPARISON_OPERATORS = {'=', '>', '<', '>=', '<='}
+
+
+class SQLiteDB:
+    def __init__(self) -> None:
+        super().__init__()
+        # Only used for writing, protected by the history lock
+        self.connection: Optional[sqlite3.Connection] = None
+
+
+def _connect_sqlite(path: Path) -> sqlite3.Connection:
+    connection = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+    # Readers don't block the writer and vice versa. Committing doesn't wait
+    # for the disk, a crash of the OS may lose the latest entries, though.
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.create_function("ec_filter", 3, _sqlite_filter, deterministic=True)
+    return connection
+
+
+def _sqlite_filter(operator_name: str, value: Any, argument: Any) -> bool:
+    return value is not None and bool(operator_for(operator_name)(value, argument))
+
+
+def _sqlite_column_type(default: Any) -> str:
+    if isinstance(default, (bool, int)):
+        return "INTEGER"
+    if isinstance(default, float):
+        return "REAL"
+    return "TEXT"
+
+
+def _reload_configuration_sqlite(history: History) -> None:
+    with history._lock:
+        if history._sqlite.connection is not None:
+            return
+        path = history._settings.paths.history_db_file.value
+        path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not path.exists()
+        connection = _connect_sqlite(path)
+        _update_sqlite_schema(history, connection)
+        history._sqlite.connection = connection
+        if is_new:
+            _import_history_files(history, connection)
+
+
+def _update_sqlite_schema(history: History, connection: sqlite3.Connection) -> None:
+    connection.execute("CREATE TABLE IF NOT EXISTS history"
+                       " (history_line INTEGER PRIMARY KEY AUTOINCREMENT)")
+    # New event columns are added on the fly, the old rows get the default value.
+    existing = {row[1] for row in connection.execute("PRAGMA table_info(history)")}
+    for column_name, default in history._history_columns[1:]:
+        if column_name not in existing:
+            connection.execute("ALTER TABLE history ADD COLUMN %s %s DEFAULT %s" %
+                               (column_name, _sqlite_column_type(default),
+                                _sqlite_literal(_to_sqlite(column_name, default))))
+    for column_name in _SQLITE_INDEXED_COLUMNS:
+        connection.execute("CREATE INDEX IF NOT EXISTS history_%s ON history (%s)" %
+                           (column_name, column_name))
+
+
+def _sqlite_literal(value: Any) -> str:
+    if isinstance(value, str):
+        return "'%s'" % value.replace("'", "''")
+    return repr(value)
+
+
+def _to_sqlite(column_name: str, value: Any) -> Any:
+    if column_name in _SQLITE_SPLIT_COLUMNS:
+        return quote_tab(value).decode("utf-8")
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def _from_sqlite(history: History) -> Callable[[Tuple[Any, ...]], List[Any]]:
+    split_indexes = [
+        index for index, (column_name, _default) in enumerate(history._history_columns)
+        if column_name in _SQLITE_SPLIT_COLUMNS
+    ]
+    bool_indexes = [
+        index for index, (_column_name, default) in enumerate(history._history_columns)
+        if isinstance(default, bool)
+    ]
+
+    def convert(row: Tuple[Any, ...]) -> List[Any]:
+        values = list(row)
+        for index in split_indexes:
+            values[index] = _unsplit(values[index])
+        for index in bool_indexes:
+            values[index] = bool(values[index])
+        return values
+
+    return convert
+
+
+def _insert_sqlite(history: History, connection: sqlite3.Connection,
+                   rows: Iterable[List[Any]]) -> None:
+    column_names = [column_name for column_name, _default in history._history_columns[1:]]
+    connection.executemany(
+        "INSERT INTO history (%s) VALUES (%s)" %
+        (", ".join(column_names), ", ".join("?" * len(column_names))),
+        ([_to_sqlite(column_name, value)
+          for column_name, value in zip(column_names, row)]
+         for row in rows),
+    )
+
+
+def _import_history_files(history: History, connection: sqlite3.Connection) -> None:
+    """Take over the entries of the history files, the files are kept"""
+    paths = sorted(history._settings.paths.history_dir.value.glob('*.log'),
+                   key=lambda path: int(str(path.name)[:-4]))
+    for path in paths:
+        history._logger.info("Importing history file %s into %s" %
+                             (path, history._settings.paths.history_db_file.value))
+        connection.execute("BEGIN")
+        try:
+            _insert_sqlite(history, connection, _read_history_file(history, path))
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+
+def _read_history_file(history: History, path: Path) -> Iterable[List[Any]]:
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                parts: List[Any] = line.rstrip('\n').split('\t')
+                _convert_history_line(history, parts)
+            except Exception as e:
+                history._logger.exception("Invalid line '%r' in history file %s: %s" %
+                                          (line, path, e))
+                continue
+            yield parts
+
+
+def _flush_sqlite(history: History) -> None:
+    with history._lock:
+        if history._sqlite.connection is not None:
+            history._sqlite.connection.execute("DELETE FROM history")
+    _flush_files(history)
+
+
+def _housekeeping_sqlite(history: History) -> None:
+    horizon = time.time() - history._config["history_lifetime"] * 86400
+    with history._lock:
+        if history._sqlite.connection is not None:
+            history._sqlite.connection.execute("DELETE FROM history WHERE history_time < ?",
+                                               (horizon,))
+            history._sqlite.connection.execute("PRAGMA optimize")
+    # The history files are kept after importing them. Let them expire, too.
+    _housekeeping_files(history)
+
+
+def _add_sqlite(history: History, event: Dict[str, Any], what: str, who: str,
+                addinfo: str) -> None:
+    _log_event(history._config, history._logger, event, what, who, addinfo)
+    row = [time.time(), scrub_string(what), scrub_string(who), scrub_string(addinfo)]
+    row += [event.get(colname[6:], defval) for colname, defval in history._event_columns]
+    with history._lock:
+        if history._sqlite.connection is None:
+            raise Exception("History database %s is not open" %
+                            history._settings.paths.history_db_file.value)
+        _insert_sqlite(history, history._sqlite.connection, [row])
+
+
+def _get_sqlite(history: History, query: QueryGET) -> Iterable[Any]:
+    filters, limit = query.filters, query.limit
+
+    # All filters on scalar columns are done by SQLite: The comparisons are
+    # able to use the indexes, the other operators at least don't need the
+    # entries to be converted. The remaining filters are applied afterwards.
+    conditions: List[str] = []
+    parameters: List[Any] = []
+    for column_name, operator_name, _predicate, argument in filters:
+        if column_name in _SQLITE_SPLIT_COLUMNS or isinstance(argument, (list, tuple)):
+            continue
+        if operator_name in _SQLITE_COMPARISON_OPERATORS:
+            conditions.append("%s %s ?" % (column_name, operator_name))
+            parameters.append(_to_sqlite(column_name, argument))
+        else:
+            conditions.append("ec_filter(?, %s, ?)" % column_name)
+            parameters += [operator_name, argument]
+
+    column_names = [column_name for column_name, _default in history._history_columns]
+    statement = "SELECT %s FROM history" % ", ".join(column_names)
+    if conditions:
+        statement += " WHERE " + " AND ".join(conditions)
+    # Newest entries first. The index on the time delivers them in this order,
+    # so a limit doesn't need all matching entries to be sorted first.
+    statement += " ORDER BY history_time DESC, history_line DESC"
+    history._logger.debug("History query: %s %r", statement, parameters)
+
+    # A connection of our own: WAL allows reading while events are added.
+    connection = _connect_sqlite(history._settings.paths.history_db_file.value)
+    try:
+        from_sqlite = _from_sqlite(history)
+        history_entries: List[Any] = []
+        for row in connection.execute(statement, parameters):
+            if limit is not None and len(history_entries) > limit:
+                break
+            values = from_sqlite(row)
+            if query.filter_row(values):
+                history_entries.append(values)
+        return history_entries
+    finally:
+        connection.close()
+
+
 #.
 #   .--History-------------------------------------------------------------.
 #   |                   _   _ _     _                                      |
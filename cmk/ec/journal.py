@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Journal of the changes to the event status
+
+Instead of writing the whole event status on each save, only the changes
+since the previous save are appended to the journal. From time to time the
+journal is compacted into a new status file, the snapshot. Each journal record
+has a sequence number and the snapshot knows the number of the last record it
+contains, so the records which are already part of the snapshot are skipped
+when the status is loaded.
+
+While a new snapshot is written, the records it contains are kept in the old
+journal file, so a crash during the compaction does not lose anything.
+"""
+
+import ast
+from logging import Logger
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+
+class StatusJournal:
+    def __init__(self, path: Path, logger: Logger) -> None:
+        super().__init__()
+        self._path = path
+        self._old_path = path.parent / (path.name + ".old")
+        self._logger = logger
+
+    @property
+    def size(self) -> int:
+        """The number of bytes in the journal files"""
+        size = 0
+        for path in [self._old_path, self._path]:
+            try:
+                size += path.stat().st_size
+            except FileNotFoundError:
+                pass
+        return size
+
+    def append(self, record: Dict[str, Any]) -> None:
+        with self._path.open(mode="ab") as f:
+            f.write((repr(record) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def records(self) -> Iterator[Dict[str, Any]]:
+        """Yield the records of the old and the current journal file, oldest first"""
+        for path in [self._old_path, self._path]:
+            try:
+                lines: List[bytes] = path.read_bytes().splitlines()
+            except FileNotFoundError:
+                continue
+
+            for line_number, line in enumerate(lines, 1):
+                try:
+                    yield ast.literal_eval(line.decode("utf-8"))
+                except (SyntaxError, ValueError) as e:
+                    # The last record may be incomplete after a crash
+                    self._logger.warning("Ignoring broken journal record in %s, line %d: %s" %
+                                         (path, line_number, e))
+                    break
+
+    def start_compaction(self) -> None:
+        """Move the current records out of the way for a new snapshot
+
+        If the previous compaction has failed, its records are still needed:
+        the current records are added to them, and the compaction is retried.
+        """
+        if not self._old_path.exists():
+            try:
+                self._path.rename(self._old_path)
+            except FileNotFoundError:
+                pass
+            return
+
+        try:
+            records = self._path.read_bytes()
+        except FileNotFoundError:
+            return
+        with self._old_path.open(mode="ab") as f:
+            f.write(records)
+            f.flush()
+            os.fsync(f.fileno())
+        self._path.unlink()
+
+    def finish_compaction(self) -> None:
+        """Remove the records which are contained in the new snapshot"""
+        try:
+            self._old_path.unlink()
+        except FileNotFoundError:
+            pass
+
+    def remove(self) -> None:
+        for path in [self._old_path, self._path]:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
@@ -13,6 +13,7 @@
 
 import abc
 import ast
+import copy
 import errno
 import json
 from logging import Logger, getLogger
@@ -50,9 +51,13 @@ import cmk.utils.store as store
 from .actions import do_notify, do_event_action, do_event_actions, event_has_opened
 from .core_queries import query_hosts_scheduled_downtime_depth, query_timeperiods_in
 from .crash_reporting import ECCrashReport, CrashReportStore
+from .event_store import EventStore
 from .history import ActiveHistoryPeriod, History, scrub_string, quote_tab, get_logfile
 from .host_config import HostConfig, HostInfo
+from .journal import StatusJournal
+from .pipeline import Pipeline
 from .query import MKClientError, Query, QueryGET, filter_operator_in
+from .rule_index import RuleIndex
 from .rule_packs import load_config as load_config_using
 from .settings import FileDescriptor, PortNumber, Settings, settings as create_settings
 from .snmp import SNMPTrapEngine
@@ -508,7 +513,55 @@ class Perfcounters:
 #   '----------------------------------------------------------------------'
 
 
+# Translate a hostname if this is configured. We are
+# *really* sorry: this code snipped is copied from modules/check_mk_base.py.
+# There is still no common library. Please keep this in sync with the
+# original code
+def translate_hostname(translation: Dict[str, Any], backedhost: str) -> str:
+    # Here comes the original code from modules/check_mk_base.py
+    if translation:
+        # 1. Case conversion
+        caseconf = translation.get("case")
+        if caseconf == "upper":
+            backedhost = backedhost.upper()
+        elif caseconf == "lower":
+            backedhost = backedhost.lower()
+
+        # 2. Drop domain part (not applied to IP addresses!)
+        if translation.get("drop_domain") and backedhost:
+            # only apply if first part does not convert successfully into an int
+            firstpart = backedhost.split(".", 1)[0]
+            try:
+                int(firstpart)
+            except Exception:
+                backedhost = firstpart
+
+        # 3. Regular expression conversion
+        if "regex" in translation:
+            for regex, subst in translation["regex"]:
+                if not regex.endswith('$'):
+                    regex += '$'
+                rcomp = cmk.utils.regex.regex(regex)
+                mo = rcomp.match(backedhost)
+                if mo:
+                    backedhost = subst
+                    for nr, text in enumerate(mo.groups()):
+                        backedhost = backedhost.replace("\\%d" % (nr + 1), text)
+                    break
+
+        # 4. Explicity mapping
+        for from_host, to_host in translation.get("mapping", []):
+            if from_host == backedhost:
+                backedhost = to_host
+                break
+
+    return backedhost
+
+
 class EventServer(ECServerThread):
+    # Number of lines the workers of the event pipeline get at once
+    _pipeline_batch_size = 256
+
     month_names = {
         "Jan": 1,
         "Feb": 2,
@@ -548,6 +601,7 @@ class EventServer(ECServerThread):
 
         # TODO: Improve type!
         self._rules: List[Any] = []
+        self._rule_index = RuleIndex([])
         self._hash_stats = []
         for _unused_facility in range(32):
             self._hash_stats.append([0] * 8)
@@ -561,6 +615,8 @@ class EventServer(ECServerThread):
         self._message_period = ActiveHistoryPeriod()
         self._rule_matcher = RuleMatcher(self._logger, config)
         self._event_creator = EventCreator(self._logger, config)
+        self._pipeline: Optional[Pipeline] = None
+        self._pipeline_rules: List[Any] = []
 
         # HACK for testing: The real fix would involve breaking up these huge
         # class monsters.
@@ -581,6 +637,7 @@ class EventServer(ECServerThread):
         columns += Perfcounters.status_columns()
         columns += cls._replication_columns()
         columns += cls._event_limit_columns()
+        columns += cls._persistence_columns()
         return columns
 
     @classmethod
@@ -610,6 +667,13 @@ class EventServer(ECServerThread):
             ("status_event_limit_active_overall", False),
         ]
 
+    @classmethod
+    def _persistence_columns(cls):
+        return [
+            ("status_save_duration", 0.0),
+            ("status_journal_size", 0),
+        ]
+
     def get_status(self):
         row: List[Any] = []
 
@@ -617,6 +681,7 @@ class EventServer(ECServerThread):
         row += self._perfcounters.get_status()
         row += self._add_replication_status()
         row += self._add_event_limit_status()
+        row += self._add_persistence_status()
 
         return [row]
 
@@ -650,6 +715,12 @@ class EventServer(ECServerThread):
             self.is_overall_event_limit_active(),
         ]
 
+    def _add_persistence_status(self) -> List[Any]:
+        return [
+            self._event_status.save_duration,
+            self._event_status.journal_size,
+        ]
+
     def create_pipe(self):
         path = self.settings.paths.event_pipe.value
         try:
@@ -767,9 +838,12 @@ class EventServer(ECServerThread):
         client_sockets: Dict[int, Tuple[socket.socket, Any, bytes]] = {}
         select_timeout = 1
         while not self._terminate_event.is_set():
+            self._update_pipeline()
+            pipeline_list = [] if self._pipeline is None else [self._pipeline.fileno()]
             try:
-                readable = select.select(listen_list + list(client_sockets.keys()), [], [],
-                                         select_timeout)[0]
+                readable = select.select(
+                    listen_list + list(client_sockets.keys()) + pipeline_list, [], [],
+                    select_timeout)[0]
             except select.error as e:
                 if e.args[0] != errno.EINTR:
                     raise
@@ -881,6 +955,66 @@ class EventServer(ECServerThread):
             except StopIteration:
                 select_timeout = 1  # restore default select timeout
 
+            if self._pipeline is not None:
+                self._process_pipeline_results()
+
+        if self._pipeline is not None:
+            self._stop_pipeline()
+
+    def _update_pipeline(self) -> None:
+        """Start, restart or stop the event pipeline as configured
+
+        The workers are started with the compiled rules, so they are restarted
+        whenever the rules have been compiled again.
+        """
+        num_workers = self._config["event_workers"]
+        if self._pipeline is not None and (self._pipeline_rules is not self._rules or
+                                           self._pipeline.num_workers != num_workers):
+            self._stop_pipeline()
+
+        if self._pipeline is None and num_workers:
+            with self._lock_configuration:
+                self._logger.info("Starting event pipeline with %d workers" % num_workers)
+                self._pipeline_rules = self._rules
+                log_file = (None if self.settings.options.foreground else str(
+                    self.settings.paths.log_file.value))
+                self._pipeline = Pipeline(num_workers, _init_classifier,
+                                          (log_file, self._logger.getEffectiveLevel(),
+                                           self._logger, self._config, self._rules,
+                                           self._rule_hash, self._rule_index))
+
+    def _stop_pipeline(self) -> None:
+        assert self._pipeline is not None
+        self._process_pipeline_results(max_pending=0)
+        self._pipeline.close()
+        self._pipeline = None
+
+    def _submit_to_pipeline(self, lines: List[bytes], address: Optional[Any]) -> None:
+        assert self._pipeline is not None
+        for start in range(0, len(lines), self._pipeline_batch_size):
+            # Rather wait for the oldest lines than letting the backlog grow
+            self._process_pipeline_results(max_pending=self._pipeline.max_pending - 1)
+            self._pipeline.submit(_classify_lines,
+                                  (lines[start:start + self._pipeline_batch_size], address),
+                                  self._pipeline_rules)
+
+    def _process_pipeline_results(self, max_pending: Optional[int] = None) -> None:
+        assert self._pipeline is not None
+        # The events are processed in the order the lines came in, so the
+        # events of one source keep their order
+        for rules, classified in self._pipeline.results(max_pending):
+            for event, results in classified:
+                try:
+
+                    def handler(event=event, results=results, rules=rules):
+                        self.process_translated_event(
+                            event, [(rules[position], result) for position, result in results])
+
+                    self.process_raw_data(handler)
+                except Exception as e:
+                    self._logger.exception('Exception handling a log line (skipping this one): %s' %
+                                           e)
+
     # Processes incoming data, just a wrapper between the real data and the
     # handler function to record some statistics etc.
     def process_raw_data(self, handler):
@@ -897,6 +1031,10 @@ class EventServer(ECServerThread):
     # Takes several lines of messages, handles encoding and processes them separated
     def process_raw_lines(self, data: bytes, address: Optional[Any] = None) -> None:
         lines = data.splitlines()
+        if self._pipeline is not None:
+            self._submit_to_pipeline(lines, address)
+            return
+
         for line_bytes in lines:
             line = scrub_and_decode(line_bytes.rstrip())
             if line:
@@ -1089,9 +1227,9 @@ class EventServer(ECServerThread):
                 # First look for case 1: rule that already have at least one hit
                 # and this events in the state "counting" exist.
                 events_to_delete = []
-                events = self._event_status.events()
+                events = self._event_status.events_of_rule(rule["id"])
                 for nr, event in enumerate(events):
-                    if event["rule_id"] == rule["id"] and event["phase"] == "counting":
+                    if event["phase"] == "counting":
                         # time has elapsed. Now lets see if we have reached
                         # the neccessary count:
                         if event["count"] < expected_count:  # no -> trigger alarm
@@ -1135,10 +1273,8 @@ class EventServer(ECServerThread):
             merge, reset_ack = merge
 
         if merge != "never":
-            for event in self._event_status.events():
-                if event["rule_id"] == rule["id"] and \
-                        (event["phase"] == "open" or
-                         (event["phase"] == "ack" and merge == "acked")):
+            for event in self._event_status.events_of_rule(rule["id"]):
+                if event["phase"] == "open" or (event["phase"] == "ack" and merge == "acked"):
                     merge_event = event
                     break
 
@@ -1272,6 +1408,7 @@ class EventServer(ECServerThread):
         self._logger.info("Compiled %d active rules (ignoring %d disabled rules)" %
                           (count_rules, count_disabled))
         if self._config["rule_optimizer"]:
+            self._rule_index = RuleIndex(self._rules)
             self._logger.info(
                 "Rule hash: %d rules - %d hashed, %d unspecific" %
                 (len(self._rules), len(self._rules) - count_unspecific, count_unspecific))
@@ -1358,26 +1495,38 @@ class EventServer(ECServerThread):
 
     def process_event(self, event: Event) -> None:
         self.do_translate_hostname(event)
+        self.process_translated_event(event, ((rule, None) for rule in self.select_rules(event)))
 
+    def select_rules(self, event: Event) -> List[Any]:
+        # Rule optimizer
+        if self._config["rule_optimizer"]:
+            return self._rule_index.select(
+                event,
+                self._rule_hash.get(event["facility"], {}).get(event["priority"], []))
+        return self._rules
+
+    def process_translated_event(self, event: Event,
+                                 rule_candidates: Iterable[Tuple[Any, Any]]) -> None:
+        """Process an event with its host name already translated
+
+        The candidates are pairs of a rule and the result of matching it, which
+        is None in case the rule has not been tried yet.
+        """
         # Log all incoming messages into a syslog-like text file if that is enabled
         if self._config["log_messages"]:
             self.log_message(event)
 
-        # Rule optimizer
         if self._config["rule_optimizer"]:
             self._hash_stats[event["facility"]][event["priority"]] += 1
-            rule_candidates = self._rule_hash.get(event["facility"], {}).get(event["priority"], [])
-        else:
-            rule_candidates = self._rules
 
         skip_pack = None
-        for rule in rule_candidates:
+        for rule, prematched in rule_candidates:
             if skip_pack and rule["pack"] == skip_pack:
                 continue  # still in the rule pack that we want to skip
             skip_pack = None  # new pack, reset skipping
 
             try:
-                result = self.event_rule_matches(rule, event)
+                result = self.event_rule_matches(rule, event, prematched)
             except Exception as e:
                 self._logger.exception('  Exception during matching:\n%s' % e)
                 result = False
@@ -1525,10 +1674,17 @@ class EventServer(ECServerThread):
     # normal match and True for a cancelling match and the groups is a tuple
     # if matched regex groups in either text (normal) or match_ok (cancelling)
     # match.
-    def event_rule_matches(self, rule, event):
+    def event_rule_matches(self, rule, event, prematched=None):
         self._perfcounters.count("rule_tries")
         with self._lock_configuration:
-            result = self._rule_matcher.event_rule_matches_non_inverted(rule, event)
+            if prematched is None:
+                result = self._rule_matcher.event_rule_matches_non_inverted(rule, event)
+            else:
+                # Matched by an EventClassifier, which leaves the time periods to us
+                result = prematched
+                if result is not False and \
+                        not self._rule_matcher.event_rule_matches_timeperiod(rule, event):
+                    result = False
             if rule.get("invert_matching"):
                 if result is False:
                     result = False, {}
@@ -1583,51 +1739,8 @@ class EventServer(ECServerThread):
         if "set_contact" in rule and "contact" not in event:
             event["contact"] = replace_groups(rule["set_contact"], event.get("contact", ""), groups)
 
-    # Translate a hostname if this is configured. We are
-    # *really* sorry: this code snipped is copied from modules/check_mk_base.py.
-    # There is still no common library. Please keep this in sync with the
-    # original code
     def translate_hostname(self, backedhost):
-        translation = self._config["hostname_translation"]
-
-        # Here comes the original code from modules/check_mk_base.py
-        if translation:
-            # 1. Case conversion
-            caseconf = translation.get("case")
-            if caseconf == "upper":
-                backedhost = backedhost.upper()
-            elif caseconf == "lower":
-                backedhost = backedhost.lower()
-
-            # 2. Drop domain part (not applied to IP addresses!)
-            if translation.get("drop_domain") and backedhost:
-                # only apply if first part does not convert successfully into an int
-                firstpart = backedhost.split(".", 1)[0]
-                try:
-                    int(firstpart)
-                except Exception:
-                    backedhost = firstpart
-
-            # 3. Regular expression conversion
-            if "regex" in translation:
-                for regex, subst in translation["regex"]:
-                    if not regex.endswith('$'):
-                        regex += '$'
-                    rcomp = cmk.utils.regex.regex(regex)
-                    mo = rcomp.match(backedhost)
-                    if mo:
-                        backedhost = subst
-                        for nr, text in enumerate(mo.groups()):
-                            backedhost = backedhost.replace("\\%d" % (nr + 1), text)
-                        break
-
-            # 4. Explicity mapping
-            for from_host, to_host in translation.get("mapping", []):
-                if from_host == backedhost:
-                    backedhost = to_host
-                    break
-
-        return backedhost
+        return translate_hostname(self._config["hostname_translation"], backedhost)
 
     def do_translate_hostname(self, event: Event) -> None:
         try:
@@ -2146,11 +2259,17 @@ class EventCreator:
 
 
 class RuleMatcher:
-    def __init__(self, logger: Logger, config: Dict[str, Any]) -> None:
+    def __init__(self,
+                 logger: Logger,
+                 config: Dict[str, Any],
+                 check_timeperiods: bool = True) -> None:
         super().__init__()
         self._logger = logger
         self._config = config
         self._time_periods = TimePeriods(logger)
+        # The workers of the event pipeline leave the time periods, which are
+        # queried from the core, to the event server
+        self._check_timeperiods = check_timeperiods
 
     @property
     def _debug_rules(self):
@@ -2308,6 +2427,8 @@ class RuleMatcher:
         return True
 
     def event_rule_matches_timeperiod(self, rule, event):
+        if not self._check_timeperiods:
+            return True
         if "match_timeperiod" in rule and not self._time_periods.active(rule["match_timeperiod"]):
             if self._debug_rules:
                 self._logger.info("  did not match, because timeperiod %s is not active" %
@@ -2371,6 +2492,102 @@ class RuleMatcher:
         return True
 
 
+class EventClassifier:
+    """Parses messages and matches them against the rules
+
+    This is the part of processing a message which depends only on the message
+    and on the configuration, so the workers of the event pipeline can do it in
+    parallel. The time periods of the rules are left to the event server.
+    """
+    def __init__(self, logger: Logger, config: Dict[str, Any], rules: List[Any],
+                 rule_hash: Dict[int, Dict[int, Any]], rule_index: RuleIndex) -> None:
+        super().__init__()
+        self._logger = logger
+        self._config = config
+        self._rules = rules
+        self._rule_hash = rule_hash
+        self._rule_index = rule_index
+        self._positions = {id(rule): position for position, rule in enumerate(rules)}
+        self._event_creator = EventCreator(logger, config)
+        self._rule_matcher = RuleMatcher(logger, config, check_timeperiods=False)
+
+    def classify(self, line: str, address: Optional[Any]) -> Tuple[Event, List[Tuple[int, Any]]]:
+        """Create the event of a line and match it against the rules it may match
+
+        Returns the event with the translated host name and pairs of the position
+        of a rule and its non-inverted matching result. The rules are tried up to
+        the first one which matches for sure.
+        """
+        if self._config["debug_rules"]:
+            if address:
+                self._logger.info(u"Processing message from %r: '%s'" % (address, line))
+            else:
+                self._logger.info(u"Processing message '%s'" % line)
+
+        event = self._event_creator.create_event_from_line(line, address)
+        try:
+            event["host"] = translate_hostname(self._config["hostname_translation"], event["host"])
+        except Exception as e:
+            if self._config["debug_rules"]:
+                self._logger.exception('Unable to parse host "%s" (%s)' % (event.get("host"), e))
+            event["host"] = ""
+
+        if self._config["rule_optimizer"]:
+            rule_candidates = self._rule_index.select(
+                event,
+                self._rule_hash.get(event["facility"], {}).get(event["priority"], []))
+        else:
+            rule_candidates = self._rules
+
+        results: List[Tuple[int, Any]] = []
+        for rule in rule_candidates:
+            try:
+                result = self._rule_matcher.event_rule_matches_non_inverted(rule, event)
+            except Exception as e:
+                self._logger.exception('  Exception during matching:\n%s' % e)
+                result = False
+            results.append((self._positions[id(rule)], result))
+
+            if result is not False and not rule.get("invert_matching") \
+                    and "match_timeperiod" not in rule and rule.get("drop") != "skip_pack":
+                break  # The event server will not look at further rules
+        return event, results
+
+    def classify_lines(self, lines: List[bytes],
+                       address: Optional[Any]) -> List[Tuple[Event, List[Tuple[int, Any]]]]:
+        classified = []
+        for line_bytes in lines:
+            line = scrub_and_decode(line_bytes.rstrip())
+            if line:
+                try:
+                    classified.append(self.classify(line, address))
+                except Exception as e:
+                    self._logger.exception('Exception handling a log line (skipping this one): %s' %
+                                           e)
+        return classified
+
+
+# The classifier of an event pipeline worker process
+_classifier: Optional[EventClassifier] = None
+
+
+def _init_classifier(log_file: Optional[str], log_level: int, logger: Logger, *args: Any) -> None:
+    # The workers don't inherit the logging setup of the event daemon
+    if log_file is None:
+        log.setup_logging_handler(sys.stderr)
+    else:
+        log.open_log(log_file)
+    logger.setLevel(log_level)
+    global _classifier
+    _classifier = EventClassifier(logger, *args)
+
+
+def _classify_lines(
+        batch: Tuple[List[bytes], Optional[Any]]) -> List[Tuple[Event, List[Tuple[int, Any]]]]:
+    assert _classifier is not None
+    return _classifier.classify_lines(*batch)
+
+
 #.
 #   .--Status Queries------------------------------------------------------.
 #   |  ____  _        _                ___                  _              |
@@ -3079,6 +3296,18 @@ def run_eventd(terminate_main_event: Any, settings: Settings, config: Dict[str,
 #   '----------------------------------------------------------------------'
 
 
+# Compact smaller journals only when they are larger than the snapshot
+_MIN_JOURNAL_COMPACTION_SIZE = 4 * 1024 * 1024
+
+
+def _copy_event(event: Event) -> Event:
+    # Nested values, e.g. lists of contact groups, may be changed in place as well
+    return {
+        key: copy.deepcopy(value) if isinstance(value, (list, dict, set)) else value
+        for key, value in event.items()
+    }
+
+
 class EventStatus:
     def __init__(self, settings: Settings, config: Dict[str, Any], perfcounters: Perfcounters,
                  history: History, logger: Logger) -> None:
@@ -3088,14 +3317,20 @@ class EventStatus:
         self.lock = threading.Lock()
         self._history = history
         self._logger = logger
+        self._journal = StatusJournal(settings.paths.status_journal_file.value, logger)
+        self._journal_sequence = 0
+        # Copies of the events as they are on disk, by event ID. None means unknown.
+        self._saved_events: Optional[Dict[int, Event]] = None
+        self._snapshot_size = 0
+        self._compaction: Optional[threading.Thread] = None
+        self.save_duration = 0.0
         self.flush()
 
     def reload_configuration(self, config: Dict[str, Any]) -> None:
         self._config = config
 
     def flush(self) -> None:
-        # TODO: Improve types!
-        self._events: List[Any] = []
+        self._events = EventStore()
         self._next_event_id = 1
         self._rule_stats: Dict[str, int] = {}
         # needed for expecting rules
@@ -3107,14 +3342,14 @@ class EventStatus:
         # - number of rule hits
         # - number of rule misses
 
-    def events(self) -> List[Any]:
-        # TODO: Improve type!
-        return self._events
+    def events(self) -> List[Event]:
+        return list(self._events)
 
-    def event(self, eid):
-        for event in self._events:
-            if event["id"] == eid:
-                return event
+    def event(self, eid: int) -> Optional[Event]:
+        return self._events.get(eid)
+
+    def events_of_rule(self, rule_id: str) -> List[Event]:
+        return self._events.of_rule(rule_id)
 
     # Return beginning of current expectation interval. For new rules
     # we start with the next interval in future.
@@ -3157,30 +3392,116 @@ class EventStatus:
     def pack_status(self):
         return {
             "next_event_id": self._next_event_id,
-            "events": self._events,
+            "events": list(self._events),
             "rule_stats": self._rule_stats,
             "interval_starts": self._interval_starts,
         }
 
     def unpack_status(self, status):
         self._next_event_id = status["next_event_id"]
-        self._events = status["events"]
+        self._events = EventStore(status["events"])
         self._rule_stats = status["rule_stats"]
         self._interval_starts = status["interval_starts"]
 
     def save_status(self):
         now = time.time()
-        status = self.pack_status()
+        if self._config["status_persistence"] == "journal":
+            self._save_journal()
+        else:
+            self._wait_for_compaction()
+            self._write_status(self.pack_status())
+            self._journal.remove()
+            self._saved_events = None
+        self.save_duration = time.time() - now
+        self._logger.log(VERBOSE, "Saved event state in %.3fms.", self.save_duration * 1000)
+
+    def _write_status(self, status: Dict[str, Any]) -> int:
         path = self.settings.paths.status_file.value
         path_new = path.parent / (path.name + '.new')
         # Believe it or not: cPickle is more than two times slower than repr()
+        data = (repr(status) + "\n").encode("utf-8")
         with path_new.open(mode='wb') as f:
-            f.write((repr(status) + "\n").encode("utf-8"))
+            f.write(data)
             f.flush()
             os.fsync(f.fileno())
         path_new.rename(path)
-        elapsed = time.time() - now
-        self._logger.log(VERBOSE, "Saved event state to %s in %.3fms.", path, elapsed * 1000)
+        return len(data)
+
+    @property
+    def journal_size(self) -> int:
+        return self._journal.size
+
+    def _save_journal(self) -> None:
+        """Append the changes since the last save to the journal
+
+        The events are compared with their copies from the last save, so
+        there is no need to track each change of an event.
+        """
+        baseline_known = self._saved_events is not None
+        saved_events = self._saved_events or {}
+        events: Dict[int, Event] = {}
+        changed = []
+        for event in self._events:
+            saved = saved_events.get(event["id"])
+            if saved is None or saved != event:
+                saved = _copy_event(event)
+                changed.append(saved)
+            events[event["id"]] = saved
+        removed = [event_id for event_id in saved_events if event_id not in events]
+
+        self._saved_events = events
+        if not baseline_known:
+            # Nothing to compare with, e.g. after switching from snapshots
+            self._wait_for_compaction()
+            self._journal.remove()
+            self._snapshot_size = self._write_status(
+                dict(self.pack_status(), journal_sequence=self._journal_sequence))
+            return
+
+        self._journal_sequence += 1
+        self._journal.append({
+            "sequence": self._journal_sequence,
+            "next_event_id": self._next_event_id,
+            "events": changed,
+            "removed": removed,
+            "rule_stats": self._rule_stats,
+            "interval_starts": self._interval_starts,
+        })
+        if self._journal.size > max(self._snapshot_size, _MIN_JOURNAL_COMPACTION_SIZE):
+            self._start_compaction()
+
+    def _start_compaction(self) -> None:
+        """Write the saved events to a new snapshot in the background"""
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        self._journal.start_compaction()
+
+        assert self._saved_events is not None
+        status = {
+            "next_event_id": self._next_event_id,
+            "events": list(self._saved_events.values()),
+            "rule_stats": dict(self._rule_stats),
+            "interval_starts": dict(self._interval_starts),
+            "journal_sequence": self._journal_sequence,
+        }
+
+        def compact():
+            try:
+                now = time.time()
+                self._snapshot_size = self._write_status(status)
+                self._journal.finish_compaction()
+                self._logger.log(VERBOSE, "Compacted the event state journal in %.3fms.",
+                                 (time.time() - now) * 1000)
+            except Exception as e:
+                # The records are kept and the next save starts over
+                self._logger.exception("Error compacting the event state journal: %s" % e)
+
+        self._compaction = threading.Thread(target=compact, name="EventStatusCompaction")
+        self._compaction.start()
+
+    def _wait_for_compaction(self) -> None:
+        if self._compaction is not None:
+            self._compaction.join()
 
     def reset_counters(self, rule_id):
         if rule_id:
@@ -3196,24 +3517,60 @@ class EventStatus:
             try:
                 status = ast.literal_eval(path.read_text(encoding="utf-8"))
                 self._next_event_id = status["next_event_id"]
-                self._events = status["events"]
+                events = status["events"]
                 self._rule_stats = status["rule_stats"]
                 self._interval_starts = status.get("interval_starts", {})
+                self._journal_sequence = status.get("journal_sequence", 0)
+                self._snapshot_size = path.stat().st_size
                 self._logger.info("Loaded event state from %s." % path)
             except Exception as e:
                 self._logger.exception("Error loading event state from %s: %s" % (path, e))
                 raise
 
-        # Add new columns
-        for event in self._events:
-            event.setdefault("ipaddress", "")
+            # Add new columns
+            for event in events:
+                event.setdefault("ipaddress", "")
+
+                if "core_host" not in event:
+                    event_server.add_core_host_to_event(event)
+                    event["host_in_downtime"] = False
+
+            # core_host is needed to index the events
+            self._events = EventStore(events)
 
-            if "core_host" not in event:
-                event_server.add_core_host_to_event(event)
-                event["host_in_downtime"] = False
+        if self._replay_journal():
+            # Start over with a snapshot containing everything
+            self._snapshot_size = self._write_status(
+                dict(self.pack_status(), journal_sequence=self._journal_sequence))
+        self._journal.remove()
 
-        # core_host is needed to initialize the status
         self._initialize_event_limit_status()
+        self._saved_events = {event["id"]: _copy_event(event) for event in self._events}
+
+    def _replay_journal(self) -> bool:
+        """Apply the journal records which are newer than the loaded snapshot"""
+        replayed = False
+        for record in self._journal.records():
+            if record["sequence"] <= self._journal_sequence:
+                continue  # already contained in the snapshot
+
+            for event_id in record["removed"]:
+                removed_event = self._events.get(event_id)
+                if removed_event is not None:
+                    self._events.remove(removed_event)
+            for event in record["events"]:
+                self._events.add(event)  # replaces the previous version of the event
+
+            self._next_event_id = record["next_event_id"]
+            self._rule_stats = record["rule_stats"]
+            self._interval_starts = record["interval_starts"]
+            self._journal_sequence = record["sequence"]
+            replayed = True
+
+        if replayed:
+            self._logger.info("Replayed event state journal up to record %d." %
+                              self._journal_sequence)
+        return replayed
 
     # Called on Event Console initialization from status file to initialize
     # the current event limit state -> Sets internal counters which are
@@ -3249,7 +3606,7 @@ class EventStatus:
         self._perfcounters.count("events")
         event["id"] = self._next_event_id
         self._next_event_id += 1
-        self._events.append(event)
+        self._events.add(event)
         self.num_existing_events += 1
         self._count_event_add(event)
         self._history.add(event, "NEW")
@@ -3262,42 +3619,28 @@ class EventStatus:
         self._history.add(event, "ARCHIVED")
 
     def remove_event(self, event: Event) -> None:
-        try:
-            self._events.remove(event)
+        if self._events.remove(event):
             self._count_event_remove(event)
-        except ValueError:
-            self._logger.exception("Cannot remove event %d: not present" % event["id"])
-
-    # protected by self.lock
-    def _remove_event_by_nr(self, index: int) -> None:
-        event = self._events.pop(index)
-        self._count_event_remove(event)
+        else:
+            self._logger.error("Cannot remove event %d: not present" % event["id"])
 
     # protected by self.lock
     def remove_oldest_event(self, ty, event):
         if ty == "overall":
             self._logger.log(VERBOSE, "  Removing oldest event")
-            self._remove_event_by_nr(0)
+            oldest = self._events.oldest()
         elif ty == "by_rule":
             self._logger.log(VERBOSE, "  Removing oldest event of rule \"%s\"", event["rule_id"])
-            self._remove_oldest_event_of_rule(event["rule_id"])
+            oldest = self._events.oldest_of_rule(event["rule_id"])
         elif ty == "by_host":
             self._logger.log(VERBOSE, "  Removing oldest event of host \"%s\"", event["host"])
-            self._remove_oldest_event_of_host(event["host"])
-
-    # protected by self.lock
-    def _remove_oldest_event_of_rule(self, rule_id) -> None:
-        for event in self._events:
-            if event["rule_id"] == rule_id:
-                self.remove_event(event)
-                return
+            # The same host as in the event limit, see get_num_existing_events_by()
+            oldest = self._events.oldest_of_host((event["host"], event["core_host"]))
+        else:
+            return
 
-    # protected by self.lock
-    def _remove_oldest_event_of_host(self, hostname: str) -> None:
-        for event in self._events:
-            if event["host"] == hostname:
-                self.remove_event(event)
-                return
+        if oldest is not None:
+            self.remove_event(oldest)
 
     # protected by self.lock
     def get_num_existing_events_by(self, ty: str, event: Event) -> int:
@@ -3314,47 +3657,46 @@ class EventStatus:
     def cancel_events(self, event_server, event_columns, new_event, match_groups, rule):
         with self.lock:
             to_delete = []
-            for nr, event in enumerate(self._events):
-                if event["rule_id"] == rule["id"]:
-                    if self.cancelling_match(match_groups, new_event, event, rule):
-                        # Fill a few fields of the cancelled event with data from
-                        # the cancelling event so that action scripts have useful
-                        # values and the logfile entry if more relevant.
-                        previous_phase = event["phase"]
-                        event["phase"] = "closed"
-                        # TODO: Why do we use OK below and not new_event["state"]???
-                        event["state"] = 0  # OK
-                        event["text"] = new_event["text"]
-                        # TODO: This is a hack and partial copy-n-paste from rewrite_events...
-                        if "set_text" in rule:
-                            event["text"] = replace_groups(rule["set_text"], event["text"],
-                                                           match_groups)
-                        event["time"] = new_event["time"]
-                        event["last"] = new_event["time"]
-                        event["priority"] = new_event["priority"]
-                        self._history.add(event, "CANCELLED")
-                        actions = rule.get("cancel_actions", [])
-                        if actions:
-                            if previous_phase != "open" \
-                               and rule.get("cancel_action_phases", "always") == "open":
-                                self._logger.info(
-                                    "Do not execute cancelling actions, event %s's phase "
-                                    "is not 'open' but '%s'" % (event["id"], previous_phase))
-                            else:
-                                do_event_actions(self._history,
-                                                 self.settings,
-                                                 self._config,
-                                                 self._logger,
-                                                 event_server.host_config,
-                                                 event_columns,
-                                                 actions,
-                                                 event,
-                                                 is_cancelling=True)
-
-                        to_delete.append(nr)
-
-            for nr in to_delete[::-1]:
-                self._remove_event_by_nr(nr)
+            for event in self._events.of_rule(rule["id"]):
+                if self.cancelling_match(match_groups, new_event, event, rule):
+                    # Fill a few fields of the cancelled event with data from
+                    # the cancelling event so that action scripts have useful
+                    # values and the logfile entry if more relevant.
+                    previous_phase = event["phase"]
+                    event["phase"] = "closed"
+                    # TODO: Why do we use OK below and not new_event["state"]???
+                    event["state"] = 0  # OK
+                    event["text"] = new_event["text"]
+                    # TODO: This is a hack and partial copy-n-paste from rewrite_events...
+                    if "set_text" in rule:
+                        event["text"] = replace_groups(rule["set_text"], event["text"],
+                                                       match_groups)
+                    event["time"] = new_event["time"]
+                    event["last"] = new_event["time"]
+                    event["priority"] = new_event["priority"]
+                    self._history.add(event, "CANCELLED")
+                    actions = rule.get("cancel_actions", [])
+                    if actions:
+                        if previous_phase != "open" \
+                           and rule.get("cancel_action_phases", "always") == "open":
+                            self._logger.info(
+                                "Do not execute cancelling actions, event %s's phase "
+                                "is not 'open' but '%s'" % (event["id"], previous_phase))
+                        else:
+                            do_event_actions(self._history,
+                                             self.settings,
+                                             self._config,
+                                             self._logger,
+                                             event_server.host_config,
+                                             event_columns,
+                                             actions,
+                                             event,
+                                             is_cancelling=True)
+
+                    to_delete.append(event)
+
+            for event in to_delete:
+                self.remove_event(event)
 
     def cancelling_match(self, match_groups, new_event, event, rule):
         debug = self._config["debug_rules"]
@@ -3451,8 +3793,8 @@ class EventStatus:
         found.update(preserve)
 
     def count_expected_event(self, event_server, event):
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"] and ev["phase"] == "counting":
+        for ev in self._events.of_rule(event["rule_id"]):
+            if ev["phase"] == "counting":
                 self.count_event_up(ev, event)
                 return
 
@@ -3467,31 +3809,30 @@ class EventStatus:
         # we do never modify events that are already in the state "open"
         # since the event has been created because the count was too
         # low in the specified period of time.
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"]:
-                if ev["phase"] == "ack" and not count["count_ack"]:
-                    continue  # skip acknowledged events
+        for ev in self._events.of_rule(event["rule_id"]):
+            if ev["phase"] == "ack" and not count["count_ack"]:
+                continue  # skip acknowledged events
 
-                if count["separate_host"] and ev["host"] != event["host"]:
-                    continue  # treat events with separated hosts separately
+            if count["separate_host"] and ev["host"] != event["host"]:
+                continue  # treat events with separated hosts separately
 
-                if count["separate_application"] and ev["application"] != event["application"]:
-                    continue  # same for application
+            if count["separate_application"] and ev["application"] != event["application"]:
+                continue  # same for application
 
-                if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
-                    continue
+            if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
+                continue
 
-                if count.get("count_duration"
-                            ) is not None and ev["first"] + count["count_duration"] < event["time"]:
-                    # Counting has been discontinued on this event after a certain time
-                    continue
+            if count.get("count_duration") is not None and \
+                    ev["first"] + count["count_duration"] < event["time"]:
+                # Counting has been discontinued on this event after a certain time
+                continue
 
-                if ev["host_in_downtime"] != event["host_in_downtime"]:
-                    continue  # treat events with different downtime states separately
+            if ev["host_in_downtime"] != event["host_in_downtime"]:
+                continue  # treat events with different downtime states separately
 
-                found = ev
-                self.count_event_up(found, event)
-                break
+            found = ev
+            self.count_event_up(found, event)
+            break
         else:
             event["count"] = 1
             event["phase"] = "counting"
@@ -3506,18 +3847,17 @@ class EventStatus:
 
     # locked with self.lock
     def delete_event(self, event_id, user):
-        for nr, event in enumerate(self._events):
-            if event["id"] == event_id:
-                event["phase"] = "closed"
-                if user:
-                    event["owner"] = user
-                self._history.add(event, "DELETE", user)
-                self._remove_event_by_nr(nr)
-                return
-        raise MKClientError("No event with id %s" % event_id)
+        event = self._events.get(event_id)
+        if event is None:
+            raise MKClientError("No event with id %s" % event_id)
+        event["phase"] = "closed"
+        if user:
+            event["owner"] = user
+        self._history.add(event, "DELETE", user)
+        self.remove_event(event)
 
     def get_events(self):
-        return self._events
+        return list(self._events)
 
     def get_rule_stats(self):
         return sorted(self._rule_stats.items(), key=lambda x: x[0])
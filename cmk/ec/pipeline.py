@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Parallel preprocessing of incoming messages
+
+Parsing a message and finding the rules it matches only depends on the message
+and on the configuration. The pipeline does this work in a pool of worker
+processes. The results are handed out strictly in the order the batches have
+been submitted, so the event server can apply them one after the other, just
+like it would have processed the messages itself.
+"""
+
+from collections import deque
+import functools
+import multiprocessing
+from multiprocessing.pool import AsyncResult
+import os
+import signal
+from typing import Any, Callable, Deque, Iterator, List, Optional, Sequence, Tuple
+
+
+def _init_worker(initializer: Callable[..., None], initargs: Sequence[Any]) -> None:
+    # Reloading and shutting down is the business of the event daemon, not of
+    # its workers.
+    for signum in [signal.SIGHUP, signal.SIGINT, signal.SIGQUIT]:
+        signal.signal(signum, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    initializer(*initargs)
+
+
+class Pipeline:
+    """Runs a function on batches of work in worker processes
+
+    The worker processes are forked from a fork server, a fresh process
+    without threads. They neither inherit the threads nor the file descriptors
+    (e.g. listening sockets and client connections) of the calling process.
+    `initargs` are pickled once for each worker, then only the batches and
+    their results are transferred between the processes. The pipeline is
+    selectable: its file descriptor becomes readable as soon as a result may
+    be available.
+    """
+    def __init__(self,
+                 num_workers: int,
+                 initializer: Callable[..., None],
+                 initargs: Sequence[Any],
+                 max_pending: int = 0) -> None:
+        super().__init__()
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        os.set_blocking(self._wakeup_read, False)
+        os.set_blocking(self._wakeup_write, False)
+        self._pool = multiprocessing.get_context("forkserver").Pool(
+            num_workers, _init_worker, (initializer, initargs))
+        # The context, the result and whether the batch is finished
+        self._pending: Deque[Tuple[Any, AsyncResult, List[bool]]] = deque()
+        self.num_workers = num_workers
+        self.max_pending = max_pending or 4 * num_workers
+
+    def fileno(self) -> int:
+        return self._wakeup_read
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _wakeup(self, finished: List[bool], _result: Any) -> None:
+        # Called by the result handler thread of the pool. The result is not
+        # ready() yet at this point, so we remember ourselves that it is finished.
+        finished[0] = True
+        try:
+            os.write(self._wakeup_write, b"x")
+        except (BlockingIOError, OSError):
+            pass  # already woken up or closed
+
+    def submit(self, func: Callable[[Any], Any], batch: Any, context: Any = None) -> None:
+        """Queue a batch of work, `context` is handed out along with its result"""
+        finished = [False]
+        wakeup = functools.partial(self._wakeup, finished)
+        self._pending.append((context,
+                              self._pool.apply_async(func, (batch,),
+                                                     callback=wakeup,
+                                                     error_callback=wakeup), finished))
+
+    def results(self, max_pending: Optional[int] = None) -> Iterator[Tuple[Any, Any]]:
+        """Yield the (context, result) pairs of the finished batches in submission order
+
+        The results of batches which are not finished are only waited for while
+        more than `max_pending` batches are pending. Exceptions of the function
+        are raised here, after the pair has been removed from the pipeline.
+        """
+        try:
+            while os.read(self._wakeup_read, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+        while self._pending:
+            context, result, finished = self._pending[0]
+            if not finished[0] and (max_pending is None or len(self._pending) <= max_pending):
+                return
+            self._pending.popleft()
+            yield context, result.get()
+
+    def close(self) -> None:
+        """Stop the workers, the results of the pending batches are lost"""
+        self._pending.clear()
+        self._pool.terminate()
+        self._pool.join()
+        os.close(self._wakeup_read)
+        os.close(self._wakeup_write)
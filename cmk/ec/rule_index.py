@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Preselection of the rules an event may match
+
+Most rules can only match messages containing a certain text, e.g. the rule
+"Interface .* down" needs the text "interface " somewhere in the message. The
+rule index collects these texts of all rules and searches all of them in a
+single pass over the message. Only the rules whose text was found (and the
+rules without such a text) have to be tried with their regular expressions.
+"""
+
+from collections import deque
+from typing import (Any, Deque, Dict, FrozenSet, Iterable, List, Optional, Pattern, Sequence, Set,
+                    Tuple)
+
+try:
+    import re._parser as sre_parse  # type: ignore[import]
+except ImportError:  # Python < 3.11
+    import sre_parse  # type: ignore[no-redef]
+
+Rule = Dict[str, Any]
+Event = Dict[str, Any]
+
+# Characters which the case insensitive regex matching treats as equal to
+# ASCII characters, but which are not lowercased to them.
+_FOLD_TABLE = str.maketrans({"İ": "i", "ı": "i", "ſ": "s"})
+
+
+def _fold(text: str) -> str:
+    return text.translate(_FOLD_TABLE).lower()
+
+
+def _literal_runs(parsed: Iterable[Tuple[Any, Any]]) -> Iterable[Tuple[Any, Any]]:
+    for op, av in parsed:
+        if op is sre_parse.SUBPATTERN:
+            # Only the contents of a group matter, the group itself matches nothing
+            yield from _literal_runs(av[-1])
+        else:
+            yield op, av
+
+
+def required_literal(pattern: Any) -> str:
+    """Return a (lowercase) text each text matching the pattern has to contain
+
+    The pattern is either a compiled regex, which is searched case insensitively,
+    or a (lowercase) string, which is searched in the lowercased text. The result
+    is empty in case there is no such text, e.g. for "a|b".
+
+    >>> import re
+    >>> required_literal(re.compile("Interface (.*) changed (state|speed)", re.IGNORECASE))
+    'interface '
+    >>> required_literal(re.compile("^[0-9]+ Users$", re.IGNORECASE))
+    ' users'
+    >>> required_literal(re.compile("backup failed|disk full", re.IGNORECASE))
+    ''
+    >>> required_literal("daß ist übel")
+    ' ist '
+    """
+    if isinstance(pattern, str):
+        runs = _ascii_runs(pattern)
+    else:
+        runs = _regex_runs(pattern)
+    return _fold(max(runs, key=len, default=""))
+
+
+def _ascii_runs(text: str) -> List[str]:
+    # Restricting the literals to ASCII keeps them comparable with the folded
+    # texts, see _fold().
+    runs = []
+    current: List[str] = []
+    for char in text:
+        if char.isascii():
+            current.append(char)
+        else:
+            runs.append("".join(current))
+            current = []
+    runs.append("".join(current))
+    return runs
+
+
+def _regex_runs(pattern: Pattern) -> List[str]:
+    runs = []
+    current: List[str] = []
+    for op, av in _literal_runs(sre_parse.parse(pattern.pattern, pattern.flags)):
+        if op is sre_parse.LITERAL and av < 128:
+            current.append(chr(av))
+        elif op is sre_parse.AT:
+            continue  # Anchors match no characters
+        else:
+            runs.append("".join(current))
+            current = []
+    runs.append("".join(current))
+    return runs
+
+
+class _LiteralAutomaton:
+    """Finds all occurrences of a set of texts in a single pass (Aho-Corasick)"""
+    def __init__(self, literals: Iterable[str]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[FrozenSet[str]] = [frozenset()]
+
+        for literal in literals:
+            state = 0
+            for char in literal:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(frozenset())
+                state = next_state
+            self._output[state] |= {literal}
+
+        # Breadth first, so the fail state of each state is complete before
+        # it is needed for the states below
+        queue: Deque[int] = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] |= self._output[self._fail[next_state]]
+
+    def search(self, text: str) -> Set[str]:
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        found: Set[str] = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found |= output[state]
+        return found
+
+
+class RuleIndex:
+    """Selects the rules which may match an event
+
+    Each rule is indexed by one condition which is necessary for it to match:
+    a text contained in the message (or in its cancelling message), the exact
+    host name, or a text contained in the host name or in the syslog
+    application. Rules without any of these conditions and rules with inverted
+    matching are always selected.
+    """
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self._positions: Dict[int, int] = {}
+        self._unconditional: List[int] = []
+        self._by_host: Dict[str, List[int]] = {}
+        literals: Dict[str, Dict[str, List[int]]] = {"text": {}, "host": {}, "application": {}}
+
+        for position, rule in enumerate(rules):
+            self._positions[id(rule)] = position
+            field, keys = self._index_keys(rule)
+            if field is None:
+                self._unconditional.append(position)
+            elif field == "exact_host":
+                self._by_host.setdefault(keys[0], []).append(position)
+            else:
+                for key in keys:
+                    literals[field].setdefault(key, []).append(position)
+
+        self._literals = {field: by_literal for field, by_literal in literals.items() if by_literal}
+        self._automatons = {
+            field: _LiteralAutomaton(by_literal) for field, by_literal in self._literals.items()
+        }
+        self._rules = list(rules)
+        self._selections: Dict[int, Tuple[Sequence[Rule], List[int], Set[int]]] = {}
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # The positions are looked up by the identity of the rules, which is
+        # different in another process
+        state = self.__dict__.copy()
+        del state["_positions"]
+        state["_selections"] = {}
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._positions = {id(rule): position for position, rule in enumerate(self._rules)}
+
+    @staticmethod
+    def _index_keys(rule: Rule) -> Tuple[Optional[str], List[str]]:
+        if rule.get("invert_matching"):
+            return None, []
+
+        # Either the message or the cancelling message has to match
+        if rule.get("match") is not None:
+            texts = [required_literal(rule["match"])]
+            if "match_ok" in rule:
+                texts.append(required_literal(rule["match_ok"]))
+            if all(texts):
+                return "text", texts
+
+        host = rule.get("match_host")
+        if isinstance(host, str):
+            return "exact_host", [host]
+        if host is not None and required_literal(host):
+            return "host", [required_literal(host)]
+
+        applications = [
+            required_literal(rule[key])
+            for key in ["match_application", "cancel_application"]
+            if rule.get(key) is not None
+        ]
+        if applications and all(applications):
+            return "application", applications
+
+        return None, []
+
+    def select(self, event: Event, rules: Sequence[Rule]) -> List[Rule]:
+        """Return the rules of `rules` which may match the event, in their order
+
+        The rules must be indexed rules, e.g. the rules of a facility and
+        priority. Unlike the indexed rules, the list must not be changed.
+        """
+        if not rules:
+            return []
+
+        selection = self._selections.get(id(rules))
+        if selection is None:
+            positions = {self._positions[id(rule)] for rule in rules}
+            selection = self._selections[id(rules)] = (
+                rules,  # keeps the id unique
+                [position for position in self._unconditional if position in positions],
+                positions,
+            )
+        _rules, unconditional, allowed = selection
+
+        candidates = [
+            position for position in self._by_host.get(event["host"].lower(), [])
+            if position in allowed
+        ]
+        for field, value in [
+            ("text", event["text"]),
+            ("host", event["host"]),
+            ("application", event.get("application", "")),
+        ]:
+            automaton = self._automatons.get(field)
+            if automaton is None:
+                continue
+            by_literal = self._literals[field]
+            for literal in automaton.search(_fold(value)):
+                candidates.extend(
+                    position for position in by_literal[literal] if position in allowed)
+
+        return [self._rules[position] for position in sorted(set(candidates).union(unconditional))]
@@ -29,11 +29,13 @@ Paths = NamedTuple('Paths', [
     ('pid_file', AnnotatedPath),
     ('log_file', AnnotatedPath),
     ('history_dir', AnnotatedPath),
+    ('history_db_file', AnnotatedPath),
     ('messages_dir', AnnotatedPath),
     ('master_config_file', AnnotatedPath),
     ('slave_status_file', AnnotatedPath),
     ('spool_dir', AnnotatedPath),
     ('status_file', AnnotatedPath),
+    ('status_journal_file', AnnotatedPath),
     ('status_server_profile', AnnotatedPath),
     ('event_server_profile', AnnotatedPath),
     ('compiled_mibs_dir', AnnotatedPath),
@@ -58,11 +60,13 @@ def _default_paths(omd_root: Path, default_config_dir: Path) -> Paths:
         pid_file=AnnotatedPath('PID file', run_dir / 'pid'),
         log_file=AnnotatedPath('log file', omd_root / 'var/log/mkeventd.log'),
         history_dir=AnnotatedPath('history directory', state_dir / 'history'),
+        history_db_file=AnnotatedPath('history database', state_dir / 'history.sqlite'),
         messages_dir=AnnotatedPath('messages directory', state_dir / 'messages'),
         master_config_file=AnnotatedPath('master configuraion', state_dir / 'master_config'),
         slave_status_file=AnnotatedPath('slave status', state_dir / 'slave_status'),
         spool_dir=AnnotatedPath('spool directory', state_dir / 'spool'),
         status_file=AnnotatedPath('status file', state_dir / 'status'),
+        status_journal_file=AnnotatedPath('status journal', state_dir / 'status.journal'),
         status_server_profile=AnnotatedPath('status server profile',
                                             state_dir / 'StatusServer.profile'),
         event_server_profile=AnnotatedPath('event server profile',
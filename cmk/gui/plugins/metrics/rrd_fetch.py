@@ -7,16 +7,30 @@
 
 import time
 import collections
-from typing import Any, Callable, Dict, List, Set, Tuple, Union, Optional, Iterator
+import threading
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Set,
+    Tuple,
+    Union,
+    Optional,
+    Iterator,
+)
 
 import livestatus
 
 import cmk.utils.version as cmk_version
 from cmk.gui.plugins.metrics.utils import check_metrics, reverse_translate_metric_name
 import cmk.gui.plugins.metrics.timeseries as ts
-from cmk.utils.prediction import livestatus_lql, TimeSeries
+from cmk.utils.prediction import lq_logic, TimeSeries
 from cmk.gui.i18n import _
 from cmk.gui.exceptions import MKGeneralException
+from cmk.gui.globals import user
 import cmk.gui.sites as sites
 
 from cmk.gui.type_defs import ColumnName
@@ -25,16 +39,10 @@ from cmk.gui.type_defs import ColumnName
 def fetch_rrd_data_for_graph(graph_recipe, graph_data_range):
     needed_rrd_data = get_needed_sources(graph_recipe["metrics"])
 
-    by_service = group_needed_rrd_data_by_service(needed_rrd_data)
-    rrd_data: Dict[Tuple[str, str, str, str, str, str], TimeSeries] = {}
-    for (site, host_name, service_description), entries in by_service.items():
-        try:
-            for (perfvar, cf, scale), data in \
-                fetch_rrd_data(site, host_name, service_description, entries, graph_recipe, graph_data_range):
-                rrd_data[(site, host_name, service_description, perfvar, cf,
-                          scale)] = TimeSeries(data)
-        except livestatus.MKLivestatusNotFoundError:
-            pass
+    rrd_data: Dict[Tuple[str, str, str, str, str, str], TimeSeries] = {
+        key: ts.ArrayTimeSeries(data) for key, data in fetch_rrd_data_batched(
+            needed_rrd_data, graph_recipe["consolidation_function"], graph_data_range)
+    }
 
     align_and_resample_rrds(rrd_data, graph_recipe["consolidation_function"])
     chop_last_empty_step(graph_data_range, rrd_data)
@@ -134,7 +142,7 @@ def group_needed_rrd_data_by_service(needed_rrd_data):
     return by_service
 
 
-def fetch_rrd_data(site, host_name, service_description, entries, graph_recipe, graph_data_range):
+def _point_range(graph_data_range) -> str:
     start_time, end_time = graph_data_range["time_range"]
 
     step: Union[int, float, str] = graph_data_range["step"]
@@ -142,12 +150,141 @@ def fetch_rrd_data(site, host_name, service_description, entries, graph_recipe,
     if not isinstance(step, str):
         step = max(1, step)
 
-    point_range = ":".join(map(str, (start_time, end_time, step)))
-    lql_columns = list(rrd_columns(entries, graph_recipe["consolidation_function"], point_range))
-    query = livestatus_lql([host_name], lql_columns, service_description)
+    return ":".join(map(str, (start_time, end_time, step)))
+
+
+RRDDataKey = Tuple[str, str, str, str, str, str]
+_ServiceKey = Tuple[str, str, str]
+_RRDEntry = Tuple[Any, Any, Any]
+
+# The graphs of a dashboard are fetched by requests of their own. Graphs showing the same metrics
+# of the same time range within a short time (e.g. a combined graph and the graphs of the single
+# services) share the fetched data.
+_RRD_DATA_CACHE_TTL = 30
+_RRD_DATA_CACHE_MAX_ENTRIES = 1000
+_rrd_data_cache: Dict[Tuple, Tuple[float, Any]] = {}
+_rrd_data_cache_lock = threading.Lock()
+
+
+def fetch_rrd_data_batched(
+    needed_rrd_data: Iterable[RRDDataKey],
+    rrd_consolidation: str,
+    graph_data_range,
+) -> Iterator[Tuple[RRDDataKey, Any]]:
+    """Fetch the RRD data of many services with as few Livestatus queries as possible
 
-    with sites.only_sites(site):
-        return list(zip(entries, sites.live().query_row(query)))
+    Instead of one query per service, the services needing the same RRD columns are fetched with a
+    single query. It is sent to all the sites of these services at once, so the sites work on it
+    concurrently. Services which are not found are skipped.
+    """
+    point_range = _point_range(graph_data_range)
+    cache_key_base = (user.id, rrd_consolidation) + _cache_range_key(graph_data_range)
+
+    by_entries: Dict[FrozenSet[_RRDEntry], Set[_ServiceKey]] = collections.defaultdict(set)
+    for service, entries in group_needed_rrd_data_by_service(needed_rrd_data).items():
+        cached = [(entry, _get_cached_rrd_data(cache_key_base + service + entry))
+                  for entry in entries]
+        if any(data is None for _entry, data in cached):
+            by_entries[frozenset(entries)].add(service)
+            continue
+        for (perfvar, cf, scale), data in cached:
+            yield service + (perfvar, cf, scale), data
+
+    for entries, services in by_entries.items():
+        for service, entry, data in _query_rrd_data(services, list(entries), rrd_consolidation,
+                                                    point_range):
+            _cache_rrd_data(cache_key_base + service + entry, data)
+            yield service + entry, data
+
+
+def _query_rrd_data(
+    services: Set[_ServiceKey],
+    entries: List[_RRDEntry],
+    rrd_consolidation: str,
+    point_range: str,
+) -> Iterator[Tuple[_ServiceKey, _RRDEntry, Any]]:
+    lql_columns = list(rrd_columns(entries, rrd_consolidation, point_range))
+    for what in ["host", "service"]:
+        services_of_table = {
+            service for service in services
+            if (service[2] in ["_HOST_", None]) == (what == "host")
+        }
+        if not services_of_table:
+            continue
+
+        query = _rrd_data_query(what, {(h, s) for _site, h, s in services_of_table}, lql_columns)
+        with sites.only_sites(sorted({site for site, _h, _s in services_of_table})), \
+                sites.prepend_site():
+            rows = sites.live().query(query)
+
+        for row in rows:
+            if what == "host":
+                site, host_name, values = row[0], row[1], row[2:]
+                service = next((s for s in services_of_table if s[:2] == (site, host_name)),
+                               None)
+            else:
+                site, host_name, service_description, values = row[0], row[1], row[2], row[3:]
+                service = (site, host_name, service_description)
+            if service not in services_of_table:
+                continue  # The same host on another site
+            for entry, data in zip(entries, values):
+                yield service, entry, data  # type: ignore[misc]
+
+
+def _rrd_data_query(what: str, host_services: Set[Tuple[str, str]], lql_columns: List[str]) -> str:
+    """Query the RRD columns of all the given hosts or services at once"""
+    services_by_host: Dict[str, Set[str]] = collections.defaultdict(set)
+    for host_name, service_description in host_services:
+        services_by_host[host_name].add(service_description)
+
+    if what == "host":
+        columns = ["host_name"] + lql_columns
+        filters = lq_logic(u"Filter: host_name =", sorted(services_by_host), u"Or")
+    else:
+        columns = ["host_name", "service_description"] + lql_columns
+        filters = u"".join(
+            u"Filter: host_name = %s\n%sAnd: 2\n" %
+            (livestatus.lqencode(host_name),
+             lq_logic(u"Filter: service_description =", sorted(service_descriptions), u"Or"))
+            for host_name, service_descriptions in sorted(services_by_host.items()))
+        if len(services_by_host) > 1:
+            filters += u"Or: %d\n" % len(services_by_host)
+
+    return u"GET %ss\nColumns: %s\n%s" % (what, u" ".join(columns), filters)
+
+
+def _cache_range_key(graph_data_range) -> Tuple:
+    start_time, end_time = graph_data_range["time_range"]
+    step = graph_data_range["step"]
+    if isinstance(step, str):
+        return start_time, end_time, step
+    # The time ranges of graphs rendered one after another differ by a few seconds. The RRD
+    # data does not differ within the same step.
+    step = max(1, step)
+    return int(start_time // step), int(end_time // step), step
+
+
+def _get_cached_rrd_data(key: Tuple) -> Any:
+    with _rrd_data_cache_lock:
+        cached = _rrd_data_cache.get(key)
+    if cached is None or cached[0] < time.time() - _RRD_DATA_CACHE_TTL:
+        return None
+    return cached[1]
+
+
+def _cache_rrd_data(key: Tuple, data: Any) -> None:
+    now = time.time()
+    with _rrd_data_cache_lock:
+        if len(_rrd_data_cache) >= _RRD_DATA_CACHE_MAX_ENTRIES:
+            for outdated_key in [
+                    k for k, (cached_at, _data) in _rrd_data_cache.items()
+                    if cached_at < now - _RRD_DATA_CACHE_TTL
+            ]:
+                del _rrd_data_cache[outdated_key]
+        if len(_rrd_data_cache) >= _RRD_DATA_CACHE_MAX_ENTRIES:
+            # Dicts keep the insertion order: drop the oldest
+            del _rrd_data_cache[next(iter(_rrd_data_cache))]
+        _rrd_data_cache[key] = (now, data)
 
 
 def rrd_columns(metrics: List[Tuple[str, Optional[str], float]], rrd_consolidation: str,
@@ -6,10 +6,19 @@
 
 import operator
 import functools
-from typing import List, Literal, Optional
+from typing import Callable, Dict, List, Literal, Optional, Tuple
 from itertools import chain
 
-from cmk.utils.prediction import TimeSeries
+import numpy as np  # type: ignore[import]
+
+from cmk.utils.prediction import (
+    ConsolidationFunctionName,
+    TimeSeries,
+    TimeSeriesValue,
+    TimeSeriesValues,
+    TimeWindow,
+)
+from cmk.utils.type_defs import Seconds
 import cmk.utils.version as cmk_version
 import cmk.gui.escaping as escaping
 from cmk.gui.exceptions import MKGeneralException
@@ -106,10 +115,10 @@ def evaluate_time_series_expression(expression, rrd_data) -> List[TimeSeries]:
         key = tuple(expression[1:])
         if key in rrd_data:
             return [rrd_data[key]]
-        return [TimeSeries([None] * num_points, twindow)]
+        return [ArrayTimeSeries.from_array(np.full(num_points, np.nan), twindow)]
 
     if expression[0] == "constant":
-        return [TimeSeries([expression[1]] * num_points, twindow)]
+        return [ArrayTimeSeries.from_array(np.full(num_points, float(expression[1])), twindow)]
 
     if expression[0] == "combined":
         metrics = resolve_combined_single_metric_spec(expression[1])
@@ -140,10 +149,9 @@ def time_series_math(operator_id: Literal["+", "*", "-", "/", "MAX", "MIN", "AVE
         # Silently return so to get an empty graph slot
         return None
 
-    _op_title, op_func = operators[operator_id]
     twindow = operands_evaluated[0].twindow
-
-    return TimeSeries([op_func_wrapper(op_func, tsp) for tsp in zip(*operands_evaluated)], twindow)
+    return ArrayTimeSeries.from_array(
+        _ARRAY_OPERATORS[operator_id](_operands_array(operands_evaluated)), twindow)
 
 
 def op_func_wrapper(op_func, tsp):
@@ -206,3 +214,220 @@ def time_series_operators():
         "AVERAGE": (_("Average"), time_series_operator_average),
         "MERGE": ("First non None", lambda x: next(iter(clean_time_series_point(x)))),
     }
+
+
+#.
+#   .--Arrays--------------------------------------------------------------.
+#   |                     _                                                |
+#   |                    / \   _ __ _ __ __ _ _   _ ___                    |
+#   |                   / _ \ | '__| '__/ _` | | | / __|                   |
+#   |                  / ___ \| |  | | | (_| | |_| \__ \                   |
+#   |                 /_/   \_\_|  |_|  \__,_|\__, |___/                   |
+#   |                                         |___/                        |
+#   +----------------------------------------------------------------------+
+#   |  Time series backed by NumPy arrays, computed without a Python loop  |
+#   |  over the data points. Missing values (None) are NaN in the arrays.  |
+#   '----------------------------------------------------------------------'
+
+
+def _to_array(values) -> np.ndarray:
+    return np.array(values, dtype=float).reshape(-1)
+
+
+def _to_values(array: np.ndarray) -> TimeSeriesValues:
+    values = array.tolist()
+    for index in np.flatnonzero(np.isnan(array)).tolist():
+        values[index] = None
+    return values
+
+
+def _rrd_timestamps_array(twindow: TimeWindow) -> np.ndarray:
+    """Same as rrd_timestamps()"""
+    start, end, step = twindow
+    if step == 0:
+        return np.empty(0)
+    return np.arange(start, end, step, dtype=float) + step
+
+
+class ArrayTimeSeries(TimeSeries):
+    """TimeSeries keeping its values in a NumPy float array
+
+    The values are converted between the array and the list of the TimeSeries API as needed:
+    After reading `values` the list is the data of the series (callers may change the list
+    in place), after reading `array` the array is.
+    """
+    def __init__(self,
+                 data: TimeSeriesValues,
+                 timewindow: Optional[Tuple[float, float, float]] = None,
+                 **metadata: str) -> None:
+        self._values: Optional[TimeSeriesValues] = None
+        self._array: Optional[np.ndarray] = None
+        super().__init__(data, timewindow, **metadata)
+
+    @classmethod
+    def from_array(cls, array: np.ndarray, timewindow: TimeWindow,
+                   **metadata: str) -> "ArrayTimeSeries":
+        time_series = cls([], timewindow, **metadata)
+        time_series.array = array
+        return time_series
+
+    @property
+    def values(self) -> TimeSeriesValues:
+        if self._values is None:
+            self._values = _to_values(self._array)
+            self._array = None
+        return self._values
+
+    @values.setter
+    def values(self, values: TimeSeriesValues) -> None:
+        self._values = values
+        self._array = None
+
+    @property
+    def array(self) -> np.ndarray:
+        if self._array is None:
+            self._array = _to_array(self._values)
+            self._values = None
+        return self._array
+
+    @array.setter
+    def array(self, array: np.ndarray) -> None:
+        self._array = array
+        self._values = None
+
+    def __repr__(self) -> str:
+        return "ArrayTimeSeries(%s, timewindow=%s)" % (self.values, self.twindow)
+
+    def __len__(self) -> int:
+        return len(self._values) if self._values is not None else len(self._array)
+
+    def bfill_upsample(self, twindow: TimeWindow, shift: Seconds) -> TimeSeriesValues:
+        start, end, step = twindow
+        if start == self.start and end == self.end and step == self.step:
+            return self.values
+
+        current_times = _rrd_timestamps_array(self.twindow)
+        # Index of the value for each of the desired timestamps
+        indices = np.searchsorted(
+            current_times + shift,
+            np.arange(start, end, step, dtype=float),
+            side="right",
+        )
+        if not _are_consecutive_groups(indices, min(len(current_times), len(self))):
+            # Let the point by point algorithm deal with series not fitting into each other
+            return super().bfill_upsample(twindow, shift)
+        return _to_values(self.array[indices])
+
+    def downsample(self,
+                   twindow: TimeWindow,
+                   cf: ConsolidationFunctionName = 'max') -> TimeSeriesValues:
+        start, end, step = twindow
+        if start == self.start and end == self.end and step == self.step:
+            return self.values
+
+        desired_times = _rrd_timestamps_array(twindow)
+        current_times = _rrd_timestamps_array(self.twindow)[:len(self)]
+        # The desired interval each of the values is consolidated into
+        groups = np.searchsorted(desired_times, current_times, side="left")
+        if ((cf or "max").lower() not in ("average", "max", "min") or not len(groups) or
+                not _are_consecutive_groups(groups, len(desired_times))):
+            return super().downsample(twindow, cf)
+
+        starts = np.flatnonzero(np.diff(groups, prepend=-1))
+        consolidated = np.full(len(desired_times), np.nan)
+        consolidated[groups[starts]] = _consolidate(self.array[:len(groups)], starts, cf)
+        # The intervals after the last value get no value, like in the point by point algorithm
+        last_group = groups[-1]
+        return _to_values(consolidated[:last_group + 1]) + [None] * (len(desired_times) - 1 -
+                                                                    last_group)
+
+    def percentile(self, q: float) -> TimeSeriesValue:
+        """The q-th percentile of all the values that are not missing"""
+        array = self.array
+        if np.isnan(array).all():
+            return None
+        return float(np.nanpercentile(array, q))
+
+
+def _are_consecutive_groups(indices: np.ndarray, limit: int) -> bool:
+    """The indices are those the point by point algorithms step through
+
+    These algorithms advance by at most one index per point, and fail beyond the limit.
+    """
+    return bool(len(indices) == 0 or
+                (indices[0] <= 1 and indices[-1] < limit and (np.diff(indices) <= 1).all()))
+
+
+def _consolidate(array: np.ndarray, starts: np.ndarray,
+                 cf: Optional[ConsolidationFunctionName]) -> np.ndarray:
+    """Consolidate the slices of array beginning at starts like aggregation_functions()"""
+    cf = (cf or "max").lower()
+    missing = np.isnan(array)
+    counts = np.add.reduceat(~missing, starts)
+    if cf == "average":
+        consolidated = np.add.reduceat(np.where(missing, 0.0, array), starts)
+        consolidated = consolidated / np.maximum(counts, 1)
+    elif cf == "max":
+        consolidated = np.maximum.reduceat(np.where(missing, -np.inf, array), starts)
+    else:
+        consolidated = np.minimum.reduceat(np.where(missing, np.inf, array), starts)
+    return np.where(counts > 0, consolidated, np.nan)
+
+
+def _operands_array(operands: List[TimeSeries]) -> np.ndarray:
+    """One row per operand, like zip() the points up to the shortest operand"""
+    arrays = [
+        time_series.array if isinstance(time_series, ArrayTimeSeries) else _to_array(
+            time_series.values) for time_series in operands
+    ]
+    length = min(len(array) for array in arrays)
+    return np.vstack([array[:length] for array in arrays])
+
+
+def _array_sum(operands: np.ndarray) -> np.ndarray:
+    return np.where(np.isnan(operands).all(axis=0), np.nan, np.nansum(operands, axis=0))
+
+
+def _array_product(operands: np.ndarray) -> np.ndarray:
+    return np.prod(operands, axis=0)
+
+
+def _array_difference(operands: np.ndarray) -> np.ndarray:
+    return operands[0] - operands[1]
+
+
+def _array_fraction(operands: np.ndarray) -> np.ndarray:
+    divisor = operands[1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(divisor == 0, np.nan, operands[0] / divisor)
+
+
+def _array_maximum(operands: np.ndarray) -> np.ndarray:
+    return np.fmax.reduce(operands, axis=0)
+
+
+def _array_minimum(operands: np.ndarray) -> np.ndarray:
+    return np.fmin.reduce(operands, axis=0)
+
+
+def _array_average(operands: np.ndarray) -> np.ndarray:
+    counts = (~np.isnan(operands)).sum(axis=0)
+    return np.where(counts > 0, np.nansum(operands, axis=0) / np.maximum(counts, 1), np.nan)
+
+
+def _array_merge(operands: np.ndarray) -> np.ndarray:
+    first_present = np.argmax(~np.isnan(operands), axis=0)
+    return operands[first_present, np.arange(operands.shape[1])]
+
+
+# The same operations as time_series_operators(), on all the points at once
+_ARRAY_OPERATORS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "+": _array_sum,
+    "*": _array_product,
+    "-": _array_difference,
+    "/": _array_fraction,
+    "MAX": _array_maximum,
+    "MIN": _array_minimum,
+    "AVERAGE": _array_average,
+    "MERGE": _array_merge,
+}
@@ -220,7 +220,9 @@ description = CPU\\nFilter: host_name ~ morgen\\nNegate: 1\\nAnd: 3'
             Optionally a ResultRow
 
         """
-        return next(self.iterate(sites), None)
+        # Not iterate(): Leaving the rest of the response unread would close the connections
+        result = self._fetch_rows(sites)
+        return result[0] if result else None
 
     def fetchall(self, sites) -> List[ResultRow]:
         return list(self.iterate(sites))
@@ -262,7 +264,7 @@ description = CPU\\nFilter: host_name ~ morgen\\nNegate: 1\\nAnd: 3'
             ValueError: Expected one row, got 2 row(s).
 
        """
-        result = list(self.iterate(sites))
+        result = self._fetch_rows(sites)
         if len(result) != 1:
             raise ValueError(f"Expected one row, got {len(result)} row(s).")
         return result[0]
@@ -320,6 +322,10 @@ description = CPU\\nFilter: host_name ~ morgen\\nNegate: 1\\nAnd: 3'
         """
         return sites.query(self.compile())
 
+    def _fetch_rows(self, sites) -> List[ResultRow]:
+        names = self.column_names
+        return [ResultRow(list(zip(names, entry))) for entry in self.fetch_values(sites)]
+
     def iterate(self, sites) -> Generator[ResultRow, None, None]:
         """Return a generator of the result.
 
@@ -345,7 +351,8 @@ description = CPU\\nFilter: host_name ~ morgen\\nNegate: 1\\nAnd: 3'
 
         """
         names = self.column_names
-        for entry in self.fetch_values(sites):
+        # Don't hold the whole response, large tables would need a lot of memory
+        for entry in sites.query_iter(self.compile()):
             # This is Dict[str, Any], just with Attribute based access. Can't do much about this.
             yield ResultRow(list(zip(names, entry)))
 
@@ -388,7 +395,7 @@ description = CPU\\nFilter: host_name ~ morgen\\nNegate: 1\\nAnd: 3'
         result = {}
         if len(self.columns) != 2:
             raise ValueError("Number of columns need to be exactly 2 to create a dict.")
-        for key, value in self.fetch_values(sites):
+        for key, value in sites.query_iter(self.compile()):
             result[key] = value
         return result
 
@@ -32,8 +32,10 @@ from cmk.gui.plugins.views.utils import (  # noqa: F401 # pylint: disable=unused
     sorter_registry, DerivedColumnsSorter, Sorter, register_sorter, multisite_builtin_views,
     output_csv_headers, paint_age, PainterOptions, paint_host_list, paint_nagiosflag,
     paint_stalified, render_cache_info, replace_action_url_macros, row_id, transform_action_url,
-    url_to_visual, view_is_enabled, view_title, query_livestatus, exporter_registry, Exporter,
-    VisualLinkSpec, Cell, CommandActionResult, CommandSpec, CellSpec, Row,
+    url_to_visual, view_is_enabled, view_title, query_livestatus, query_livestatus_iter,
+    exporter_registry, Exporter, VisualLinkSpec, Cell, CommandActionResult, CommandSpec, CellSpec,
+    Row, get_custom_var, key_insensitive_string, key_ip, key_ip_address, key_num_split,
+    key_simple_number, key_simple_string, key_string_list, ReversedSortKey, sorter_key_function,
 )
 
 #.
@@ -426,11 +426,13 @@ inventory_displayhints.update({
     ".software.packages:*.package_type": {"title": _("Type")},
     ".software.packages:*.summary": {"title": _("Description")},
     ".software.packages:*.version": {
-        "title": _("Version"), "sort": cmk.gui.utils.cmp_version, "filter": FilterInvtableVersion
+        "title": _("Version"), "sort": cmk.gui.utils.cmp_version,
+        "sort_key": cmk.gui.utils.key_version, "filter": FilterInvtableVersion
     },
     ".software.packages:*.vendor": {"title": _("Publisher")},
     ".software.packages:*.package_version": {
-        "title": _("Package Version"), "sort": cmk.gui.utils.cmp_version, "filter": FilterInvtableVersion
+        "title": _("Package Version"), "sort": cmk.gui.utils.cmp_version,
+        "sort_key": cmk.gui.utils.key_version, "filter": FilterInvtableVersion
     },
     ".software.packages:*.install_date": {"title": _("Install Date"), "paint": "date"},
     ".software.packages:*.size": {"title": _("Size"), "paint": "count"},
@@ -279,6 +279,9 @@ class SorterCrashTime(Sorter):
     def cmp(self, r1, r2):
         return cmp_simple_number("crash_time", r1, r2)
 
+    def key(self, row):
+        return row["crash_time"]
+
 
 PermissionActionDeleteCrashReport = permission_registry.register(
     Permission(
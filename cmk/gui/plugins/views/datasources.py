@@ -12,7 +12,7 @@ from cmk.gui.plugins.views import (
     DataSourceLivestatus,
     RowTable,
     RowTableLivestatus,
-    query_livestatus,
+    query_livestatus_iter,
 )
 
 
@@ -483,13 +483,11 @@ class ServiceDiscoveryRowTable(RowTable):
 
         columns = [c for c in columns if c not in view.datasource.add_columns]
         query = self.prepare_lql(columns, headers)
-        data = query_livestatus(query, only_sites, limit, "read")
+        data = query_livestatus_iter(query, only_sites, limit, "read")
 
         columns = ["site"] + columns
-        service_rows = [dict(zip(columns, row)) for row in data]
-
         rows = []
-        for row in service_rows:
+        for row in (dict(zip(columns, row)) for row in data):
             for service_line in row["long_plugin_output"].split("\n"):
                 if not service_line:
                     continue
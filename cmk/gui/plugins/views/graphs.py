@@ -245,6 +245,10 @@ class PainterServiceGraphs(Painter):
     def parameters(self):
         return cmk_time_graph_params()
 
+    @property
+    def queries_livestatus(self):
+        return True
+
     def render(self, row, cell):
         return paint_cmk_graphs_with_timeranges(row, cell)
 
@@ -274,6 +278,10 @@ class PainterHostGraphs(Painter):
     def parameters(self):
         return cmk_time_graph_params()
 
+    @property
+    def queries_livestatus(self):
+        return True
+
     def render(self, row, cell):
         return paint_cmk_graphs_with_timeranges(row, cell)
 
@@ -208,6 +208,7 @@ def _declare_inv_column(invpath, datatype, title, short=None, is_show_more: bool
         # not look good for the HW/SW inventory tree
         "printable": is_leaf_node,
         "load_inv": True,
+        "queries_livestatus": True,
         "paint": lambda row: paint_host_inventory_tree(row, invpath),
         "sorter": name,
     }
@@ -225,6 +226,8 @@ def _declare_inv_column(invpath, datatype, title, short=None, is_show_more: bool
                 "columns": ["host_inventory", "host_structured_status"],
                 "load_inv": True,
                 "cmp": lambda self, a, b: _cmp_inventory_node(a, b, self._spec["_inv_path"]),
+                "key": lambda self, row: _decorate_key_func(lambda v: v)(
+                    inventory.get_inventory_data(row["host_inventory"], self._spec["_inv_path"])),
             })
 
         filter_info = _inv_filter_info().get(datatype, {})
@@ -314,6 +317,10 @@ class PainterInventoryTree(Painter):
     def load_inv(self):
         return True
 
+    @property
+    def queries_livestatus(self):
+        return True
+
     def render(self, row: Row, cell: Cell) -> CellSpec:
         return paint_host_inventory_tree(row)
 
@@ -798,6 +805,17 @@ def _decorate_sort_func(f):
     return wrapper
 
 
+def _decorate_key_func(f):
+    # Orders like _decorate_sort_func: None first
+    def wrapper(val):
+        if val is None:
+            return (False,)
+
+        return (True, f(val))
+
+    return wrapper
+
+
 def _declare_invtable_column(infoname, invpath, topic, name, column):
     sub_invpath = invpath + "*." + name
     hint = inventory_displayhints.get(sub_invpath, {})
@@ -806,6 +824,8 @@ def _declare_invtable_column(infoname, invpath, topic, name, column):
         return (a > b) - (a < b)
 
     sortfunc = hint.get("sort", cmp_func)
+    # Sorters with a custom sort function only have a key when the hint declares one
+    keyfunc = hint.get("sort_key") if "sort" in hint else (lambda v: v)
     if "paint" in hint:
         paint_name = hint["paint"]
         paint_function = globals()["inv_paint_" + paint_name]
@@ -837,14 +857,17 @@ def _declare_invtable_column(infoname, invpath, topic, name, column):
             "columns": [column],
             "paint": lambda row: paint_function(row.get(column)),
             "sorter": column,
+            "streamable": True,
         })
 
-    register_sorter(
-        column, {
-            "title": _("Inventory") + ": " + title,
-            "columns": [column],
-            "cmp": lambda self, a, b: _decorate_sort_func(sortfunc)(a.get(column), b.get(column)),
-        })
+    sorter_spec = {
+        "title": _("Inventory") + ": " + title,
+        "columns": [column],
+        "cmp": lambda self, a, b: _decorate_sort_func(sortfunc)(a.get(column), b.get(column)),
+    }
+    if keyfunc is not None:
+        sorter_spec["key"] = lambda self, row: _decorate_key_func(keyfunc)(row.get(column))
+    register_sorter(column, sorter_spec)
 
 
 class RowTableInventory(ABCRowTable):
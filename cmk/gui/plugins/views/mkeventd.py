@@ -42,6 +42,7 @@ from cmk.gui.plugins.views import (
     cmp_simple_number,
     cmp_simple_string,
     cmp_num_split,
+    sorter_key_function,
 )
 from cmk.gui.permissions import (
     permission_registry,
@@ -1309,6 +1310,12 @@ def cmp_simple_state(column, ra, rb):
     return (a > b) - (a < b)
 
 
+@sorter_key_function(cmp_simple_state)
+def key_simple_state(column, row):
+    state = row.get(column, -1)
+    return 1.5 if state == 3 else state
+
+
 declare_1to1_sorter("event_id", cmp_simple_number)
 declare_1to1_sorter("event_count", cmp_simple_number)
 declare_1to1_sorter("event_text", cmp_simple_string)
@@ -1386,6 +1386,10 @@ class PainterSvcPnpgraph(Painter):
     def parameters(self) -> Transform:
         return cmk_time_graph_params()
 
+    @property
+    def queries_livestatus(self) -> bool:
+        return True
+
     def render(self, row: Row, cell: Cell) -> CellSpec:
         return paint_time_graph_cmk(row, cell)
 
@@ -2323,6 +2327,10 @@ class PainterHostPnpgraph(Painter):
     def parameters(self) -> Transform:
         return cmk_time_graph_params()
 
+    @property
+    def queries_livestatus(self) -> bool:
+        return True
+
     def render(self, row: Row, cell: Cell) -> CellSpec:
         return paint_time_graph_cmk(row, cell)
 
@@ -5028,6 +5036,10 @@ class PainterHostDockerNode(Painter):
     def columns(self) -> List[ColumnName]:
         return ["host_labels", "host_label_sources"]
 
+    @property
+    def queries_livestatus(self) -> bool:
+        return True
+
     def render(self, row: Row, cell: Cell) -> CellSpec:
         source_hosts = [
             k[21:] for k in get_labels(row, "host") if k.startswith("cmk/piggyback_source_")
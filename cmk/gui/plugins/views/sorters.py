@@ -24,6 +24,10 @@ from cmk.gui.plugins.views import (
     cmp_string_list,
     cmp_ip_address,
     compare_ips,
+    get_custom_var,
+    key_ip,
+    key_num_split,
+    sorter_key_function,
     get_tag_groups,
     get_labels,
     get_perfdata_nth_value,
@@ -66,6 +70,9 @@ class SorterSvcstate(Sorter):
         return (cmp_state_equiv(r1) > cmp_state_equiv(r2)) - (cmp_state_equiv(r1) <
                                                               cmp_state_equiv(r2))
 
+    def key(self, row):
+        return cmp_state_equiv(row)
+
 
 @sorter_registry.register
 class SorterHoststate(Sorter):
@@ -85,6 +92,9 @@ class SorterHoststate(Sorter):
         return (cmp_host_state_equiv(r1) > cmp_host_state_equiv(r2)) - (cmp_host_state_equiv(r1) <
                                                                         cmp_host_state_equiv(r2))
 
+    def key(self, row):
+        return cmp_host_state_equiv(row)
+
 
 @sorter_registry.register
 class SorterSiteHost(Sorter):
@@ -104,6 +114,9 @@ class SorterSiteHost(Sorter):
         return (r1["site"] > r2["site"]) - (r1["site"] < r2["site"]) or cmp_num_split(
             "host_name", r1, r2)
 
+    def key(self, row):
+        return row["site"], key_num_split("host_name", row)
+
 
 @sorter_registry.register
 class SorterHostName(Sorter):
@@ -122,6 +135,9 @@ class SorterHostName(Sorter):
     def cmp(self, r1, r2):
         return cmp_num_split("host_name", r1, r2)
 
+    def key(self, row):
+        return key_num_split("host_name", row)
+
 
 @sorter_registry.register
 class SorterSitealias(Sorter):
@@ -141,6 +157,9 @@ class SorterSitealias(Sorter):
         return (config.site(r1["site"])["alias"] > config.site(r2["site"])["alias"]) - (config.site(
             r1["site"])["alias"] < config.site(r2["site"])["alias"])
 
+    def key(self, row):
+        return config.site(row["site"])["alias"]
+
 
 class ABCTagSorter(Sorter, metaclass=abc.ABCMeta):
     @abc.abstractproperty
@@ -152,6 +171,9 @@ class ABCTagSorter(Sorter, metaclass=abc.ABCMeta):
         tag_groups_2 = sorted(get_tag_groups(r2, self.object_type).items())
         return (tag_groups_1 > tag_groups_2) - (tag_groups_1 < tag_groups_2)
 
+    def key(self, row):
+        return sorted(get_tag_groups(row, self.object_type).items())
+
 
 @sorter_registry.register
 class SorterHost(ABCTagSorter):
@@ -201,6 +223,9 @@ class ABCLabelSorter(Sorter, metaclass=abc.ABCMeta):
         labels_2 = sorted(get_labels(r2, self.object_type).items())
         return (labels_1 > labels_2) - (labels_1 < labels_2)
 
+    def key(self, row):
+        return sorted(get_labels(row, self.object_type).items())
+
 
 @sorter_registry.register
 class SorterHostLabels(ABCTagSorter):
@@ -257,6 +282,9 @@ class SorterServicelevel(Sorter):
     def cmp(self, r1, r2):
         return cmp_custom_variable(r1, r2, 'EC_SL', cmp_simple_number)
 
+    def key(self, row):
+        return get_custom_var(row, 'EC_SL')
+
 
 def cmp_service_name(column, r1, r2):
     return ((cmp_service_name_equiv(r1[column]) > cmp_service_name_equiv(r2[column])) -
@@ -264,6 +292,11 @@ def cmp_service_name(column, r1, r2):
             cmp_num_split(column, r1, r2))
 
 
+@sorter_key_function(cmp_service_name)
+def key_service_name(column, row):
+    return cmp_service_name_equiv(row[column]), key_num_split(column, row)
+
+
 #                      name                      title                              column                       sortfunction
 declare_simple_sorter("svcdescr", _("Service description"), "service_description", cmp_service_name)
 declare_simple_sorter("svcdispname", _("Service alternative display name"), "service_display_name",
@@ -329,6 +362,9 @@ class PerfValSorter(Sorter):
                 (utils.savefloat(get_perfdata_nth_value(r1, self._num - 1, True)) < utils.savefloat(
                     get_perfdata_nth_value(r2, self._num - 1, True))))
 
+    def key(self, row):
+        return utils.savefloat(get_perfdata_nth_value(row, self._num - 1, True))
+
 
 @sorter_registry.register
 class SorterSvcPerfVal01(PerfValSorter):
@@ -431,12 +467,15 @@ class SorterHostIpv4Address(Sorter):
         return ['host_custom_variable_names', 'host_custom_variable_values']
 
     def cmp(self, r1, r2):
-        def get_address(row):
-            custom_vars = dict(
-                zip(row["host_custom_variable_names"], row["host_custom_variable_values"]))
-            return custom_vars.get("ADDRESS_4", "")
+        return compare_ips(self._get_address(r1), self._get_address(r2))
 
-        return compare_ips(get_address(r1), get_address(r2))
+    def key(self, row):
+        return key_ip(self._get_address(row))
+
+    def _get_address(self, row):
+        custom_vars = dict(zip(row["host_custom_variable_names"],
+                               row["host_custom_variable_values"]))
+        return custom_vars.get("ADDRESS_4", "")
 
 
 @sorter_registry.register
@@ -461,6 +500,10 @@ class SorterNumProblems(Sorter):
                  r1["host_num_services_pending"] < r2["host_num_services"] -
                  r2["host_num_services_ok"] - r2["host_num_services_pending"]))
 
+    def key(self, row):
+        return (row["host_num_services"] - row["host_num_services_ok"] -
+                row["host_num_services_pending"])
+
 
 # Hostgroup
 declare_1to1_sorter("hg_num_services", cmp_simple_number)
@@ -525,6 +568,11 @@ def cmp_log_what(col, a, b):
     return (log_what(a[col]) > log_what(b[col])) - (log_what(a[col]) < log_what(b[col]))
 
 
+@sorter_key_function(cmp_log_what)
+def key_log_what(col, row):
+    return log_what(row[col])
+
+
 def log_what(t):
     if "HOST" in t:
         return 1
@@ -551,6 +599,13 @@ def cmp_date(column, r1, r2):
     return (r2_date > r1_date) - (r2_date < r1_date)
 
 
+@sorter_key_function(cmp_date)
+def key_date(column, row):
+    # Newest day first
+    start, end = get_day_start_timestamp(row[column])
+    return -start, -end
+
+
 declare_1to1_sorter("log_date", cmp_date)
 
 # Alert statistics
@@ -9,13 +9,14 @@
 
 import abc
 import functools
+import sys
 import time
 import re
 import hashlib
 from pathlib import Path
 import traceback
 from typing import (Callable, NamedTuple, Hashable, TYPE_CHECKING, Any, Set, Tuple, List, Optional,
-                    Union, Dict, Type, cast, Sequence)
+                    Union, Dict, Type, cast, Sequence, Iterable, Iterator)
 from contextlib import suppress
 
 from six import ensure_str
@@ -74,6 +75,7 @@ from cmk.gui.type_defs import (
     Row,
     Rows,
     SorterFunction,
+    SorterKeyFunction,
     AllViewSpecs,
     PermittedViewSpecs,
     VisualContext,
@@ -423,7 +425,7 @@ layout_registry = ViewLayoutRegistry()
 
 Exporter = NamedTuple("Exporter", [
     ("name", str),
-    ("handler", Callable[["View", Rows], None]),
+    ("handler", Callable[["View", Iterable[Row]], None]),
 ])
 
 
@@ -735,17 +737,20 @@ class RowTableLivestatus(RowTable):
         return self._table_name
 
     @staticmethod
-    def _prepare_columns(columns: List[ColumnName],
-                         view: 'View') -> Tuple[List[ColumnName], Dict[int, List[ColumnName]]]:
+    def _prepare_columns(
+        columns: List[ColumnName],
+        datasource: ABCDataSource,
+        cells: 'List[Cell]',
+        add_state_columns: bool = True,
+    ) -> Tuple[List[ColumnName], Dict[int, List[ColumnName]]]:
         dynamic_columns = {}
-        for index, cell in enumerate(view.row_cells):
+        for index, cell in enumerate(cells):
             dyn_col = cell.painter().dynamic_columns(cell)
             dynamic_columns[index] = dyn_col
             columns += dyn_col
 
         columns = list(set(columns))
 
-        datasource = view.datasource
         merge_column = datasource.merge_by
         if merge_column:
             # Prevent merge column from being duplicated in the query. It needs
@@ -757,7 +762,7 @@ class RowTableLivestatus(RowTable):
         # is selected. Make sure those columns are fetched. This
         # must not be done for the table 'log' as it cannot correctly
         # distinguish between service_state and host_state
-        if "log" not in datasource.infos:
+        if add_state_columns and "log" not in datasource.infos:
             state_columns: List[ColumnName] = []
             if "service" in datasource.infos:
                 state_columns += ["service_has_been_checked", "service_state"]
@@ -791,9 +796,12 @@ class RowTableLivestatus(RowTable):
 
         datasource = view.datasource
 
-        columns, dynamic_columns = self._prepare_columns(columns, view)
+        columns, dynamic_columns = self._prepare_columns(columns, datasource, view.row_cells)
         query = self.prepare_lql(columns, headers + datasource.add_headers)
-        data = query_livestatus(query, only_sites, limit, datasource.auth_domain)
+        # Convert the rows while they are received, so the rows are never held
+        # as lists and dictionaries at the same time.
+        data: Iterable[LivestatusRow] = query_livestatus_iter(query, only_sites, limit,
+                                                              datasource.auth_domain)
 
         if datasource.merge_by:
             data = _merge_data(data, columns)
@@ -801,18 +809,57 @@ class RowTableLivestatus(RowTable):
         # convert lists-rows into dictionaries.
         # performance, but makes live much easier later.
         columns = ["site"] + columns + datasource.add_columns
-        rows: Rows = datasource.post_process([dict(zip(columns, row)) for row in data])
+        rows: Rows = [dict(zip(columns, row)) for row in data]
+        num_rows = len(rows)
+        rows = datasource.post_process(rows)
 
         for index, cell in enumerate(view.row_cells):
             painter = cell.painter()
             painter.derive(rows, cell, dynamic_columns.get(index))
 
-        return rows, len(data)
+        return rows, num_rows
+
+    def query_iter(self,
+                   view: 'View',
+                   columns: List[ColumnName],
+                   headers: str,
+                   only_sites: OnlySites,
+                   limit: Optional[int],
+                   join_datasource: Optional[ABCDataSource] = None) -> Iterator[Row]:
+        """Yield the rows of query() while they are received
+
+        Only usable for views that can process the rows one by one: The datasource must neither
+        merge nor post process the rows and no painter may derive columns from all rows.
+
+        join_datasource: Yield the rows of this join datasource of the view instead. The dynamic
+        columns of the join cells are added and the implicit state columns are skipped."""
+        if join_datasource is None:
+            datasource = view.datasource
+            columns, _dynamic_columns = self._prepare_columns(columns, datasource, view.row_cells)
+        else:
+            datasource = join_datasource
+            columns, _dynamic_columns = self._prepare_columns(columns,
+                                                              datasource,
+                                                              view.join_cells,
+                                                              add_state_columns=False)
+        query = self.prepare_lql(columns, headers + datasource.add_headers)
+
+        columns = ["site"] + columns + datasource.add_columns
+        for row in query_livestatus_iter(query, only_sites, limit, datasource.auth_domain):
+            yield dict(zip(columns, row))
 
 
 def query_livestatus(query: LivestatusQuery, only_sites: OnlySites, limit: Optional[int],
                      auth_domain: str) -> List[LivestatusRow]:
+    return list(query_livestatus_iter(query, only_sites, limit, auth_domain))
+
 
+def query_livestatus_iter(query: LivestatusQuery, only_sites: OnlySites, limit: Optional[int],
+                          auth_domain: str) -> Iterator[LivestatusRow]:
+    """Yield the rows while they are received, see MultiSiteConnection.query_iter()
+
+    The sites, limit and authorization domain only apply to this query, the connection keeps
+    its settings. The rows must be consumed before issuing other livestatus queries."""
     if all((
             config.debug_livestatus_queries,
             html.output_format == "html",
@@ -822,13 +869,15 @@ def query_livestatus(query: LivestatusQuery, only_sites: OnlySites, limit: Optio
         html.tt(query.replace('\n', '<br>\n'))
         html.close_div()
 
-    sites.live().set_auth_domain(auth_domain)
-    with sites.only_sites(only_sites), sites.prepend_site(), sites.set_limit(limit):
-        data = sites.live().query(query)
-
-    sites.live().set_auth_domain("read")
-
-    return data
+    yield from sites.live().query_iter(
+        query,
+        options=livestatus.QueryOptions(
+            only_sites=only_sites or None,
+            # + 1: We need to know, if limit is exceeded
+            limit=None if limit is None else limit + 1,
+            prepend_site=True,
+            auth_domain=auth_domain,
+        ))
 
 
 # TODO: Return value of render() could be cleaned up e.g. to a named tuple with an
@@ -959,6 +1008,32 @@ class Painter(metaclass=abc.ABCMeta):
         """Whether or not to load the HW/SW inventory for this column"""
         return False
 
+    @property
+    def queries_livestatus(self) -> bool:
+        """Whether or not rendering a cell issues Livestatus queries of its own
+
+        Exports of views with such painters can not render the rows while they are received."""
+        return False
+
+    @property
+    def streamable(self) -> bool:
+        """Whether or not the cells can be rendered while the rows are received from Livestatus
+
+        Only the painters shipped with Checkmk are known not to issue Livestatus queries of their
+        own, unless they tell otherwise by queries_livestatus. Painters of local plugins are never
+        rendered while the rows are received."""
+        return not self.queries_livestatus and _is_shipped_class(type(self))
+
+
+_SHIPPED_GUI_DIR = Path(__file__).resolve().parents[2]  # cmk/gui, local plugins are elsewhere
+
+
+def _is_shipped_class(cls: type) -> bool:
+    module_file = getattr(sys.modules.get(cls.__module__), "__file__", None)
+    if module_file is None:
+        return False
+    return _SHIPPED_GUI_DIR in Path(module_file).resolve().parents
+
 
 class PainterRegistry(cmk.utils.plugin_registry.Registry[Type[Painter]]):
     def plugin_name(self, instance: Type[Painter]) -> str:
@@ -986,6 +1061,9 @@ def register_painter(ident: str, spec: Dict[str, Any]) -> None:
             "printable": property(lambda s: s._spec.get("printable", True)),
             "sorter": property(lambda s: s._spec.get("sorter", None)),
             "load_inv": property(lambda s: s._spec.get("load_inv", False)),
+            "queries_livestatus": property(lambda s: s._spec.get("queries_livestatus", False)),
+            # Legacy painters are registered here, no matter where they come from
+            "streamable": property(lambda s: s._spec.get("streamable", False)),
         })
     painter_registry.register(cls)
 
@@ -1023,6 +1101,14 @@ class Sorter(metaclass=abc.ABCMeta):
         one service, etc."""
         raise NotImplementedError()
 
+    def key(self, row: Dict) -> Any:
+        """Optional: The sort key of a data row
+
+        Sorting the rows by their keys is much faster than comparing them
+        pairwise with cmp. The keys must order the rows the same way cmp
+        does. Sorters which do not implement this are sorted with cmp."""
+        raise NotImplementedError()
+
     @property
     def _args(self) -> Optional[List]:
         """Optional list of arguments for the cmp function"""
@@ -1052,16 +1138,18 @@ sorter_registry = SorterRegistry()
 # Kept for pre 1.6 compatibility. But also the inventory.py uses this to
 # register some painters dynamically
 def register_sorter(ident: str, spec: Dict[str, Any]) -> None:
-    cls = type(
-        "LegacySorter%s" % str(ident).title(), (Sorter,), {
-            "_ident": ident,
-            "_spec": spec,
-            "ident": property(lambda s: s._ident),
-            "title": property(lambda s: s._spec["title"]),
-            "columns": property(lambda s: s._spec["columns"]),
-            "load_inv": property(lambda s: s._spec.get("load_inv", False)),
-            "cmp": spec["cmp"],
-        })
+    attrs = {
+        "_ident": ident,
+        "_spec": spec,
+        "ident": property(lambda s: s._ident),
+        "title": property(lambda s: s._spec["title"]),
+        "columns": property(lambda s: s._spec["columns"]),
+        "load_inv": property(lambda s: s._spec.get("load_inv", False)),
+        "cmp": spec["cmp"],
+    }
+    if "key" in spec:
+        attrs["key"] = spec["key"]
+    cls = type("LegacySorter%s" % str(ident).title(), (Sorter,), attrs)
     sorter_registry.register(cls)
 
 
@@ -1335,11 +1423,15 @@ def paint_nagiosflag(row: Row, field: ColumnName, bold_if_nonzero: bool) -> Cell
 
 
 def declare_simple_sorter(name: str, title: str, column: ColumnName, func: SorterFunction) -> None:
-    register_sorter(name, {
+    spec = {
         "title": title,
         "columns": [column],
         "cmp": lambda self, r1, r2: func(column, r1, r2)
-    })
+    }
+    key_func = _sorter_key_functions.get(func)
+    if key_func is not None:
+        spec["key"] = lambda self, row: key_func(column, row)  # type: ignore[misc]
+    register_sorter(name, spec)
 
 
 def declare_1to1_sorter(painter_name: PainterName,
@@ -1347,35 +1439,88 @@ def declare_1to1_sorter(painter_name: PainterName,
                         col_num: int = 0,
                         reverse: bool = False) -> PainterName:
     painter = painter_registry[painter_name]()
+    key_func = _sorter_key_functions.get(func)
 
     if not reverse:
         cmp_func = lambda self, r1, r2: func(painter.columns[col_num], r1, r2)
+        sort_key = lambda self, row: key_func(painter.columns[col_num], row)  # type: ignore[misc]
     else:
         cmp_func = lambda self, r1, r2: func(painter.columns[col_num], r2, r1)
+        sort_key = lambda self, row: ReversedSortKey(key_func(  # type: ignore[misc]
+            painter.columns[col_num], row))
 
-    register_sorter(painter_name, {
+    spec = {
         "title": painter.title,
         "columns": painter.columns,
         "cmp": cmp_func,
-    })
+    }
+    if key_func is not None:
+        spec["key"] = sort_key
+    register_sorter(painter_name, spec)
     return painter_name
 
 
+# The sorter functions which order the rows like a sort key function, see sorter_key_function()
+_sorter_key_functions: Dict[SorterFunction, SorterKeyFunction] = {}
+
+
+def sorter_key_function(
+        sorter_function: SorterFunction) -> Callable[[SorterKeyFunction], SorterKeyFunction]:
+    """Register the key function ordering the rows like the given sorter function
+
+    The sorters declared with declare_simple_sorter() and declare_1to1_sorter() sort
+    by the key function of their sorter function, if there is one."""
+    def register(key_function: SorterKeyFunction) -> SorterKeyFunction:
+        _sorter_key_functions[sorter_function] = key_function
+        return key_function
+
+    return register
+
+
+class ReversedSortKey:
+    """Wraps a sort key to order it the other way round"""
+    __slots__ = ["value"]
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __eq__(self, other: Any) -> bool:
+        return self.value == other.value
+
+    def __lt__(self, other: "ReversedSortKey") -> bool:
+        return other.value < self.value
+
+
 def cmp_simple_number(column: ColumnName, r1: Row, r2: Row) -> int:
     v1 = r1[column]
     v2 = r2[column]
     return (v1 > v2) - (v1 < v2)
 
 
+@sorter_key_function(cmp_simple_number)
+def key_simple_number(column: ColumnName, row: Row) -> Any:
+    return row[column]
+
+
 def cmp_num_split(column: ColumnName, r1: Row, r2: Row) -> int:
     return cmk.gui.utils.cmp_num_split(r1[column].lower(), r2[column].lower())
 
 
+@sorter_key_function(cmp_num_split)
+def key_num_split(column: ColumnName, row: Row) -> Tuple:
+    return cmk.gui.utils.key_num_split(row[column].lower())
+
+
 def cmp_simple_string(column: ColumnName, r1: Row, r2: Row) -> int:
     v1, v2 = r1.get(column, ''), r2.get(column, '')
     return cmp_insensitive_string(v1, v2)
 
 
+@sorter_key_function(cmp_simple_string)
+def key_simple_string(column: ColumnName, row: Row) -> Tuple[str, str]:
+    return key_insensitive_string(row.get(column, ''))
+
+
 def cmp_insensitive_string(v1: str, v2: str) -> int:
     c = (v1.lower() > v2.lower()) - (v1.lower() < v2.lower())
     # force a strict order in case of equal spelling but different
@@ -1385,12 +1530,21 @@ def cmp_insensitive_string(v1: str, v2: str) -> int:
     return c
 
 
+def key_insensitive_string(v: str) -> Tuple[str, str]:
+    return v.lower(), v
+
+
 def cmp_string_list(column: ColumnName, r1: Row, r2: Row) -> int:
     v1 = ''.join(r1.get(column, []))
     v2 = ''.join(r2.get(column, []))
     return cmp_insensitive_string(v1, v2)
 
 
+@sorter_key_function(cmp_string_list)
+def key_string_list(column: ColumnName, row: Row) -> Tuple[str, str]:
+    return key_insensitive_string(''.join(row.get(column, [])))
+
+
 def cmp_service_name_equiv(r: str) -> int:
     if r == "Check_MK":
         return -6
@@ -1414,18 +1568,24 @@ def cmp_ip_address(column: ColumnName, r1: Row, r2: Row) -> int:
     return compare_ips(r1.get(column, ''), r2.get(column, ''))
 
 
-def compare_ips(ip1: str, ip2: str) -> int:
-    def split_ip(ip: str) -> Tuple:
-        try:
-            return tuple(int(part) for part in ip.split('.'))
-        except ValueError:
-            # Make hostnames comparable with IPv4 address representations
-            return (255, 255, 255, 255, ip)
+@sorter_key_function(cmp_ip_address)
+def key_ip_address(column: ColumnName, row: Row) -> Tuple:
+    return key_ip(row.get(column, ''))
+
 
-    v1, v2 = split_ip(ip1), split_ip(ip2)
+def compare_ips(ip1: str, ip2: str) -> int:
+    v1, v2 = key_ip(ip1), key_ip(ip2)
     return (v1 > v2) - (v1 < v2)
 
 
+def key_ip(ip: str) -> Tuple:
+    try:
+        return tuple(int(part) for part in ip.split('.'))
+    except ValueError:
+        # Make hostnames comparable with IPv4 address representations
+        return (255, 255, 255, 255, ip)
+
+
 def get_custom_var(row: Row, key: str) -> str:
     return row["custom_variables"].get(key, "")
 
@@ -1449,7 +1609,8 @@ def get_perfdata_nth_value(row: Row, n: int, remove_unit: bool = False) -> str:
         return str(e)
 
 
-def _merge_data(data: List[LivestatusRow], columns: List[ColumnName]) -> List[LivestatusRow]:
+def _merge_data(data: Iterable[LivestatusRow],
+                columns: List[ColumnName]) -> List[LivestatusRow]:
     """Merge all data rows with different sites but the same value in merge_column
 
     We require that all column names are prefixed with the tablename. The column with the merge key
@@ -175,6 +175,9 @@ class SorterWatoFolderAbs(Sorter):
     def cmp(self, r1, r2):
         return cmp_wato_folder(r1, r2, 'abs')
 
+    def key(self, row):
+        return _get_wato_folder_text(row, 'abs')
+
 
 @sorter_registry.register
 class SorterWatoFolderRel(Sorter):
@@ -193,6 +196,9 @@ class SorterWatoFolderRel(Sorter):
     def cmp(self, r1, r2):
         return cmp_wato_folder(r1, r2, 'rel')
 
+    def key(self, row):
+        return _get_wato_folder_text(row, 'rel')
+
 
 @sorter_registry.register
 class SorterWatoFolderPlain(Sorter):
@@ -210,3 +216,6 @@ class SorterWatoFolderPlain(Sorter):
 
     def cmp(self, r1, r2):
         return cmp_wato_folder(r1, r2, 'plain')
+
+    def key(self, row):
+        return _get_wato_folder_text(row, 'plain')
@@ -6,14 +6,14 @@
 
 import json
 import time
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Iterable, List
 
 from six import ensure_str
 
 import cmk.gui.escaping as escaping
 from cmk.gui.globals import html
 from cmk.gui.htmllib import HTML
-from cmk.gui.type_defs import Rows
+from cmk.gui.type_defs import Row
 from cmk.gui.plugins.views import (
     exporter_registry,
     Exporter,
@@ -25,8 +25,8 @@ if TYPE_CHECKING:
     from cmk.gui.views import View
 
 
-def _export_python_raw(view: "View", rows: Rows) -> None:
-    html.write(repr(rows))
+def _export_python_raw(view: "View", rows: Iterable[Row]) -> None:
+    html.write(repr(list(rows)))
 
 
 exporter_registry.register(Exporter(
@@ -35,7 +35,7 @@ exporter_registry.register(Exporter(
 ))
 
 
-def _export_python(view: "View", rows: Rows) -> None:
+def _export_python(view: "View", rows: Iterable[Row]) -> None:
     html.write_text("[\n")
     html.write(repr([cell.export_title() for cell in view.row_cells]))
     html.write_text(",\n")
@@ -63,13 +63,15 @@ exporter_registry.register(Exporter(
 ))
 
 
-def _show_json(view: "View", rows: Rows) -> None:
-    painted_rows = []
+def _show_json(view: "View", rows: Iterable[Row]) -> None:
+    # The rows are encoded one by one, so the painted rows are never held all at
+    # once. The output is the same as of json.dumps(painted_rows, indent=True).
+    html.write("[\n")
 
     header_row = []
     for cell in view.row_cells:
         header_row.append(escaping.strip_tags(cell.export_title()))
-    painted_rows.append(header_row)
+    html.write(_json_row(header_row))
 
     for row in rows:
         painted_row = []
@@ -86,12 +88,18 @@ def _show_json(view: "View", rows: Rows) -> None:
 
             painted_row.append(content)
 
-        painted_rows.append(painted_row)
+        html.write(",\n")
+        html.write(_json_row(painted_row))
 
-    html.write(json.dumps(painted_rows, indent=True))
+    html.write("\n]")
 
 
-def _export_json(view: "View", rows: Rows) -> None:
+def _json_row(painted_row: List[Any]) -> str:
+    # JSON strings never contain a raw newline, so every line can be indented
+    return " " + json.dumps(painted_row, indent=True).replace("\n", "\n ")
+
+
+def _export_json(view: "View", rows: Iterable[Row]) -> None:
     _show_json(view, rows)
 
 
@@ -101,7 +109,7 @@ exporter_registry.register(Exporter(
 ))
 
 
-def _export_json_export(view: "View", rows: Rows) -> None:
+def _export_json_export(view: "View", rows: Iterable[Row]) -> None:
     filename = '%s-%s.json' % (view.name,
                                time.strftime('%Y-%m-%d_%H-%M-%S', time.localtime(time.time())))
     html.response.headers["Content-Disposition"] = "Attachment; filename=\"%s\"" % ensure_str(
@@ -116,7 +124,7 @@ exporter_registry.register(Exporter(
 ))
 
 
-def _export_jsonp(view: "View", rows: Rows) -> None:
+def _export_jsonp(view: "View", rows: Iterable[Row]) -> None:
     html.write("%s(\n" % html.request.var('jsonp', 'myfunction'))
     _show_json(view, rows)
     html.write_text(");\n")
@@ -129,7 +137,7 @@ exporter_registry.register(Exporter(
 
 
 class CSVRenderer:
-    def show(self, view: "View", rows: Rows) -> None:
+    def show(self, view: "View", rows: Iterable[Row]) -> None:
         csv_separator = html.request.get_str_input_mandatory("csv_separator", ";")
         first = True
         for cell in view.group_cells + view.row_cells:
@@ -160,7 +168,7 @@ class CSVRenderer:
         return escaping.strip_tags(str(raw_data)).replace('\n', '').replace('"', '""')
 
 
-def _export_csv_export(view: "View", rows: Rows) -> None:
+def _export_csv_export(view: "View", rows: Iterable[Row]) -> None:
     output_csv_headers(view.spec)
     CSVRenderer().show(view, rows)
 
@@ -171,7 +179,7 @@ exporter_registry.register(Exporter(
 ))
 
 
-def _export_csv(view: "View", rows: Rows) -> None:
+def _export_csv(view: "View", rows: Iterable[Row]) -> None:
     CSVRenderer().show(view, rows)
 
 
@@ -1865,6 +1865,10 @@ class FilterAggrServiceUsed(FilterTristate):
                 new_rows.append(row)
         return new_rows
 
+    def filters_rows_independently(self, context: VisualContext) -> bool:
+        # The BI aggregations may need to be compiled, which queries Livestatus
+        return self.tristate_value() == -1
+
     def filter_code(self, infoname, positive):
         pass
 
@@ -3099,6 +3103,10 @@ class FilterCMKSiteStatisticsByCorePIDs(Filter):
             yield "service_description"
             yield "long_plugin_output"
 
+    def filters_rows_independently(self, context: VisualContext) -> bool:
+        # The services of all connected sites are checked together
+        return self.ID not in context
+
     def filter_table(self, context: VisualContext, rows: Rows) -> Rows:
         if self.ID not in context:
             return rows
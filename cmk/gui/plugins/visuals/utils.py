@@ -279,6 +279,14 @@ class Filter(metaclass=abc.ABCMeta):
         """post-Livestatus filtering (e.g. for BI aggregations)"""
         return rows
 
+    def filters_rows_independently(self, context: VisualContext) -> bool:
+        """Whether filter_table() decides about each row on its own
+
+        The rows of some views are filtered in chunks while they are received from Livestatus.
+        Filters which need all rows at once or query Livestatus in filter_table() must return
+        False."""
+        return True
+
     def request_vars_from_row(self, row: Row) -> Dict[str, str]:
         """return filter request variables built from the given row"""
         return {}
@@ -29,6 +29,7 @@ from cmk.gui.valuespec import (
     Dictionary,
     DropdownChoice,
     DualListChoice,
+    Filesize,
     FixedValue,
     Float,
     IconSelector,
@@ -2363,6 +2364,75 @@ class ConfigVariableDelayPrecompile(ConfigVariable):
         )
 
 
+@config_variable_registry.register
+class ConfigVariableConfigSnapshot(ConfigVariable):
+    def group(self):
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self):
+        return ConfigDomainCore
+
+    def ident(self):
+        return "config_snapshot"
+
+    def valuespec(self):
+        return Checkbox(
+            title=_("Use a snapshot of the configuration"),
+            label=_("reuse the loaded configuration"),
+            help=_(
+                "When activating the changes, Checkmk stores the configuration it has loaded from "
+                "the configuration files. Later calls, e.g. the service discovery, use this "
+                "snapshot instead of reading all configuration files again, as long as none of "
+                "the files has been changed. Disable this in case your <tt>main.mk</tt> computes "
+                "the configuration from other sources, e.g. from a database."),
+        )
+
+
+@config_variable_registry.register
+class ConfigVariableCoreConfigProcesses(ConfigVariable):
+    def group(self):
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self):
+        return ConfigDomainCore
+
+    def ident(self):
+        return "core_config_processes"
+
+    def valuespec(self):
+        return Integer(
+            title=_("Processes for creating the core configuration"),
+            help=_("When activating the changes, the objects of the hosts and their services "
+                   "are created for the monitoring core. With more than one process, the hosts "
+                   "are split into parts which are processed in parallel. This speeds up the "
+                   "activation of large sites on machines with several CPU cores."),
+            minvalue=1,
+            maxvalue=64,
+        )
+
+
+@config_variable_registry.register
+class ConfigVariableCoreConfigIncremental(ConfigVariable):
+    def group(self):
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self):
+        return ConfigDomainCore
+
+    def ident(self):
+        return "core_config_incremental"
+
+    def valuespec(self):
+        return Checkbox(
+            title=_("Incremental creation of the core configuration"),
+            label=_("Only create the objects of changed hosts"),
+            help=_("The objects created for each host are kept together with a fingerprint of "
+                   "the configuration of the host. When activating the changes, the objects "
+                   "of all hosts whose configuration has not changed are reused. Changes of "
+                   "global settings affect all hosts, which are then created again."),
+        )
+
+
 @config_variable_registry.register
 class ConfigVariableClusterMaxCachefileAge(ConfigVariable):
     def group(self):
@@ -2407,6 +2477,56 @@ class ConfigVariablePiggybackMaxCachefileAge(ConfigVariable):
         )
 
 
+@config_variable_registry.register
+class ConfigVariableCacheFileMemorySize(ConfigVariable):
+    def group(self):
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self):
+        return ConfigDomainCore
+
+    def ident(self):
+        return "cache_file_memory_size"
+
+    def valuespec(self):
+        return Filesize(
+            title=_("Cache files kept in memory"),
+            help=_("Processes which read the same cache files again and again (e.g. the "
+                   "Checkmk helpers) can keep the recently used cache files in memory. This "
+                   "only makes the processing faster if the cache files of all hosts handled "
+                   "by a process fit into this size. Please note that each process allocates "
+                   "up to this size. Set to 0 to disable this (default)."),
+            minvalue=0,
+        )
+
+
+@config_variable_registry.register
+class ConfigVariableItemStateStorageFormat(ConfigVariable):
+    def group(self):
+        return ConfigVariableGroupCheckExecution
+
+    def domain(self):
+        return ConfigDomainCore
+
+    def ident(self):
+        return "item_state_storage_format"
+
+    def valuespec(self):
+        return DropdownChoice(
+            title=_("Storage format of counters"),
+            help=_("Checks keep counters and other values between two check cycles "
+                   "(e.g. for computing rates). Per default all values of a host are "
+                   "rewritten after each check cycle. The journal format only appends "
+                   "the values that have changed and is therefore much faster for "
+                   "hosts with many services. Existing values are taken over when "
+                   "switching to the journal format, but not when switching back."),
+            choices=[
+                ("standard", _("Standard: rewrite all values")),
+                ("journal", _("Journal: append changed values")),
+            ],
+        )
+
+
 @config_variable_registry.register
 class ConfigVariableCheckMKPerfdataWithTimes(ConfigVariable):
     def group(self):
@@ -2692,6 +2812,33 @@ class ConfigVariableInventoryCheckAutotrigger(ConfigVariable):
         )
 
 
+@config_variable_registry.register
+class ConfigVariableDiscoveryConcurrency(ConfigVariable):
+    def group(self):
+        return ConfigVariableGroupServiceDiscovery
+
+    def domain(self):
+        return ConfigDomainCore
+
+    def ident(self):
+        return "discovery_concurrency"
+
+    def valuespec(self):
+        return Integer(
+            title=_("Concurrent service discovery of hosts"),
+            label=_("Fetch the data of up to"),
+            unit=_("hosts at the same time"),
+            help=_("A service discovery of several hosts - with <tt>cmk -I</tt>, a bulk "
+                   "discovery or the automatic rediscovery of hosts - normally handles one host "
+                   "after the other. With a value larger than one, the data of that many hosts "
+                   "is fetched at the same time by separate processes, and the services are "
+                   "discovered by up to one process per CPU. Make sure to also raise the number "
+                   "of hosts handled at once by the bulk discovery."),
+            minvalue=1,
+            maxvalue=500,
+        )
+
+
 #.
 #   .--Rulesets------------------------------------------------------------.
 #   |                ____        _                _                        |
@@ -91,6 +91,7 @@ ViewSpec = Dict[str, Any]
 AllViewSpecs = Dict[Tuple[UserId, ViewName], ViewSpec]
 PermittedViewSpecs = Dict[ViewName, ViewSpec]
 SorterFunction = Callable[[ColumnName, Row, Row], int]
+SorterKeyFunction = Callable[[ColumnName, Row], Any]
 FilterHeaders = str
 
 # Configuration related
@@ -33,19 +33,18 @@ from cmk.gui.log import logger
 from cmk.gui.exceptions import MKUserError
 
 
+_NUMBERS_RE = re.compile(r'(\d+)')
+
+
 def num_split(s: str) -> Tuple[Union[int, str], ...]:
     """Splits a word into sequences of numbers and non-numbers.
 
     Creates a tuple from these where the number are converted into int datatype.
     That way a naturual sort can be implemented.
     """
-    parts: List[Union[int, str]] = []
-    for part in re.split(r'(\d+)', s):
-        try:
-            parts.append(int(part))
-        except ValueError:
-            parts.append(part)
-
+    parts: List[Union[int, str]] = list(_NUMBERS_RE.split(s))
+    # The numbers are always at the odd positions
+    parts[1::2] = map(int, parts[1::2])
     return tuple(parts)
 
 
@@ -102,6 +101,11 @@ def cmp_version(a: Optional[str], b: Optional[str]) -> int:
     return (aa > bb) - (aa < bb)
 
 
+def key_version(a: str) -> List[Tuple[Union[int, str], ...]]:
+    """Return a key from a version number, ordering it like cmp_version"""
+    return list(map(num_split, a.split(".")))
+
+
 # TODO: Remove this helper function. Replace with explicit checks and covnersion
 # in using code.
 def savefloat(f: Any) -> float:
@@ -7,12 +7,14 @@
 import abc
 import ast
 import collections
+import contextlib
 import functools
+import heapq
 import json
 import pprint
 import time
 from dataclasses import dataclass
-from itertools import chain
+from itertools import chain, islice
 from typing import Any, Callable, cast, Dict, Iterable, Iterator, List, Optional, Sequence, Set
 from typing import Tuple as _Tuple
 from typing import Type, Union
@@ -86,7 +88,7 @@ from cmk.gui.plugins.views.utils import (  # noqa: F401 # pylint: disable=unused
     PainterOptions, register_command_group, register_legacy_command, register_painter,
     register_sorter, replace_action_url_macros, row_id, Sorter, sorter_registry, SorterEntry,
     SorterSpec, transform_action_url, view_hooks, view_is_enabled, view_title, CommandExecutor,
-    CommandSpec,
+    CommandSpec, ReversedSortKey, RowTableLivestatus,
 )
 from cmk.gui.plugins.visuals.utils import (
     Filter,
@@ -151,17 +153,36 @@ multisite_datasources: Dict[str, Any] = {}
 multisite_painters: Dict[str, Dict[str, Any]] = {}
 multisite_sorters: Dict[str, Any] = {}
 
+_DEFAULT_PAGE_SIZE = 100
+# Number of rows that are processed at once while the rows are received from Livestatus
+_ROW_CHUNK_SIZE = 1000
+_SLA_PAINTERS = ["sla_specific", "sla_fixed"]
+
 
 @dataclass
 class ViewProcessTracking:
     amount_unfiltered_rows: int = 0
     amount_filtered_rows: int = 0
     amount_rows_after_limit: int = 0
+    amount_joined_rows: int = 0
     duration_fetch_rows: Snapshot = Snapshot.null()
+    duration_join_rows: Snapshot = Snapshot.null()
     duration_filter_rows: Snapshot = Snapshot.null()
     duration_view_render: Snapshot = Snapshot.null()
 
 
+@dataclass
+class ViewPage:
+    """The part of the rows of a view to show, see get_view_page()"""
+    number: int  # The first page is 1
+    size: int
+    has_next: bool = False  # Set while fetching the rows of the page
+
+    @property
+    def offset(self) -> int:
+        return (self.number - 1) * self.size
+
+
 @visual_type_registry.register
 class VisualTypeViews(VisualType):
     """Register the views as a visual type"""
@@ -318,6 +339,7 @@ class View:
         self.spec = view_spec
         self.context = context
         self._row_limit: Optional[int] = None
+        self._page: Optional[ViewPage] = None
         self._only_sites: Optional[List[SiteId]] = None
         self._user_sorters: Optional[List[SorterSpec]] = None
         self._want_checkboxes: bool = False
@@ -402,6 +424,18 @@ class View:
     def row_limit(self, row_limit: Optional[int]) -> None:
         self._row_limit = row_limit
 
+    @property
+    def page(self) -> Optional[ViewPage]:
+        """Optional page of the rows to show instead of all rows
+
+        The rows of a page are fetched without holding all rows of the view, in case the view
+        allows it, see _get_view_page_rows()."""
+        return self._page
+
+    @page.setter
+    def page(self, page: Optional[ViewPage]) -> None:
+        self._page = page
+
     @property
     def only_sites(self) -> Optional[List[SiteId]]:
         """Optional list of sites to query instead of all sites
@@ -711,6 +745,8 @@ class GUIViewRenderer(ABCViewRenderer):
 
             layout.render(rows, view_spec, self.view.group_cells, self.view.row_cells, num_columns,
                           show_checkboxes and not html.do_actions())
+            if self.view.page is not None:
+                _show_page_navigation(self.view.page, len(rows))
             row_info = "%d %s" % (row_count, _("row") if row_count == 1 else _("rows"))
             if show_checkboxes:
                 selected = _filter_selected_rows(
@@ -1180,6 +1216,8 @@ def _register_host_tag_sorters():
                 "title": _("Host tag:") + ' ' + tag_group.title,
                 "columns": ["host_tags"],
                 "cmp": lambda self, r1, r2: _cmp_host_tag(r1, r2, self._spec["_tag_group_id"]),
+                "key": lambda self, row: _get_tag_group_value(row, "host", self._spec[
+                    "_tag_group_id"]),
             })
 
 
@@ -1791,6 +1829,7 @@ def page_view():
 
         view = View(view_name, view_spec, context)
         view.row_limit = get_limit()
+        view.page = get_view_page()
 
         view.only_sites = visuals.get_only_sites_from_context(context)
 
@@ -1822,7 +1861,8 @@ def _may_create_slow_view_log_entry(page_view_tracker: CPUTracker, view: View) -
     logger.debug(
         ("View name: %s, User: %s, Row limit: %s, Limit type: %s, URL variables: %s"
          ", View context: %s, Unfiltered rows: %s, Filtered rows: %s, Rows after limit: %s"
-         ", Duration fetching rows: %s, Duration filtering rows: %s, Duration rendering view: %s"
+         ", Joined rows: %s, Duration fetching rows: %s, Duration joining rows: %s"
+         ", Duration filtering rows: %s, Duration rendering view: %s"
          ", Rendering page exceeds %ss: %s"),
         view.name,
         config.user.id,
@@ -1834,7 +1874,9 @@ def _may_create_slow_view_log_entry(page_view_tracker: CPUTracker, view: View) -
         view.process_tracking.amount_unfiltered_rows,
         view.process_tracking.amount_filtered_rows,
         view.process_tracking.amount_rows_after_limit,
+        view.process_tracking.amount_joined_rows,
         _format_snapshot_duration(view.process_tracking.duration_fetch_rows),
+        _format_snapshot_duration(view.process_tracking.duration_join_rows),
         _format_snapshot_duration(view.process_tracking.duration_filter_rows),
         _format_snapshot_duration(view.process_tracking.duration_view_render),
         duration_threshold,
@@ -1885,16 +1927,31 @@ def process_view(view_renderer: ABCViewRenderer) -> None:
 
 
 def _process_regular_view(view_renderer: ABCViewRenderer) -> None:
-    all_active_filters = _get_view_filters(view_renderer.view)
+    view = view_renderer.view
+    all_active_filters = _get_view_filters(view)
+
+    if (html.output_format != "html" and view.page is None and
+            _can_stream_view_rows(view, all_active_filters) and
+            _can_render_streamed_rows(view)):
+        _export_view(view, _stream_view_rows(view, all_active_filters))
+        return
+
     with livestatus.intercept_queries() as queries:
-        unfiltered_amount_of_rows, rows = _get_view_rows(
-            view_renderer.view,
-            all_active_filters,
-            only_count=False,
-        )
+        if view.page is not None:
+            unfiltered_amount_of_rows, rows = _get_view_page_rows(
+                view,
+                all_active_filters,
+                view.page,
+            )
+        else:
+            unfiltered_amount_of_rows, rows = _get_view_rows(
+                view,
+                all_active_filters,
+                only_count=False,
+            )
 
     if html.output_format != "html":
-        _export_view(view_renderer.view, rows)
+        _export_view(view, rows)
         return
 
     _add_rest_api_menu_entries(view_renderer, queries)
@@ -2027,21 +2084,13 @@ def _fetch_view_rows(view: View, all_active_filters: List[Filter],
     filterheaders = get_livestatus_filter_headers(view, all_active_filters)
     headers = filterheaders + view.spec.get("add_headers", "")
 
-    # Fetch data. Some views show data only after pressing [Search]
-    if (only_count or (not view.spec.get("mustsearch")) or
-            html.request.var("filled_in") in ["filter", 'actions', 'confirm', 'painteroptions']):
+    if _should_fetch_rows(view, only_count):
         columns = _get_needed_regular_columns(
             all_active_filters,
             view,
         )
-        # We test for limit here and not inside view.row_limit, because view.row_limit is used
-        # for rendering limits.
-        query_row_limit = None if view.datasource.ignore_limit else view.row_limit
-        row_data: Union[Rows,
-                        _Tuple[Rows,
-                               int]] = view.datasource.table.query(view, columns, headers,
-                                                                   view.only_sites, query_row_limit,
-                                                                   all_active_filters)
+        row_data: Union[Rows, _Tuple[Rows, int]] = view.datasource.table.query(
+            view, columns, headers, view.only_sites, _query_row_limit(view), all_active_filters)
 
         if isinstance(row_data, tuple):
             rows, unfiltered_amount_of_rows = row_data
@@ -2066,6 +2115,169 @@ def _fetch_view_rows(view: View, all_active_filters: List[Filter],
     return [], 0
 
 
+def _should_fetch_rows(view: View, only_count: bool) -> bool:
+    # Some views show data only after pressing [Search]
+    return (only_count or (not view.spec.get("mustsearch")) or
+            html.request.var("filled_in") in ["filter", 'actions', 'confirm', 'painteroptions'])
+
+
+def _query_row_limit(view: View) -> Optional[int]:
+    # We test for limit here and not inside view.row_limit, because view.row_limit is used
+    # for rendering limits.
+    return None if view.datasource.ignore_limit else view.row_limit
+
+
+def _can_stream_view_rows(view: View, all_active_filters: List[Filter]) -> bool:
+    """Whether or not the rows of the view can be processed while they are received
+
+    This is not possible for views which need all rows at once, e.g. for merging or joining rows."""
+    if not _can_stream_datasource_rows(view.datasource):
+        return False
+
+    if view.join_cells:
+        return False
+
+    if any(type(cell.painter()).derive is not Painter.derive for cell in view.row_cells):
+        return False
+
+    if not cmk_version.is_raw_edition() and any(
+            cell.painter_name() in _SLA_PAINTERS for cell in view.row_cells):
+        return False
+
+    return all(filt.filters_rows_independently(view.context) for filt in all_active_filters)
+
+
+def _can_stream_datasource_rows(datasource: ABCDataSource) -> bool:
+    """Whether or not RowTableLivestatus.query_iter() can be used for the rows of the datasource"""
+    table = datasource.table
+    if not (isinstance(table, RowTableLivestatus) and
+            type(table).query is RowTableLivestatus.query):
+        return False
+
+    return not datasource.merge_by and type(
+        datasource).post_process is ABCDataSource.post_process
+
+
+def _can_render_streamed_rows(view: View) -> bool:
+    # No Livestatus queries can be issued while the rows of the view are received
+    return all(cell.painter().streamable for cell in view.group_cells + view.row_cells)
+
+
+def _iter_view_rows(view: View, all_active_filters: List[Filter],
+                    limit: Optional[int]) -> Iterator[Row]:
+    """Yield the filtered rows of a view while they are received from Livestatus
+
+    Like _get_view_rows() without sorting, but the rows are processed in chunks. Only usable in
+    case _can_stream_view_rows() is true. At most limit + 1 rows are received from all sites."""
+    view.process_tracking.amount_unfiltered_rows = 0
+    view.process_tracking.amount_filtered_rows = 0
+    if not _should_fetch_rows(view, only_count=False):
+        return
+
+    headers = get_livestatus_filter_headers(view, all_active_filters) + view.spec.get(
+        "add_headers", "")
+    columns = _get_needed_regular_columns(all_active_filters, view)
+    need_inventory = _is_inventory_data_needed(view.group_cells, view.row_cells, view.sorters,
+                                               all_active_filters)
+    table = cast(RowTableLivestatus, view.datasource.table)
+
+    with contextlib.closing(table.query_iter(view, columns, headers, view.only_sites,
+                                             limit)) as received:
+        received_rows: Iterator[Row] = received if limit is None else islice(received, limit + 1)
+        while True:
+            rows = list(islice(received_rows, _ROW_CHUNK_SIZE))
+            if not rows:
+                return
+            view.process_tracking.amount_unfiltered_rows += len(rows)
+
+            if need_inventory:
+                _add_inventory_data(rows)
+
+            for filter_ in all_active_filters:
+                rows = filter_.filter_table(view.context, rows)
+            view.process_tracking.amount_filtered_rows += len(rows)
+
+            yield from rows
+
+
+def _get_view_page_rows(view: View, all_active_filters: List[Filter],
+                        page: ViewPage) -> _Tuple[int, Rows]:
+    """Fetch the rows of a single page of a view
+
+    Livestatus can neither sort nor skip rows. The rows of unsorted views are fetched up to the
+    end of the page. Of sorted views only the rows up to the end of the page are kept while the
+    rows are received. Views which can not process the rows one by one fetch all rows.
+
+    Like the rows of views without pages, the pages end at the row limit. The view warns about
+    the exceeded limit, see GUIViewRenderer.render()."""
+    end = page.offset + page.size
+    if not _can_stream_view_rows(view, all_active_filters):
+        unfiltered_amount_of_rows, rows = _get_view_rows(view, all_active_filters)
+    else:
+        # One more row tells whether or not there is a next page
+        with CPUTracker() as fetch_rows_tracker:
+            if view.sorters:
+                rows = _first_sorted_view_rows(view, all_active_filters, end + 1)
+            else:
+                rows = _first_view_rows(view, all_active_filters, end + 1)
+
+        view.process_tracking.duration_fetch_rows = fetch_rows_tracker.duration
+        unfiltered_amount_of_rows = view.process_tracking.amount_unfiltered_rows
+
+    row_limit = _query_row_limit(view)
+    if cmk.gui.view_utils.row_limit_exceeded(unfiltered_amount_of_rows, row_limit):
+        del rows[row_limit:]
+
+    page.has_next = len(rows) > end
+    return unfiltered_amount_of_rows, rows[page.offset:end]
+
+
+def _first_view_rows(view: View, all_active_filters: List[Filter], amount: int) -> Rows:
+    row_limit = _query_row_limit(view)
+    limit = amount - 1 if row_limit is None else min(row_limit, amount - 1)
+    with contextlib.closing(_iter_view_rows(view, all_active_filters, limit)) as rows:
+        first_rows = list(islice(rows, amount))
+
+    if (len(first_rows) == amount or limit == row_limit or
+            view.process_tracking.amount_unfiltered_rows <= limit):
+        return first_rows
+
+    # Rows have been removed by the filters, so the rows after the limit are needed
+    with contextlib.closing(_iter_view_rows(view, all_active_filters, row_limit)) as rows:
+        return list(islice(rows, amount))
+
+
+def _first_sorted_view_rows(view: View, all_active_filters: List[Filter], amount: int) -> Rows:
+    return heapq.nsmallest(amount,
+                           _iter_view_rows(view, all_active_filters, _query_row_limit(view)),
+                           key=_combined_sort_key(view.sorters))
+
+
+def _stream_view_rows(view: View, all_active_filters: List[Filter]) -> Iterator[Row]:
+    """Yield the rows of a view for exporting them
+
+    The rows of unsorted views are yielded while they are received. Sorting needs all rows."""
+    rows = _iter_view_rows(view, all_active_filters, _query_row_limit(view))
+    if not view.sorters:
+        yield from rows
+        return
+
+    sorted_rows = list(rows)
+    _sort_data(view, sorted_rows, view.sorters)
+    yield from sorted_rows
+
+
+def _show_page_navigation(page: ViewPage, num_rows: int) -> None:
+    html.open_div(class_="view_pages")
+    if page.number > 1:
+        html.a(_("Previous page"), href=makeuri(global_request, [("page", page.number - 1)]))
+    if num_rows:
+        html.span(_("Rows %d to %d") % (page.offset + 1, page.offset + num_rows))
+    if page.has_next:
+        html.a(_("Next page"), href=makeuri(global_request, [("page", page.number + 1)]))
+    html.close_div()
+
+
 def _show_view(view_renderer: ABCViewRenderer, unfiltered_amount_of_rows: int, rows: Rows) -> None:
     view = view_renderer.view
 
@@ -2119,11 +2331,11 @@ def _get_all_active_filters(view: View) -> 'List[Filter]':
     return use_filters
 
 
-def _export_view(view: View, rows: Rows) -> None:
+def _export_view(view: View, rows: Iterable[Row]) -> None:
     """Shows the views data in one of the supported machine readable formats"""
     layout = view.layout
     if html.output_format == "csv" and layout.has_individual_csv_export:
-        layout.csv_export(rows, view.spec, view.group_cells, view.row_cells)
+        layout.csv_export(list(rows), view.spec, view.group_cells, view.row_cells)
         return
 
     exporter = exporter_registry.get(html.output_format)
@@ -2277,7 +2489,7 @@ def _add_sla_data(view: View, rows: Rows) -> None:
     import cmk.gui.cee.sla as sla  # pylint: disable=no-name-in-module,import-outside-toplevel
     sla_params = []
     for cell in view.row_cells:
-        if cell.painter_name() in ["sla_specific", "sla_fixed"]:
+        if cell.painter_name() in _SLA_PAINTERS:
             sla_params.append(cell.painter_parameters())
     if sla_params:
         sla_configurations_container = sla.SLAConfigurationsContainerFactory.create_from_cells(
@@ -2298,51 +2510,69 @@ JoinSlaveKey = str
 
 def _do_table_join(view: View, master_rows: Rows, master_filters: str,
                    sorters: List[SorterEntry]) -> None:
+    """Add the rows of the join table to the master rows in the artificial column "JOIN"
+
+    The master rows are hashed by their join key. The rows of the join table are matched against
+    them while they are received, independent of their order."""
     assert view.datasource.join is not None
     join_table, join_master_column = view.datasource.join
     slave_ds = data_source_registry[join_table]()
     assert slave_ds.join_key is not None
     join_slave_column = slave_ds.join_key
     join_cells = view.join_cells
-    join_columns = _get_needed_join_columns(join_cells, sorters)
-
-    # Create additional filters
-    join_filters = []
-    for cell in join_cells:
-        join_filters.append(cell.livestatus_filter(join_slave_column))
 
+    # Only the columns shown or sorted by the join cells are fetched
+    join_columns = set(_get_needed_join_columns(join_cells, sorters))
+    dynamic_columns = {}
+    for index, cell in enumerate(join_cells):
+        dynamic_columns[index] = cell.painter().dynamic_columns(cell)
+        join_columns.update(dynamic_columns[index])
+    join_columns.update([join_master_column, join_slave_column])
+
+    # Create additional filters, one per joined object
+    join_filters = list(
+        dict.fromkeys(cell.livestatus_filter(join_slave_column) for cell in join_cells))
     join_filters.append("Or: %d" % len(join_filters))
     headers = "%s%s\n" % (master_filters, "\n".join(join_filters))
-    row_data = slave_ds.table.query(
-        view,
-        columns=list(set([join_master_column, join_slave_column] + join_columns)),
-        headers=headers,
-        only_sites=view.only_sites,
-        limit=None,
-        all_active_filters=[])
-
-    if isinstance(row_data, tuple):
-        rows, _unfiltered_amount_of_rows = row_data
-    else:
-        rows = row_data
-
-    per_master_entry: Dict[JoinMasterKey, Dict[JoinSlaveKey, Row]] = {}
-    current_key: Optional[JoinMasterKey] = None
-    current_entry: Optional[Dict[JoinSlaveKey, Row]] = None
-    for row in rows:
-        master_key = (row["site"], row[join_master_column])
-        if master_key != current_key:
-            current_key = master_key
-            current_entry = {}
-            per_master_entry[current_key] = current_entry
-        assert current_entry is not None
-        current_entry[row[join_slave_column]] = row
 
-    # Add this information into master table in artificial column "JOIN"
-    for row in master_rows:
-        key = (row["site"], row[join_master_column])
-        joininfo = per_master_entry.get(key, {})
-        row["JOIN"] = joininfo
+    with CPUTracker() as join_rows_tracker:
+        per_master_entry: Dict[JoinMasterKey, Dict[JoinSlaveKey, Row]] = {}
+        for row in master_rows:
+            row["JOIN"] = per_master_entry.setdefault((row["site"], row[join_master_column]), {})
+
+        joined_rows = []
+        for row in _query_join_rows(view, slave_ds, sorted(join_columns), headers):
+            entry = per_master_entry.get((row["site"], row[join_master_column]))
+            if entry is not None:
+                entry[row[join_slave_column]] = row
+                joined_rows.append(row)
+
+        for index, cell in enumerate(join_cells):
+            cell.painter().derive(joined_rows, cell, dynamic_columns[index])
+
+    view.process_tracking.amount_joined_rows = len(joined_rows)
+    view.process_tracking.duration_join_rows = join_rows_tracker.duration
+
+
+def _query_join_rows(view: View, slave_ds: ABCDataSource, columns: List[ColumnName],
+                     headers: str) -> Iterable[Row]:
+    table = slave_ds.table
+    if not _can_stream_datasource_rows(slave_ds):
+        row_data = table.query(view,
+                               columns=columns,
+                               headers=headers,
+                               only_sites=view.only_sites,
+                               limit=None,
+                               all_active_filters=[])
+        return row_data[0] if isinstance(row_data, tuple) else row_data
+
+    # The rows are received from all sites at once. They are converted while they are received.
+    return cast(RowTableLivestatus, table).query_iter(view,
+                                                      columns,
+                                                      headers,
+                                                      view.only_sites,
+                                                      limit=None,
+                                                      join_datasource=slave_ds)
 
 
 g_alarm_sound_states: Set[str] = set([])
@@ -2398,6 +2628,16 @@ def get_want_checkboxes() -> bool:
     return html.request.get_integer_input_mandatory("show_checkboxes", 0) == 1
 
 
+def get_view_page() -> Optional[ViewPage]:
+    """Which page of the rows does the user want to see? None shows all rows"""
+    if not html.request.has_var("page"):
+        return None
+    return ViewPage(
+        number=max(1, html.request.get_integer_input_mandatory("page")),
+        size=max(1, html.request.get_integer_input_mandatory("page_size", _DEFAULT_PAGE_SIZE)),
+    )
+
+
 def get_limit() -> Optional[int]:
     """How many data rows may the user query?"""
     limitvar = html.request.var("limit", "soft")
@@ -2934,31 +3174,52 @@ def _sort_data(view: View, data: 'Rows', sorters: List[SorterEntry]) -> None:
     if not sorters:
         return
 
-    # Handle case where join columns are not present for all rows
-    def safe_compare(compfunc: Callable[[Row, Row], int], row1: Row, row2: Row) -> int:
-        if row1 is None and row2 is None:
-            return 0
-        if row1 is None:
-            return -1
-        if row2 is None:
-            return 1
-        return compfunc(row1, row2)
-
-    def multisort(e1: Row, e2: Row) -> int:
-        for entry in sorters:
-            neg = -1 if entry.negate else 1
-
-            if entry.join_key:  # Sorter for join column, use JOIN info
-                c = neg * safe_compare(entry.sorter.cmp, e1["JOIN"].get(entry.join_key),
-                                       e2["JOIN"].get(entry.join_key))
-            else:
-                c = neg * entry.sorter.cmp(e1, e2)
+    # Sort by one key per row instead of comparing the rows pairwise. The keys of the sorters
+    # sharing the same direction are combined into one tuple. The sort is stable, so the
+    # differently directed groups are sorted one after another, the least significant first.
+    key_groups: List[_Tuple[bool, List[Callable[[Row], Any]]]] = []
+    for entry in sorters:
+        key = _sort_key(entry)
+        if key_groups and key_groups[-1][0] == entry.negate:
+            key_groups[-1][1].append(key)
+        else:
+            key_groups.append((entry.negate, [key]))
 
-            if c != 0:
-                return c
-        return 0  # equal
+    for negate, keys in reversed(key_groups):
+        if len(keys) == 1:
+            data.sort(key=keys[0], reverse=negate)
+        else:
+            data.sort(key=lambda row, keys=keys: tuple(key(row) for key in keys), reverse=negate)
+
+
+def _combined_sort_key(sorters: List[SorterEntry]) -> Callable[[Row], _Tuple]:
+    """One sort key for all sorters, ordering the rows like _sort_data() does"""
+    keys = [(entry.negate, _sort_key(entry)) for entry in sorters]
+    return lambda row: tuple(
+        ReversedSortKey(key(row)) if negate else key(row) for negate, key in keys)
+
+
+def _sort_key(entry: SorterEntry) -> Callable[[Row], Any]:
+    sorter = entry.sorter
+    if type(sorter).key is Sorter.key:
+        # Sorters without a sort key are compared pairwise
+        key: Callable[[Row], Any] = functools.cmp_to_key(sorter.cmp)
+    else:
+        key = sorter.key
+
+    if not entry.join_key:
+        return key
+
+    join_key = entry.join_key
+
+    # Handle case where join columns are not present for all rows
+    def join_row_key(row: Row) -> _Tuple:
+        join_row = row["JOIN"].get(join_key)
+        if join_row is None:
+            return (False,)
+        return (True, key(join_row))
 
-    data.sort(key=functools.cmp_to_key(multisort))
+    return join_row_key
 
 
 def sorters_of_datasource(ds_name):
@@ -3313,6 +3313,32 @@ class ConfigVariableEventConsoleRetentionInterval(ConfigVariable):
         )
 
 
+@config_variable_registry.register
+class ConfigVariableEventConsoleStatusPersistence(ConfigVariable):
+    def group(self):
+        return ConfigVariableGroupEventConsoleGeneric
+
+    def domain(self):
+        return ConfigDomainEventConsole
+
+    def ident(self):
+        return "status_persistence"
+
+    def valuespec(self):
+        return DropdownChoice(
+            title=_("Saving of the event state"),
+            help=_("By default the event daemon writes its complete state to disk in each "
+                   "state retention interval. With many open events this takes long and blocks "
+                   "the processing of events. When using a journal, only the changes since the "
+                   "last save are appended to a journal file, which is compacted into the "
+                   "complete state from time to time in the background."),
+            choices=[
+                ("snapshot", _("Write the complete state")),
+                ("journal", _("Append the changes to a journal")),
+            ],
+        )
+
+
 @config_variable_registry.register
 class ConfigVariableEventConsoleHousekeepingInterval(ConfigVariable):
     def group(self):
@@ -3397,6 +3423,32 @@ class ConfigVariableEventConsoleRuleOptimizer(ConfigVariable):
         )
 
 
+@config_variable_registry.register
+class ConfigVariableEventConsoleEventWorkers(ConfigVariable):
+    def group(self):
+        return ConfigVariableGroupEventConsoleGeneric
+
+    def domain(self):
+        return ConfigDomainEventConsole
+
+    def ident(self):
+        return "event_workers"
+
+    def valuespec(self):
+        return Integer(
+            title=_("Worker processes for incoming messages"),
+            help=_("With a high rate of incoming messages, parsing them and matching them against "
+                   "the rules can keep a single CPU busy. Set this to the number of worker "
+                   "processes which should do this work in parallel. The events are still "
+                   "created, cancelled and counted one after the other and in the order the "
+                   "messages came in. The workers only pay off with several CPUs, on a single "
+                   "CPU they slow the Event Console down. The default of <tt>0</tt> processes "
+                   "every message in the Event Console itself."),
+            minvalue=0,
+            maxvalue=64,
+        )
+
+
 @config_variable_registry.register
 class ConfigVariableEventConsoleActions(ConfigVariable):
     def group(self):
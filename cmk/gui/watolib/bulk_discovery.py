@@ -4,6 +4,7 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import time
 from typing import NamedTuple, List
 
 import cmk.utils.store as store
@@ -129,8 +130,14 @@ class BulkDiscoveryBackgroundJob(WatoBackgroundJob):
         self._initialize_statistics()
         job_interface.send_progress_update(_("Bulk discovery started..."))
 
+        num_hosts = sum(len(task.host_names) for task in tasks)
+        start_time = time.time()
         for task in tasks:
             self._bulk_discover_item(task, mode, do_scan, error_handling, job_interface)
+            job_interface.send_progress_update(
+                _("%d of %d hosts done (%.1f hosts/s)") %
+                (self._num_hosts_total, num_hosts, self._num_hosts_total /
+                 max(time.time() - start_time, 0.001)))
 
         job_interface.send_progress_update(_("Bulk discovery finished."))
 
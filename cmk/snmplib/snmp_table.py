@@ -5,7 +5,19 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 """Provide methods to get an snmp table with or without caching
 """
-from typing import Callable, Iterable, Iterator, List, MutableMapping, Optional, Set, Tuple
+import itertools
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    MutableMapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
 
 from pathlib import Path
 from six import ensure_binary
@@ -32,6 +44,7 @@ from .type_defs import (
 ResultColumnsUnsanitized = List[Tuple[OID, SNMPRowInfo, SNMPValueEncoding]]
 ResultColumnsSanitized = List[Tuple[List[SNMPRawValue], SNMPValueEncoding]]
 ResultColumnsDecoded = List[List[SNMPDecodedValues]]
+OIDKey = Tuple[int, ...]
 
 
 class WalkCache(MutableMapping[str, Tuple[bool, SNMPRowInfo]]):  # pylint: disable=too-many-ancestors
@@ -210,22 +223,10 @@ def _extract_end_oid(prefix: OID, complete: OID) -> OID:
 
 
 # sort OID strings numerically
-def _oid_to_intlist(oid: OID) -> List[int]:
+def _oid_to_key(oid: OID) -> OIDKey:
     if oid:
-        return list(map(int, oid.split('.')))
-    return []
-
-
-def _cmp_oids(o1: OID, o2: OID) -> int:
-    return (_oid_to_intlist(o1) > _oid_to_intlist(o2)) - (_oid_to_intlist(o1) < _oid_to_intlist(o2))
-
-
-def _key_oids(o1: OID) -> List[int]:
-    return _oid_to_intlist(o1)
-
-
-def _key_oid_pairs(pair1: Tuple[OID, SNMPRawValue]) -> List[int]:
-    return _oid_to_intlist(pair1[0].lstrip('.'))
+        return tuple(map(int, oid.split('.')))
+    return ()
 
 
 def _get_snmpwalk(
@@ -305,70 +306,72 @@ def _decode_column(column: List[SNMPRawValue], value_encoding: SNMPValueEncoding
     return [decode(v) for v in column]
 
 
+class _Column(NamedTuple):
+    """The rows of a walk, split into the end OIDs and the values"""
+    end_oids: List[OID]
+    values: List[SNMPRawValue]
+    value_encoding: SNMPValueEncoding
+
+    @classmethod
+    def from_row_info(
+        cls,
+        fetchoid: OID,
+        row_info: SNMPRowInfo,
+        value_encoding: SNMPValueEncoding,
+    ) -> "_Column":
+        if not row_info:
+            return cls([], [], value_encoding)
+        oids, values = zip(*row_info)
+        prefix_len = len(fetchoid)
+        return cls(
+            [o[prefix_len:].lstrip('.') for o in oids],
+            list(values),
+            value_encoding,
+        )
+
+    def sorted(self, keys: Mapping[OID, OIDKey]) -> "_Column":
+        order = sorted(range(len(self.end_oids)), key=lambda i: keys[self.end_oids[i]])
+        return _Column(
+            [self.end_oids[i] for i in order],
+            [self.values[i] for i in order],
+            self.value_encoding,
+        )
+
+    def aligned(self, end_oids: List[OID], positions: Mapping[OID, int]) -> List[SNMPRawValue]:
+        """The values at the positions of `end_oids`, missing ones are empty"""
+        if self.end_oids == end_oids:
+            return self.values
+        new_values = [b""] * len(end_oids)
+        for end_oid, value in zip(self.end_oids, self.values):
+            new_values[positions[end_oid]] = value
+        return new_values
+
+
 def _sanitize_snmp_table_columns(columns: ResultColumnsUnsanitized) -> ResultColumnsSanitized:
+    table_columns = [
+        _Column.from_row_info(fetchoid, row_info, value_encoding)
+        for fetchoid, row_info, value_encoding in columns
+    ]
+
     # First compute the complete list of end-oids appearing in the output
-    # by looping all results and putting the endoids to a flat list
-    endoids: List[OID] = []
-    for fetchoid, row_info, value_encoding in columns:
-        for o, value in row_info:
-            endoid = _extract_end_oid(fetchoid, o)
-            if endoid not in endoids:
-                endoids.append(endoid)
+    # (in the order of their first appearance)
+    endoids = list(dict.fromkeys(itertools.chain.from_iterable(c.end_oids for c in table_columns)))
 
     # The list needs to be sorted to prevent problems when the first
     # column has missing values in the middle of the tree.
-    if not _are_ascending_oids(endoids):
-        endoids.sort(key=_key_oids)
-        need_sort = True
-    else:
-        need_sort = False
-
-    # Now fill gaps in columns where some endois are missing
-    new_columns: ResultColumnsSanitized = []
-    for fetchoid, row_info, value_encoding in columns:
+    keys = list(map(_oid_to_key, endoids))
+    if any(k1 > k2 for k1, k2 in zip(keys, keys[1:])):  # == should never happen
+        key_of = dict(zip(endoids, keys))
+        endoids.sort(key=key_of.__getitem__)
         # It might happen that end OIDs are not ordered. Fix the OID sorting to make
-        # it comparable to the already sorted endoids list. Otherwise we would get
-        # some mixups when filling gaps
-        if need_sort:
-            row_info.sort(key=_key_oid_pairs)
-
-        i = 0
-        new_column = []
-        # Loop all lines to fill holes in the middle of the list. All
-        # columns check the following lines for the correct endoid. If
-        # an endoid differs empty values are added until the hole is filled
-        for o, value in row_info:
-            eo = _extract_end_oid(fetchoid, o)
-            if len(row_info) != len(endoids):
-                while i < len(endoids) and endoids[i] != eo:
-                    new_column.append(b"")  # (beginoid + '.' +endoids[i], "" ) )
-                    i += 1
-            new_column.append(value)
-            i += 1
-
-        # At the end check if trailing OIDs are missing
-        while i < len(endoids):
-            new_column.append(b"")  # (beginoid + '.' +endoids[i], "") )
-            i += 1
-        new_columns.append((new_column, value_encoding))
-
-    return new_columns
-
-
-def _are_ascending_oids(oid_list: List[OID]) -> bool:
-    for a in range(len(oid_list) - 1):
-        if _cmp_oids(oid_list[a], oid_list[a + 1]) > 0:  # == 0 should never happen
-            return False
-    return True
+        # it comparable to the already sorted endoids list.
+        table_columns = [c.sorted(key_of) for c in table_columns]
 
+    # Now fill gaps in columns where some endoids are missing
+    positions = {endoid: index for index, endoid in enumerate(endoids)}
+    return [(c.aligned(endoids, positions), c.value_encoding) for c in table_columns]
 
-def _construct_snmp_table_of_rows(columns: ResultColumnsDecoded) -> SNMPTable:
-    if not columns:
-        return []
 
+def _construct_snmp_table_of_rows(columns: ResultColumnsDecoded) -> SNMPTable:
     # Now construct table by swapping X and Y.
-    new_info = []
-    for index in range(len(columns[0])):
-        row = [c[index] for c in columns]
-        new_info.append(row)
-    return new_info
+    return list(map(list, zip(*columns)))
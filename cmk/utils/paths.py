@@ -46,6 +46,7 @@ autochecks_dir = base_autochecks_dir
 precompiled_hostchecks_dir = _omd_path("var/check_mk/precompiled")
 snmpwalks_dir = _omd_path("var/check_mk/snmpwalks")
 counters_dir = _omd_path("tmp/check_mk/counters")
+counters_journal_dir = _omd_path("tmp/check_mk/counters_journal")
 tcp_cache_dir = _omd_path("tmp/check_mk/cache")
 data_source_cache_dir = _omd_path("tmp/check_mk/data_source_cache")
 snmp_scan_cache_dir = _omd_path("tmp/check_mk/snmp_scan_cache")
@@ -71,6 +72,7 @@ base_discovered_host_labels_dir = Path(_omd_path("var/check_mk/discovered_host_l
 discovered_host_labels_dir = base_discovered_host_labels_dir
 piggyback_dir = Path(tmp_dir, "piggyback")
 piggyback_source_dir = Path(tmp_dir, "piggyback_sources")
+piggyback_index_dir = Path(tmp_dir, "piggyback_index")
 crash_dir = Path(var_dir, "crashes")
 diagnostics_dir = Path(var_dir, "diagnostics")
 site_config_dir = Path(var_dir, "site_configs")
@@ -5,11 +5,13 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import errno
+import json
 import logging
 import os
 import tempfile
+import time
 from pathlib import Path
-from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+from typing import Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple
 
 import cmk.utils
 import cmk.utils.paths
@@ -55,9 +57,13 @@ PiggybackTimeSettings = List[Tuple[Optional[str], str, int]]
 # "source_state_file":
 # - tmp/check_mk/piggyback_sources/SOURCE
 #
+# "source_index_file":
+# - tmp/check_mk/piggyback_index/SOURCE
+#
 # "source_hostname":
 # - Path(tmp/check_mk/piggyback/HOST/SOURCE).name
 # - Path(tmp/check_mk/piggyback_sources/SOURCE).name
+# - Path(tmp/check_mk/piggyback_index/SOURCE).name
 
 
 def get_piggyback_raw_data(
@@ -138,16 +144,12 @@ def get_piggyback_raw_data(
 def get_source_and_piggyback_hosts(
         time_settings: PiggybackTimeSettings) -> Iterator[Tuple[str, str]]:
     """Generates all piggyback pig/piggybacked host pairs that have up-to-date data"""
-
-    # Pylint bug (https://github.com/PyCQA/pylint/issues/1660). Fixed with pylint 2.x
-    for piggybacked_host_folder in _get_piggybacked_host_folders():
-        for file_info in _get_piggyback_processed_file_infos(
-                piggybacked_host_folder.name,
-                time_settings,
-        ):
+    index = PiggybackIndex.load()
+    for piggybacked_hostname in index.piggybacked_hostnames():
+        for file_info in index.processed_file_infos(piggybacked_hostname, time_settings):
             if not file_info.successfully_processed:
                 continue
-            yield file_info.source_hostname, piggybacked_host_folder.name
+            yield file_info.source_hostname, piggybacked_hostname
 
 
 def has_piggyback_raw_data(piggybacked_hostname: str, time_settings: PiggybackTimeSettings) -> bool:
@@ -207,25 +209,49 @@ def _get_matching_time_settings(
 def _get_piggyback_processed_file_info(
         source_hostname: str, piggybacked_hostname: str, piggyback_file_path: Path,
         time_settings: Dict[Tuple[Optional[str], str], int]) -> Tuple[bool, str, int]:
+    try:
+        # TODO use Path.stat() but be aware of:
+        # On POSIX platforms Python reads atime and mtime at nanosecond resolution
+        # but only writes them at microsecond resolution.
+        # (We're using os.utime() in _store_status_file_of())
+        file_stat = os.stat(str(piggyback_file_path))
+    except OSError:
+        return False, "Piggyback file might have been deleted", 0
+
+    status_time = _get_source_status_time(source_hostname)
+    return _eval_piggyback_file(
+        source_hostname,
+        piggybacked_hostname,
+        time.time() - file_stat.st_mtime,
+        None if status_time is None else status_time <= file_stat[8],
+        time_settings,
+    )
+
+
+def _eval_piggyback_file(
+    source_hostname: str,
+    piggybacked_hostname: str,
+    file_age: float,
+    updated: Optional[bool],
+    time_settings: Dict[Tuple[Optional[str], str], int],
+) -> Tuple[bool, str, int]:
+    """Evaluate the piggyback data of a source for a host
 
+    `updated` tells whether it has been stored together with the last piggyback data
+    of the source, it is None if the source does not send piggyback data.
+    """
     max_cache_age = _get_max_cache_age(source_hostname, piggybacked_hostname, time_settings)
     validity_period = _get_validity_period(source_hostname, piggybacked_hostname, time_settings)
     validity_state = _get_validity_state(source_hostname, piggybacked_hostname, time_settings)
 
-    try:
-        file_age = cmk.utils.cachefile_age(piggyback_file_path)
-    except MKGeneralException:
-        return False, "Piggyback file might have been deleted", 0
-
     if file_age > max_cache_age:
         return False, "Piggyback file too old: %s" % Age(file_age - max_cache_age), 0
 
-    status_file_path = _get_source_status_file_path(source_hostname)
-    if not status_file_path.exists():
+    if updated is None:
         reason = "Source '%s' not sending piggyback data" % source_hostname
         return _eval_file_in_validity_period(file_age, validity_period, validity_state, reason)
 
-    if _is_piggyback_file_outdated(status_file_path, piggyback_file_path):
+    if not updated:
         reason = "Piggyback file not updated by source '%s'" % source_hostname
         return _eval_file_in_validity_period(file_age, validity_period, validity_state, reason)
 
@@ -264,16 +290,13 @@ def _eval_file_in_validity_period(file_age: float, validity_period: Optional[int
     return False, reason, 0
 
 
-def _is_piggyback_file_outdated(status_file_path: Path, piggyback_file_path: Path) -> bool:
+def _get_source_status_time(source_hostname: str) -> Optional[int]:
+    """The time of the last piggyback data of the source, None if it does not send any"""
     try:
-        # TODO use Path.stat() but be aware of:
-        # On POSIX platforms Python reads atime and mtime at nanosecond resolution
-        # but only writes them at microsecond resolution.
-        # (We're using os.utime() in _store_status_file_of())
-        return os.stat(str(status_file_path))[8] > os.stat(str(piggyback_file_path))[8]
+        return os.stat(str(_get_source_status_file_path(source_hostname)))[8]
     except OSError as e:
         if e.errno == errno.ENOENT:
-            return True
+            return None
         raise
 
 
@@ -355,9 +378,238 @@ def _store_status_file_of(status_file_path: Path, piggyback_file_paths: List[Pat
                 if e.errno == errno.ENOENT:
                     continue
                 raise
+
+    # Before the status file, so that the index is never older than the status file
+    _add_to_source_index(
+        status_file_path.name,
+        {
+            piggyback_file_path.parent.name: status_file_times[1]
+            for piggyback_file_path in piggyback_file_paths
+        },
+    )
     os.rename(tmp_path, str(status_file_path))
 
 
+#.
+#   .--index---------------------------------------------------------------.
+#   |                    _           _                                     |
+#   |                   (_)_ __   __| | _____  __                          |
+#   |                   | | '_ \ / _` |/ _ \ \/ /                          |
+#   |                   | | | | | (_| |  __/>  <                           |
+#   |                   |_|_| |_|\__,_|\___/_/\_\                          |
+#   |                                                                      |
+#   '----------------------------------------------------------------------'
+
+# The source index files contain the piggybacked hosts a source has stored piggyback data
+# for with the time it has been stored at, and the same for its last piggyback data only:
+# {"stored_at": {PIGGYBACKED_HOST: TIME, ...}, "last": {PIGGYBACKED_HOST: TIME, ...}}
+SourceIndex = Dict[str, Dict[str, float]]
+
+
+class PiggybackIndex:
+    """Which sources have stored piggyback data for which piggybacked hosts
+
+    The functions concerning all piggybacked hosts use this instead of walking through
+    all the piggyback folders and stat()ing every file. It is made of the source index
+    files, one per source, which are updated whenever a source stores piggyback data or
+    piggyback files are cleaned up. (The functions concerning a single piggybacked host
+    look at its folder, it is an index of its own.)
+    """
+    def __init__(self, stored_at: Mapping[str, Mapping[str, Tuple[float, Optional[bool]]]]) -> None:
+        super().__init__()
+        # Piggybacked host -> source -> the time the piggyback data has been stored at and
+        # whether it has been updated with the last piggyback data of the source (None if
+        # the source does not send piggyback data anymore)
+        self._stored_at = stored_at
+
+    @classmethod
+    def load(cls) -> "PiggybackIndex":
+        if not cmk.utils.paths.piggyback_index_dir.exists():
+            _create_index()
+
+        stored_at: Dict[str, Dict[str, Tuple[float, Optional[bool]]]] = {}
+        for source_index_file in _get_source_index_files():
+            source_index = _load_source_index(source_index_file)
+            source_hostname = source_index_file.name
+            sending = _get_source_status_file_path(source_hostname).exists()
+            last = source_index["last"]
+            for piggybacked_hostname, stored in source_index["stored_at"].items():
+                stored_at.setdefault(piggybacked_hostname, {})[source_hostname] = (
+                    stored,
+                    (piggybacked_hostname in last) if sending else None,
+                )
+        return cls(stored_at)
+
+    def piggybacked_hostnames(self) -> List[str]:
+        return list(self._stored_at)
+
+    def source_hostnames(self) -> List[str]:
+        return [
+            source_hostname for sources in self._stored_at.values()
+            for source_hostname in sources
+        ]
+
+    def stored_at(self, piggybacked_hostname: str) -> Dict[str, float]:
+        return {
+            source_hostname: stored
+            for source_hostname, (stored, _updated) in self._stored_at.get(
+                piggybacked_hostname, {}).items()
+        }
+
+    def processed_file_infos(
+        self,
+        piggybacked_hostname: str,
+        time_settings: PiggybackTimeSettings,
+    ) -> List[PiggybackFileInfo]:
+        """Like _get_piggyback_processed_file_infos(), without looking at the files"""
+        sources = self._stored_at.get(piggybacked_hostname, {})
+        matching_time_settings = _get_matching_time_settings(list(sources), piggybacked_hostname,
+                                                             time_settings)
+        now = time.time()
+        return [
+            PiggybackFileInfo(
+                source_hostname,
+                _get_piggybacked_file_path(source_hostname, piggybacked_hostname),
+                *_eval_piggyback_file(
+                    source_hostname,
+                    piggybacked_hostname,
+                    now - stored,
+                    updated,
+                    matching_time_settings,
+                ),
+            ) for source_hostname, (stored, updated) in sources.items()
+        ]
+
+
+def _create_index() -> None:
+    """Create the index from the piggyback folders, which have been stored without one
+
+    It is created aside and moved into place, so that it is either complete or missing.
+    """
+    index_dir = cmk.utils.paths.piggyback_index_dir
+    store.makedirs(index_dir.parent)
+    new_index_dir = Path(
+        tempfile.mkdtemp(dir=str(index_dir.parent), prefix=".%s.new" % index_dir.name))
+    os.chmod(str(new_index_dir), 0o770)
+
+    source_indexes: Dict[str, SourceIndex] = {}
+    for piggybacked_host_folder in _get_piggybacked_host_folders():
+        for piggybacked_host_source in _get_piggybacked_host_sources(piggybacked_host_folder):
+            try:
+                file_stat = os.stat(str(piggybacked_host_source))
+            except OSError as e:
+                if e.errno == errno.ENOENT:
+                    continue
+                raise
+
+            source_index = source_indexes.setdefault(piggybacked_host_source.name, {
+                "stored_at": {},
+                "last": {},
+            })
+            source_index["stored_at"][piggybacked_host_folder.name] = file_stat.st_mtime
+            # See _get_piggyback_processed_file_info()
+            status_time = _get_source_status_time(piggybacked_host_source.name)
+            if status_time is not None and status_time <= file_stat[8]:
+                source_index["last"][piggybacked_host_folder.name] = file_stat.st_mtime
+
+    for source_hostname, source_index in source_indexes.items():
+        _save_source_index(new_index_dir / source_hostname, source_index)
+
+    try:
+        os.rename(str(new_index_dir), str(index_dir))
+    except OSError as e:
+        # Another process has been faster
+        if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+            raise
+        for source_index_file in new_index_dir.iterdir():
+            source_index_file.unlink()
+        new_index_dir.rmdir()
+
+
+def _add_to_source_index(source_hostname: str, stored_at: Mapping[str, float]) -> None:
+    """Add the piggyback data just stored by the source, it is the last one of the source"""
+    if not cmk.utils.paths.piggyback_index_dir.exists():
+        _create_index()
+
+    source_index_file = _get_source_index_file_path(source_hostname)
+    with store.locked(source_index_file):
+        source_index = _load_source_index(source_index_file)
+        source_index["stored_at"].update(stored_at)
+        source_index["last"] = dict(stored_at)
+        _save_source_index(source_index_file, source_index)
+
+
+def _remove_from_source_index(source_hostname: str, stored_at: Mapping[str, float]) -> None:
+    """Remove removed piggyback files, unless they have been stored again in the meantime"""
+    source_index_file = _get_source_index_file_path(source_hostname)
+    with store.locked(source_index_file):
+        source_index = _load_source_index(source_index_file)
+        for piggybacked_hostname, stored in stored_at.items():
+            if source_index["stored_at"].get(piggybacked_hostname) == stored:
+                del source_index["stored_at"][piggybacked_hostname]
+                source_index["last"].pop(piggybacked_hostname, None)
+        _save_source_index(source_index_file, source_index)
+
+
+def rename_host_in_index(oldname: str, newname: str) -> None:
+    """Update the index after the piggyback files of a host have been renamed
+
+    The host may be a piggybacked host as well as a source. The piggyback folder of the
+    new name has been replaced by the one of the old name.
+    """
+    if not cmk.utils.paths.piggyback_index_dir.exists():
+        return  # It is created from the renamed files on first use
+
+    for source_index_file in _get_source_index_files():
+        with store.locked(source_index_file):
+            source_index = _load_source_index(source_index_file)
+            if oldname not in source_index["stored_at"]:
+                continue
+            for entries in [source_index["stored_at"], source_index["last"]]:
+                entries.pop(newname, None)
+                if oldname in entries:
+                    entries[newname] = entries.pop(oldname)
+            _save_source_index(source_index_file, source_index)
+
+    old_source_index_file = _get_source_index_file_path(oldname)
+    if not old_source_index_file.exists():
+        return
+    with store.locked(old_source_index_file):
+        old_source_index = _load_source_index(old_source_index_file)
+        old_source_index_file.unlink()
+
+    # The files stored by the new name for other piggybacked hosts are kept
+    new_source_index_file = _get_source_index_file_path(newname)
+    with store.locked(new_source_index_file):
+        source_index = _load_source_index(new_source_index_file)
+        source_index["stored_at"].update(old_source_index["stored_at"])
+        source_index["last"].update(old_source_index["last"])
+        _save_source_index(new_source_index_file, source_index)
+
+
+def remove_piggybacked_host_from_index(piggybacked_hostname: str) -> None:
+    """Update the index after the piggyback folder of a host has been removed"""
+    for source_index_file in _get_source_index_files():
+        with store.locked(source_index_file):
+            source_index = _load_source_index(source_index_file)
+            if piggybacked_hostname not in source_index["stored_at"]:
+                continue
+            del source_index["stored_at"][piggybacked_hostname]
+            source_index["last"].pop(piggybacked_hostname, None)
+            _save_source_index(source_index_file, source_index)
+
+
+def _load_source_index(source_index_file: Path) -> SourceIndex:
+    content = store.load_text_from_file(source_index_file)
+    if not content:
+        return {"stored_at": {}, "last": {}}
+    return json.loads(content)
+
+
+def _save_source_index(source_index_file: Path, source_index: SourceIndex) -> None:
+    store.save_text_to_file(source_index_file, json.dumps(source_index))
+
+
 #   .--folders/files-------------------------------------------------------.
 #   |         __       _     _                  ____ _ _                   |
 #   |        / _| ___ | | __| | ___ _ __ ___   / / _(_) | ___  ___         |
@@ -370,11 +622,7 @@ def _store_status_file_of(status_file_path: Path, piggyback_file_paths: List[Pat
 
 def get_source_hostnames(piggybacked_hostname: Optional[str] = None) -> List[str]:
     if piggybacked_hostname is None:
-        return [
-            source_host.name
-            for piggybacked_host_folder in _get_piggybacked_host_folders()
-            for source_host in _get_piggybacked_host_sources(piggybacked_host_folder)
-        ]
+        return PiggybackIndex.load().source_hostnames()
 
     piggybacked_host_folder = cmk.utils.paths.piggyback_dir / Path(piggybacked_hostname)
     return [
@@ -421,6 +669,23 @@ def _get_source_state_files() -> List[Path]:
         raise
 
 
+def _get_source_index_files() -> List[Path]:
+    try:
+        return [
+            source_index_file
+            for source_index_file in cmk.utils.paths.piggyback_index_dir.iterdir()
+            if not source_index_file.name.startswith(".")
+        ]
+    except OSError as e:
+        if e.errno == errno.ENOENT:
+            return []
+        raise
+
+
+def _get_source_index_file_path(source_hostname: str) -> Path:
+    return cmk.utils.paths.piggyback_index_dir / source_hostname
+
+
 def _get_source_status_file_path(source_hostname: str) -> Path:
     return cmk.utils.paths.piggyback_source_dir / source_hostname
 
@@ -454,47 +719,37 @@ def cleanup_piggyback_files(time_settings: List[Tuple[Optional[str], str, int]])
         time_settings,
     )
 
-    piggybacked_hosts_settings = _get_piggybacked_hosts_settings(time_settings)
-
-    _cleanup_old_source_status_files(piggybacked_hosts_settings)
-    _cleanup_old_piggybacked_files(piggybacked_hosts_settings)
-
-
-def _get_piggybacked_hosts_settings(
-    time_settings: List[Tuple[Optional[str], str, int]]
-) -> List[Tuple[Path, List[Path], Dict[Tuple[Optional[str], str], int]]]:
-    piggybacked_hosts_settings = []
-    for piggybacked_host_folder in _get_piggybacked_host_folders():
-        source_hosts = _get_piggybacked_host_sources(piggybacked_host_folder)
-        matching_time_settings = _get_matching_time_settings(
-            [source_host.name for source_host in source_hosts],
-            piggybacked_host_folder.name,
-            time_settings,
-        )
-        piggybacked_hosts_settings.append(
-            (piggybacked_host_folder, source_hosts, matching_time_settings))
-    return piggybacked_hosts_settings
+    _cleanup_old_source_status_files(PiggybackIndex.load(), time_settings)
+    # Load it again: the evaluation of the piggyback files depends on the status files
+    _cleanup_old_piggybacked_files(PiggybackIndex.load(), time_settings)
 
 
 def _cleanup_old_source_status_files(
-    piggybacked_hosts_settings: List[Tuple[Path, List[Path], Dict[Tuple[Optional[str], str], int]]]
+    index: PiggybackIndex,
+    time_settings: List[Tuple[Optional[str], str, int]],
 ) -> None:
     """Remove source status files which exceed configured maximum cache age.
     There may be several 'Piggybacked Host Files' rules where the max age is configured.
     We simply use the greatest one per source."""
 
     max_cache_age_by_sources: Dict[str, int] = {}
-    for piggybacked_host_folder, source_hosts, time_settings in piggybacked_hosts_settings:
-        for source_host in source_hosts:
-            max_cache_age = _get_max_cache_age(source_host.name, piggybacked_host_folder.name,
-                                               time_settings)
+    for piggybacked_hostname in index.piggybacked_hostnames():
+        source_hostnames = list(index.stored_at(piggybacked_hostname))
+        matching_time_settings = _get_matching_time_settings(
+            source_hostnames,
+            piggybacked_hostname,
+            time_settings,
+        )
+        for source_hostname in source_hostnames:
+            max_cache_age = _get_max_cache_age(source_hostname, piggybacked_hostname,
+                                               matching_time_settings)
 
-            max_cache_age_of_source = max_cache_age_by_sources.get(source_host.name)
+            max_cache_age_of_source = max_cache_age_by_sources.get(source_hostname)
             if max_cache_age_of_source is None:
-                max_cache_age_by_sources[source_host.name] = max_cache_age
+                max_cache_age_by_sources[source_hostname] = max_cache_age
 
             elif max_cache_age >= max_cache_age_of_source:
-                max_cache_age_by_sources[source_host.name] = max_cache_age
+                max_cache_age_by_sources[source_hostname] = max_cache_age
 
     for source_state_file in _get_source_state_files():
         try:
@@ -523,33 +778,32 @@ def _cleanup_old_source_status_files(
 
 
 def _cleanup_old_piggybacked_files(
-    piggybacked_hosts_settings: List[Tuple[Path, List[Path], Dict[Tuple[Optional[str], str], int]]]
+    index: PiggybackIndex,
+    time_settings: List[Tuple[Optional[str], str, int]],
 ) -> None:
     """Remove piggybacked data files which exceed configured maximum cache age."""
 
-    for piggybacked_host_folder, source_hosts, time_settings in piggybacked_hosts_settings:
-        for piggybacked_host_source in source_hosts:
-            successfully_processed, reason, _reason_status = _get_piggyback_processed_file_info(
-                piggybacked_host_source.name,
-                piggybacked_host_folder.name,
-                piggybacked_host_source,
-                time_settings=time_settings,
-            )
-
-            if not successfully_processed:
+    removed: Dict[str, Dict[str, float]] = {}
+    for piggybacked_hostname in index.piggybacked_hostnames():
+        stored_at = index.stored_at(piggybacked_hostname)
+        for file_info in index.processed_file_infos(piggybacked_hostname, time_settings):
+            if not file_info.successfully_processed:
                 logger.log(
                     VERBOSE,
                     "Piggyback file '%s' is outdated (%s). Remove it.",
-                    piggybacked_host_source,
-                    reason,
+                    file_info.file_path,
+                    file_info.reason,
                 )
-                _remove_piggyback_file(piggybacked_host_source)
+                _remove_piggyback_file(file_info.file_path)
+                removed.setdefault(file_info.source_hostname,
+                                   {})[piggybacked_hostname] = stored_at[file_info.source_hostname]
 
         # Remove empty backed host directory
+        piggybacked_host_folder = cmk.utils.paths.piggyback_dir / piggybacked_hostname
         try:
             piggybacked_host_folder.rmdir()
         except OSError as e:
-            if e.errno == errno.ENOTEMPTY:
+            if e.errno in (errno.ENOTEMPTY, errno.ENOENT):
                 continue
             raise
         else:
@@ -558,3 +812,6 @@ def _cleanup_old_piggybacked_files(
                 "Piggyback folder '%s' is empty. Removed it.",
                 piggybacked_host_folder,
             )
+
+    for source_hostname, removed_stored_at in removed.items():
+        _remove_from_source_index(source_hostname, removed_stored_at)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Sets of hosts represented as integer bitmaps
+
+Every host gets a bit number. The hosts having a tag or being located below a
+folder are then a single integer, and the host conditions of a rule can be
+evaluated with a few bitwise operations instead of looking at every host.
+"""
+
+from typing import Dict, Iterable, List, Mapping, Set, Union
+
+from cmk.utils.type_defs import HostName, TagList
+
+HostBitmap = int
+
+
+class HostBitmaps:
+    def __init__(self, hostnames: Iterable[HostName], host_tag_lists: Mapping[HostName, TagList],
+                 host_paths: Mapping[HostName, str]) -> None:
+        super(HostBitmaps, self).__init__()
+        self._hostnames: List[HostName] = sorted(hostnames)
+        self._host_numbers = {hostname: number for number, hostname in enumerate(self._hostnames)}
+        self._host_paths = host_paths
+        self.all: HostBitmap = (1 << len(self._hostnames)) - 1
+
+        hosts_of_tag: Dict[str, List[int]] = {}
+        for number, hostname in enumerate(self._hostnames):
+            for tag in host_tag_lists.get(hostname, ()):
+                hosts_of_tag.setdefault(tag, []).append(number)
+        self._tags = {tag: self._from_numbers(numbers) for tag, numbers in hosts_of_tag.items()}
+
+        self._folders: Dict[str, HostBitmap] = {}
+
+    def __contains__(self, hostname: HostName) -> bool:
+        return hostname in self._host_numbers
+
+    def _from_numbers(self, numbers: Iterable[int]) -> HostBitmap:
+        # Setting the bits one by one on an int would copy the whole int each time
+        bits = bytearray((len(self._hostnames) + 7) // 8)
+        for number in numbers:
+            bits[number >> 3] |= 1 << (number & 7)
+        return int.from_bytes(bits, "little")
+
+    def of_hosts(self, hostnames: Iterable[HostName]) -> HostBitmap:
+        """The bitmap of the given hosts, unknown hosts are ignored"""
+        host_numbers = self._host_numbers
+        return self._from_numbers(
+            host_numbers[hostname] for hostname in hostnames if hostname in host_numbers)
+
+    def hosts(self, bitmap: HostBitmap) -> Set[HostName]:
+        """The names of the hosts in the bitmap"""
+        bits = bin(bitmap & self.all)
+        highest = len(bits) - 1
+        hostnames = self._hostnames
+        result = set()
+        position = bits.find("1", 2)
+        while position != -1:
+            result.add(hostnames[highest - position])
+            position = bits.find("1", position + 1)
+        return result
+
+    def within_folder(self, folder_path: str) -> HostBitmap:
+        """The hosts located in the folder or one of its subfolders"""
+        try:
+            return self._folders[folder_path]
+        except KeyError:
+            pass
+
+        host_paths = self._host_paths
+        bitmap = self._folders[folder_path] = self._from_numbers(
+            number for number, hostname in enumerate(self._hostnames)
+            if host_paths.get(hostname, "/").startswith(folder_path))
+        return bitmap
+
+    def matching_tag_spec(self, tag_spec: Union[dict, str]) -> HostBitmap:
+        """The hosts matching the tag condition, see matches_tag_spec()"""
+        if isinstance(tag_spec, dict):
+            if "$ne" in tag_spec:
+                return self.all & ~self.matching_tag_spec(tag_spec["$ne"])
+
+            if "$or" in tag_spec:
+                return self._matching_any(tag_spec["$or"])
+
+            if "$nor" in tag_spec:
+                return self.all & ~self._matching_any(tag_spec["$nor"])
+
+            raise NotImplementedError()
+
+        return self._tags.get(tag_spec, 0)
+
+    def _matching_any(self, tag_specs: List[Union[dict, str]]) -> HostBitmap:
+        bitmap = 0
+        for tag_spec in tag_specs:
+            bitmap |= self.matching_tag_spec(tag_spec)
+        return bitmap
@@ -5,8 +5,11 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 """This module provides generic Check_MK ruleset processing functionality"""
 
+import itertools
+import re
 from typing import TYPE_CHECKING, Any, Dict, Generator, List, Optional, Pattern, Set, Tuple
 
+from cmk.utils.rulesets.host_bitmaps import HostBitmap, HostBitmaps
 from cmk.utils.rulesets.tuple_rulesets import (
     ALL_HOSTS,
     ALL_SERVICES,
@@ -27,6 +30,9 @@ PreprocessedPattern = Tuple[bool, Pattern[str]]
 PreprocessedServiceRuleset = List[Tuple[RuleValue, Set[HostName], LabelConditions, Tuple,
                                         PreprocessedPattern]]
 
+# The number of remembered service matches of a RulesetMatcher
+_SERVICE_MATCH_CACHE_SIZE = 100000
+
 
 class RulesetMatchObject:
     """Wrapper around dict to ensure the ruleset match objects are correctly created"""
@@ -46,7 +52,7 @@ class RulesetMatchObject:
                                  if self.service_labels else None)
 
     def _generate_hash(self, service_labels: Optional[Dict[str, str]]) -> int:
-        return hash(None if service_labels is None else frozenset(service_labels))
+        return hash(None if service_labels is None else frozenset(service_labels.items()))
 
     def to_dict(self) -> Dict:
         # TODO: Two getattr()?
@@ -172,49 +178,24 @@ class RulesetMatcher:
                                                                        with_foreign_hosts,
                                                                        is_binary=is_binary)
 
-        for value, hosts, service_labels_condition, service_labels_condition_cache_id, service_description_condition in optimized_ruleset:
-            if match_object.service_description is None:
-                continue
-
-            if match_object.host_name not in hosts:
-                continue
-
-            service_cache_id = (match_object.service_cache_id, service_description_condition,
-                                service_labels_condition_cache_id)
-
-            if service_cache_id in self._service_match_cache:
-                match = self._service_match_cache[service_cache_id]
-            else:
-                match = self._matches_service_conditions(service_description_condition,
-                                                         service_labels_condition, match_object)
-                self._service_match_cache[service_cache_id] = match
-
-            if match:
-                yield value
-
-    def _matches_service_conditions(self, service_description_condition: Tuple[bool, Pattern[str]],
-                                    service_labels_condition: Dict[str, str],
-                                    match_object: RulesetMatchObject) -> bool:
-        if not self._matches_service_description_condition(service_description_condition,
-                                                           match_object):
-            return False
-
-        if service_labels_condition \
-           and not matches_labels(match_object.service_labels, service_labels_condition):
-            return False
+        if match_object.service_description is None:
+            return
 
-        return True
+        rule_group = optimized_ruleset.rules_of_host(match_object.host_name)
+        if not rule_group:
+            return
 
-    def _matches_service_description_condition(self,
-                                               service_description_condition: Tuple[bool,
-                                                                                    Pattern[str]],
-                                               match_object: RulesetMatchObject) -> bool:
-        negate, pattern = service_description_condition
+        cache_id = rule_group.cache_id, match_object.service_cache_id
+        try:
+            values = self._service_match_cache[cache_id]
+        except KeyError:
+            values = rule_group.matching_values(match_object)
+            if len(self._service_match_cache) >= _SERVICE_MATCH_CACHE_SIZE:
+                # Starting over is cheaper than keeping track of the least recently used entries
+                self._service_match_cache.clear()
+            self._service_match_cache[cache_id] = values
 
-        if match_object.service_description is not None \
-            and pattern.match(match_object.service_description) is not None:
-            return not negate
-        return negate
+        yield from values
 
     # TODO: Find a way to use the generic get_host_ruleset_values
     def get_values_for_generic_agent_host(self, ruleset: Ruleset) -> List[RuleValue]:
@@ -274,29 +255,13 @@ class RulesetOptimizer:
         # may contain a reduced set of hosts, since each process handles a subset
         self._all_processed_hosts = self._all_configured_hosts
 
-        # A factor which indicates how much hosts share the same host tag configuration (excluding folders).
-        # len(all_processed_hosts) / len(different tag combinations)
-        # It is used to determine the best rule evualation method
-        self._all_processed_hosts_similarity = 1.0
-
         self._service_ruleset_cache: Dict = {}
         self._host_ruleset_cache: Dict = {}
         self._all_matching_hosts_match_cache: Dict = {}
 
-        # Reference dirname -> hosts in this dir including subfolders
-        self._folder_host_lookup: Dict[Tuple[bool, str], Set[HostName]] = {}
-
-        # Provides a list of hosts with the same hosttags, excluding the folder
-        self._hosts_grouped_by_tags: Dict = {}
-        # Reference hostname -> tag group reference
-        self._host_grouped_ref: Dict = {}
-
-        # TODO: The folder will not be part of new dict tags anymore. This can
-        # be cleaned up then.
-        self._hosttags_without_folder: Dict[HostName, TagList] = {}
-
-        # TODO: Clean this one up?
-        self._initialize_host_lookup()
+        # The tags and folders of the hosts as bitmaps, built on first use
+        self._host_bitmaps: Optional[HostBitmaps] = None
+        self._valid_hosts_bitmaps: Dict[bool, HostBitmap] = {}
 
     def clear_ruleset_caches(self) -> None:
         self._host_ruleset_cache.clear()
@@ -323,28 +288,11 @@ class RulesetOptimizer:
 
         self._all_processed_hosts.update(nodes_and_clusters)
 
-        # The folder host lookup includes a list of all -processed- hosts within a given
-        # folder. Any update with set_all_processed hosts invalidates this cache, because
-        # the scope of relevant hosts has changed. This is -good-, since the values in this
-        # lookup are iterated one by one later on in all_matching_hosts
-        self._folder_host_lookup = {}
-
-        self._adjust_processed_hosts_similarity()
-
-    def _adjust_processed_hosts_similarity(self) -> None:
-        """ This function computes the tag similarities between of the processed hosts
-        The result is a similarity factor, which helps finding the most perfomant operation
-        for the current hostset """
-        used_groups = set()
-        for hostname in self._all_processed_hosts:
-            used_groups.add(self._host_grouped_ref.get(hostname, ()))
-
-        if not used_groups:
-            self._all_processed_hosts_similarity = 1.0
-            return
-
-        self._all_processed_hosts_similarity = (1.0 * len(self._all_processed_hosts) /
-                                                len(used_groups))
+        # The bitmaps of the valid hosts are derived again on next use
+        self._valid_hosts_bitmaps.clear()
+        if (self._host_bitmaps is not None and
+                any(hostname not in self._host_bitmaps for hostname in self._all_processed_hosts)):
+            self._host_bitmaps = None
 
     def get_host_ruleset(self, ruleset: Ruleset, with_foreign_hosts: bool,
                          is_binary: bool) -> PreprocessedHostRuleset:
@@ -375,15 +323,16 @@ class RulesetOptimizer:
         return host_values
 
     def get_service_ruleset(self, ruleset: Ruleset, with_foreign_hosts: bool,
-                            is_binary: bool) -> PreprocessedServiceRuleset:
+                            is_binary: bool) -> 'CompiledServiceRuleset':
         cache_id = id(ruleset), with_foreign_hosts
 
         if cache_id in self._service_ruleset_cache:
             return self._service_ruleset_cache[cache_id]
 
-        cached_ruleset = self._convert_service_ruleset(ruleset,
-                                                       with_foreign_hosts=with_foreign_hosts,
-                                                       is_binary=is_binary)
+        cached_ruleset = CompiledServiceRuleset(
+            self._convert_service_ruleset(ruleset,
+                                          with_foreign_hosts=with_foreign_hosts,
+                                          is_binary=is_binary))
         self._service_ruleset_cache[cache_id] = cached_ruleset
         return cached_ruleset
 
@@ -430,6 +379,11 @@ class RulesetOptimizer:
 
         return negate, regex("(?:%s)" % "|".join("(?:%s)" % p for p in pattern_parts))
 
+    def all_matching_hosts(self, condition: Dict[str, Any],
+                           with_foreign_hosts: bool) -> Set[HostName]:
+        """Returns the names of the hosts matching the host conditions of a rule"""
+        return self._all_matching_hosts(condition, with_foreign_hosts)
+
     def _all_matching_hosts(self, condition: Dict[str, Any],
                             with_foreign_hosts: bool) -> Set[HostName]:
         """Returns a set containing the names of hosts that match the given
@@ -446,59 +400,36 @@ class RulesetOptimizer:
         except KeyError:
             pass
 
-        if with_foreign_hosts:
-            valid_hosts = self._all_configured_hosts
-        else:
-            valid_hosts = self._all_processed_hosts
-
-        # Thin out the valid hosts further. If the rule is located in a folder
-        # we only need the intersection of the folders hosts and the previously determined valid_hosts
-        valid_hosts = self.get_hosts_within_folder(rule_path,
-                                                   with_foreign_hosts).intersection(valid_hosts)
+        host_bitmaps = self._get_host_bitmaps()
 
-        if tags and hostlist is None and not labels:
-            # TODO: Labels could also be optimized like the tags
-            matched_by_tags = self._match_hosts_by_tags(cache_id, valid_hosts, tags)
-            if matched_by_tags is not None:
-                return matched_by_tags
-
-        matching: Set[str] = set()
-        only_specific_hosts = (hostlist is not None and not isinstance(hostlist, dict) and
-                               all(not isinstance(x, dict) for x in hostlist))
+        # Tags and folders are evaluated for all hosts at once. Only host name
+        # patterns and labels need to be checked host by host.
+        candidates = (self._valid_hosts_bitmap(with_foreign_hosts) &
+                      host_bitmaps.within_folder(rule_path))
+        for tag_spec in tags.values():
+            candidates &= host_bitmaps.matching_tag_spec(tag_spec)
 
         if hostlist == []:
-            pass  # Empty host list -> Nothing matches
-
-        elif not tags and not labels and not hostlist:
-            # If no tags are specified and the hostlist only include @all (all hosts)
-            matching = valid_hosts
-
-        elif not tags and not labels and only_specific_hosts and hostlist is not None:
-            # If no tags are specified and there are only specific hosts we already have the matches
-            matching = valid_hosts.intersection(hostlist)
-
-        else:
-            # If the rule has only exact host restrictions, we can thin out the list of hosts to check
-            if only_specific_hosts and hostlist is not None:
-                hosts_to_check = valid_hosts.intersection(hostlist)
-            else:
-                hosts_to_check = valid_hosts
-
-            for hostname in hosts_to_check:
-                # When no tag matching is requested, do not filter by tags. Accept all hosts
-                # and filter only by hostlist
-                if tags and not self.matches_host_tags(self._host_tag_lists[hostname], tags):
-                    continue
-
-                if labels:
-                    host_labels = self._labels.labels_of_host(self._ruleset_matcher, hostname)
-                    if not matches_labels(host_labels, labels):
-                        continue
-
-                if not self.matches_host_name(hostlist, hostname):
-                    continue
-
-                matching.add(hostname)
+            candidates = 0  # Empty host list -> Nothing matches
+
+        elif hostlist:
+            negate, host_entries = parse_negated_condition_list(hostlist)
+            if all(not isinstance(x, dict) for x in host_entries):
+                listed_hosts = host_bitmaps.of_hosts(host_entries)
+                candidates &= ~listed_hosts if negate else listed_hosts
+                hostlist = None
+
+        matching = host_bitmaps.hosts(candidates)
+        if hostlist:
+            matching = {
+                hostname for hostname in matching if self.matches_host_name(hostlist, hostname)
+            }
+
+        if labels:
+            matching = {
+                hostname for hostname in matching if matches_labels(
+                    self._labels.labels_of_host(self._ruleset_matcher, hostname), labels)
+            }
 
         self._all_matching_hosts_match_cache[cache_id] = matching
         return matching
@@ -556,93 +487,133 @@ class RulesetOptimizer:
             rule_path,
         )
 
-    # TODO: Generalize this optimization: Build some kind of key out of the tag conditions
-    # (positive, negative, ...). Make it work with the new tag group based "$or" handling.
-    def _match_hosts_by_tags(self, cache_id, valid_hosts, tags):
-        matching = set()
-        negative_match_tags = set()
-        positive_match_tags = set()
-        for tag in tags.values():
-            if isinstance(tag, dict):
-                if "$ne" in tag:
-                    negative_match_tags.add(tag["$ne"])
-                    continue
+    def _get_host_bitmaps(self) -> HostBitmaps:
+        if self._host_bitmaps is None:
+            self._host_bitmaps = HostBitmaps(
+                self._all_configured_hosts.union(self._all_processed_hosts),
+                self._host_tag_lists, self._host_paths)
+        return self._host_bitmaps
 
-                if "$or" in tag:
-                    return None  # Can not be optimized, makes _all_matching_hosts proceed
+    def _valid_hosts_bitmap(self, with_foreign_hosts: bool) -> HostBitmap:
+        try:
+            return self._valid_hosts_bitmaps[with_foreign_hosts]
+        except KeyError:
+            pass
 
-                if "$nor" in tag:
-                    return None  # Can not be optimized, makes _all_matching_hosts proceed
+        valid_hosts = (self._all_configured_hosts
+                       if with_foreign_hosts else self._all_processed_hosts)
+        bitmap = self._valid_hosts_bitmaps[with_foreign_hosts] = (
+            self._get_host_bitmaps().of_hosts(valid_hosts))
+        return bitmap
 
-                raise NotImplementedError()
+    def get_hosts_within_folder(self, folder_path: str, with_foreign_hosts: bool) -> Set[HostName]:
+        host_bitmaps = self._get_host_bitmaps()
+        return host_bitmaps.hosts(
+            self._valid_hosts_bitmap(with_foreign_hosts) & host_bitmaps.within_folder(folder_path))
 
-            positive_match_tags.add(tag)
 
-        # TODO:
-        #if has_specific_folder_tag or self._all_processed_hosts_similarity < 3.0:
-        if self._all_processed_hosts_similarity < 3.0:
-            # Without shared folders
-            for hostname in valid_hosts:
-                host_tags = self._host_tag_lists[hostname]
-                if not positive_match_tags - host_tags:
-                    if not negative_match_tags.intersection(host_tags):
-                        matching.add(hostname)
+class CompiledServiceRuleset:
+    """The rules of a service ruleset, prepared for matching many services
 
-            self._all_matching_hosts_match_cache[cache_id] = matching
-            return matching
+    The rules applying to a host are determined once per host. Hosts with the
+    same rules share a rule group, which matches a service description against
+    the patterns of all its rules in one go.
+    """
+    def __init__(self, rules: PreprocessedServiceRuleset) -> None:
+        super(CompiledServiceRuleset, self).__init__()
+        self._rules = rules
+        self._rule_groups: Dict[Tuple[int, ...], _ServiceRuleGroup] = {}
+        self._rule_group_of_host: Dict[Optional[HostName], _ServiceRuleGroup] = {}
 
-        # With shared folders
-        checked_hosts: Set[str] = set()
-        for hostname in valid_hosts:
-            if hostname in checked_hosts:
-                continue
+    def rules_of_host(self, hostname: Optional[HostName]) -> '_ServiceRuleGroup':
+        try:
+            return self._rule_group_of_host[hostname]
+        except KeyError:
+            pass
+
+        rule_numbers = tuple(
+            number for number, rule in enumerate(self._rules) if hostname in rule[1])
+        try:
+            rule_group = self._rule_groups[rule_numbers]
+        except KeyError:
+            rule_group = self._rule_groups[rule_numbers] = _ServiceRuleGroup(
+                [self._rules[number] for number in rule_numbers])
 
-            hosts_with_same_tag = self._filter_hosts_with_same_tags_as_host(hostname, valid_hosts)
-            checked_hosts.update(hosts_with_same_tag)
+        self._rule_group_of_host[hostname] = rule_group
+        return rule_group
 
-            tags = self._host_tag_lists[hostname]
-            if not positive_match_tags - tags:
-                if not negative_match_tags.intersection(tags):
-                    matching.update(hosts_with_same_tag)
 
-        self._all_matching_hosts_match_cache[cache_id] = matching
-        return matching
+_rule_group_ids = itertools.count()
 
-    def _filter_hosts_with_same_tags_as_host(self, hostname, hosts):
-        return self._hosts_grouped_by_tags[self._host_grouped_ref[hostname]].intersection(hosts)
+# References to groups by number or name: \1, (?P=name), (?(1)yes|no) and (?(name)yes|no)
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
 
-    def get_hosts_within_folder(self, folder_path: str, with_foreign_hosts: bool) -> Set[HostName]:
-        cache_id = with_foreign_hosts, folder_path
-        if cache_id not in self._folder_host_lookup:
-            hosts_in_folder = set()
-            relevant_hosts = self._all_configured_hosts if with_foreign_hosts else self._all_processed_hosts
-
-            for hostname in relevant_hosts:
-                host_path = self._host_paths.get(hostname, "/")
-                if host_path.startswith(folder_path):
-                    hosts_in_folder.add(hostname)
-
-            self._folder_host_lookup[cache_id] = hosts_in_folder
-            return hosts_in_folder
-
-        return self._folder_host_lookup[cache_id]
-
-    def _initialize_host_lookup(self):
-        # Determine hosttags without folder tag
-        for hostname in self._all_configured_hosts:
-            tags_without_folder = set(self._host_tag_lists[hostname])
-            try:
-                tags_without_folder.remove(self._host_paths.get(hostname, "/"))
-            except (KeyError, ValueError):
-                pass
-
-            self._hosttags_without_folder[hostname] = tags_without_folder
-
-        # Determine hosts with same tag setup (ignoring folder tag)
-        for hostname in self._all_configured_hosts:
-            group_ref = tuple(sorted(self._hosttags_without_folder[hostname]))
-            self._hosts_grouped_by_tags.setdefault(group_ref, set()).add(hostname)
-            self._host_grouped_ref[hostname] = group_ref
+
+class _ServiceRuleGroup:
+    """Rules of a service ruleset that apply to the same hosts
+
+    The service description patterns of the rules are combined into a single
+    regex. Each pattern is an optional lookahead with a capturing group, so one
+    match tells which of the patterns match the service description.
+    """
+    __slots__ = ["cache_id", "_rules", "_patterns", "_combined_pattern", "_group_numbers"]
+
+    def __init__(self, rules: PreprocessedServiceRuleset) -> None:
+        super(_ServiceRuleGroup, self).__init__()
+        self.cache_id = next(_rule_group_ids)
+        self._rules = [(value, labels_condition, negate, pattern.pattern)
+                       for value, _hosts, labels_condition, _cache_id, (negate, pattern) in rules]
+
+        self._patterns: Dict[str, Pattern[str]] = {}
+        for _value, _hosts, _labels_condition, _cache_id, (_negate, pattern) in rules:
+            self._patterns.setdefault(pattern.pattern, pattern)
+
+        self._combined_pattern: Optional[Pattern[str]] = None
+        self._group_numbers: Dict[str, int] = {}
+        if len(self._patterns) > 1:
+            self._combine_patterns()
+
+    def __len__(self) -> int:
+        return len(self._rules)
+
+    def _combine_patterns(self) -> None:
+        parts = []
+        group_number = 1
+        for pattern_text, pattern in self._patterns.items():
+            if pattern.groups and _BACKREFERENCE.search(pattern_text):
+                return  # The group numbers would change, match the patterns one by one
+
+            parts.append("(?:(?=(%s)))?" % pattern_text)
+            self._group_numbers[pattern_text] = group_number
+            group_number += 1 + pattern.groups
+
+        try:
+            self._combined_pattern = re.compile("".join(parts))
+        except re.error:
+            self._group_numbers.clear()
+
+    def matching_values(self, match_object: RulesetMatchObject) -> Tuple[RuleValue, ...]:
+        """The values of the rules matching the service, in the order of the rules"""
+        service_description = match_object.service_description
+        assert service_description is not None
+
+        if self._combined_pattern is not None:
+            match = self._combined_pattern.match(service_description)
+            assert match is not None
+            matching_patterns = {
+                pattern_text for pattern_text, group_number in self._group_numbers.items()
+                if match.group(group_number) is not None
+            }
+        else:
+            matching_patterns = {
+                pattern_text for pattern_text, pattern in self._patterns.items()
+                if pattern.match(service_description) is not None
+            }
+
+        return tuple(
+            value for value, labels_condition, negate, pattern_text in self._rules
+            if (pattern_text in matching_patterns) is not negate and
+            (not labels_condition or matches_labels(match_object.service_labels, labels_condition)))
 
 
 def _tags_or_labels_cache_id(tag_or_label_spec):
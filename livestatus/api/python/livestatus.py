@@ -6,13 +6,31 @@
 """MK Livestatus Python API"""
 import ast
 import contextlib
+import json
 import os
 import re
+import selectors
 import socket
 import ssl
 import threading
 import time
-from typing import Any, AnyStr, Dict, List, NewType, Optional, Pattern, Set, Tuple, Type, Union
+from typing import (
+    Any,
+    AnyStr,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    NewType,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 
 # TODO: Find a better solution for this issue. Astroid 2.x bug prevents us from using NewType :(
 # (https://github.com/PyCQA/pylint/issues/2296)
@@ -49,6 +67,43 @@ persistent_connections: Dict[str, socket.socket] = {}
 # Regular expression for removing Cache: headers if caching is not allowed
 remove_cache_regex: Pattern = re.compile("\nCache:[^\n]*")
 
+# The output formats we can parse, see SingleSiteConnection.set_output_format(). The
+# json module parses with its C accelerator, which is a lot faster than literal_eval().
+_response_parsers: Dict[str, Callable[[bytes], LivestatusResponse]] = {
+    "python3": lambda data: ast.literal_eval(data.decode("utf-8")),
+    "json": json.loads,
+}
+
+# Size of the pieces in which SingleSiteConnection.query_iter() receives a response
+_STREAM_CHUNK_SIZE = 65536
+
+
+def _iter_response_rows(chunks: Iterable[bytes],
+                        parse: Callable[[bytes], LivestatusResponse]) -> Iterator[LivestatusRow]:
+    """Parse the rows of a response while its chunks arrive
+
+    Livestatus puts each row of a python3 or JSON response on a line of its own and
+    strings never contain a raw newline. So all lines received so far can be parsed
+    as a list of their own, while the incomplete last line has to wait.
+    """
+    pending = bytearray()
+    first = True
+    for chunk in chunks:
+        pending += chunk
+        if first:
+            # The opening bracket of the response
+            del pending[:1]
+            first = False
+        end = pending.rfind(b",\n")
+        if end != -1:
+            yield from parse(b"[" + pending[:end] + b"]")
+            del pending[:end + 2]
+
+    # The last row, followed by the closing bracket of the response
+    rows = pending.rstrip()[:-1]
+    if rows:
+        yield from parse(b"[" + rows + b"]")
+
 
 def _ensure_unicode(value: Union[str, bytes]) -> str:
     if isinstance(value, str):
@@ -88,6 +143,10 @@ class MKLivestatusBadGatewayError(MKLivestatusException):
     """Raised when connection errors from CMC <> EC happen"""
 
 
+class MKLivestatusQueryInProgressError(MKLivestatusException):
+    """Raised when a query is issued while the rows of query_iter() are received"""
+
+
 # We need some unique value here
 NO_DEFAULT = lambda: None
 
@@ -166,6 +225,26 @@ def intercept_queries():
 
 
 class Helpers:
+    # Set while the rows of query_iter() are received
+    _receiving_rows = False
+
+    @contextlib.contextmanager
+    def _receiving_rows_of_query(self) -> Iterator[None]:
+        self._ensure_no_query_in_progress()
+        self._receiving_rows = True
+        try:
+            yield
+        finally:
+            self._receiving_rows = False
+
+    def _ensure_no_query_in_progress(self) -> None:
+        """The connections can not handle a second query before the response of query_iter()
+        has been received completely, its answer would be mixed up with the pending rows"""
+        if self._receiving_rows:
+            raise MKLivestatusQueryInProgressError(
+                "Cannot issue a query while the rows of another query are received, consume "
+                "or close the iterator returned by query_iter() first")
+
     def query(self,
               query: 'QueryTypes',
               add_headers: Union[str, bytes] = u"") -> 'LivestatusResponse':
@@ -286,6 +365,19 @@ class Query:
 
 QueryTypes = Union[str, bytes, Query]
 OnlySites = Optional[List[SiteId]]
+
+
+class QueryOptions(NamedTuple):
+    """Settings of a single MultiSiteConnection.query_iter() call
+
+    They are used instead of the ones set on the connection, e.g. by set_only_sites(), which
+    would otherwise stay in effect for other queries while the rows are consumed."""
+    only_sites: OnlySites = None
+    limit: Optional[int] = None
+    prepend_site: bool = False
+    auth_domain: str = "read"
+
+
 DeadSite = Dict[str, Union[str, int, Exception, SiteConfiguration]]
 
 #.
@@ -372,6 +464,7 @@ class SingleSiteConnection(Helpers):
         self.socket: Optional[socket.socket] = None
         self.timeout: Optional[int] = None
         self.successful_persistence = False
+        self.output_format = "python3"
 
         # Whether to establish an encrypted connection
         self.tls = tls
@@ -392,6 +485,16 @@ class SingleSiteConnection(Helpers):
     def add_header(self, header: str) -> None:
         self.add_headers += header + "\n"
 
+    def set_output_format(self, output_format: str) -> None:
+        """Choose the format livestatus uses to transfer the responses
+
+        The default is "python3". "json" is parsed much faster, but older
+        livestatus versions and proxies may not support it."""
+        if output_format not in _response_parsers:
+            raise MKLivestatusConfigError("Invalid output format '%s'. Must be one of %s" %
+                                          (output_format, ", ".join(sorted(_response_parsers))))
+        self.output_format = output_format
+
     def set_timeout(self, timeout: int) -> None:
         self.timeout = timeout
         if self.socket:
@@ -498,16 +601,19 @@ class SingleSiteConnection(Helpers):
         self.send_query(query)
         return self.recv_response(query, query_obj.suppress_exceptions)
 
-    def build_query(self, query_obj: Query, add_headers: str) -> str:
+    def build_query(self,
+                    query_obj: Query,
+                    add_headers: str,
+                    auth_domain: Optional[str] = None) -> str:
         query = str(query_obj)
         if not self.allow_cache:
             query = remove_cache_regex.sub("", query)
 
         headers = [
-            self.auth_header,
+            self.auth_header if auth_domain is None else self._auth_header(auth_domain),
             self.add_headers,
             f"Localtime: {int(time.time()):d}",
-            "OutputFormat: python3",
+            f"OutputFormat: {self.output_format}",
             "KeepAlive: on",
             "ResponseHeader: fixed16",
             add_headers,
@@ -542,6 +648,36 @@ class SingleSiteConnection(Helpers):
 
             raise MKLivestatusSocketError("RC1:" + str(e))
 
+    def parse_response_header(self, header: bytes) -> Tuple[str, int]:
+        """Return the status code and the length of the response data"""
+        # Headers are always ASCII encoded
+        code = header[0:3].decode("ascii")
+        try:
+            length = int(header[4:15].lstrip())
+        except Exception:
+            self.disconnect()
+            raise MKLivestatusSocketError(
+                "Malformed output. Livestatus TCP socket might be unreachable or wrong"
+                "encryption settings are used.")
+        return code, length
+
+    def parse_response(self, code: str, data: bytes) -> LivestatusResponse:
+        if code == "200":
+            try:
+                return _response_parsers[self.output_format](data)
+            except (ValueError, SyntaxError):
+                self.disconnect()
+                raise MKLivestatusSocketError("Malformed output")
+
+        text = data.decode("utf-8").strip()
+        if code == "404":
+            raise MKLivestatusTableNotFoundError("Not Found (%s): %s" % (code, text))
+
+        if code == "502":
+            raise MKLivestatusBadGatewayError(text)
+
+        raise MKLivestatusQueryError("%s: %s" % (code, text))
+
     # Reads a response from the livestatus socket. If the socket is closed
     # by the livestatus server, we automatically make a reconnect and send
     # the query again (once). This is due to timeouts during keepalive.
@@ -550,34 +686,8 @@ class SingleSiteConnection(Helpers):
                       suppress_exceptions: Tuple[Type[Exception], ...],
                       timeout_at: Optional[float] = None) -> LivestatusResponse:
         try:
-            # Headers are always ASCII encoded
-            resp = self.receive_data(16)
-            code = resp[0:3].decode("ascii")
-            try:
-                length = int(resp[4:15].lstrip())
-            except Exception:
-                self.disconnect()
-                raise MKLivestatusSocketError(
-                    "Malformed output. Livestatus TCP socket might be unreachable or wrong"
-                    "encryption settings are used.")
-
-            data = self.receive_data(length).decode("utf-8")
-
-            if code == "200":
-                try:
-                    return ast.literal_eval(data)
-                except (ValueError, SyntaxError):
-                    self.disconnect()
-                    raise MKLivestatusSocketError("Malformed output")
-
-            elif code == "404":
-                raise MKLivestatusTableNotFoundError("Not Found (%s): %s" % (code, data.strip()))
-
-            elif code == "502":
-                raise MKLivestatusBadGatewayError(data.strip())
-
-            else:
-                raise MKLivestatusQueryError("%s: %s" % (code, data.strip()))
+            code, length = self.parse_response_header(self.receive_data(16))
+            return self.parse_response(code, self.receive_data(length))
 
         except (MKLivestatusSocketClosed, IOError) as e:
             # In case of an IO error or the other side having
@@ -617,6 +727,47 @@ class SingleSiteConnection(Helpers):
             # FIXME: ? self.disconnect()
             raise MKLivestatusSocketError("Unhandled exception: %s" % e)
 
+    def recv_response_iter(
+        self,
+        query: str,
+        suppress_exceptions: Tuple[Type[Exception], ...],
+    ) -> Iterator[LivestatusRow]:
+        """Like recv_response(), but yield the rows while the response is received"""
+        try:
+            code, length = self.parse_response_header(self.receive_data(16))
+        except (MKLivestatusSocketClosed, IOError):
+            # recv_response() knows how to reconnect, the response is not streamed then
+            yield from self.recv_response(query, suppress_exceptions)
+            return
+
+        if code != "200":
+            try:
+                self.parse_response(code, self.receive_data(length))
+            except suppress_exceptions:
+                raise
+            except Exception as e:
+                raise MKLivestatusSocketError("Unhandled exception: %s" % e)
+
+        complete = False
+        try:
+            yield from _iter_response_rows(self._receive_chunks(length),
+                                           _response_parsers[self.output_format])
+            complete = True
+        except (ValueError, SyntaxError):
+            raise MKLivestatusSocketError("Malformed output")
+        except (MKLivestatusSocketClosed, IOError) as e:
+            raise MKLivestatusSocketError(str(e))
+        finally:
+            if not complete:
+                # The rest of the response would be read by the next query
+                self.disconnect()
+
+    def _receive_chunks(self, length: int) -> Iterator[bytes]:
+        while length > 0:
+            chunk = self.receive_data(min(length, _STREAM_CHUNK_SIZE))
+            length -= len(chunk)
+            yield chunk
+
     def set_prepend_site(self, p: bool) -> None:
         self.prepend_site = p
 
@@ -627,6 +778,7 @@ class SingleSiteConnection(Helpers):
         self.limit = limit
 
     def query(self, query: 'QueryTypes', add_headers: Union[str, bytes] = "") -> LivestatusResponse:
+        self._ensure_no_query_in_progress()
 
         # Normalize argument types
         normalized_add_headers = _ensure_unicode(add_headers)
@@ -642,8 +794,33 @@ class SingleSiteConnection(Helpers):
                 row.insert(0, b"")
         return response
 
+    def query_iter(self,
+                   query: 'QueryTypes',
+                   add_headers: Union[str, bytes] = "") -> Iterator[LivestatusRow]:
+        """Like query(), but yield the rows while they are received
+
+        The whole response is never held in memory, which makes a difference for
+        large responses. The rows must be consumed before issuing the next query,
+        MKLivestatusQueryInProgressError is raised otherwise.
+        """
+        normalized_add_headers = _ensure_unicode(add_headers)
+        normalized_query = Query(query) if not isinstance(query, Query) else query
+
+        if self.limit is not None:
+            normalized_query = Query("%sLimit: %d\n" % (normalized_query, self.limit),
+                                     normalized_query.suppress_exceptions)
+
+        with self._receiving_rows_of_query():
+            str_query = self.build_query(normalized_query, normalized_add_headers)
+            self.send_query(str_query)
+            for row in self.recv_response_iter(str_query, normalized_query.suppress_exceptions):
+                if self.prepend_site:
+                    row.insert(0, b"")
+                yield row
+
     # TODO: Cleanup all call sites to hand over str types
     def command(self, command: AnyStr, site: Optional[SiteId] = None) -> None:
+        self._ensure_no_query_in_progress()
         command_str = _ensure_unicode(command).rstrip("\n")
         if not command_str.startswith("["):
             command_str = f"[{int(time.time())}] {command_str}"
@@ -672,11 +849,13 @@ class SingleSiteConnection(Helpers):
 
     # Switch future request to new authorization domain
     def set_auth_domain(self, domain: str) -> None:
+        self.auth_header = self._auth_header(domain)
+
+    def _auth_header(self, domain: str) -> str:
         auth_user = self.auth_users.get(domain)
         if auth_user:
-            self.auth_header = "AuthUser: %s\n" % auth_user
-        else:
-            self.auth_header = u""
+            return "AuthUser: %s\n" % auth_user
+        return u""
 
 
 #.
@@ -700,6 +879,120 @@ class SingleSiteConnection(Helpers):
 # it possible to connect/disconnect while an object is instantiated.
 
 
+class _ResponseReader:
+    """Receives the response of one site without blocking"""
+    def __init__(self, sitename: SiteId, site: SiteConfiguration,
+                 connection: SingleSiteConnection, query: str) -> None:
+        self.sitename = sitename
+        self.site = site
+        self.connection = connection
+        self.query = query
+        # Optional per site limit for waiting for the response
+        self.deadline: Optional[float] = None
+        if site.get("query_timeout"):
+            self.deadline = time.time() + float(site["query_timeout"])
+        self._code: Optional[str] = None
+        self._chunks: List[bytes] = []
+        self._missing = 16  # The header first
+
+    def read(self) -> bool:
+        """Read as much as is available, return whether the response is complete"""
+        sock = self.connection.socket
+        if sock is None:
+            raise MKLivestatusSocketError("Socket to '%s' is not connected" %
+                                          self.connection.socketurl)
+        sock.settimeout(0.0)
+        try:
+            while self._missing:
+                try:
+                    # Never read beyond this response, the connection may be kept alive.
+                    chunk = sock.recv(min(self._missing, 65536))
+                except (BlockingIOError, ssl.SSLWantReadError):
+                    return False
+                if not chunk:
+                    raise MKLivestatusSocketClosed(
+                        "Read zero data from socket, nagios server closed connection")
+                self._chunks.append(chunk)
+                self._missing -= len(chunk)
+                if not self._missing and self._code is None:
+                    self._code, self._missing = self.connection.parse_response_header(
+                        b"".join(self._chunks))
+                    self._chunks = []
+            return True
+        finally:
+            sock.settimeout(None)
+
+    def response(self, suppress_exceptions: Tuple[Type[Exception], ...]) -> LivestatusResponse:
+        assert self._code is not None
+        try:
+            return self.connection.parse_response(self._code, b"".join(self._chunks))
+        except suppress_exceptions:
+            raise
+        except Exception as e:
+            # Same as SingleSiteConnection.recv_response()
+            raise MKLivestatusSocketError("Unhandled exception: %s" % e)
+
+    def recover(self, suppress_exceptions: Tuple[Type[Exception], ...]) -> LivestatusResponse:
+        """Fall back to the blocking receive, which knows how to reconnect"""
+        self.connection.disconnect()
+        self.connection.connect()
+        self.connection.send_query(self.query)
+        return self.connection.recv_response(self.query, suppress_exceptions)
+
+
+def _receive_responses(
+    readers: List[_ResponseReader],
+    suppress_exceptions: Tuple[Type[Exception], ...],
+) -> Iterator[Tuple[_ResponseReader, Union[LivestatusResponse, Exception]]]:
+    """Yield the responses (or the errors) of the readers as soon as they are complete"""
+    def finish(
+        reader: _ResponseReader
+    ) -> Iterator[Tuple[_ResponseReader, Union[LivestatusResponse, Exception]]]:
+        try:
+            try:
+                if not reader.read():
+                    return
+            except (MKLivestatusSocketClosed, IOError):
+                yield reader, reader.recover(suppress_exceptions)
+                return
+            yield reader, reader.response(suppress_exceptions)
+        except LivestatusTestingError:
+            raise
+        except Exception as e:
+            yield reader, e
+
+    with selectors.DefaultSelector() as selector:
+        # Some responses may already be there
+        for reader in readers:
+            done = False
+            for result in finish(reader):
+                done = True
+                yield result
+            if not done:
+                selector.register(reader.connection.socket, selectors.EVENT_READ, reader)
+
+        while selector.get_map():
+            deadlines = [
+                key.data.deadline
+                for key in selector.get_map().values()
+                if key.data.deadline is not None
+            ]
+            timeout = max(0.0, min(deadlines) - time.time()) if deadlines else None
+            for key, _events in selector.select(timeout):
+                reader = key.data
+                for result in finish(reader):
+                    selector.unregister(key.fileobj)
+                    yield result
+
+            now = time.time()
+            for key in list(selector.get_map().values()):
+                reader = key.data
+                if reader.deadline is not None and reader.deadline <= now:
+                    selector.unregister(key.fileobj)
+                    yield reader, MKLivestatusSocketError(
+                        "Timeout while waiting for the response of site %s" % reader.sitename)
+
+
 class MultiSiteConnection(Helpers):
     def __init__(self,
                  sites: SiteConfigurations,
@@ -873,6 +1166,10 @@ class MultiSiteConnection(Helpers):
         for _sitename, _site, connection in self.connections:
             connection.add_header(header)
 
+    def set_output_format(self, output_format: str) -> None:
+        for _sitename, _site, connection in self.connections:
+            connection.set_output_format(output_format)
+
     def set_prepend_site(self, p: bool) -> None:
         self.prepend_site = p
 
@@ -911,6 +1208,7 @@ class MultiSiteConnection(Helpers):
     def query(self,
               query: 'QueryTypes',
               add_headers: Union[str, bytes] = u"") -> LivestatusResponse:
+        self._ensure_no_query_in_progress()
 
         # Normalize argument types
         normalized_add_headers = _ensure_unicode(add_headers)
@@ -971,10 +1269,12 @@ class MultiSiteConnection(Helpers):
             limit_header = u""
 
         # First send all queries
+        readers: List[_ResponseReader] = []
         for sitename, site, connection in connect_to_sites:
             try:
                 str_query = connection.build_query(query, add_headers + limit_header)
                 connection.send_query(str_query)
+                readers.append(_ResponseReader(sitename, site, connection, str_query))
             except LivestatusTestingError:
                 raise
             except Exception as e:
@@ -983,36 +1283,123 @@ class MultiSiteConnection(Helpers):
                     "site": site,
                 }
 
-        # Then retrieve all answers. We will be as slow as the slowest of all
-        # connections.
+        # Then retrieve all answers, in the order they arrive. So the responses of
+        # the fast sites are already parsed while waiting for the slower ones.
+        responses: Dict[SiteId, LivestatusResponse] = {}
+        for reader, response_or_exception in _receive_responses(readers, query.suppress_exceptions):
+            sitename, site, connection = reader.sitename, reader.site, reader.connection
+            if isinstance(response_or_exception, query.suppress_exceptions):
+                responses[sitename] = LivestatusResponse([])
+            elif isinstance(response_or_exception, Exception):
+                connection.disconnect()
+                self.deadsites[sitename] = {
+                    "exception": response_or_exception,
+                    "site": site,
+                }
+                continue
+            else:
+                responses[sitename] = response_or_exception
+
+        # Keep the order of the sites, no matter which one answered first
         result = LivestatusResponse([])
         for sitename, site, connection in connect_to_sites:
-            try:
-                str_query = connection.build_query(query, add_headers + limit_header)
-                r = connection.recv_response(str_query, query.suppress_exceptions)
-                stillalive.append((sitename, site, connection))
-                if self.prepend_site:
-                    for row in r:
-                        row.insert(0, sitename)
-                result += r
-            except query.suppress_exceptions:
-                stillalive.append((sitename, site, connection))
+            if sitename not in responses:
                 continue
+            stillalive.append((sitename, site, connection))
+            r = responses[sitename]
+            if self.prepend_site:
+                for row in r:
+                    row.insert(0, sitename)
+            result += r
+
+        self.connections = stillalive
+        return result
+
+    def query_iter(self,
+                   query: 'QueryTypes',
+                   add_headers: Union[str, bytes] = u"",
+                   options: Optional[QueryOptions] = None) -> Iterator[LivestatusRow]:
+        """Like query(), but yield the rows while they are received
+
+        The query is sent to all sites first, then the rows are yielded site by site.
+        Limit: is applied to each site, like query_parallel() does. A site failing in
+        the middle of its response is marked dead, but its rows received up to then
+        have already been yielded. The rows must be consumed before issuing the next
+        query, MKLivestatusQueryInProgressError is raised otherwise.
+
+        Without options, the sites, limit, site prefix and authorization domain set on
+        the connection are used.
+        """
+        with self._receiving_rows_of_query():
+            yield from self._query_iter(query, add_headers, options)
+
+    def _query_iter(self, query: 'QueryTypes', add_headers: Union[str, bytes],
+                    options: Optional[QueryOptions]) -> Iterator[LivestatusRow]:
+        normalized_add_headers = _ensure_unicode(add_headers)
+        normalized_query = Query(query) if not isinstance(query, Query) else query
+
+        if options is None:
+            only_sites, limit, prepend_site = self.only_sites, self.limit, self.prepend_site
+            auth_domain = None
+        else:
+            only_sites, limit, prepend_site, auth_domain = options
+
+        if only_sites is not None:
+            connect_to_sites = [c for c in self.connections if c[0] in only_sites]
+        else:
+            connect_to_sites = self.connections
+
+        if limit is not None:
+            normalized_add_headers += u"Limit: %d\n" % limit
+
+        sent: List[Tuple[SiteId, SiteConfiguration, SingleSiteConnection, str]] = []
+        for sitename, site, connection in connect_to_sites:
+            try:
+                str_query = connection.build_query(normalized_query, normalized_add_headers,
+                                                   auth_domain)
+                connection.send_query(str_query)
+                connection._receiving_rows = True
+                sent.append((sitename, site, connection, str_query))
             except LivestatusTestingError:
                 raise
             except Exception as e:
-                connection.disconnect()
                 self.deadsites[sitename] = {
                     "exception": e,
                     "site": site,
                 }
 
-        self.connections = stillalive
-        return result
+        received = 0
+        try:
+            for sitename, site, connection, str_query in sent:
+                try:
+                    for row in connection.recv_response_iter(str_query,
+                                                             normalized_query.suppress_exceptions):
+                        if prepend_site:
+                            row.insert(0, sitename)
+                        yield row
+                except normalized_query.suppress_exceptions:
+                    pass
+                except LivestatusTestingError:
+                    raise
+                except Exception as e:
+                    connection.disconnect()
+                    self.deadsites[sitename] = {
+                        "exception": e,
+                        "site": site,
+                    }
+                received += 1
+        finally:
+            # The responses of the remaining sites are not needed anymore
+            for _sitename, _site, connection, _str_query in sent[received:]:
+                connection.disconnect()
+            for _sitename, _site, connection, _str_query in sent:
+                connection._receiving_rows = False
+            self.connections = [c for c in self.connections if c[0] not in self.deadsites]
 
     # TODO: Is this SiteId(...) the way to go? Without this mypy complains about incompatible bytes
     # vs. Optional[SiteId]
     def command(self, command: AnyStr, sitename: Optional[SiteId] = SiteId("local")) -> None:
+        self._ensure_no_query_in_progress()
         if sitename in self.deadsites:
             raise MKLivestatusSocketError("Connection to site %s is dead: %s" %
                                           (sitename, self.deadsites[sitename]["exception"]))
@@ -50,6 +50,7 @@ test_types = collections.OrderedDict([
     ("gui_crawl", EXECUTE_IN_VENV),
     ("packaging", EXECUTE_IN_VENV),
     ("composition", EXECUTE_IN_VENV),
+    ("performance", EXECUTE_IN_VENV),
 ])
 
 
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import os
+
+import pytest  # type: ignore[import]
+
+from testlib.base import Scenario  # type: ignore[import]
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+import cmk.utils.paths
+from cmk.utils.type_defs import EVERYTHING
+
+from cmk.core_helpers.type_defs import NO_SELECTION
+
+import cmk.base.config as config
+import cmk.base.agent_based.discovery as discovery
+
+NUM_HOSTS = 40
+# Time the (simulated) agent needs to answer
+AGENT_LATENCY = 0.2
+
+
+@pytest.mark.usefixtures("load_all_agent_based_plugins")
+def test_do_discovery(monkeypatch):
+    host_names = ["host%d" % number for number in range(NUM_HOSTS)]
+    ts = Scenario()
+    for host_name in host_names:
+        ts.add_host(host_name, ipaddress="127.0.0.1")
+    ts.fake_standard_linux_agent_output(*host_names)
+    ts.set_ruleset("datasource_programs", [
+        ("sleep %s; cat %s/<HOST>" % (AGENT_LATENCY, cmk.utils.paths.tcp_cache_dir), [],
+         host_names, {}),
+    ])
+    ts.apply(monkeypatch)
+
+    def do_discovery():
+        discovery.do_discovery(
+            set(host_names),
+            selected_sections=NO_SELECTION,
+            run_plugin_names=EVERYTHING,
+            arg_only_new=False,
+        )
+
+    # The first discovery creates the caches and the persisted sections, which all the
+    # measured runs then find
+    do_discovery()
+
+    measurements = []
+    for concurrency in [1, 10, 40]:
+        monkeypatch.setattr(config, "discovery_concurrency", concurrency)
+        measurements.append(
+            measure("concurrency %d" % concurrency, do_discovery, rounds=1, items=NUM_HOSTS))
+
+    text = report(
+        "discovery.do_discovery(): %d hosts, %.1f s agent latency, %d CPUs" %
+        (NUM_HOSTS, AGENT_LATENCY, os.cpu_count()), measurements)
+    assert text
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+import pprint
+
+import pytest  # type: ignore[import]
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+import cmk.base.config as config
+
+NUM_FOLDERS = 50
+HOSTS_PER_FOLDER = 400
+RULES_PER_FOLDER = 20
+
+
+def _hosts_mk(folder):
+    hostnames = ["host-%d-%d" % (folder, index) for index in range(HOSTS_PER_FOLDER)]
+    return "\n".join([
+        "all_hosts += %s" % pprint.pformat(hostnames),
+        "host_tags.update(%s)" % pprint.pformat({
+            hostname: {
+                "site": "unit",
+                "address_family": "ip-v4-only",
+                "ip-v4": "ip-v4",
+                "agent": "cmk-agent",
+                "tcp": "tcp",
+                "piggyback": "auto-piggyback",
+                "snmp_ds": "no-snmp",
+                "criticality": "prod",
+                "networking": "lan",
+            } for hostname in hostnames
+        }),
+        "ipaddresses.update(%s)" % pprint.pformat({
+            hostname: "10.%d.%d.%d" % (folder, index // 256, index % 256)
+            for index, hostname in enumerate(hostnames)
+        }),
+        "host_attributes.update(%s)" % pprint.pformat({
+            hostname: {
+                "alias": "Host %s" % hostname,
+                "ipaddress": "10.%d.%d.%d" % (folder, index // 256, index % 256),
+            } for index, hostname in enumerate(hostnames)
+        }),
+    ]) + "\n"
+
+
+def _rules_mk(folder):
+    rules = "".join("{'condition': {'host_folder': '/%%s/' %% FOLDER_PATH, "
+                    "'host_name': ['host-%d-%d']}, 'value': 'RRD%d'},\n" % (folder, index, index)
+                    for index in range(RULES_PER_FOLDER))
+    return "cmc_host_rrd_config = [\n%s] + cmc_host_rrd_config\n" % rules
+
+
+@pytest.fixture(name="config_files")
+def fixture_config_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("OMD_SITE", "unit")
+    monkeypatch.setattr("cmk.utils.paths.main_config_file", str(tmp_path / "main.mk"))
+    monkeypatch.setattr("cmk.utils.paths.check_mk_config_dir", str(tmp_path / "conf.d"))
+    monkeypatch.setattr("cmk.utils.paths.var_dir", str(tmp_path / "var"))
+
+    (tmp_path / "main.mk").write_text(u"")
+    for folder in range(NUM_FOLDERS):
+        folder_dir = tmp_path / "conf.d" / "wato" / ("folder%d" % folder)
+        folder_dir.mkdir(parents=True)
+        (folder_dir / "hosts.mk").write_text(_hosts_mk(folder))
+        (folder_dir / "rules.mk").write_text(_rules_mk(folder))
+    yield
+    config._initialize_config()
+
+
+def test_config_snapshot(config_files):
+    def load_files():
+        config.ConfigSnapshotStore().remove()
+        config.load(validate_hosts=False)
+
+    measurements = [measure("evaluate config files", load_files, rounds=3)]
+    config.save_config_snapshot()
+    measurements.append(
+        measure("load snapshot", lambda: config.load(validate_hosts=False), rounds=3))
+    assert len(config.all_hosts) == NUM_FOLDERS * HOSTS_PER_FOLDER
+
+    text = report("config.load(): %d hosts" % (NUM_FOLDERS * HOSTS_PER_FOLDER), measurements)
+    assert text
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import io
+import os
+
+from testlib.base import Scenario  # type: ignore[import]
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+import cmk.base.config as config
+import cmk.base.core_nagios as core_nagios
+
+NUM_HOSTS = 2000
+
+
+def test_create_config(monkeypatch):
+    ts = Scenario()
+    for number in range(NUM_HOSTS):
+        ts.add_host("host%d" % number)
+    ts.set_option("ipaddresses",
+                  {"host%d" % number: "10.0.%d.%d" % (number // 256, number % 256)
+                   for number in range(NUM_HOSTS)})
+    ts.set_option("extra_service_conf", {
+        "check_interval": [(5, [], ["host%d" % number for number in range(0, NUM_HOSTS, 3)],
+                            ["Check_MK"])],
+    })
+    ts.apply(monkeypatch)
+
+    outputs = []
+
+    def create_config():
+        outfile = io.StringIO()
+        core_nagios.create_config(outfile, hostnames=None)
+        outputs.append(outfile.getvalue())
+
+    measurements = []
+    monkeypatch.setattr(config, "core_config_incremental", False)
+    for processes in [1, 2, 4]:
+        monkeypatch.setattr(config, "core_config_processes", processes)
+        measurements.append(
+            measure("%d processes" % processes, create_config, rounds=3, items=NUM_HOSTS))
+    assert len(set(outputs)) == 1
+
+    text = report("core_nagios.create_config(): %d hosts, %d CPUs" % (NUM_HOSTS, os.cpu_count()),
+                  measurements)
+    assert text
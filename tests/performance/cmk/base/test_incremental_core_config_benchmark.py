@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import io
+import itertools
+from pathlib import Path
+
+from testlib.base import Scenario  # type: ignore[import]
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+import cmk.utils.paths
+import cmk.base.config as config
+import cmk.base.core_nagios as core_nagios
+
+NUM_HOSTS = 2000
+
+
+def test_create_config_incremental(monkeypatch, tmp_path):
+    monkeypatch.setattr(cmk.utils.paths, "var_dir", str(tmp_path / "var"))
+    monkeypatch.setattr(cmk.utils.paths, "autochecks_dir", str(tmp_path / "autochecks"))
+    Path(cmk.utils.paths.autochecks_dir).mkdir()
+
+    ts = Scenario()
+    for number in range(NUM_HOSTS):
+        ts.add_host("host%d" % number)
+    ts.set_option("ipaddresses",
+                  {"host%d" % number: "10.0.%d.%d" % (number // 256, number % 256)
+                   for number in range(NUM_HOSTS)})
+    ts.set_option("extra_service_conf", {
+        "check_interval": [(5, [], ["host%d" % number for number in range(0, NUM_HOSTS, 3)],
+                            ["Check_MK"])],
+    })
+    ts.apply(monkeypatch)
+
+    def create_config():
+        core_nagios.create_config(io.StringIO(), hostnames=None)
+
+    host_numbers = itertools.count()
+
+    def create_config_one_changed_host():
+        Path(cmk.utils.paths.autochecks_dir,
+             "host%d.mk" % next(host_numbers)).write_text(u"[\n]\n")
+        create_config()
+
+    monkeypatch.setattr(config, "core_config_incremental", False)
+    measurements = [measure("full", create_config, rounds=3, items=NUM_HOSTS)]
+
+    monkeypatch.setattr(config, "core_config_incremental", True)
+    create_config()
+    measurements.append(measure("unchanged", create_config, rounds=3, items=NUM_HOSTS))
+    measurements.append(
+        measure("one changed host", create_config_one_changed_host, rounds=3, items=NUM_HOSTS))
+
+    text = report("core_nagios.create_config(): %d hosts" % NUM_HOSTS, measurements)
+    assert text
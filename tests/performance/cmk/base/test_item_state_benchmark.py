@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+import itertools
+
+import pytest  # type: ignore[import]
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+from cmk.base import item_state
+
+NUM_ITEM_STATES = 20000
+
+
+@pytest.fixture(name="stores")
+def fixture_stores(tmp_path, monkeypatch):
+    monkeypatch.setattr(item_state._StaticValueStore, "STORAGE_PATH", tmp_path / "standard")
+    monkeypatch.setattr(item_state._JournalValueStore, "STORAGE_PATH", tmp_path / "journal")
+    monkeypatch.setattr(item_state._JournalValueStore, "STANDARD_STORAGE_PATH",
+                        tmp_path / "standard")
+    return [item_state._StaticValueStore, item_state._JournalValueStore]
+
+
+@pytest.mark.parametrize("changed_percent", [10, 100])
+def test_item_state_check_cycle(stores, changed_percent):
+    """Load the item states of a host, update some of them and store them"""
+    keys = [("if64", "%d" % index, "in_octets") for index in range(NUM_ITEM_STATES)]
+    changed_keys = keys[:NUM_ITEM_STATES * changed_percent // 100]
+    timestamps = itertools.count(1600000000)
+
+    measurements = []
+    for cls in stores:
+        host_name = "host-%s" % cls.__name__
+        # Every cycle stands for one process: create a new store
+        cls(host_name, lambda msg: None).store(
+            removed=set(),
+            updated={key: (0, 0) for key in keys},
+        )
+
+        def check_cycle(cls=cls, host_name=host_name):
+            value_store = cls(host_name, lambda msg: None)
+            value_store.load()
+            now = next(timestamps)
+            assert len(value_store) == NUM_ITEM_STATES
+            value_store.store(
+                removed=set(),
+                updated={key: (now, now * 1000) for key in changed_keys},
+            )
+
+        measurements.append(measure(cls.__name__, check_cycle, rounds=5, items=len(keys)))
+
+    report(
+        "Item states: %d values, %d%% changed per check cycle" %
+        (NUM_ITEM_STATES, changed_percent),
+        measurements,
+    )
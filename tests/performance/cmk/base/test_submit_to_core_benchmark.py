@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+import os
+import threading
+from typing import Callable
+
+import pytest  # type: ignore[import]
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+import cmk.utils.paths
+
+import cmk.base.config as config
+import cmk.base.agent_based.checking._submit_to_core as submit_to_core
+
+NUM_SERVICES = 3000
+
+
+@pytest.fixture(autouse=True)
+def fixture_submit_to_core(monkeypatch):
+    monkeypatch.setattr(submit_to_core, "keepalive", None)
+    monkeypatch.setattr(submit_to_core, "_nagios_command_pipe", None)
+    monkeypatch.setattr(config, "monitoring_core", "nagios")
+
+
+def _submit_result(number: int) -> None:
+    submit_to_core.check_result(
+        host_name="heute",
+        service_name="Filesystem /srv/data/%d" % number,
+        result=(0, "Used: 42.17% - 421.7 GB of 1000 GB", [
+            ("fs_used", 421700.0, 800000.0, 900000.0, 0, 1000000.0),
+            ("fs_size", 1000000.0),
+        ]),
+        cache_info=None,
+        dry_run=False,
+        show_perfdata=False,
+    )
+
+
+def _report_check_host(title: str, flush: Callable[[], None], num_writes: int) -> None:
+    def check_host_unbatched():
+        # How the results have been submitted before: one write per result
+        for number in range(NUM_SERVICES):
+            _submit_result(number)
+            flush()
+        submit_to_core.finalize()
+
+    def check_host():
+        for number in range(NUM_SERVICES):
+            _submit_result(number)
+        submit_to_core.finalize()
+
+    report(title, [
+        measure("one write per result (%d writes)" % NUM_SERVICES,
+                check_host_unbatched,
+                items=NUM_SERVICES),
+        measure("batched (%d writes)" % num_writes, check_host, items=NUM_SERVICES),
+    ])
+
+
+def test_submit_via_command_pipe(monkeypatch, tmp_path):
+    # A real pipe with a reader, like the core
+    command_pipe_path = tmp_path / "nagios.cmd"
+    os.mkfifo(command_pipe_path)
+    monkeypatch.setattr(cmk.utils.paths, "nagios_command_pipe_path", str(command_pipe_path))
+    monkeypatch.setattr(config, "check_submission", "pipe")
+
+    def read():
+        with command_pipe_path.open("rb") as pipe:
+            while pipe.read(65536):
+                pass
+
+    reader = threading.Thread(target=read, daemon=True)
+    reader.start()
+
+    for number in range(NUM_SERVICES):
+        _submit_result(number)
+    num_writes = len(list(submit_to_core._command_pipe_chunks(
+        submit_to_core._pending_command_pipe_messages)))
+    submit_to_core.finalize()
+
+    _report_check_host(
+        "_submit_to_core.check_result(): %d services via the command pipe" % NUM_SERVICES,
+        submit_to_core._flush_command_pipe,
+        num_writes,
+    )
+
+    submit_to_core._nagios_command_pipe.close()  # type: ignore[union-attr]
+    reader.join()
+
+
+def test_submit_via_check_result_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(cmk.utils.paths, "check_result_path", str(tmp_path))
+    monkeypatch.setattr(config, "check_submission", "file")
+
+    _report_check_host(
+        "_submit_to_core.check_result(): %d services via check result files" % NUM_SERVICES,
+        submit_to_core._flush_checkresult_file,
+        1,
+    )
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+
+import pytest  # type: ignore[import]
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+from testlib.utils import get_standard_linux_agent_output  # type: ignore[import]
+
+from cmk.utils.type_defs import AgentRawData, SectionName
+
+from cmk.core_helpers.agent import AgentHostSections, AgentParser, NOOPParser, ParserState
+from cmk.core_helpers.type_defs import NO_SELECTION
+
+HOSTNAME = "benchmark"
+
+
+def _large_ps_and_logwatch_output(num_processes: int) -> AgentRawData:
+    lines = [b"<<<check_mk>>>", b"Version: 2.0.0", b"<<<ps_lnx>>>", b"[header] CGROUP USER ..."]
+    lines.extend(b"(root,%d,%d,00:00:%02d/05:33:%02d,%d) /usr/sbin/daemon --option=%d" %
+                 (num_processes + n, n * 3, n % 60, n % 60, n, n) for n in range(num_processes))
+    lines.append(b"<<<logwatch>>>")
+    lines.append(b"[[[/var/log/messages]]]")
+    lines.extend(b"W Oct 18 08:00:%02d host kernel: message number %d" % (n % 60, n)
+                 for n in range(num_processes))
+    lines.append(b"<<<uptime>>>")
+    lines.append(b"4711.0 1234.5")
+    return AgentRawData(b"\n".join(lines))
+
+
+@pytest.fixture(name="raw_data",
+                params=["linux-agent", "20k-processes"],
+                ids=["linux-agent", "20k-processes"])
+def fixture_raw_data(request) -> AgentRawData:
+    if request.param == "linux-agent":
+        return AgentRawData(get_standard_linux_agent_output().encode("utf-8"))
+    return _large_ps_and_logwatch_output(20000)
+
+
+def test_agent_parser(raw_data):
+    logger = logging.getLogger("benchmark")
+    parser = AgentParser(
+        HOSTNAME,
+        None,  # type: ignore[arg-type]  # the store is not used by _parse_host_section
+        check_interval=60,
+        keep_outdated=True,
+        translation={},
+        encoding_fallback="ascii",
+        simulation=False,
+        logger=logger,
+    )
+
+    def parse_line_by_line(selection):
+        # How the state machine has been driven before: every line through every state
+        state: ParserState = NOOPParser(
+            HOSTNAME,
+            AgentHostSections(),
+            section_info={},
+            selection=selection,
+            translation={},
+            encoding_fallback="ascii",
+            logger=logger,
+        )
+        for line in raw_data.split(b"\n"):
+            state = state(line.rstrip(b"\r"))
+        return state
+
+    selections = [
+        ("all sections", NO_SELECTION),
+        ("2 sections", {SectionName("check_mk"), SectionName("uptime")}),
+    ]
+    measurements = []
+    for title, selection in selections:
+        expected = parse_line_by_line(selection).host_sections
+        parsed = parser._parse_host_section(raw_data, selection=selection).host_sections
+        assert parsed.sections == expected.sections
+        assert parsed.piggybacked_raw_data == expected.piggybacked_raw_data
+        measurements.append(
+            measure(
+                "line by line, %s" % title,
+                lambda selection=selection: parse_line_by_line(selection),
+                items=len(raw_data) // 1024,
+            ))
+        measurements.append(
+            measure(
+                "marker scan, %s" % title,
+                lambda selection=selection: parser._parse_host_section(raw_data,
+                                                                       selection=selection),
+                items=len(raw_data) // 1024,
+            ))
+
+    report("AgentParser._parse_host_section(), %d KiB (items: KiB)" % (len(raw_data) // 1024),
+           measurements)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+from testlib.utils import get_standard_linux_agent_output  # type: ignore[import]
+
+from cmk.utils.type_defs import AgentRawData
+
+from cmk.core_helpers.agent import DefaultAgentFileCache
+from cmk.core_helpers.cache import MemoryCache
+
+NUM_HOSTS = 200
+
+
+def test_file_cache_read(monkeypatch, tmp_path):
+    raw_data = AgentRawData(get_standard_linux_agent_output().encode("utf-8"))
+    file_caches = [
+        DefaultAgentFileCache(
+            path=tmp_path / ("host%d" % number),
+            max_age=3600,
+            disabled=False,
+            use_outdated=False,
+            simulation=False,
+        ) for number in range(NUM_HOSTS)
+    ]
+    for file_cache in file_caches:
+        file_cache.write(raw_data)
+
+    def read_all():
+        for file_cache in file_caches:
+            assert file_cache.read() == raw_data
+
+    measurements = []
+    for title, memory_cache in [
+        ("default: memory tier off", MemoryCache.instance),
+        ("memory tier 128 MiB", MemoryCache(max_size=128 * 1024 * 1024, max_age=3600)),
+        # Round robin over more data than fits is the worst case of the LRU eviction
+        ("memory tier 16 MiB, too small", MemoryCache(max_size=16 * 1024 * 1024, max_age=3600)),
+    ]:
+        monkeypatch.setattr(MemoryCache, "instance", memory_cache)
+        read_all()
+        measurements.append(measure(title, read_all, items=NUM_HOSTS))
+
+    report(
+        "FileCache.read(): %d hosts, %d KiB agent output (items: reads)" %
+        (NUM_HOSTS, len(raw_data) // 1024), measurements)
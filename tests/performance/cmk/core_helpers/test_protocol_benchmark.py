@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import pytest  # type: ignore[import]
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+from cmk.utils.type_defs import SectionName
+
+from cmk.snmplib.type_defs import SNMPRawData, SNMPTable
+
+from cmk.core_helpers.protocol import SNMPBinaryResultMessage, SNMPResultMessage
+
+
+def _interface_table(num_interfaces: int) -> SNMPTable:
+    # Roughly the shape of the `if64` section: 20 text columns and a MAC address.
+    return [[
+        str(index),
+        "Ethernet%d/%d/%d" % (index // 2304, index // 48 % 48, index % 48),
+        "6",
+        "10000000000",
+        "1",
+        "1" if index % 3 else "2",
+        *(str(index * factor) for factor in range(1, 13)),
+        "",
+        "uplink to switch %d" % (index % 17),
+        [0x00, 0x1c, 0x7f, index >> 16 & 0xff, index >> 8 & 0xff, index & 0xff],
+    ] for index in range(num_interfaces)]
+
+
+@pytest.fixture(name="walk", params=[5000, 50000], ids=["5k-interfaces", "50k-interfaces"])
+def fixture_walk(request) -> SNMPRawData:
+    return {
+        SectionName("if64"): [_interface_table(request.param)],
+        SectionName("if64adm"): [[[str(index), "1"] for index in range(request.param)]],
+    }
+
+
+def test_snmp_payload_encoding(walk):
+    num_cells = sum(
+        len(row) for section in walk.values() for table in section for row in table)  # type: ignore
+
+    measurements = []
+    for cls in (SNMPResultMessage, SNMPBinaryResultMessage):
+        payload = cls._serialize(walk)
+        assert cls._deserialize(payload) == walk
+        measurements.append(
+            measure(
+                "%s (%d bytes) encode" % (cls.payload_type.name, len(payload)),
+                lambda cls=cls: cls._serialize(walk),
+                items=num_cells,
+            ))
+        measurements.append(
+            measure(
+                "%s decode" % cls.payload_type.name,
+                lambda cls=cls, payload=payload: cls._deserialize(payload),
+                items=num_cells,
+            ))
+
+    report("SNMP payload encoding, %d cells" % num_cells, measurements)
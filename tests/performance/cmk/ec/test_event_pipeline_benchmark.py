@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+import logging
+import pathlib  # pylint: disable=import-error
+import select
+import time
+
+import pytest  # type: ignore[import]
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+import cmk.utils.paths
+import cmk.ec.export as ec
+import cmk.ec.history
+import cmk.ec.main
+
+NUM_LINES = 20000
+LINES_PER_READ = 40  # about what fits into a 4096 bytes read from a socket
+NUM_RULES = 2000
+
+
+def _rules():
+    rules = []
+    for index in range(NUM_RULES):
+        rule = [
+            {
+                "match": "Interface .* on port %d went down" % index
+            },
+            {
+                "match": "^service%d\\[[0-9]+\\]: (.*) crashed" % index,
+                "match_ok": "^service%d\\[[0-9]+\\]: started" % index,
+            },
+            {
+                "match": "(backup|restore) job %d failed" % index,
+                "match_application": "backup",
+            },
+            {
+                "match": "temperature .* critical",
+                "match_host": "sensor%d" % index
+            },
+        ][index % 4]
+        rule.update({
+            "id": "rule%d" % index,
+            "state": -1,
+            "sl": {
+                "value": 0,
+                "precedence": "message"
+            },
+        })
+        rules.append(rule)
+    return rules
+
+
+def _lines():
+    return [("<78>May 26 13:45:01 host%d %s[%d]: %s\n" % (
+        index % 100,
+        ["sshd", "CRON", "backup", "kernel"][index % 4],
+        index,
+        [
+            "Interface eth0 on port %d went down" % (index % NUM_RULES),
+            "service%d[4711]: process crashed" % (index % NUM_RULES),
+            "Accepted publickey for root from 10.0.0.%d port 22 ssh2" % (index % 256),
+            "pam_unix(cron:session): session opened for user root by (uid=0)",
+        ][index % 4],
+    )).encode("utf-8") for index in range(NUM_LINES)]
+
+
+@pytest.fixture(name="event_server")
+def fixture_event_server(monkeypatch):
+    settings = ec.settings('1.2.3i45', pathlib.Path(cmk.utils.paths.omd_root),
+                           pathlib.Path(cmk.utils.paths.default_config_dir), ['mkeventd'])
+    config = ec.default_config()
+    for limit in config["event_limit"].values():
+        limit["limit"] = NUM_LINES
+    perfcounters = cmk.ec.main.Perfcounters(logging.getLogger("cmk.mkeventd.lock.perfcounters"))
+    history = cmk.ec.history.History(settings, config, logging.getLogger("cmk.mkeventd"),
+                                     cmk.ec.main.StatusTableEvents.columns,
+                                     cmk.ec.main.StatusTableHistory.columns)
+    event_status = cmk.ec.main.EventStatus(settings, config, perfcounters, history,
+                                           logging.getLogger("cmk.mkeventd.EventStatus"))
+    event_server = cmk.ec.main.EventServer(
+        logging.getLogger("cmk.mkeventd.EventServer"), settings, config,
+        cmk.ec.main.default_slave_status_master(), perfcounters,
+        cmk.ec.main.ECLock(logging.getLogger("cmk.mkeventd.configuration")), history,
+        event_status, cmk.ec.main.StatusTableEvents.columns, False)
+    logging.getLogger("cmk.mkeventd.EventServer").setLevel(logging.WARNING)
+    event_server.compile_rules([], [{"id": "pack", "disabled": False, "rules": _rules()}])
+
+    monkeypatch.setattr(event_server.host_config, "_update_cache_after_core_restart", lambda: True)
+    monkeypatch.setattr(history, "add", lambda event, what, who="", addinfo="": None)
+    return event_server
+
+
+def _replay(event_server, lines, interval=0.0):
+    """Feed the lines to the event server like its main loop would do
+
+    Every `interval` seconds one read worth of lines comes in. Returns the
+    latencies from reading a line until its event has been processed.
+    """
+    reads = [lines[start:start + LINES_PER_READ] for start in range(0, len(lines), LINES_PER_READ)]
+    read_times = []
+    latencies = []
+    process_translated_event = event_server.process_translated_event
+
+    def processed(event, rule_candidates):
+        process_translated_event(event, rule_candidates)
+        latencies.append(time.perf_counter() - read_times[int(event["pid"]) // LINES_PER_READ])
+
+    event_server.process_translated_event = processed
+    event_server._event_status.flush()
+    start = time.perf_counter()
+    try:
+        for number, read in enumerate(reads):
+            delay = start + number * interval - time.perf_counter()
+            while delay > 0:
+                if event_server._pipeline is not None:
+                    select.select([event_server._pipeline], [], [], delay)
+                    event_server._process_pipeline_results()
+                else:
+                    time.sleep(delay)
+                delay = start + number * interval - time.perf_counter()
+
+            read_times.append(time.perf_counter())
+            event_server.process_raw_lines(b"".join(read))
+            if event_server._pipeline is not None:
+                event_server._process_pipeline_results()
+
+        if event_server._pipeline is not None:
+            event_server._process_pipeline_results(max_pending=0)
+    finally:
+        del event_server.process_translated_event
+
+    assert len(latencies) == len(lines)
+    return latencies
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+@pytest.mark.parametrize("num_workers", [0, 2, 4])
+def test_event_pipeline(event_server, num_workers):
+    lines = _lines()
+    event_server._config["event_workers"] = num_workers
+    event_server._update_pipeline()
+    try:
+        measurements = [
+            measure("%d workers, max. rate" % num_workers,
+                    lambda: _replay(event_server, lines),
+                    rounds=2,
+                    items=NUM_LINES)
+        ]
+
+        # The latencies at a fixed rate which all variants can sustain
+        lines_per_second = 5000
+        latencies = _replay(event_server, lines, interval=LINES_PER_READ / lines_per_second)
+    finally:
+        if event_server._pipeline is not None:
+            event_server._stop_pipeline()
+
+    text = report("EC event processing: %d lines, %d rules" % (NUM_LINES, NUM_RULES),
+                  measurements)
+    print("%-40s %10s %10s\n%-40s %10.2f %10.2f" % (
+        "",
+        "p50 [ms]",
+        "p99 [ms]",
+        "latency at %d lines/s" % lines_per_second,
+        1000 * _percentile(latencies, 50),
+        1000 * _percentile(latencies, 99),
+    ))
+    assert text
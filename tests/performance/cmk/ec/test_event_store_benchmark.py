@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+
+import pytest  # type: ignore[import]
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+import cmk.ec.export as ec
+import cmk.ec.history
+import cmk.ec.main
+
+NUM_EVENTS = 50000
+NUM_RULES = 500
+NUM_HOSTS = 1000
+NUM_OPERATIONS = 2000
+
+
+@pytest.fixture(name="event_status")
+def fixture_event_status(tmp_path):
+    settings = ec.settings('1.2.3i45', tmp_path, tmp_path / "etc", ['mkeventd'])
+    config = ec.default_config()
+    perfcounters = cmk.ec.main.Perfcounters(logging.getLogger("cmk.mkeventd.lock.perfcounters"))
+    history = cmk.ec.history.History(settings, config, logging.getLogger("cmk.mkeventd"),
+                                     cmk.ec.main.StatusTableEvents.columns,
+                                     cmk.ec.main.StatusTableHistory.columns)
+    history.add = lambda event, what, who="", addinfo="": None
+    return cmk.ec.main.EventStatus(settings, config, perfcounters, history,
+                                   logging.getLogger("cmk.mkeventd.EventStatus"))
+
+
+def _event(number):
+    return {
+        "rule_id": "rule%d" % (number % NUM_RULES),
+        "host": "host%d" % (number % NUM_HOSTS),
+        "core_host": "host%d" % (number % NUM_HOSTS),
+        "application": "app",
+        "facility": 1,
+        "match_groups": ("eth%d" % number,),
+        "text": "Interface eth%d down" % number,
+        "time": 1590000000.0,
+        "priority": 3,
+        "phase": "open",
+    }
+
+
+def _fill(event_status):
+    event_status.flush()
+    for number in range(NUM_EVENTS):
+        event_status.new_event(_event(number))
+
+
+def _cancel(event_status):
+    for number in range(NUM_OPERATIONS):
+        ok_event = dict(_event(number), text="Interface eth%d up" % number)
+        match_groups = {
+            "match_groups_message": (),
+            "match_groups_message_ok": ok_event["match_groups"],
+        }
+        event_status.cancel_events(None, [], ok_event, match_groups, {"id": ok_event["rule_id"]})
+
+
+def _enforce_limits(event_status):
+    for number in range(NUM_OPERATIONS):
+        event = _event(number)
+        event_status.remove_oldest_event(["overall", "by_rule", "by_host"][number % 3], event)
+        event_status.new_event(event)
+
+
+def _lookup(event_status):
+    for number in range(NUM_OPERATIONS):
+        event_status.event(NUM_EVENTS - number)
+
+
+def test_event_store(event_status):
+    measurements = []
+    for name, func in [
+        ("cancel", _cancel),
+        ("enforce limits", _enforce_limits),
+        ("lookup by ID", _lookup),
+    ]:
+        _fill(event_status)
+        measurements.append(
+            measure("%s, %d open events" % (name, NUM_EVENTS),
+                    lambda func=func: func(event_status),
+                    rounds=1,
+                    items=NUM_OPERATIONS))
+    text = report("EC open event store: %d operations" % NUM_OPERATIONS, measurements)
+    assert text
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+import time
+
+import pytest  # type: ignore[import]
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+import cmk.ec.export as ec
+import cmk.ec.history
+import cmk.ec.main
+from cmk.ec.query import QueryGET
+
+logger = logging.getLogger("cmk.mkeventd")
+
+NUM_ENTRIES = 200000
+NUM_HOSTS = 500
+
+
+class FakeStatusServer:
+    def __init__(self, history):
+        self._table = cmk.ec.main.StatusTableHistory(logger, history)
+
+    def table(self, name):
+        return self._table
+
+
+def _make_history(path, archive_mode):
+    settings = ec.settings('1.2.3i45', path, path / "etc", ['mkeventd'])
+    config = ec.default_config()
+    config["archive_mode"] = archive_mode
+    return cmk.ec.history.History(settings, config, logger, cmk.ec.main.StatusTableEvents.columns,
+                                  cmk.ec.main.StatusTableHistory.columns)
+
+
+@pytest.fixture(name="histories", scope="module")
+def fixture_histories(tmp_path_factory):
+    path = tmp_path_factory.mktemp("history")
+    file_history = _make_history(path, "file")
+    now = time.time()
+    for index in range(NUM_ENTRIES):
+        file_history.add(
+            {
+                "id": index,
+                "host": "host%d" % (index % NUM_HOSTS),
+                "rule_id": "rule%d" % (index % 50),
+                "text": "Interface eth%d changed its state to down" % (index % 48),
+                "first": now,
+                "last": now,
+            }, "NEW")
+    sqlite_history = _make_history(path, "sqlite")  # imports the files
+    return {"file": file_history, "sqlite": sqlite_history}
+
+
+@pytest.mark.parametrize("headers", [
+    ["Filter: event_host = host42", "Limit: 1000"],
+    ["Filter: event_id = 4711"],
+    ["Filter: history_time > %d" % (time.time() + 3600)],
+    ["Filter: event_rule_id = rule7", "Filter: event_host ~~ HOST1"],
+],
+                         ids=["host", "event-id", "no-matching-time", "rule-and-host-regex"])
+def test_history_query(histories, headers):
+    measurements = []
+    results = {}
+    for archive_mode, history in histories.items():
+        query = QueryGET(FakeStatusServer(history), ["GET history"] + headers, logger)
+        results[archive_mode] = sorted(row[5] for row in history.get(query))
+        measurements.append(measure(archive_mode, lambda h=history, q=query: h.get(q), rounds=3))
+
+    assert results["file"] == results["sqlite"]
+    report(
+        "EC history of %d entries: %s (%d results)" %
+        (NUM_ENTRIES, ", ".join(headers), len(results["file"])),
+        measurements,
+    )
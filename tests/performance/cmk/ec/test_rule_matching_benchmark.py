@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+import logging
+
+import pytest  # type: ignore[import]
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+from cmk.ec.main import EventServer, RuleMatcher
+from cmk.ec.rule_index import RuleIndex
+
+NUM_EVENTS = 500
+
+
+def _rules(num_rules):
+    rules = []
+    for index in range(num_rules):
+        rule = [
+            {
+                "match": "Interface .* on port %d went down" % index
+            },
+            {
+                "match": "^service%d\\[[0-9]+\\]: (.*) crashed" % index,
+                "match_ok": "^service%d\\[[0-9]+\\]: started" % index,
+            },
+            {
+                "match": "(backup|restore) job %d failed" % index,
+                "match_application": "backup",
+            },
+            {
+                "match": "temperature .* critical",
+                "match_host": "sensor%d" % index
+            },
+        ][index % 4]
+        for key in list(rule):
+            rule[key] = EventServer._compile_matching_value(key, rule[key])
+        rule.update({"id": "rule%d" % index, "pack": "pack%d" % (index // 100)})
+        rules.append(rule)
+    return rules
+
+
+def _events(num_rules):
+    events = []
+    for index in range(NUM_EVENTS):
+        text = [
+            "Interface eth0 on port %d went down" % (index % num_rules),
+            "service%d[4711]: process crashed" % (index % num_rules),
+            "Accepted publickey for root from 10.0.0.%d port 22 ssh2" % (index % 256),
+            "pam_unix(cron:session): session opened for user root by (uid=0)",
+        ][index % 4]
+        events.append({
+            "text": text,
+            "host": "host%d" % index,
+            "application": ["sshd", "CRON", "backup", "kernel"][index % 4],
+            "ipaddress": "10.0.0.1",
+            "facility": 1,
+            "priority": 4,
+        })
+    return events
+
+
+@pytest.mark.parametrize("num_rules", [200, 2000])
+def test_rule_matching(num_rules):
+    rules = _rules(num_rules)
+    events = _events(num_rules)
+    matcher = RuleMatcher(logging.getLogger("cmk.mkeventd"), {"debug_rules": False})
+    rule_index = RuleIndex(rules)
+
+    def first_match(event, candidates):
+        for rule in candidates:
+            if matcher.event_rule_matches_non_inverted(rule, event) is not False:
+                return rule["id"]
+        return None
+
+    def match_all():
+        return [first_match(event, rules) for event in events]
+
+    def match_indexed():
+        return [first_match(event, rule_index.select(event, rules)) for event in events]
+
+    assert match_all() == match_indexed()
+    report(
+        "EC rule matching: %d events, %d rules" % (NUM_EVENTS, num_rules),
+        [
+            measure("all rules", match_all, rounds=1, items=NUM_EVENTS),
+            measure("rule index", match_indexed, rounds=3, items=NUM_EVENTS),
+            measure("build rule index", lambda: RuleIndex(rules), rounds=3),
+        ],
+    )
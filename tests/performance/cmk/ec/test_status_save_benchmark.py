@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+import itertools
+import logging
+
+import pytest  # type: ignore[import]
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+import cmk.ec.export as ec
+import cmk.ec.history
+import cmk.ec.main
+from cmk.ec.event_store import EventStore
+
+NUM_EVENTS = 50000
+CHANGED_PER_SAVE = 500
+
+
+@pytest.fixture(name="event_status")
+def fixture_event_status(tmp_path):
+    settings = ec.settings('1.2.3i45', tmp_path, tmp_path / "etc", ['mkeventd'])
+    settings.paths.status_file.value.parent.mkdir(parents=True)
+    config = ec.default_config()
+    perfcounters = cmk.ec.main.Perfcounters(logging.getLogger("cmk.mkeventd.lock.perfcounters"))
+    history = cmk.ec.history.History(settings, config, logging.getLogger("cmk.mkeventd"),
+                                     cmk.ec.main.StatusTableEvents.columns,
+                                     cmk.ec.main.StatusTableHistory.columns)
+    event_status = cmk.ec.main.EventStatus(settings, config, perfcounters, history,
+                                           logging.getLogger("cmk.mkeventd.EventStatus"))
+    event_status.load_status(None)
+    event_status._events = EventStore({
+        "id": event_id,
+        "host": "host%d" % (event_id % 1000),
+        "core_host": "host%d" % (event_id % 1000),
+        "ipaddress": "10.0.%d.%d" % (event_id // 256 % 256, event_id % 256),
+        "application": "sshd",
+        "text": "Failed password for invalid user admin%d from 10.1.2.3 port 22" % event_id,
+        "rule_id": "rule%d" % (event_id % 100),
+        "phase": "open",
+        "state": 2,
+        "count": 1,
+        "first": 1590000000.0 + event_id,
+        "last": 1590000000.0 + event_id,
+        "comment": "",
+        "contact": "",
+    } for event_id in range(1, NUM_EVENTS + 1))
+    event_status._next_event_id = NUM_EVENTS + 1
+    return event_status
+
+
+def _change_some_events(event_status, round_number):
+    events = event_status.events()
+    for index in range(CHANGED_PER_SAVE):
+        event = events[(round_number * CHANGED_PER_SAVE + index * 97) % len(events)]
+        event["count"] += 1
+        event["last"] += 60
+
+
+@pytest.mark.parametrize("persistence", ["snapshot", "journal"])
+def test_status_save(event_status, persistence):
+    event_status._config["status_persistence"] = persistence
+    event_status.save_status()  # the initial snapshot
+    event_status._wait_for_compaction()
+
+    round_numbers = itertools.count()
+
+    def save():
+        _change_some_events(event_status, next(round_numbers))
+        event_status.save_status()
+
+    measurements = [
+        measure("%s, %d of %d events changed" % (persistence, CHANGED_PER_SAVE, NUM_EVENTS),
+                save,
+                rounds=20)
+    ]
+    event_status._wait_for_compaction()
+    text = report("EC status saving", measurements)
+    print("%-40s %10.2f\n%-40s %10d" % (
+        "last save duration [ms]",
+        1000 * event_status.save_duration,
+        "journal size [bytes]",
+        event_status.journal_size,
+    ))
+    assert text
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+import time
+import types
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+from cmk.utils.prediction import livestatus_lql
+
+import cmk.gui.plugins.metrics.rrd_fetch as rf
+
+# A combined graph over the CPU load of many hosts spread over a few sites
+NUM_SITES = 4
+NUM_HOSTS = 100
+# Round trip time of a Livestatus query to a remote site. The sites of a MultiSiteConnection
+# answer a query concurrently.
+LATENCY = 0.002
+
+
+class _SimulatedLivestatus:
+    def __init__(self):
+        self.only_sites = None
+        self.prepend_site = False
+        self.num_queries = 0
+
+    def set_only_sites(self, only_sites):
+        self.only_sites = only_sites
+
+    def set_prepend_site(self, prepend_site):
+        self.prepend_site = prepend_site
+
+    def query_row(self, _query):
+        self.num_queries += 1
+        time.sleep(LATENCY)
+        return [[0, 3600, 60] + [1.0] * 60]
+
+    def query(self, _query):
+        self.num_queries += 1
+        time.sleep(LATENCY)
+        # Ignores the filters: _query_rrd_data has to skip services which were not asked for
+        rows = []
+        for number in range(NUM_HOSTS):
+            site = "site%d" % (number % NUM_SITES)
+            if site in self.only_sites:
+                rows.append([site, "host%d" % number, "CPU load", [0, 3600, 60] + [1.0] * 60])
+        return rows
+
+
+def test_fetch_rrd_data(monkeypatch):
+    live = _SimulatedLivestatus()
+    monkeypatch.setattr(rf.sites, "live", lambda: live)
+    monkeypatch.setattr(rf, "user", types.SimpleNamespace(id="cmkadmin"))
+
+    needed_rrd_data = [("site%d" % (number % NUM_SITES), "host%d" % number, "CPU load", "load1",
+                        "max", 1) for number in range(NUM_HOSTS)]
+    graph_data_range = {"time_range": (0, 3600), "step": 60}
+
+    def one_query_per_service():
+        # How the RRD data has been fetched before
+        point_range = rf._point_range(graph_data_range)
+        fetched = {}
+        for (site, host_name, service_description), entries in \
+                rf.group_needed_rrd_data_by_service(needed_rrd_data).items():
+            query = livestatus_lql([host_name],
+                                   list(rf.rrd_columns(entries, "max", point_range)),
+                                   service_description)
+            with rf.sites.only_sites(site):
+                row = rf.sites.live().query_row(query)
+            for (perfvar, cf, scale), data in zip(entries, row):
+                fetched[(site, host_name, service_description, perfvar, cf, scale)] = data
+        return fetched
+
+    def batched():
+        monkeypatch.setattr(rf, "_rrd_data_cache", {})
+        return dict(rf.fetch_rrd_data_batched(needed_rrd_data, "max", graph_data_range))
+
+    def batched_cached():
+        return dict(rf.fetch_rrd_data_batched(needed_rrd_data, "max", graph_data_range))
+
+    assert one_query_per_service() == batched() == batched_cached()
+    live.num_queries = 0
+    batched()
+    assert live.num_queries == 1
+
+    report(
+        "fetch_rrd_data_for_graph(): %d services on %d sites, %.0f ms latency (items: services)" %
+        (NUM_HOSTS, NUM_SITES, LATENCY * 1000), [
+            measure("one query per service", one_query_per_service, items=NUM_HOSTS),
+            measure("batched", batched, items=NUM_HOSTS),
+            measure("batched, cached by a previous graph", batched_cached, items=NUM_HOSTS),
+        ])
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import random
+
+import pytest  # type: ignore[import]
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+from cmk.utils.prediction import TimeSeries
+
+import cmk.gui.plugins.metrics.timeseries as ts
+
+# A combined graph over the traffic of many interfaces, one year in daily steps
+NUM_INTERFACES = 200
+NUM_POINTS = 2000
+STEP = 86400 * 365 // NUM_POINTS
+
+
+def _interface_traffic(rnd: random.Random):
+    return [None if rnd.random() < 0.05 else rnd.uniform(0, 1e9) for _n in range(NUM_POINTS)]
+
+
+def test_time_series_math():
+    rnd = random.Random(4711)
+    twindow = (0, NUM_POINTS * STEP, STEP)
+    values = [_interface_traffic(rnd) for _n in range(NUM_INTERFACES)]
+    list_operands = [TimeSeries(v, twindow) for v in values]
+    array_operands = [ts.ArrayTimeSeries(v, twindow) for v in values]
+    operators = ts.time_series_operators()
+
+    def pointwise(operator_id):
+        # How the operators have been evaluated before
+        _op_title, op_func = operators[operator_id]
+        return TimeSeries([ts.op_func_wrapper(op_func, tsp) for tsp in zip(*list_operands)],
+                          twindow)
+
+    measurements = []
+    for operator_id in ["+", "MAX", "AVERAGE", "MERGE"]:
+        expected = pointwise(operator_id).values
+        assert ts.time_series_math(operator_id, array_operands).values == pytest.approx(expected)
+        measurements.append(
+            measure("%s point by point" % operator_id,
+                    lambda operator_id=operator_id: pointwise(operator_id),
+                    items=NUM_INTERFACES * NUM_POINTS))
+        measurements.append(
+            measure("%s arrays" % operator_id,
+                    lambda operator_id=operator_id: ts.time_series_math(
+                        operator_id, array_operands).values,
+                    items=NUM_INTERFACES * NUM_POINTS))
+
+    # The conversion of the values fetched from Livestatus is done once per graph
+    measurements.append(
+        measure("+ arrays, converted from lists",
+                lambda: ts.time_series_math("+", list_operands).values,
+                items=NUM_INTERFACES * NUM_POINTS))
+
+    report(
+        "time_series_math(): %d time series of %d points (items: points)" %
+        (NUM_INTERFACES, NUM_POINTS), measurements)
+
+
+def test_resample():
+    rnd = random.Random(4711)
+    values = _interface_traffic(rnd) * 30
+    # A fine grained series aligned to the coarse one of the graph, and back
+    fine_twindow = (0, len(values) * 60, 60)
+    coarse_twindow = (0, len(values) * 60, 300)
+    list_ts = TimeSeries(values, fine_twindow)
+    array_ts = ts.ArrayTimeSeries(values, fine_twindow)
+    list_coarse_ts = TimeSeries(list_ts.downsample(coarse_twindow, "average"), coarse_twindow)
+    array_coarse_ts = ts.ArrayTimeSeries(list_coarse_ts.values, coarse_twindow)
+
+    assert array_ts.downsample(coarse_twindow, "average") == pytest.approx(
+        list_ts.downsample(coarse_twindow, "average"))
+    assert array_coarse_ts.bfill_upsample(fine_twindow, 0) == list_coarse_ts.bfill_upsample(
+        fine_twindow, 0)
+
+    report("TimeSeries resampling: %d points (items: points)" % len(values), [
+        measure("downsample point by point",
+                lambda: list_ts.downsample(coarse_twindow, "average"),
+                items=len(values)),
+        measure("downsample arrays",
+                lambda: array_ts.downsample(coarse_twindow, "average"),
+                items=len(values)),
+        measure("bfill_upsample point by point",
+                lambda: list_coarse_ts.bfill_upsample(fine_twindow, 0),
+                items=len(values)),
+        measure("bfill_upsample arrays",
+                lambda: array_coarse_ts.bfill_upsample(fine_twindow, 0),
+                items=len(values)),
+    ])
+
+
+def _percentile_point_by_point(values, q):
+    clean = sorted(v for v in values if v is not None)
+    if not clean:
+        return None
+    # Linear interpolation between the closest ranks, like numpy does by default
+    rank = (len(clean) - 1) * q / 100.0
+    lower = int(rank)
+    upper = min(lower + 1, len(clean) - 1)
+    return clean[lower] + (clean[upper] - clean[lower]) * (rank - lower)
+
+
+def test_percentile():
+    rnd = random.Random(4711)
+    values = _interface_traffic(rnd) * 30
+    array_ts = ts.ArrayTimeSeries(values)
+
+    assert array_ts.percentile(95) == pytest.approx(_percentile_point_by_point(values, 95))
+
+    report("ArrayTimeSeries.percentile(): %d points (items: points)" % len(values), [
+        measure("percentile point by point",
+                lambda: _percentile_point_by_point(values, 95),
+                items=len(values)),
+        measure("percentile arrays", lambda: array_ts.percentile(95), items=len(values)),
+    ])
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+import functools
+import random
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+import cmk.gui.views
+from cmk.gui.plugins.views.utils import sorter_registry, SorterEntry
+
+NUM_ROWS = 20000
+
+
+def _service_rows():
+    rnd = random.Random(4711)
+    return [{
+        "site": "site%d" % rnd.randrange(5),
+        "host_name": "host%d" % rnd.randrange(1000),
+        "service_description": rnd.choice(
+            ["Check_MK", "CPU load", "Memory", "Uptime"] +
+            ["Interface %d" % number for number in range(20)] +
+            ["Filesystem /srv/%d" % number for number in range(10)]),
+        "service_state": rnd.randrange(4),
+        "service_has_been_checked": int(rnd.random() > 0.01),
+        "service_plugin_output": rnd.choice(["OK - all fine", "WARN - 81% used", "CRIT - down"]),
+        "service_last_state_change": rnd.randrange(1600000000, 1610000000),
+    } for _n in range(NUM_ROWS)]
+
+
+def _compare_pairwise(sorters):
+    # How the rows have been sorted before the sorters had keys
+    def multisort(e1, e2):
+        for entry in sorters:
+            neg = -1 if entry.negate else 1
+            c = neg * entry.sorter.cmp(e1, e2)
+            if c != 0:
+                return c
+        return 0
+
+    return multisort
+
+
+def test_sort_data():
+    rows = _service_rows()
+
+    measurements = []
+    for sorter_names in [
+        [("svcstate", True)],
+        [("svcstate", True), ("site_host", False), ("svcdescr", False)],
+        [("svcoutput", False), ("stateage", True)],
+    ]:
+        sorters = [
+            SorterEntry(sorter_registry[name](), negate, None) for name, negate in sorter_names
+        ]
+        expected = sorted(rows, key=functools.cmp_to_key(_compare_pairwise(sorters)))
+        sorted_rows = list(rows)
+        cmk.gui.views._sort_data(None, sorted_rows, sorters)  # type: ignore[arg-type]
+        assert sorted_rows == expected
+
+        title = ", ".join(("-" if negate else "") + name for name, negate in sorter_names)
+        measurements.append(
+            measure("%s: cmp pairwise" % title,
+                    lambda sorters=sorters: sorted(
+                        rows, key=functools.cmp_to_key(_compare_pairwise(sorters))),
+                    rounds=3,
+                    items=NUM_ROWS))
+        measurements.append(
+            measure("%s: keys" % title,
+                    lambda sorters=sorters: cmk.gui.views._sort_data(  # type: ignore[arg-type]
+                        None, list(rows), sorters),
+                    rounds=3,
+                    items=NUM_ROWS))
+
+    report("views._sort_data(): %d service rows (items: rows)" % NUM_ROWS, measurements)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+import copy
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+import cmk.gui.plugins.views.utils
+import cmk.gui.views
+from cmk.gui.plugins.views.utils import transform_painter_spec
+from cmk.gui.type_defs import PainterSpec
+
+NUM_HOSTS = 20000
+JOINED_SERVICES = ["Check_MK", "CPU load", "Memory", "Uptime", "Filesystem /"]
+
+
+def _join_table():
+    # The services of the hosts, as the rows of the join query are received from Livestatus
+    return [("site%d" % (number % 3), "host%d" % number, service_description, number % 4)
+            for service_description in JOINED_SERVICES for number in range(NUM_HOSTS)]
+
+
+def test_do_table_join(monkeypatch, register_builtin_html):
+    view_spec = transform_painter_spec(
+        copy.deepcopy(cmk.gui.views.multisite_builtin_views["allhosts"]))
+    for service_description in JOINED_SERVICES:
+        view_spec["painters"].append(PainterSpec("service_state", None, None,
+                                                 service_description))
+    view = cmk.gui.views.View("allhosts", view_spec, {})
+
+    join_table = _join_table()
+
+    def query_livestatus_iter(query, only_sites, limit, auth_domain):
+        columns = query.split("\n")[1].split(": ")[1].split()
+        for site, host_name, service_description, state in join_table:
+            row = {
+                "host_name": host_name,
+                "service_description": service_description,
+                "service_has_been_checked": 1,
+                "service_state": state,
+                "host_has_been_checked": 1,
+                "host_state": 0,
+            }
+            yield [site] + [row.get(column) for column in columns]
+
+    monkeypatch.setattr(cmk.gui.plugins.views.utils, "query_livestatus_iter",
+                        query_livestatus_iter)
+
+    def master_rows():
+        return [{
+            "site": "site%d" % (number % 3),
+            "host_name": "host%d" % number
+        } for number in range(NUM_HOSTS)]
+
+    def join_grouped_scan():
+        # How the rows have been joined before: all rows of the join table are fetched with
+        # the implicit state columns and grouped by scanning them in order
+        rows = master_rows()
+        columns = [
+            "host_name", "service_description", "service_has_been_checked", "service_state",
+            "host_has_been_checked", "host_state"
+        ]
+        slave_rows = [
+            dict(zip(["site"] + columns, row)) for row in query_livestatus_iter(
+                "GET services\nColumns: %s\n" % " ".join(columns), None, None, "read")
+        ]
+        slave_rows.sort(key=lambda row: (row["site"], row["host_name"]))
+        per_master_entry = {}
+        current_key = None
+        current_entry: dict = {}
+        for row in slave_rows:
+            master_key = (row["site"], row["host_name"])
+            if master_key != current_key:
+                current_key = master_key
+                current_entry = {}
+                per_master_entry[current_key] = current_entry
+            current_entry[row["service_description"]] = row
+        for row in rows:
+            row["JOIN"] = per_master_entry.get((row["site"], row["host_name"]), {})
+        return rows
+
+    def join_hashed():
+        rows = master_rows()
+        cmk.gui.views._do_table_join(view, rows, "", view.sorters)
+        return rows
+
+    def states(rows):
+        return [{name: join_row["service_state"] for name, join_row in row["JOIN"].items()}
+                for row in rows]
+
+    assert states(join_hashed()) == states(join_grouped_scan())
+
+    report(
+        "views._do_table_join(): %d hosts, %d joined services (items: joined rows)" %
+        (NUM_HOSTS, len(JOINED_SERVICES)), [
+            measure("fetch all, grouped scan",
+                    join_grouped_scan,
+                    rounds=3,
+                    items=len(join_table)),
+            measure("hash join while received", join_hashed, rounds=3, items=len(join_table)),
+        ])
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+import heapq
+import random
+from itertools import islice
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+import cmk.gui.views
+from cmk.gui.plugins.views.utils import sorter_registry, SorterEntry
+
+NUM_ROWS = 20000
+PAGE_SIZE = 100
+COLUMNS = [
+    "site",
+    "host_name",
+    "service_description",
+    "service_state",
+    "service_has_been_checked",
+    "service_plugin_output",
+    "service_last_state_change",
+]
+
+
+def _livestatus_rows():
+    # The rows as they are received from Livestatus
+    rnd = random.Random(4711)
+    for _n in range(NUM_ROWS):
+        yield [
+            "site%d" % rnd.randrange(5),
+            "host%d" % rnd.randrange(1000),
+            rnd.choice(["Check_MK", "CPU load", "Memory", "Uptime"] +
+                       ["Interface %d" % number for number in range(20)]),
+            rnd.randrange(4),
+            int(rnd.random() > 0.01),
+            rnd.choice(["OK - all fine", "WARN - 81% used", "CRIT - down"]),
+            rnd.randrange(1600000000, 1610000000),
+        ]
+
+
+def _received_rows():
+    return (dict(zip(COLUMNS, row)) for row in _livestatus_rows())
+
+
+def test_view_page():
+    sorters = [
+        SorterEntry(sorter_registry["svcstate"](), True, None),
+        SorterEntry(sorter_registry["site_host"](), False, None),
+    ]
+
+    def all_rows_sorted():
+        # How a page has been shown before: fetch and sort all rows
+        rows = list(_received_rows())
+        cmk.gui.views._sort_data(None, rows, sorters)  # type: ignore[arg-type]
+        return rows[:PAGE_SIZE]
+
+    def page_rows_sorted():
+        return heapq.nsmallest(PAGE_SIZE + 1,
+                               _received_rows(),
+                               key=cmk.gui.views._combined_sort_key(sorters))[:PAGE_SIZE]
+
+    def all_rows():
+        return list(_received_rows())[:PAGE_SIZE]
+
+    def page_rows():
+        return list(islice(_received_rows(), PAGE_SIZE + 1))[:PAGE_SIZE]
+
+    assert page_rows_sorted() == all_rows_sorted()
+    assert page_rows() == all_rows()
+
+    report(
+        "First page of %d rows of a view with %d rows (items: rows)" % (PAGE_SIZE, NUM_ROWS), [
+            measure("-svcstate, site_host: all rows", all_rows_sorted, rounds=3, items=NUM_ROWS),
+            measure("-svcstate, site_host: top rows", page_rows_sorted, rounds=3, items=NUM_ROWS),
+            measure("unsorted: all rows", all_rows, rounds=3, items=NUM_ROWS),
+            measure("unsorted: page rows", page_rows, rounds=3, items=NUM_ROWS),
+        ])
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import pytest  # type: ignore[import]
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+import cmk.utils.paths
+from cmk.utils.log import logger
+from cmk.utils.type_defs import SectionName
+
+import cmk.snmplib.snmp_cache as snmp_cache
+import cmk.snmplib.snmp_table as snmp_table
+from cmk.snmplib.type_defs import (
+    BackendOIDSpec,
+    BackendSNMPTree,
+    SNMPBackendEnum,
+    SNMPHostConfig,
+    SpecialColumn,
+)
+
+from cmk.core_helpers.snmp_backend import StoredWalkSNMPBackend
+
+IF_TABLE = ".1.3.6.1.2.1.2.2.1"
+IF_COLUMNS = ["2", "3", "5", "8", "10", "16"]
+
+TREE = BackendSNMPTree(
+    base=IF_TABLE,
+    oids=[
+        BackendOIDSpec(SpecialColumn.END, "string", False),
+        *(BackendOIDSpec(column, "string", False) for column in IF_COLUMNS),
+        BackendOIDSpec("6", "binary", False),
+    ],
+)
+
+
+def _write_walk(path, num_interfaces: int) -> None:
+    # The interface indexes are sparse (as on stacked switches), and every
+    # seventh interface lacks its counters, so gaps have to be filled.
+    indexes = [1000 * (index // 48) + index % 48 for index in range(num_interfaces)]
+    with path.open("w") as walk:
+        for column in IF_COLUMNS:
+            for index in indexes:
+                if column in ("10", "16") and index % 7 == 0:
+                    continue
+                walk.write("%s.%s.%d %d\n" % (IF_TABLE, column, index, index * int(column)))
+        for index in indexes:
+            walk.write('%s.6.%d "00 1C 7F %02X %02X %02X "\n' %
+                       (IF_TABLE, index, index >> 16 & 0xff, index >> 8 & 0xff, index & 0xff))
+
+
+@pytest.fixture(name="backend", params=[2000, 20000], ids=["2k-interfaces", "20k-interfaces"])
+def fixture_backend(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(cmk.utils.paths, "snmpwalks_dir", str(tmp_path))
+    _write_walk(tmp_path / "walkhost", request.param)
+    snmp_cache.cleanup_host_caches()
+    yield StoredWalkSNMPBackend(
+        SNMPHostConfig(
+            is_ipv6_primary=False,
+            hostname="walkhost",
+            ipaddress="127.0.0.1",
+            credentials="public",
+            port=161,
+            is_bulkwalk_host=True,
+            is_snmpv2or3_without_bulkwalk_host=False,
+            bulk_walk_size_of=10,
+            timing={},
+            oid_range_limits=[],
+            snmpv3_contexts=[],
+            character_encoding=None,
+            is_usewalk_host=True,
+            snmp_backend=SNMPBackendEnum.CLASSIC,
+        ),
+        logger,
+    )
+    snmp_cache.cleanup_host_caches()
+
+
+def test_get_snmp_table(backend):
+    def get_snmp_table(walk_cache):
+        return snmp_table.get_snmp_table(
+            section_name=SectionName("interfaces"),
+            tree=TREE,
+            walk_cache=walk_cache,
+            backend=backend,
+        )
+
+    filled_walk_cache: dict = {}
+    table = get_snmp_table(filled_walk_cache)
+    num_cells = len(table) * len(TREE.oids)
+
+    report(
+        "SNMP table of %d rows from a stored walk" % len(table),
+        [
+            measure("stored walk + table", lambda: get_snmp_table({}), items=num_cells),
+            measure(
+                "table from walk cache",
+                lambda: get_snmp_table(filled_walk_cache),
+                items=num_cells,
+            ),
+        ],
+    )
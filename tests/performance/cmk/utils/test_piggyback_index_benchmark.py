@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+import cmk.utils.paths
+import cmk.utils.piggyback as piggyback
+
+NUM_PIGGYBACKED_HOSTS = 10000
+NUM_SOURCES = 3
+
+
+def test_piggyback_index(monkeypatch, tmp_path):
+    monkeypatch.setattr(cmk.utils.paths, "piggyback_dir", tmp_path / "piggyback")
+    monkeypatch.setattr(cmk.utils.paths, "piggyback_source_dir", tmp_path / "piggyback_sources")
+    monkeypatch.setattr(cmk.utils.paths, "piggyback_index_dir", tmp_path / "piggyback_index")
+
+    # Like a few vSphere servers sending piggyback data for their VMs
+    for source in range(NUM_SOURCES):
+        piggyback.store_piggyback_raw_data(
+            "vcenter%d" % source, {
+                "vm%d" % number: [b"<<<check_mk>>>", b"Version: 2.0.0"]
+                for number in range(source, NUM_PIGGYBACKED_HOSTS, NUM_SOURCES)
+            })
+    time_settings: piggyback.PiggybackTimeSettings = [(None, "max_cache_age", 3600)]
+
+    def walk_folders():
+        # How all piggybacked hosts have been looked up before
+        return [(file_info.source_hostname, piggybacked_host_folder.name)
+                for piggybacked_host_folder in piggyback._get_piggybacked_host_folders()
+                for file_info in piggyback._get_piggyback_processed_file_infos(
+                    piggybacked_host_folder.name, time_settings)
+                if file_info.successfully_processed]
+
+    def use_index():
+        return list(piggyback.get_source_and_piggyback_hosts(time_settings))
+
+    assert sorted(walk_folders()) == sorted(use_index())
+    assert len(use_index()) == NUM_PIGGYBACKED_HOSTS
+
+    measurements = [
+        measure("walk the folders", walk_folders, items=NUM_PIGGYBACKED_HOSTS),
+        measure("piggyback index", use_index, items=NUM_PIGGYBACKED_HOSTS),
+        measure("cleanup (nothing to do)",
+                lambda: piggyback.cleanup_piggyback_files(time_settings),
+                items=NUM_PIGGYBACKED_HOSTS),
+    ]
+
+    report(
+        "piggyback.get_source_and_piggyback_hosts(): %d hosts, %d sources" %
+        (NUM_PIGGYBACKED_HOSTS, NUM_SOURCES), measurements)
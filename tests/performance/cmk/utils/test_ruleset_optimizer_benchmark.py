@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import pytest  # type: ignore[import]
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+from cmk.utils.labels import LabelManager
+from cmk.utils.rulesets.ruleset_matcher import RulesetMatcher
+
+NUM_FOLDERS = 100
+HOSTS_PER_FOLDER = 200
+NUM_RULES = 2000
+
+TAG_GROUPS = {
+    "criticality": ["prod", "critical", "test", "offline"],
+    "networking": ["lan", "wan", "dmz"],
+    "agent": ["cmk-agent", "no-agent", "special-agents"],
+    "snmp_ds": ["no-snmp", "snmp-v2"],
+}
+
+
+def _host_tags(number):
+    return {
+        group_id: tags[(number // (index + 1)) % len(tags)]
+        for index, (group_id, tags) in enumerate(TAG_GROUPS.items())
+    }
+
+
+@pytest.fixture(name="hosts")
+def fixture_hosts():
+    host_tag_lists = {}
+    host_paths = {}
+    for folder in range(NUM_FOLDERS):
+        path = "/wato/dc%d/folder%d/" % (folder % 10, folder)
+        for index in range(HOSTS_PER_FOLDER):
+            hostname = "host-%d-%d" % (folder, index)
+            host_tag_lists[hostname] = set(_host_tags(index).values()) | {path}
+            host_paths[hostname] = path
+    return host_tag_lists, host_paths
+
+
+def _condition(number):
+    group_ids = list(TAG_GROUPS)
+    group_id = group_ids[number % len(group_ids)]
+    tags = TAG_GROUPS[group_id]
+    tag_spec = [
+        tags[number % len(tags)],
+        {
+            "$ne": tags[number % len(tags)]
+        },
+        {
+            "$or": tags[:2]
+        },
+        {
+            "$nor": tags[1:]
+        },
+    ][number % 4]
+    condition = {
+        "host_folder": ["/", "/wato/dc%d/" % (number % 10),
+                        "/wato/dc%d/folder%d/" % (number % 10, number % NUM_FOLDERS)][number % 3],
+        "host_tags": {
+            group_id: tag_spec,
+            "snmp_ds": "no-snmp",
+        },
+    }
+    if number % 5 == 0:
+        condition["host_name"] = ["host-%d-%d" % (number % NUM_FOLDERS, index)
+                                  for index in range(number % 7)]
+    elif number % 5 == 1:
+        condition["host_name"] = [{"$regex": "host-%d-" % (number % NUM_FOLDERS)}]
+    return condition
+
+
+def test_ruleset_optimizer(hosts):
+    host_tag_lists, host_paths = hosts
+    ruleset = [{
+        "condition": _condition(number),
+        "value": number,
+    } for number in range(NUM_RULES)]
+    counts = []
+
+    def match_rules():
+        ruleset_matcher = RulesetMatcher(
+            tag_to_group_map={},
+            host_tag_lists=host_tag_lists,
+            host_paths=host_paths,
+            labels=LabelManager({}, [], [], lambda hostname, service_description: {}),
+            all_configured_hosts=set(host_tag_lists),
+            clusters_of={},
+            nodes_of={},
+        )
+        host_ruleset = ruleset_matcher.ruleset_optimizer.get_host_ruleset(ruleset,
+                                                                          with_foreign_hosts=False,
+                                                                          is_binary=False)
+        counts.append(sum(len(values) for values in host_ruleset.values()))
+
+    measurements = [
+        measure("%d rules, %d hosts" % (NUM_RULES, len(host_tag_lists)),
+                match_rules,
+                rounds=3,
+                items=NUM_RULES)
+    ]
+    assert len(set(counts)) == 1
+
+    text = report("RulesetOptimizer.get_host_ruleset()", measurements)
+    print("%-40s %10d" % ("matching host/rule pairs", counts[0]))
+    assert text
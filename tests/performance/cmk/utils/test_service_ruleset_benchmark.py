@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+
+from cmk.utils.labels import LabelManager
+from cmk.utils.rulesets.ruleset_matcher import RulesetMatcher, RulesetMatchObject
+
+NUM_HOSTS = 500
+NUM_RULES = 400
+SERVICES = (["CPU load", "CPU utilization", "Memory", "Uptime", "Check_MK"] +
+            ["Interface %d" % number for number in range(30)] +
+            ["Filesystem /srv/volume%d" % number for number in range(20)])
+
+
+def _rule(number):
+    condition = {
+        "service_description": [
+            ["CPU"],
+            [{
+                "$regex": "Interface %d$" % (number % 30)
+            }],
+            ["Filesystem /srv/volume%d" % (number % 20), "Memory"],
+            {
+                "$nor": ["Check_MK"]
+            },
+        ][number % 4],
+    }
+    if number % 3 == 0:
+        condition["host_name"] = [
+            "host%d" % (index % NUM_HOSTS) for index in range(number, number + 50)
+        ]
+    return {"condition": condition, "value": number}
+
+
+def test_service_ruleset():
+    host_tag_lists = {"host%d" % number: set() for number in range(NUM_HOSTS)}
+    ruleset = [_rule(number) for number in range(NUM_RULES)]
+    counts = []
+
+    def match_services():
+        ruleset_matcher = RulesetMatcher(
+            tag_to_group_map={},
+            host_tag_lists=host_tag_lists,
+            host_paths={},
+            labels=LabelManager({}, [], [], lambda hostname, service_description: {}),
+            all_configured_hosts=set(host_tag_lists),
+            clusters_of={},
+            nodes_of={},
+        )
+        count = 0
+        for hostname in host_tag_lists:
+            for service_description in SERVICES:
+                count += len(
+                    list(
+                        ruleset_matcher.get_service_ruleset_values(
+                            RulesetMatchObject(hostname, service_description),
+                            ruleset,
+                            is_binary=False)))
+        counts.append(count)
+
+    measurements = [
+        measure("%d rules, %d hosts" % (NUM_RULES, NUM_HOSTS),
+                match_services,
+                rounds=3,
+                items=NUM_HOSTS * len(SERVICES))
+    ]
+    assert len(set(counts)) == 1
+
+    text = report("RulesetMatcher.get_service_ruleset_values()", measurements)
+    print("%-40s %10d" % ("matching service/rule pairs", counts[0]))
+    assert text
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=redefined-outer-name
+
+import multiprocessing
+import threading
+
+import pytest  # type: ignore[import]
+
+from testlib.benchmark import measure, report  # type: ignore[import]
+from testlib.livestatus_server import FakeLivestatusServer  # type: ignore[import]
+
+import livestatus
+
+NUM_SITES = 8
+NUM_ROWS = 5000
+QUERY = "GET services\nColumns: host_name description state plugin_output perf_data\n"
+
+
+def _rows(site_index):
+    return [[
+        "host%d-%d" % (site_index, index // 20),
+        "Interface %d" % index,
+        index % 4,
+        "OK - [eth%d] (up) MAC: 00:1c:7f:%02x:%02x, speed 1 GBit/s" %
+        (index, index >> 8 & 0xff, index & 0xff),
+        "in=%d.5;;;0;125000000 out=%d;;;0;125000000" % (index * 11, index * 7),
+    ] for index in range(NUM_ROWS)]
+
+
+def _serve(servers, started):
+    for server in servers:
+        server.__enter__()
+    started.set()
+    threading.Event().wait()
+
+
+@pytest.fixture(name="servers", params=[0.0, 0.05], ids=["no-latency", "50ms-latency"])
+def fixture_servers(request):
+    servers = [FakeLivestatusServer(_rows(index), delay=request.param) for index in range(NUM_SITES)]
+    # Parsing the python3 format does not release the GIL, so the servers must
+    # not run in the process of the client to simulate the latency correctly.
+    started = multiprocessing.Event()
+    process = multiprocessing.Process(target=_serve, args=(servers, started), daemon=True)
+    process.start()
+    started.wait()
+    yield servers
+    process.terminate()
+    for server in servers:
+        server.__exit__(None, None, None)
+
+
+def test_multisite_query(servers):
+    sites = {
+        livestatus.SiteId("site%d" % index): {
+            "socket": server.url
+        } for index, server in enumerate(servers)
+    }
+    num_rows = NUM_SITES * NUM_ROWS
+
+    measurements = []
+    for output_format in ["python3", "json"]:
+        live = livestatus.MultiSiteConnection(sites)
+        live.set_output_format(output_format)
+        assert len(live.query(QUERY)) == num_rows
+        measurements.append(
+            measure("parallel, %s" % output_format,
+                    lambda live=live: live.query(QUERY),
+                    rounds=3,
+                    items=num_rows))
+
+    live = livestatus.MultiSiteConnection(sites)
+    live.parallelize = False
+    measurements.append(measure("sequential, python3", lambda: live.query(QUERY), rounds=3,
+                                items=num_rows))
+
+    report(
+        "Livestatus query of %d sites with %d rows each, %.0f ms latency" %
+        (NUM_SITES, NUM_ROWS, servers[0].delay * 1000),
+        measurements,
+    )
+
+
+def test_multisite_query_iter(servers):
+    live = livestatus.MultiSiteConnection({
+        livestatus.SiteId("site%d" % index): {
+            "socket": server.url
+        } for index, server in enumerate(servers)
+    })
+    num_rows = NUM_SITES * NUM_ROWS
+
+    measurements = []
+    for output_format in ["python3", "json"]:
+        live.set_output_format(output_format)
+        measurements.append(
+            measure("query, %s" % output_format,
+                    lambda: len(live.query(QUERY)),
+                    rounds=3,
+                    items=num_rows))
+        measurements.append(
+            measure("query_iter, %s" % output_format,
+                    lambda: sum(1 for _row in live.query_iter(QUERY)),
+                    rounds=3,
+                    items=num_rows))
+
+    report(
+        "Livestatus rows of %d sites with %d rows each, counted without keeping them" %
+        (NUM_SITES, NUM_ROWS),
+        measurements,
+    )
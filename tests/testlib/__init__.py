@@ -94,6 +94,8 @@ def fake_version_and_paths():
     monkeypatch.setattr("cmk.utils.paths.tmp_dir", os.path.join(tmp_dir, "tmp/check_mk"))
     monkeypatch.setattr("cmk.utils.paths.counters_dir",
                         os.path.join(tmp_dir, "tmp/check_mk/counters"))
+    monkeypatch.setattr("cmk.utils.paths.counters_journal_dir",
+                        os.path.join(tmp_dir, "tmp/check_mk/counters_journal"))
     monkeypatch.setattr("cmk.utils.paths.tcp_cache_dir", os.path.join(tmp_dir,
                                                                       "tmp/check_mk/cache"))
     monkeypatch.setattr("cmk.utils.paths.data_source_cache_dir",
@@ -117,6 +119,8 @@ def fake_version_and_paths():
     monkeypatch.setattr("cmk.utils.paths.piggyback_dir", Path(tmp_dir) / "var/check_mk/piggyback")
     monkeypatch.setattr("cmk.utils.paths.piggyback_source_dir",
                         Path(tmp_dir) / "var/check_mk/piggyback_sources")
+    monkeypatch.setattr("cmk.utils.paths.piggyback_index_dir",
+                        Path(tmp_dir) / "var/check_mk/piggyback_index")
     monkeypatch.setattr("cmk.utils.paths.htpasswd_file", os.path.join(tmp_dir, "etc/htpasswd"))
 
     monkeypatch.setattr("cmk.utils.paths.local_share_dir", Path(tmp_dir, "local/share/check_mk"))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Helpers for the performance tests
+
+Run the tests with `make -C tests test-performance` to see the reports.
+
+"""
+
+import time
+import tracemalloc
+from typing import Any, Callable, Iterable, NamedTuple, Optional
+
+
+class Measurement(NamedTuple):
+    name: str
+    rounds: int
+    best: float
+    mean: float
+    peak_memory: int
+    items: Optional[int] = None
+
+    @property
+    def throughput(self) -> Optional[float]:
+        """Items per second for the best round"""
+        if self.items is None or self.best <= 0:
+            return None
+        return self.items / self.best
+
+
+def measure(
+    name: str,
+    func: Callable[[], Any],
+    *,
+    rounds: int = 5,
+    items: Optional[int] = None,
+) -> Measurement:
+    """Time `func` over `rounds` rounds and measure its peak memory
+
+    The peak memory is measured in an additional round, so that the
+    overhead of `tracemalloc` does not distort the timings.
+
+    """
+    timings = []
+    for _round in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _current, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Measurement(
+        name=name,
+        rounds=rounds,
+        best=min(timings),
+        mean=sum(timings) / len(timings),
+        peak_memory=peak_memory,
+        items=items,
+    )
+
+
+def report(title: str, measurements: Iterable[Measurement]) -> str:
+    lines = [
+        title,
+        "%-40s %10s %10s %14s %12s" % ("", "best [ms]", "mean [ms]", "items/s", "peak [KiB]"),
+    ]
+    for m in measurements:
+        throughput = m.throughput
+        lines.append("%-40s %10.2f %10.2f %14s %12d" % (
+            m.name,
+            1000 * m.best,
+            1000 * m.mean,
+            "-" if throughput is None else "%.0f" % throughput,
+            m.peak_memory // 1024,
+        ))
+    text = "\n".join(lines)
+    print("\n" + text)
+    return text
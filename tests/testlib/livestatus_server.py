@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""A livestatus server speaking just enough of the protocol for testing the client"""
+
+import json
+import socket
+import threading
+import time
+from typing import Any, List, Optional
+
+
+class FakeLivestatusServer:
+    """Answers every query with the same rows, after an optional delay
+
+    Use it as a context manager, the socket URL for the client is in `url`.
+    The queries received are collected in `queries`.
+
+    """
+    def __init__(self, rows: List[List[Any]], delay: float = 0.0, code: int = 200) -> None:
+        self.rows = rows
+        self.delay = delay
+        self.code = code
+        self.queries: List[str] = []
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(("127.0.0.1", 0))
+        self.url = "tcp:127.0.0.1:%d" % self._socket.getsockname()[1]
+        # Like livestatus, put every row on a line of its own
+        self._responses = {
+            "python3": ("[" + ",\n".join(repr(row) for row in rows) + "]\n").encode("utf-8"),
+            "json": ("[" + ",\n".join(json.dumps(row) for row in rows) + "]\n").encode("utf-8"),
+        }
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "FakeLivestatusServer":
+        self._socket.listen(16)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._socket.close()
+
+    def _serve(self) -> None:
+        while True:
+            try:
+                connection, _address = self._socket.accept()
+            except OSError:
+                return  # closed
+            threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+
+    def _handle(self, connection: socket.socket) -> None:
+        with connection:
+            buf = b""
+            while True:
+                while b"\n\n" not in buf:
+                    try:
+                        data = connection.recv(4096)
+                    except ConnectionResetError:
+                        return  # the client does not want the rest of the response
+                    if not data:
+                        return
+                    buf += data
+                raw_query, buf = buf.split(b"\n\n", 1)
+                query = raw_query.decode("utf-8")
+                self.queries.append(query)
+
+                output_format = "python3"
+                for line in query.splitlines():
+                    if line.startswith("OutputFormat: "):
+                        output_format = line.split(": ", 1)[1]
+
+                time.sleep(self.delay)
+                body = self._responses[output_format] if self.code == 200 else b"error\n"
+                connection.sendall(b"%03d %11d\n" % (self.code, len(body)) + body)
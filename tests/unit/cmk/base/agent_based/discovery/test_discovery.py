@@ -659,6 +659,32 @@ def test_do_discovery(monkeypatch):
     assert store.load() == _expected_host_labels
 
 
+@pytest.mark.usefixtures("load_all_agent_based_plugins")
+def test_do_discovery_concurrently(monkeypatch):
+    ts = Scenario()
+    for host_name in ["test-host1", "test-host2", "test-host3"]:
+        ts.add_host(host_name, ipaddress="127.0.0.1")
+    ts.fake_standard_linux_agent_output("test-host1", "test-host2", "test-host3")
+    ts.apply(monkeypatch)
+    monkeypatch.setattr(config, "discovery_concurrency", 2)
+
+    with cmk_debug_enabled():
+        discovery.do_discovery(
+            arg_hostnames={"test-host1", "test-host2", "test-host3"},
+            selected_sections=NO_SELECTION,
+            run_plugin_names=EVERYTHING,
+            arg_only_new=False,
+        )
+
+    for host_name in ["test-host1", "test-host2", "test-host3"]:
+        services = autochecks.parse_autochecks_file(host_name, config.service_description)
+        found = {(s.check_plugin_name, s.item): s.service_labels.to_dict() for s in services}
+        assert found == _expected_services
+
+        store = DiscoveredHostLabelsStore(host_name)
+        assert store.load() == _expected_host_labels
+
+
 RealHostScenario = NamedTuple("RealHostScenario", [
     ("hostname", str),
     ("ipaddress", str),
@@ -8,6 +8,7 @@
 
 # No stub file
 import pytest  # type: ignore[import]
+import cmk.utils.paths
 import cmk.base.core
 import cmk.base.config
 import cmk.base.agent_based.checking as checking
@@ -209,3 +210,74 @@ def _check_timeperiod(timeperiod, active_timeperiods):
 ])
 def test_aggregate_result(subresults, aggregated_results):
     assert checking._aggregate_results(subresults) == aggregated_results
+
+
+@pytest.fixture(name="submit_to_core")
+def fixture_submit_to_core(monkeypatch):
+    submit_to_core = checking._submit_to_core
+    monkeypatch.setattr(submit_to_core, "keepalive", None)
+    monkeypatch.setattr(submit_to_core, "_nagios_command_pipe", None)
+    monkeypatch.setattr(submit_to_core, "_checkresult_file_fd", None)
+    monkeypatch.setattr(submit_to_core, "_checkresult_file_path", None)
+    monkeypatch.setattr(cmk.base.config, "monitoring_core", "nagios")
+    return submit_to_core
+
+
+def _submit_results(submit_to_core, num_services):
+    for number in range(num_services):
+        submit_to_core.check_result(
+            host_name="heute",
+            service_name="Service %d" % number,
+            result=(0, "Everything is OK", []),
+            cache_info=None,
+            dry_run=False,
+            show_perfdata=False,
+        )
+
+
+def test_submit_via_check_result_file(monkeypatch, tmp_path, submit_to_core):
+    monkeypatch.setattr(cmk.utils.paths, "check_result_path", str(tmp_path))
+    monkeypatch.setattr(cmk.base.config, "check_submission", "file")
+
+    _submit_results(submit_to_core, 3)
+    check_result_file, = tmp_path.iterdir()
+    assert check_result_file.read_bytes() == b""
+
+    submit_to_core.finalize()
+    records = check_result_file.read_text().split("\n\n")
+    assert [r.split("\n")[1] for r in records if r] == [
+        "service_description=Service 0",
+        "service_description=Service 1",
+        "service_description=Service 2",
+    ]
+    assert check_result_file.with_name(check_result_file.name + ".ok").exists()
+
+
+def test_submit_via_command_pipe(monkeypatch, tmp_path, submit_to_core):
+    command_pipe_path = tmp_path / "nagios.cmd"
+    command_pipe_path.touch()
+    monkeypatch.setattr(cmk.utils.paths, "nagios_command_pipe_path", str(command_pipe_path))
+    monkeypatch.setattr(cmk.base.config, "check_submission", "pipe")
+
+    _submit_results(submit_to_core, 100)
+    assert command_pipe_path.read_bytes() == b""
+
+    submit_to_core.finalize()
+    commands = command_pipe_path.read_text().splitlines()
+    assert len(commands) == 100
+    assert commands[42].endswith("] PROCESS_SERVICE_CHECK_RESULT;heute;Service 42;0;"
+                                 "Everything is OK")
+
+
+def test_command_pipe_chunks(submit_to_core, monkeypatch):
+    monkeypatch.setattr(submit_to_core.select, "PIPE_BUF", 10)
+    assert list(submit_to_core._command_pipe_chunks([b"aaaa", b"bbbb", b"cc", b"dddd"])) == [
+        b"aaaabbbbcc",
+        b"dddd",
+    ]
+    # Too large messages are written on their own
+    assert list(submit_to_core._command_pipe_chunks([b"aaaa", b"b" * 12, b"cc"])) == [
+        b"aaaa",
+        b"b" * 12,
+        b"cc",
+    ]
@@ -2159,6 +2159,83 @@ class TestPackedConfigStore:
         }
 
 
+@pytest.fixture(name="snapshot_main_mk")
+def fixture_snapshot_main_mk():
+    main_mk = Path(cmk.utils.paths.main_config_file)
+    main_mk.parent.mkdir(parents=True, exist_ok=True)
+    main_mk.write_text(u"""
+all_hosts += ['host1']
+ipaddresses.update({'host1': '127.0.0.1'})
+""")
+    yield main_mk
+    main_mk.unlink()
+    config.ConfigSnapshotStore().remove()
+    config._initialize_config()
+
+
+def _fail_loading_config(*args, **kwargs):
+    raise AssertionError("configuration files should not be evaluated")
+
+
+def test_load_config_snapshot(snapshot_main_mk, monkeypatch):
+    config.load()
+    config.save_config_snapshot()
+    assert config.ConfigSnapshotStore().path.exists()
+
+    monkeypatch.setattr(config, "_load_config", _fail_loading_config)
+    config.load()
+    assert config.all_hosts == ["host1"]
+    assert config.ipaddresses == {"host1": "127.0.0.1"}
+    assert config.get_config_cache().all_configured_hosts() == {"host1"}
+
+    # Nothing new to store
+    config.ConfigSnapshotStore().remove()
+    config.save_config_snapshot()
+    assert not config.ConfigSnapshotStore().path.exists()
+
+
+def test_config_snapshot_changed_file(snapshot_main_mk):
+    config.load()
+    config.save_config_snapshot()
+
+    snapshot_main_mk.write_text(u"all_hosts += ['host2']\n")
+    config.load()
+    assert config.all_hosts == ["host2"]
+    assert config.ipaddresses == {}
+
+
+def test_config_snapshot_other_options(snapshot_main_mk, monkeypatch):
+    config.load(with_conf_d=False)
+    config.save_config_snapshot()
+
+    load_config = config._load_config
+    calls = []
+    monkeypatch.setattr(config, "_load_config",
+                        lambda *args: calls.append(args) or load_config(*args))
+    config.load()
+    assert calls == [(True, False)]
+
+
+def test_config_snapshot_disabled(snapshot_main_mk):
+    config.load()
+    config.save_config_snapshot()
+
+    with snapshot_main_mk.open("a") as f:
+        f.write(u"config_snapshot = False\n")
+    config.load()
+    config.save_config_snapshot()
+    assert not config.ConfigSnapshotStore().path.exists()
+
+
+def test_config_snapshot_broken(snapshot_main_mk):
+    store = config.ConfigSnapshotStore()
+    store.path.parent.mkdir(parents=True, exist_ok=True)
+    store.path.write_bytes(b"broken")
+    assert store.read() is None
+    config.load()
+    assert config.all_hosts == ["host1"]
+
+
 @pytest.mark.parametrize("params, expected_result", [
     (
         None,
@@ -333,3 +333,35 @@ def test_new_helper_config_serial():
     assert core_config.new_helper_config_serial() == ConfigSerial("1")
     assert core_config.new_helper_config_serial() == ConfigSerial("2")
     assert core_config.new_helper_config_serial() == ConfigSerial("3")
+
+
+def test_host_config_fingerprints(monkeypatch):
+    def fingerprints(rules, ipaddresses):
+        ts = Scenario()
+        for hostname in ["host1", "host2", "host3"]:
+            ts.add_host(hostname)
+        ts.set_option("ipaddresses", ipaddresses)
+        ts.set_ruleset("extra_host_conf", {
+            "alias": [{
+                "condition": {
+                    "host_name": hostnames
+                },
+                "value": alias
+            } for alias, hostnames in rules]
+        })
+        config_cache = ts.apply(monkeypatch)
+        return core_config.host_config_fingerprints(config_cache, ["host1", "host2", "host3"])
+
+    # The first configuration converts some of the default rulesets to the current format
+    fingerprints([], {})
+    original = fingerprints([("alias1", ["host1"])], {"host1": "127.0.0.1"})
+    assert len(set(original.values())) == 3
+    assert fingerprints([("alias1", ["host1"])], {"host1": "127.0.0.1"}) == original
+
+    changed = fingerprints([("alias1", ["host1"]), ("alias2", ["host2"])], {"host1": "127.0.0.1"})
+    assert [hostname for hostname in original if changed[hostname] != original[hostname]
+           ] == ["host2"]
+
+    changed = fingerprints([("alias1", ["host1"])], {"host1": "127.0.0.2"})
+    assert [hostname for hostname in original if changed[hostname] != original[hostname]
+           ] == ["host1"]
@@ -316,3 +316,97 @@ def test_compile_delayed_host_check(monkeypatch, serial):
     assert compiled_file.resolve() != source_file
     with compiled_file.open("rb") as f:
         assert f.read().startswith(importlib.util.MAGIC_NUMBER)
+
+
+def test_create_config_sharded(monkeypatch):
+    ts = Scenario()
+    for number in range(20):
+        ts.add_host("host%02d" % number)
+    ts.set_option("ipaddresses", {"host%02d" % number: "127.0.0.1" for number in range(20)})
+    ts.set_ruleset("host_check_commands", [
+        (("service", "Uptime"), [], ["host03", "host07", "host15"]),
+    ])
+    ts.apply(monkeypatch)
+
+    def create_config(processes):
+        monkeypatch.setattr(config, "core_config_incremental", False)
+        monkeypatch.setattr(config, "core_config_processes", processes)
+        outfile = io.StringIO()
+        core_nagios.create_config(outfile, hostnames=None)
+        return outfile.getvalue()
+
+    monkeypatch.setattr(core_nagios, "_MIN_HOSTS_PER_SHARD", 2)
+    sequential = create_config(1)
+    assert "check-mk-host-custom-3" in sequential
+    assert create_config(3) == sequential
+
+
+def test_create_config_incremental(monkeypatch, tmp_path):
+    monkeypatch.setattr(paths, "var_dir", str(tmp_path))
+
+    def create_config(ipaddresses):
+        ts = Scenario()
+        for hostname in ipaddresses:
+            ts.add_host(hostname)
+        ts.set_option("ipaddresses", ipaddresses)
+        ts.set_ruleset("host_check_commands", [
+            (("service", "Uptime"), [], ["host03", "host07"]),
+        ])
+        ts.apply(monkeypatch)
+
+        created_hosts = []
+        create_host = core_nagios._create_nagios_config_host
+
+        def create_host_counting(cfg, config_cache, hostname):
+            created_hosts.append(hostname)
+            create_host(cfg, config_cache, hostname)
+
+        monkeypatch.setattr(core_nagios, "_create_nagios_config_host", create_host_counting)
+        outfile = io.StringIO()
+        core_nagios.create_config(outfile, hostnames=None)
+        monkeypatch.setattr(core_nagios, "_create_nagios_config_host", create_host)
+        return outfile.getvalue(), created_hosts
+
+    ipaddresses = {"host%02d" % number: "127.0.0.1" for number in range(10)}
+    monkeypatch.setattr(config, "core_config_incremental", False)
+    full, _created_hosts = create_config(ipaddresses)
+
+    monkeypatch.setattr(config, "core_config_incremental", True)
+    assert create_config(ipaddresses) == (full, sorted(ipaddresses))
+    assert create_config(ipaddresses) == (full, [])
+
+    ipaddresses["host05"] = "127.0.0.2"
+    monkeypatch.setattr(config, "core_config_incremental", False)
+    full, _created_hosts = create_config(ipaddresses)
+    assert "127.0.0.2" in full
+
+    monkeypatch.setattr(config, "core_config_incremental", True)
+    assert create_config(ipaddresses) == (full, ["host05"])
+
+    del ipaddresses["host09"]
+    assert create_config(ipaddresses)[1] == []
+    assert sorted(path.name for path in core_nagios.HostObjectsStore().path.iterdir()) == sorted(
+        ipaddresses)
+
+
+def test_create_config_incremental_removed_parent(monkeypatch, tmp_path):
+    monkeypatch.setattr(paths, "var_dir", str(tmp_path))
+
+    def create_config(hostnames, incremental):
+        ts = Scenario()
+        for hostname in hostnames:
+            ts.add_host(hostname)
+        ts.set_option("ipaddresses", {hostname: "127.0.0.1" for hostname in hostnames})
+        ts.set_ruleset("parents", [("parent1", ["child1"])])
+        ts.apply(monkeypatch)
+
+        monkeypatch.setattr(config, "core_config_incremental", incremental)
+        outfile = io.StringIO()
+        core_nagios.create_config(outfile, hostnames=None)
+        return outfile.getvalue()
+
+    assert "parent1" in create_config(["child1", "parent1"], incremental=True)
+
+    full = create_config(["child1"], incremental=False)
+    assert "parent1" not in full
+    assert create_config(["child1"], incremental=True) == full
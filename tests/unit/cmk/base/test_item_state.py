@@ -5,6 +5,9 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 # pylint: disable=protected-access
+
+import os
+
 import pytest  # type: ignore[import]
 
 from cmk.utils import store
@@ -137,6 +140,141 @@ class Test_StaticValueStore:
         assert list(svs.items()) == list(expected_values.items())
 
 
+class Test_JournalValueStore:
+    @pytest.fixture(name="journal_store")
+    def fixture_journal_store(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(item_state._JournalValueStore, "STORAGE_PATH", tmp_path / "journal")
+        monkeypatch.setattr(item_state._JournalValueStore, "STANDARD_STORAGE_PATH",
+                            tmp_path / "standard")
+        return lambda: item_state._JournalValueStore("test-host", lambda msg: None)
+
+    def test_mapping_features(self, journal_store):
+        jvs = journal_store()
+        jvs.load()
+        assert jvs.get(("check_no", None, "moo")) is None
+        with pytest.raises(KeyError):
+            _ = jvs[("check_no", None, "moo")]
+        assert list(jvs) == []
+        assert len(jvs) == 0
+
+    def test_store_and_reload(self, journal_store):
+        writer = journal_store()
+        writer.load()
+        writer.store(removed=set(), updated={("check1", None, "key"): (1.5, 23)})
+        writer.store(
+            removed={("check1", None, "key")},
+            updated={("check2", "item", "key"): {"a": [1, 2]}},
+        )
+        assert dict(writer) == {("check2", "item", "key"): {"a": [1, 2]}}
+
+        reader = journal_store()
+        reader.load()
+        assert dict(reader) == dict(writer)
+
+    def test_only_changes_are_appended(self, journal_store):
+        jvs = journal_store()
+        jvs.load()
+        jvs.store(removed=set(), updated={("check1", None, "key"): 23})
+        size = jvs._path.stat().st_size
+
+        jvs.store(removed={("check_no", None, "key")}, updated={("check1", None, "key"): 23})
+        assert jvs._path.stat().st_size == size
+
+        jvs.store(removed=set(), updated={("check1", None, "key"): 42})
+        assert jvs._path.stat().st_size > size
+
+    def test_sees_changes_of_other_writers(self, journal_store):
+        one, other = journal_store(), journal_store()
+        one.load()
+        other.load()
+        one.store(removed=set(), updated={("check1", None, "key"): 1})
+        other.store(removed=set(), updated={("check2", None, "key"): 2})
+        one.load()
+        assert dict(one) == {("check1", None, "key"): 1, ("check2", None, "key"): 2}
+
+    def test_compaction(self, journal_store, monkeypatch):
+        monkeypatch.setattr(item_state._JournalValueStore, "COMPACTION_MIN_SIZE", 0)
+        jvs = journal_store()
+        jvs.load()
+        for value in range(20):
+            jvs.store(removed=set(), updated={("check1", None, "key"): value})
+        assert jvs._path.stat().st_size <= 2 * item_state._JournalValueStore.COMPACTION_FACTOR * (
+            len(jvs._frame(((), dict(jvs)))))
+
+        reader = journal_store()
+        reader.load()
+        assert dict(reader) == {("check1", None, "key"): 19}
+
+    def test_truncated_frame_is_ignored(self, journal_store):
+        jvs = journal_store()
+        jvs.load()
+        jvs.store(removed=set(), updated={("check1", None, "key"): 1})
+        jvs.store(removed=set(), updated={("check1", None, "key"): 2})
+        raw = jvs._path.read_bytes()
+        jvs._path.write_bytes(raw[:-1])
+
+        reader = journal_store()
+        reader.load()
+        assert dict(reader) == {("check1", None, "key"): 1}
+
+        reader.store(removed=set(), updated={("check2", None, "key"): 3})
+        reader = journal_store()
+        reader.load()
+        assert dict(reader) == {("check1", None, "key"): 1, ("check2", None, "key"): 3}
+
+    def test_migration_from_standard_format(self, journal_store):
+        jvs = journal_store()
+        standard_path = jvs._standard_path
+        standard_path.parent.mkdir()
+        store.save_object_to_file(standard_path, {("check1", None, "key"): 23})
+
+        jvs.load()
+        assert dict(jvs) == {("check1", None, "key"): 23}
+
+        jvs.store(removed=set(), updated={("check2", None, "key"): 42})
+        assert not standard_path.exists()
+
+        reader = journal_store()
+        reader.load()
+        assert dict(reader) == {("check1", None, "key"): 23, ("check2", None, "key"): 42}
+
+    def test_newer_standard_format_wins_over_journal(self, journal_store):
+        jvs = journal_store()
+        jvs.load()
+        jvs.store(removed=set(), updated={("check1", None, "key"): 1})
+
+        # The "standard" format has been used in the meantime
+        standard_path = jvs._standard_path
+        standard_path.parent.mkdir()
+        store.save_object_to_file(standard_path, {("check1", None, "key"): 2})
+        journal_mtime = jvs._path.stat().st_mtime
+        os.utime(standard_path, (journal_mtime + 1, journal_mtime + 1))
+
+        reader = journal_store()
+        reader.load()
+        assert dict(reader) == {("check1", None, "key"): 2}
+
+        reader.store(removed=set(), updated={("check2", None, "key"): 3})
+        assert not standard_path.exists()
+
+        reader = journal_store()
+        reader.load()
+        assert dict(reader) == {("check1", None, "key"): 2, ("check2", None, "key"): 3}
+
+
+def test_set_storage_format():
+    try:
+        item_state.set_storage_format("journal")
+        cis = item_state.CachedItemStates()
+        cis.load("hostname")
+        assert isinstance(cis._static_values, item_state._JournalValueStore)
+
+        with pytest.raises(MKGeneralException):
+            item_state.set_storage_format("gibberish")
+    finally:
+        item_state.set_storage_format("standard")
+
+
 def test_item_state_prefix_required():
     cis = item_state.CachedItemStates()
     # we *must* set a prefix:
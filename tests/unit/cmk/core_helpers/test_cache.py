@@ -5,10 +5,12 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import copy
+import os
+import time
 
 from cmk.utils.type_defs import AgentRawDataSection, SectionName
 
-from cmk.core_helpers.cache import PersistedSections
+from cmk.core_helpers.cache import MemoryCache, PersistedSections, set_memory_cache_size
 
 
 class MockStore:
@@ -43,3 +45,91 @@ class TestPersistedSections:
         assert persisted_sections == {  # type: ignore[comparison-overlap]
             section_a: (cached_at, fetch_interval, content_a)
         }
+
+
+class TestMemoryCache:
+    @staticmethod
+    def _write(path, content):
+        path.write_bytes(content)
+        return path.stat()
+
+    def test_get_and_put(self, tmp_path):
+        cache = MemoryCache(max_size=1024, max_age=60)
+        path = tmp_path / "host"
+        stat_result = self._write(path, b"data")
+        assert cache.get(path, stat_result) is None
+
+        cache.put(path, stat_result, b"data")
+        assert cache.get(path, stat_result) == b"data"
+        assert len(cache) == 1
+        assert cache.size == 4
+
+    def test_changed_file(self, tmp_path):
+        cache = MemoryCache(max_size=1024, max_age=60)
+        path = tmp_path / "host"
+        cache.put(path, self._write(path, b"data"), b"data")
+
+        # Like the cache file written by another process
+        new_path = tmp_path / "new"
+        new_path.write_bytes(b"other data")
+        new_path.replace(path)
+
+        assert cache.get(path, path.stat()) is None
+        assert len(cache) == 0
+        assert cache.size == 0
+
+    def test_evict_least_recently_used(self, tmp_path):
+        cache = MemoryCache(max_size=10, max_age=60)
+        paths = [tmp_path / name for name in "abc"]
+        stat_results = [self._write(path, b"12345") for path in paths]
+
+        cache.put(paths[0], stat_results[0], b"12345")
+        cache.put(paths[1], stat_results[1], b"12345")
+        assert cache.get(paths[0], stat_results[0]) == b"12345"
+        cache.put(paths[2], stat_results[2], b"12345")
+
+        assert cache.get(paths[0], stat_results[0]) == b"12345"
+        assert cache.get(paths[1], stat_results[1]) is None
+        assert cache.get(paths[2], stat_results[2]) == b"12345"
+        assert cache.size == 10
+
+    def test_too_large(self, tmp_path):
+        cache = MemoryCache(max_size=3, max_age=60)
+        path = tmp_path / "host"
+        stat_result = self._write(path, b"data")
+        cache.put(path, stat_result, b"data")
+        assert cache.get(path, stat_result) is None
+        assert cache.size == 0
+
+    def test_evict_old(self, tmp_path):
+        cache = MemoryCache(max_size=1024, max_age=60)
+        old_path = tmp_path / "old"
+        self._write(old_path, b"data")
+        os.utime(old_path, (time.time() - 120, time.time() - 120))
+        old_stat_result = old_path.stat()
+        cache.put(old_path, old_stat_result, b"data")
+
+        path = tmp_path / "host"
+        stat_result = self._write(path, b"data")
+        cache.put(path, stat_result, b"data")
+
+        assert cache.get(old_path, old_stat_result) is None
+        assert cache.get(path, stat_result) == b"data"
+
+    def test_expired_when_used(self, monkeypatch, tmp_path):
+        cache = MemoryCache(max_size=1024, max_age=60)
+        path = tmp_path / "host"
+        stat_result = self._write(path, b"data")
+        cache.put(path, stat_result, b"data")
+
+        monkeypatch.setattr(time, "time", lambda: stat_result.st_mtime + 120)
+        assert cache.get(path, stat_result) is None
+        assert len(cache) == 0
+
+
+def test_set_memory_cache_size(monkeypatch):
+    assert MemoryCache.instance.max_size == 0
+
+    monkeypatch.setattr(MemoryCache, "instance", MemoryCache.instance)
+    set_memory_cache_size(1024)
+    assert MemoryCache.instance.max_size == 1024
@@ -31,6 +31,7 @@ from cmk.snmplib.type_defs import (
 
 from cmk.core_helpers import FetcherType, snmp
 from cmk.core_helpers.agent import DefaultAgentFileCache, NoCache
+from cmk.core_helpers.cache import MemoryCache
 from cmk.core_helpers.ipmi import IPMIFetcher
 from cmk.core_helpers.piggyback import PiggybackFetcher
 from cmk.core_helpers.program import ProgramFetcher
@@ -173,6 +174,38 @@ class TestDefaultFileCache_and_SNMPFileCache:
         assert file_cache.path.exists()
         assert file_cache.read() is None
 
+    @pytest.fixture
+    def memory_cache(self, monkeypatch):
+        memory_cache = MemoryCache(max_size=1024 * 1024, max_age=999)
+        monkeypatch.setattr(MemoryCache, "instance", memory_cache)
+        return memory_cache
+
+    def test_write_keeps_no_content_in_memory(self, memory_cache, file_cache, raw_data):
+        file_cache.write(raw_data)
+        assert len(memory_cache) == 0
+
+        assert file_cache.read() == raw_data
+        assert len(memory_cache) == 1
+
+    def test_read_written_by_other_process(self, memory_cache, file_cache, raw_data):
+        file_cache.write(raw_data)
+        assert file_cache.read() == raw_data
+
+        if isinstance(file_cache, DefaultAgentFileCache):
+            other_raw_data = AgentRawData(b"<<<check_mk>>>\nother agent raw data")
+        else:
+            table: SNMPTable = []
+            other_raw_data = {SectionName("Y"): table}
+        # The cache files are replaced, never changed in place
+        other_path = file_cache.path.with_name("other")
+        cache_file = file_cache._to_cache_file(other_raw_data)  # pylint: disable=protected-access
+        other_path.write_bytes(cache_file)
+        other_path.replace(file_cache.path)
+        assert file_cache.read() == other_raw_data
+
+        file_cache.path.unlink()
+        assert file_cache.read() is None
+
 
 class TestIPMIFetcher:
     @pytest.fixture
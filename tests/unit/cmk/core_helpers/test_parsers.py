@@ -179,6 +179,39 @@ class TestAgentParser:
             ],
         }
 
+    @pytest.mark.usefixtures("scenario")
+    def test_section_options_and_odd_lines(self, parser):
+        raw_data = AgentRawData(b"\r\n".join((
+            b"<<<a_section:sep(59)>>>",
+            b"first;line",
+            b"",
+            b" \t",
+            b"not a <<<header>>>",
+            b"<<<not a header",
+            b"<<<nostrip_section:nostrip():sep(59)>>>",
+            b" first;line ",
+            b"<<<latin_section:encoding(latin-1)>>>",
+            b"\xe4 line",
+            b"<<<utf8_section>>>",
+            b"\xc3\xa4 line",
+            b"\xe4 line",
+        )))
+
+        ahs = parser.parse(raw_data, selection=NO_SELECTION)
+
+        assert ahs.sections == {
+            SectionName("a_section"): [
+                ["first", "line"],
+                ["not a <<<header>>>"],
+                ["<<<not a header"],
+            ],
+            SectionName("nostrip_section"): [[" first", "line "]],
+            SectionName("latin_section"): [["\xe4", "line"]],
+            SectionName("utf8_section"): [["\xe4", "line"], ["\xe4", "line"]],
+        }
+        assert ahs.cache_info == {}
+        assert ahs.piggybacked_raw_data == {}
+
     @pytest.mark.usefixtures("scenario")
     def test_persist_option_populates_cache_info(self, parser, mocker, monkeypatch):
         time_time = 1000
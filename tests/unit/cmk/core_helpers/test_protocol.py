@@ -36,6 +36,7 @@ from cmk.core_helpers.protocol import (
     FetcherMessage,
     ResultStats,
     PayloadType,
+    SNMPBinaryResultMessage,
     SNMPResultMessage,
 )
 
@@ -211,6 +212,73 @@ class TestSNMPResultMessage:
         assert SNMPResultMessage.from_bytes(bytes(snmp_payload)) == snmp_payload
 
 
+class TestSNMPBinaryResultMessage:
+    @pytest.fixture(params=[
+        {},
+        {
+            SectionName("empty"): []
+        },
+        {
+            SectionName("no_rows"): [[]]
+        },
+        {
+            SectionName("no_columns"): [[[], []]]
+        },
+        {
+            SectionName("if64"): [
+                [
+                    ["1", "eth0", [0, 28, 127, 1, 2, 3]],
+                    ["2", "ethernet 1/2/3 äöü", [255, 0, 0, 0, 0, 0]],
+                    ["3", "", []],
+                ],
+                [["1", "up"], ["2", "down"], ["3", "testing"]],
+            ],
+            SectionName("hr_mem"): [[["with\0nul", ""], ["\0", "x"]]],
+        },
+    ])
+    def value(self, request):
+        return request.param
+
+    def test_serialization(self, value):
+        message = SNMPBinaryResultMessage(value)
+        other = SNMPBinaryResultMessage.from_bytes(bytes(message))
+        assert other == message
+        assert other.result().ok == value
+
+    @pytest.mark.parametrize("value", [
+        {
+            SectionName("no_tables"): [["1", "2"]]
+        },
+        {
+            SectionName("ints"): [[[6500337, 11822045]]]
+        },
+        {
+            SectionName("no_bytes"): [[[[6500337, 11822045]]]]
+        },
+        {
+            SectionName("ragged"): [[["1", "2"], ["3"]]]
+        },
+        {
+            SectionName("mixed"): [[["1"], [[2]]]]
+        },
+    ])
+    def test_serialization_failure(self, value):
+        with pytest.raises(ValueError):
+            _payload = SNMPBinaryResultMessage(value).payload
+
+    def test_unsupported_version(self):
+        payload = SNMPBinaryResultMessage._serialize({SectionName("empty"): []})
+        with pytest.raises(ValueError):
+            SNMPBinaryResultMessage._deserialize(b"\xff" + payload[1:])
+
+    def test_truncated_payload(self):
+        payload = SNMPBinaryResultMessage._serialize(
+            {SectionName("name"): [[["1", [2]], ["3", [4]]]]})
+        for end in range(len(payload)):
+            with pytest.raises(ValueError):
+                SNMPBinaryResultMessage._deserialize(payload[:end])
+
+
 class TestErrorResultMessage:
     @pytest.fixture(params=[
         # Our special exceptions.
@@ -475,6 +543,16 @@ class TestFetcherMessage:
         assert message.header.payload_type is PayloadType.SNMP
         assert message.raw_data == raw_data
 
+    def test_from_raw_data_snmp_binary(self, duration):
+        table: SNMPTable = [["6500337", [0, 28, 127, 1, 2, 3]]]
+        raw_data: result.Result[SNMPRawData, Exception] = result.OK(
+            {SectionName("snmp_uptime"): [table]})
+        message = FetcherMessage.from_raw_data(raw_data, duration, FetcherType.SNMP)
+        assert message.header.fetcher_type is FetcherType.SNMP
+        assert message.header.payload_type is PayloadType.SNMP_BINARY
+        assert message.raw_data == raw_data
+        assert FetcherMessage.from_bytes(bytes(message)).raw_data == raw_data
+
     def test_from_raw_data_exception(self, duration):
         error: result.Result[AgentRawData, Exception] = result.Error(ValueError("zomg!"))
         message = FetcherMessage.from_raw_data(error, duration, FetcherType.TCP)
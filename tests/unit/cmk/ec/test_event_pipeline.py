@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+import logging
+import os
+import pathlib  # pylint: disable=import-error
+import select
+import socket
+import time
+
+import pytest  # type: ignore[import]
+
+import cmk.utils.paths
+import cmk.ec.export as ec
+import cmk.ec.history
+import cmk.ec.main
+from cmk.ec.pipeline import Pipeline
+
+
+def _init_noop():
+    pass
+
+
+def _sleep_and_return(batch):
+    delay, value = batch
+    time.sleep(delay)
+    return value
+
+
+def test_pipeline_keeps_order():
+    pipeline = Pipeline(4, _init_noop, ())
+    try:
+        for value in range(8):
+            # The later batches are finished first
+            pipeline.submit(_sleep_and_return, ((8 - value) * 0.02, value), "context%d" % value)
+        assert len(pipeline) == 8
+        assert list(pipeline.results(max_pending=0)) == [
+            ("context%d" % value, value) for value in range(8)
+        ]
+        assert len(pipeline) == 0
+    finally:
+        pipeline.close()
+
+
+def test_pipeline_results_do_not_wait():
+    pipeline = Pipeline(1, _init_noop, ())
+    try:
+        pipeline.submit(_sleep_and_return, (0.0, "fast"))
+        pipeline.submit(_sleep_and_return, (1.0, "slow"))
+        assert select.select([pipeline], [], [], 10)[0]
+        assert [value for _context, value in pipeline.results()] == ["fast"]
+        assert [value for _context, value in pipeline.results(max_pending=0)] == ["slow"]
+    finally:
+        pipeline.close()
+
+
+def _has_file(batch):
+    fd, inode = batch
+    try:
+        return os.fstat(fd).st_ino == inode
+    except OSError:
+        return False
+
+
+def test_pipeline_workers_do_not_inherit_file_descriptors():
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        pipeline = Pipeline(1, _init_noop, ())
+        try:
+            pipeline.submit(_has_file, (listener.fileno(), os.fstat(listener.fileno()).st_ino))
+            assert [value for _context, value in pipeline.results(max_pending=0)] == [False]
+        finally:
+            pipeline.close()
+
+
+RULES = [
+    {
+        "id": "drop_debug",
+        "match": "DEBUG",
+        "drop": True,
+    },
+    {
+        "id": "skip_noise",
+        "match": "noise",
+        "drop": "skip_pack",
+    },
+    {
+        "id": "interface",
+        "match": "Interface (.*) down",
+        "match_ok": "Interface (.*) up",
+    },
+    {
+        "id": "login",
+        "match": "failed login",
+        "count": {
+            "count": 3,
+            "period": 3600,
+            "algorithm": "interval",
+            "count_ack": False,
+            "separate_host": True,
+            "separate_application": True,
+            "separate_match_groups": True,
+        },
+    },
+    {
+        "id": "office_hours",
+        "match": "backup",
+        "match_timeperiod": "office_hours",
+    },
+    {
+        "id": "night",
+        "match": "time adjusted",
+        "match_timeperiod": "night",
+    },
+    {
+        "id": "not_cron",
+        "match_application": "CRON",
+        "invert_matching": True,
+    },
+]
+
+LINES = [
+    "<78>May 26 13:45:01 %s %s[%d]: %s" % (host, application, pid, text)
+    for pid, (host, application, text) in enumerate([
+        ("switch1", "kernel", "Interface eth0 down"),
+        ("switch1", "kernel", "DEBUG: nothing to see"),
+        ("switch2", "kernel", "Interface eth1 down"),
+        ("web", "sshd", "failed login for root"),
+        ("web", "sshd", "failed login for admin"),
+        ("switch1", "kernel", "Interface eth0 up"),
+        ("web", "sshd", "failed login for guest"),
+        ("db", "CRON", "backup started"),
+        ("db", "CRON", "noise from backup"),
+        ("db", "CRON", "all quiet"),
+        ("db", "ntpd", "time adjusted"),
+        ("switch2", "kernel", "Interface eth1 up"),
+    ] * 3)
+]
+
+
+@pytest.fixture(name="event_server")
+def fixture_event_server(monkeypatch):
+    settings = ec.settings('1.2.3i45', pathlib.Path(cmk.utils.paths.omd_root),
+                           pathlib.Path(cmk.utils.paths.default_config_dir), ['mkeventd'])
+    config = ec.default_config()
+    perfcounters = cmk.ec.main.Perfcounters(logging.getLogger("cmk.mkeventd.lock.perfcounters"))
+    history = cmk.ec.history.History(settings, config, logging.getLogger("cmk.mkeventd"),
+                                     cmk.ec.main.StatusTableEvents.columns,
+                                     cmk.ec.main.StatusTableHistory.columns)
+    event_status = cmk.ec.main.EventStatus(settings, config, perfcounters, history,
+                                           logging.getLogger("cmk.mkeventd.EventStatus"))
+    event_server = cmk.ec.main.EventServer(
+        logging.getLogger("cmk.mkeventd.EventServer"), settings, config,
+        cmk.ec.main.default_slave_status_master(), perfcounters,
+        cmk.ec.main.ECLock(logging.getLogger("cmk.mkeventd.configuration")), history,
+        event_status, cmk.ec.main.StatusTableEvents.columns, False)
+
+    rules = [dict(rule, state=-1, sl={"value": 0, "precedence": "message"}) for rule in RULES]
+    event_server.compile_rules([], [{"id": "pack", "disabled": False, "rules": rules}])
+    monkeypatch.setattr(event_server.host_config, "_update_cache_after_core_restart", lambda: True)
+    monkeypatch.setattr(event_server._rule_matcher._time_periods, "active",
+                        lambda name: name == "office_hours")
+    monkeypatch.setattr(history, "add", lambda event, what, who="", addinfo="": None)
+    return event_server
+
+
+def _process(event_server, num_workers):
+    event_server._config["event_workers"] = num_workers
+    event_server._update_pipeline()
+    try:
+        for start in range(0, len(LINES), 5):
+            event_server.process_raw_lines(("\n".join(LINES[start:start + 5]) + "\n").encode())
+    finally:
+        if event_server._pipeline is not None:
+            event_server._stop_pipeline()
+
+    return [(event["rule_id"], event["host"], event["text"], event["phase"], event.get("count"))
+            for event in event_server._event_status.events()]
+
+
+def test_pipeline_processes_like_event_server(event_server, monkeypatch):
+    expected = _process(event_server, 0)
+    assert {rule_id for rule_id, *_rest in expected} == {"login", "office_hours", "not_cron"}
+
+    event_server._event_status.flush()
+    monkeypatch.setattr(event_server, "_pipeline_batch_size", 2)
+    assert _process(event_server, 3) == expected
+
+
+def test_pipeline_restarts_with_new_rules(event_server):
+    event_server._config["event_workers"] = 2
+    event_server._update_pipeline()
+    pipeline = event_server._pipeline
+    assert pipeline is not None
+
+    event_server._update_pipeline()
+    assert event_server._pipeline is pipeline
+
+    event_server.compile_rules([], [])
+    event_server._update_pipeline()
+    assert event_server._pipeline is not pipeline
+
+    event_server._config["event_workers"] = 0
+    event_server._update_pipeline()
+    assert event_server._pipeline is None
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+import logging
+
+import pytest  # type: ignore[import]
+
+import cmk.ec.export as ec
+import cmk.ec.history
+import cmk.ec.main
+
+
+@pytest.fixture(name="settings")
+def fixture_settings(tmp_path):
+    settings = ec.settings('1.2.3i45', tmp_path, tmp_path / "etc", ['mkeventd'])
+    settings.paths.status_file.value.parent.mkdir(parents=True)
+    return settings
+
+
+@pytest.fixture(name="config")
+def fixture_config():
+    return dict(ec.default_config(), status_persistence="journal")
+
+
+def _event_status(settings, config):
+    perfcounters = cmk.ec.main.Perfcounters(logging.getLogger("cmk.mkeventd.lock.perfcounters"))
+    history = cmk.ec.history.History(settings, config, logging.getLogger("cmk.mkeventd"),
+                                     cmk.ec.main.StatusTableEvents.columns,
+                                     cmk.ec.main.StatusTableHistory.columns)
+    history.add = lambda event, what, who="", addinfo="": None
+    event_status = cmk.ec.main.EventStatus(settings, config, perfcounters, history,
+                                           logging.getLogger("cmk.mkeventd.EventStatus"))
+    event_status.load_status(None)
+    return event_status
+
+
+def _new_event(event_status, text, host="host"):
+    event_status.new_event({
+        "text": text,
+        "host": host,
+        "core_host": host,
+        "ipaddress": "",
+        "rule_id": "rule",
+        "phase": "open",
+        "count": 1,
+    })
+
+
+def _status(event_status):
+    return (event_status._next_event_id, event_status.events(), event_status.get_rule_stats())
+
+
+def test_journal_keeps_changes(settings, config):
+    event_status = _event_status(settings, config)
+    for number in range(5):
+        _new_event(event_status, "event %d" % number)
+    event_status.count_rule_match("rule")
+    event_status.save_status()
+
+    event_status.event(2)["count"] += 1
+    event_status.delete_event(4, "user")
+    _new_event(event_status, "event 5", host="other")
+    event_status.events()[0]["phase"] = "ack"
+    event_status.count_rule_match("rule")
+    event_status.save_status()
+
+    # Only the changes have been written
+    assert not settings.paths.status_file.value.exists()
+    record = list(event_status._journal.records())[-1]
+    assert [event["id"] for event in record["events"]] == [1, 2, 6]
+    assert record["removed"] == [4]
+    assert record["rule_stats"] == {"rule": 2}
+    assert event_status.save_duration > 0
+
+    loaded = _event_status(settings, config)
+    assert _status(loaded) == _status(event_status)
+    assert [event["id"] for event in loaded.events()] == [1, 2, 3, 5, 6]
+    assert loaded.event(2)["count"] == 2
+    assert loaded.num_existing_events_by_host == {("host", "host"): 4, ("other", "other"): 1}
+    # The journal has been compacted into the snapshot
+    assert loaded.journal_size == 0
+
+
+def test_journal_compaction(settings, config, monkeypatch):
+    monkeypatch.setattr(cmk.ec.main, "_MIN_JOURNAL_COMPACTION_SIZE", 0)
+    event_status = _event_status(settings, config)
+    _new_event(event_status, "event 0")
+    event_status.save_status()
+    event_status._wait_for_compaction()
+    assert settings.paths.status_file.value.exists()
+    assert event_status.journal_size == 0
+
+    for number in range(1, 4):
+        _new_event(event_status, "event %d" % number)
+        event_status.save_status()
+    event_status._wait_for_compaction()
+
+    assert _status(_event_status(settings, config)) == _status(event_status)
+
+
+def test_journal_interrupted_compaction(settings, config):
+    event_status = _event_status(settings, config)
+    _new_event(event_status, "event 1")
+    event_status.save_status()
+    _new_event(event_status, "event 2")
+    event_status.save_status()
+
+    # Crash right after the journal has been moved out of the way
+    event_status._journal.start_compaction()
+    _new_event(event_status, "event 3")
+    event_status.save_status()
+
+    assert _status(_event_status(settings, config)) == _status(event_status)
+
+
+def test_journal_failed_compaction_is_retried(settings, config, monkeypatch):
+    monkeypatch.setattr(cmk.ec.main, "_MIN_JOURNAL_COMPACTION_SIZE", 0)
+    event_status = _event_status(settings, config)
+    _new_event(event_status, "event 1")
+    event_status.save_status()
+    event_status._wait_for_compaction()
+
+    write_status = event_status._write_status
+
+    def disk_full(status):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(event_status, "_write_status", disk_full)
+    _new_event(event_status, "event 2")
+    event_status.save_status()
+    event_status._wait_for_compaction()
+    assert event_status.journal_size > 0
+
+    monkeypatch.setattr(event_status, "_write_status", write_status)
+    _new_event(event_status, "event 3")
+    event_status.save_status()
+    event_status._wait_for_compaction()
+    assert event_status.journal_size == 0
+    assert _status(_event_status(settings, config)) == _status(event_status)
+
+
+def test_journal_keeps_changes_of_nested_values(settings, config):
+    event_status = _event_status(settings, config)
+    _new_event(event_status, "event 1")
+    event_status.event(1)["contact_groups"] = ["admins"]
+    event_status.save_status()
+
+    event_status.event(1)["contact_groups"].append("operators")
+    event_status.save_status()
+
+    assert _event_status(settings, config).event(1)["contact_groups"] == ["admins", "operators"]
+
+
+def test_journal_broken_record(settings, config):
+    event_status = _event_status(settings, config)
+    _new_event(event_status, "event 1")
+    event_status.save_status()
+    _new_event(event_status, "event 2")
+    event_status.save_status()
+    _new_event(event_status, "event 3")
+    event_status.save_status()
+
+    # Crash while writing the last record
+    path = settings.paths.status_journal_file.value
+    path.write_bytes(path.read_bytes()[:-20])
+
+    loaded = _event_status(settings, config)
+    assert [event["text"] for event in loaded.events()] == ["event 1", "event 2"]
+
+
+def test_switch_to_snapshot(settings, config):
+    event_status = _event_status(settings, config)
+    _new_event(event_status, "event 1")
+    event_status.save_status()
+    _new_event(event_status, "event 2")
+    event_status.save_status()
+    assert event_status.journal_size > 0
+
+    config["status_persistence"] = "snapshot"
+    _new_event(event_status, "event 3")
+    event_status.save_status()
+    assert event_status.journal_size == 0
+    assert _status(_event_status(settings, config)) == _status(event_status)
+
+    # And back again
+    config["status_persistence"] = "journal"
+    event_status.delete_event(1, "user")
+    event_status.save_status()
+    _new_event(event_status, "event 4")
+    event_status.save_status()
+    assert event_status.journal_size > 0
+    assert _status(_event_status(settings, config)) == _status(event_status)
+
+
+def test_status_columns(settings, config):
+    assert [name for name, _default in cmk.ec.main.EventServer.status_columns()[-2:]] == [
+        "status_save_duration",
+        "status_journal_size",
+    ]
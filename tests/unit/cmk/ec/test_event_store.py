@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+
+import pytest  # type: ignore[import]
+
+import cmk.ec.export as ec
+import cmk.ec.history
+import cmk.ec.main
+from cmk.ec.event_store import EventStore
+
+
+def _event(event_id, rule_id="rule", host="host", core_host="host"):
+    return {
+        "id": event_id,
+        "rule_id": rule_id,
+        "host": host,
+        "core_host": core_host,
+        "ipaddress": "",
+        "application": "app",
+        "phase": "open",
+    }
+
+
+def _ids(events):
+    return [event["id"] for event in events]
+
+
+def test_event_store_keeps_order():
+    store = EventStore([_event(3), _event(1, rule_id="other"), _event(2)])
+    assert _ids(store) == [3, 1, 2]
+    assert _ids(store.of_rule("rule")) == [3, 2]
+    assert store.oldest()["id"] == 3
+    assert store.oldest_of_rule("other")["id"] == 1
+    assert store.oldest_of_host(("host", "host"))["id"] == 3
+
+    # Replacing an event keeps its position in all indexes
+    store.add(_event(3, rule_id="other"))
+    assert _ids(store) == [3, 1, 2]
+    assert _ids(store.of_rule("rule")) == [2]
+    assert _ids(store.of_rule("other")) == [3, 1]
+    assert store.oldest_of_host(("host", "host"))["id"] == 3
+
+    store.add(_event(3, rule_id="other"))
+    assert _ids(store) == [3, 1, 2]
+    assert _ids(store.of_rule("other")) == [3, 1]
+    assert store.oldest_of_host(("host", "host"))["id"] == 3
+
+    store.add(_event(1, host="other", core_host="other"))
+    assert _ids(store.of_rule("rule")) == [1, 2]
+    assert _ids(store.of_rule("other")) == [3]
+    assert store.oldest_of_host(("host", "host"))["id"] == 3
+    assert store.oldest_of_host(("other", "other"))["id"] == 1
+
+
+def test_event_store_remove():
+    events = [_event(1), _event(2, host="other", core_host="other.example.com"), _event(3)]
+    store = EventStore(events)
+    assert store.remove(events[0])
+    assert not store.remove(events[0])
+    assert not store.remove(_event(2))  # not the stored event
+    assert store.get(1) is None
+    assert store.get(2) is events[1]
+    assert len(store) == 2
+    assert store.oldest()["id"] == 2
+    assert store.oldest_of_host(("other", "other")) is None
+    assert store.oldest_of_host(("other", "other.example.com"))["id"] == 2
+
+    assert store.remove(events[1])
+    assert store.remove(events[2])
+    assert store.oldest() is None
+    assert store.oldest_of_rule("rule") is None
+    assert store.of_rule("rule") == []
+
+
+def test_event_store_uses_keys_of_added_event():
+    event = _event(1)
+    store = EventStore([event])
+    event["host"] = "renamed"  # e.g. when counting events of different hosts
+    assert store.oldest_of_host(("host", "host")) is event
+    assert store.remove(event)
+    assert store.oldest_of_host(("host", "host")) is None
+
+
+@pytest.fixture(name="event_status")
+def fixture_event_status(tmp_path):
+    settings = ec.settings('1.2.3i45', tmp_path, tmp_path / "etc", ['mkeventd'])
+    config = ec.default_config()
+    perfcounters = cmk.ec.main.Perfcounters(logging.getLogger("cmk.mkeventd.lock.perfcounters"))
+    history = cmk.ec.history.History(settings, config, logging.getLogger("cmk.mkeventd"),
+                                     cmk.ec.main.StatusTableEvents.columns,
+                                     cmk.ec.main.StatusTableHistory.columns)
+    history.add = lambda event, what, who="", addinfo="": None
+    return cmk.ec.main.EventStatus(settings, config, perfcounters, history,
+                                   logging.getLogger("cmk.mkeventd.EventStatus"))
+
+
+@pytest.mark.parametrize("ty, expected", [
+    ("overall", [2, 3, 4, 5]),
+    ("by_rule", [1, 2, 4, 5]),
+    ("by_host", [1, 3, 4, 5]),
+])
+def test_remove_oldest_event(event_status, ty, expected):
+    for event in [
+            _event(0),
+            _event(0, host="other", core_host="other"),
+            _event(0, rule_id="other", host="other", core_host="other"),
+            _event(0, host="other", core_host="other"),
+            _event(0, rule_id="other"),
+    ]:
+        event_status.new_event(event)
+
+    event_status.remove_oldest_event(ty, _event(0, rule_id="other", host="other",
+                                                core_host="other"))
+    assert _ids(event_status.events()) == expected
+    assert event_status.num_existing_events == 4
+    assert sum(event_status.num_existing_events_by_rule.values()) == 4
+    assert sum(event_status.num_existing_events_by_host.values()) == 4
+
+
+def test_delete_event(event_status):
+    for _nr in range(3):
+        event_status.new_event(_event(0))
+    event_status.delete_event(2, "user")
+    assert _ids(event_status.events()) == [1, 3]
+    assert event_status.event(2) is None
+    assert event_status.event(3)["id"] == 3
+    with pytest.raises(cmk.ec.main.MKClientError):
+        event_status.delete_event(2, "user")
+
+
+def test_load_status_of_previous_version(event_status):
+    events = [_event(1), _event(2, rule_id="other")]
+    del events[1]["ipaddress"]
+    event_status.settings.paths.status_file.value.parent.mkdir(parents=True)
+    event_status.settings.paths.status_file.value.write_text(
+        repr({
+            "next_event_id": 3,
+            "events": events,
+            "rule_stats": {},
+        }))
+    event_status.load_status(None)
+    assert _ids(event_status.events()) == [1, 2]
+    assert _ids(event_status.events_of_rule("other")) == [2]
+    assert event_status.event(2)["ipaddress"] == ""
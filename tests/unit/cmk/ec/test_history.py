@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import logging
+
+import pytest  # type: ignore[import]
+
+import cmk.ec.export as ec
+import cmk.ec.history
+import cmk.ec.main
+from cmk.ec.query import QueryGET
+
+logger = logging.getLogger("cmk.mkeventd")
+
+COLUMN_NAMES = [name for name, _default in cmk.ec.main.StatusTableHistory.columns]
+
+
+class FakeStatusServer:
+    def __init__(self, history):
+        self._table = cmk.ec.main.StatusTableHistory(logger, history)
+
+    def table(self, name):
+        assert name == "history"
+        return self._table
+
+
+def _make_history(tmp_path, archive_mode):
+    settings = ec.settings('1.2.3i45', tmp_path, tmp_path / "etc", ['mkeventd'])
+    config = ec.default_config()
+    config["archive_mode"] = archive_mode
+    return cmk.ec.history.History(settings, config, logger, cmk.ec.main.StatusTableEvents.columns,
+                                  cmk.ec.main.StatusTableHistory.columns)
+
+
+def _query(history, *headers):
+    query = QueryGET(FakeStatusServer(history), ["GET history"] + list(headers), logger)
+    return list(history.get(query))
+
+
+def _event(event_id, host, rule_id="rule", **kwargs):
+    event = {
+        "id": event_id,
+        "host": host,
+        "rule_id": rule_id,
+        "text": "Event %d on %s" % (event_id, host),
+        "match_groups": ("a", "b"),
+        "contact_groups": None,
+        "host_in_downtime": True,
+    }
+    event.update(kwargs)
+    return event
+
+
+@pytest.fixture(name="history", params=["file", "sqlite"])
+def fixture_history(tmp_path, request):
+    history = _make_history(tmp_path, request.param)
+    for event_id in range(1, 11):
+        history.add(_event(event_id, "host%d" % (event_id % 3), rule_id="rule%d" % (event_id % 2)),
+                    "NEW")
+    return history
+
+
+def _event_ids(entries):
+    return sorted(entry[COLUMN_NAMES.index("event_id")] for entry in entries)
+
+
+@pytest.mark.parametrize("headers, expected_ids", [
+    ([], list(range(1, 11))),
+    (["Filter: event_host = host1"], [1, 4, 7, 10]),
+    (["Filter: event_host = host1", "Filter: event_rule_id = rule0"], [4, 10]),
+    (["Filter: event_id >= 8"], [8, 9, 10]),
+    (["Filter: event_host ~~ HOST2"], [2, 5, 8]),
+    (["Filter: event_host in host0 HOST2"], [2, 3, 5, 6, 8, 9]),
+    (["Filter: event_text ~ on host0$"], [3, 6, 9]),
+    (["Filter: history_what = DELETE"], []),
+])
+def test_history_get(history, headers, expected_ids):
+    assert _event_ids(_query(history, *headers)) == expected_ids
+
+
+def test_history_values(history):
+    entry, = _query(history, "Filter: event_id = 3")
+    values = dict(zip(COLUMN_NAMES, entry))
+    assert isinstance(values["history_time"], float)
+    assert values["history_what"] == "NEW"
+    assert values["event_host"] == "host0"
+    assert values["event_match_groups"] == ("a", "b")
+    assert values["event_contact_groups"] is None
+    assert values["event_host_in_downtime"] is True
+    assert values["event_priority"] == 5
+
+
+def test_history_limit(history):
+    # Like the other backends, one entry more than the limit tells the
+    # client that there are more entries.
+    assert len(_query(history, "Limit: 3")) == 4
+
+
+def test_history_flush(history):
+    history.flush()
+    assert _query(history) == []
+
+
+def test_sqlite_history_newest_first(tmp_path):
+    history = _make_history(tmp_path, "sqlite")
+    for event_id in range(1, 4):
+        history.add(_event(event_id, "host"), "NEW")
+    entries = _query(history)
+    assert [entry[0] for entry in entries] == [3, 2, 1]  # history_line
+
+
+def test_sqlite_history_imports_files(tmp_path):
+    file_history = _make_history(tmp_path, "file")
+    for event_id in range(1, 6):
+        file_history.add(_event(event_id, "host%d" % event_id), "NEW")
+
+    sqlite_history = _make_history(tmp_path, "sqlite")
+    assert _event_ids(_query(sqlite_history)) == [1, 2, 3, 4, 5]
+    assert _event_ids(_query(sqlite_history, "Filter: event_host = host4")) == [4]
+    # The files are still there, e.g. for switching back.
+    assert list(sqlite_history._settings.paths.history_dir.value.glob("*.log"))
+
+    # Importing only happens once
+    sqlite_history = _make_history(tmp_path, "sqlite")
+    assert _event_ids(_query(sqlite_history)) == [1, 2, 3, 4, 5]
+
+
+def test_sqlite_history_housekeeping(tmp_path, monkeypatch):
+    history = _make_history(tmp_path, "sqlite")
+    monkeypatch.setattr(cmk.ec.history.time, "time", lambda: 1000000000.0)
+    history.add(_event(1, "host"), "NEW")
+    monkeypatch.undo()
+    history.add(_event(2, "host"), "NEW")
+
+    history.housekeeping()
+    assert _event_ids(_query(history)) == [2]
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+# pylint: disable=protected-access
+import itertools
+import logging
+import pickle
+
+import pytest  # type: ignore[import]
+
+from cmk.ec.main import EventServer, RuleMatcher
+from cmk.ec.rule_index import RuleIndex, _LiteralAutomaton, required_literal
+
+
+def _compile(rule):
+    for key in ["match", "match_ok", "match_host", "match_application", "cancel_application"]:
+        if key in rule:
+            value = EventServer._compile_matching_value(key, rule[key])
+            if value is None:
+                del rule[key]
+            else:
+                rule[key] = value
+    rule.setdefault("pack", "pack")
+    return rule
+
+
+@pytest.mark.parametrize("pattern, literal", [
+    ("Interface (.*) changed state", " changed state"),
+    ("^ERROR: disk (sda|sdb) failed$", "error: disk sd"),
+    ("(?-i:Backup) finished", "backup finished"),
+    ("a+b?c{2,3}", ""),
+    ("FAN [0-9]+ FAILED|PSU FAILED", ""),
+    ("Nachricht über Fehler", "nachricht "),
+    (r"\bsshd\b\[\d+\]: Failed", "]: failed"),
+    ("plain text", "plain text"),
+])
+def test_required_literal(pattern, literal):
+    assert required_literal(EventServer._compile_matching_value("match", pattern)) == literal
+
+
+def test_literal_automaton_overlapping():
+    automaton = _LiteralAutomaton(["he", "she", "his", "hers"])
+    assert automaton.search("ushers") == {"he", "she", "hers"}
+    assert automaton.search("this") == {"his"}
+    assert automaton.search("nothing") == set()
+
+
+RULES = [
+    {
+        "match": "Interface .* down"
+    },
+    {
+        "match": "link up",
+        "match_host": "switch1"
+    },
+    {
+        "match": "fan (failed|broken)$",
+        "match_ok": "FAN OK$"
+    },
+    {
+        "match": "failed|error",
+        "match_host": "^db"
+    },
+    {
+        "match": "(?i)some.*thing",
+        "match_application": "sshd"
+    },
+    {
+        "match": "x",
+        "invert_matching": True
+    },
+    {
+        "match_application": "cron",
+        "cancel_application": "^anacron"
+    },
+    {
+        "match": "",
+    },
+    {
+        "match": "ſtrange İnput",
+    },
+    {
+        "match": "kelvin 10K",
+    },
+]
+
+EVENTS = [(text, host, application) for text, host, application in itertools.product(
+    [
+        "INTERFACE eth0 down",
+        "Link UP on port 3",
+        "Fan 2 failed",
+        "fan ok",
+        "Database error",
+        "Something strange",
+        "STRANGE INPUT",
+        "Kelvin 10K",
+        "",
+    ],
+    ["switch1", "SWITCH1", "db01", "web"],
+    ["sshd", "anacron", "cron", ""],
+)]
+
+
+@pytest.mark.parametrize("text, host, application", EVENTS)
+def test_rule_index_selects_all_matching_rules(text, host, application):
+    rules = [_compile(dict(rule, id="rule%d" % index)) for index, rule in enumerate(RULES)]
+    matcher = RuleMatcher(logging.getLogger("cmk.mkeventd"), {"debug_rules": False})
+    event = {
+        "text": text,
+        "host": host,
+        "application": application,
+        "ipaddress": "127.0.0.1",
+        "facility": 1,
+        "priority": 2,
+    }
+
+    selected = RuleIndex(rules).select(event, rules)
+
+    # The order of the rules is kept
+    assert selected == [rule for rule in rules if rule in selected]
+    for rule in rules:
+        matches = matcher.event_rule_matches_non_inverted(rule, event) is not False
+        if matches or rule.get("invert_matching"):
+            assert rule in selected
+
+
+def test_rule_index_selects_from_given_rules():
+    rules = [_compile({"id": "rule%d" % index, "match": "message"}) for index in range(10)]
+    index = RuleIndex(rules)
+    event = {"text": "A message", "host": "host", "application": ""}
+    assert index.select(event, rules[3:6]) == rules[3:6]
+    assert index.select(event, []) == []
+    assert index.select(dict(event, text="Nothing"), rules) == []
+
+
+def test_rule_index_can_be_pickled():
+    rules = [_compile({"id": "rule%d" % index, "match": "message"}) for index in range(10)]
+    # Like the initialization arguments of the event pipeline workers
+    index, rules = pickle.loads(pickle.dumps((RuleIndex(rules), rules)))
+    event = {"text": "A message", "host": "host", "application": ""}
+    assert index.select(event, rules[3:6]) == rules[3:6]
@@ -12,3 +12,111 @@ def test_needed_elements_of_expression():
         rf.needed_elements_of_expression(('transformation', ('q90percentile', 95.0), [
             ('rrd', u'heute', u'CPU utilization', 'util', 'max')
         ]))) == {('heute', 'CPU utilization', 'util', 'max')}
+
+
+def test_rrd_data_query_services():
+    assert rf._rrd_data_query(
+        "service",
+        {("heute", "CPU load"), ("heute", "Memory"), ("morgen", "CPU load")},
+        ["rrddata:load1:load1.max:1:2:60"],
+    ) == ("GET services\n"
+          "Columns: host_name service_description rrddata:load1:load1.max:1:2:60\n"
+          "Filter: host_name = heute\n"
+          "Filter: service_description = CPU load\n"
+          "Filter: service_description = Memory\n"
+          "Or: 2\n"
+          "And: 2\n"
+          "Filter: host_name = morgen\n"
+          "Filter: service_description = CPU load\n"
+          "And: 2\n"
+          "Or: 2\n")
+
+
+def test_rrd_data_query_hosts():
+    assert rf._rrd_data_query(
+        "host",
+        {("heute", "_HOST_")},
+        ["rrddata:rta:rta.max:1:2:60"],
+    ) == ("GET hosts\n"
+          "Columns: host_name rrddata:rta:rta.max:1:2:60\n"
+          "Filter: host_name = heute\n")
+
+
+def test_fetch_rrd_data_batched(monkeypatch, register_builtin_html):
+    monkeypatch.setattr(rf, "_rrd_data_cache", {})
+    queries = []
+
+    def query_rrd_data(services, entries, rrd_consolidation, point_range):
+        queries.append((services, set(entries)))
+        for service in services:
+            for entry in entries:
+                yield service, entry, [1, 2, 60, hash(service + entry)]
+
+    monkeypatch.setattr(rf, "_query_rrd_data", query_rrd_data)
+
+    needed_rrd_data = [
+        ("site1", "heute", "CPU load", "load1", "max", 1),
+        ("site2", "morgen", "CPU load", "load1", "max", 1),
+        ("site1", "heute", "Memory", "mem_used", "max", 1),
+    ]
+    graph_data_range = {"time_range": (1000, 2000), "step": 60}
+    expected = {key: [1, 2, 60, hash(key)] for key in needed_rrd_data}
+
+    assert dict(rf.fetch_rrd_data_batched(needed_rrd_data, "max", graph_data_range)) == expected
+    # One query for each set of columns, each of them sent to all the sites
+    assert sorted(queries, key=repr) == sorted([
+        ({("site1", "heute", "CPU load"), ("site2", "morgen", "CPU load")},
+         {("load1", "max", 1)}),
+        ({("site1", "heute", "Memory")}, {("mem_used", "max", 1)}),
+    ], key=repr)
+
+    # The next graph of the dashboard, rendered a few seconds later, reuses the data
+    queries.clear()
+    graph_data_range = {"time_range": (1005, 2005), "step": 60}
+    assert dict(rf.fetch_rrd_data_batched(needed_rrd_data, "max", graph_data_range)) == expected
+    assert not queries
+
+    # Another consolidation function is fetched again
+    assert dict(rf.fetch_rrd_data_batched(needed_rrd_data, "min", graph_data_range)) == expected
+    assert len(queries) == 2
+
+
+class _FakeLivestatus:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+        self.only_sites = None
+        self.prepend_site = False
+
+    def set_only_sites(self, only_sites):
+        self.only_sites = only_sites
+
+    def set_prepend_site(self, prepend_site):
+        self.prepend_site = prepend_site
+
+    def query(self, query):
+        self.queries.append((query, self.only_sites, self.prepend_site))
+        return self.rows
+
+
+def test_query_rrd_data(monkeypatch):
+    live = _FakeLivestatus([
+        ["site1", "heute", "CPU load", [1, 2, 60, 1.0]],
+        # Same host and service name on another site, not asked for
+        ["site2", "heute", "CPU load", [1, 2, 60, 2.0]],
+        ["site2", "morgen", "CPU load", [1, 2, 60, 3.0]],
+    ])
+    monkeypatch.setattr(rf.sites, "live", lambda: live)
+
+    assert sorted(
+        rf._query_rrd_data(
+            {("site1", "heute", "CPU load"), ("site2", "morgen", "CPU load")},
+            [("load1", "max", 1)],
+            "max",
+            "1:2:60",
+        )) == [
+            (("site1", "heute", "CPU load"), ("load1", "max", 1), [1, 2, 60, 1.0]),
+            (("site2", "morgen", "CPU load"), ("load1", "max", 1), [1, 2, 60, 3.0]),
+        ]
+    assert [(only_sites, prepend_site) for _query, only_sites, prepend_site in live.queries
+           ] == [(["site1", "site2"], True)]
@@ -35,3 +35,59 @@ def test_time_series_math_exc(args):
 def test_time_series_math_stable_singles(operator):
     test_ts = ts.TimeSeries([0, 180, 60, 6, 5, 10, None, -2, -3.14])
     assert ts.time_series_math(operator, [test_ts]) == test_ts
+
+
+@pytest.mark.parametrize("operator, operands, result", [
+    ("+", [[1, None, None], [2, 3, None]], [3, 3, None]),
+    ("*", [[2, None, 2], [3, 3, 0.5]], [6, None, 1]),
+    ("-", [[5, None, 1], [3, 1, 2]], [2, None, -1]),
+    ("/", [[6, 1, None, 0], [3, 0, 1, 2]], [2, None, None, 0]),
+    ("MAX", [[1, None, None], [2, 3, None]], [2, 3, None]),
+    ("MIN", [[1, None, None], [2, 3, None]], [1, 3, None]),
+    ("AVERAGE", [[1, None, None], [2, 3, None]], [1.5, 3, None]),
+    ("MERGE", [[None, 1, None], [2, 3, None]], [2, 1, None]),
+    # Like zip(), only up to the shortest operand
+    ("+", [[1, 2, 3], [1, 2]], [2, 4]),
+])
+def test_time_series_math(operator, operands, result):
+    operands_evaluated = [ts.TimeSeries(values, (0, 60 * len(values), 60)) for values in operands]
+    assert ts.time_series_math(operator, operands_evaluated).values == result
+
+
+def test_array_time_series_values():
+    array_ts = ts.ArrayTimeSeries([0, 180, 60, 6, None, 10])
+    assert array_ts.twindow == (0, 180, 60)
+    assert len(array_ts) == 3
+    assert array_ts.array[2] == 10
+    assert array_ts == ts.TimeSeries([0, 180, 60, 6, None, 10])
+
+    # Changing the values in place, like chop_last_empty_step() does
+    del array_ts.values[-1]
+    assert len(array_ts.array) == 2
+    assert array_ts.values == [6, None]
+
+
+@pytest.mark.parametrize("rrddata, twindow, shift, upsampled", [
+    ([10, 20, 10, 20], (10, 20, 5), 0, [20, 20]),
+    ([0, 120, 40, 25, None, 105],
+     (300, 400, 10), 300, [25, 25, 25, 25, None, None, None, None, 105, 105]),
+    ([0, 120, 40, 25, 65, 105], (330, 410, 10), 300, [25, 65, 65, 65, 65, 105, 105, 105]),
+])
+def test_array_time_series_upsampling(rrddata, twindow, shift, upsampled):
+    assert ts.ArrayTimeSeries(rrddata).bfill_upsample(twindow, shift) == upsampled
+
+
+@pytest.mark.parametrize("rrddata, twindow, cf, downsampled", [
+    ([10, 25, 5, 15, 20, 25], (10, 30, 10), "average", [17.5, 25]),
+    ([10, 45, 5, 15, None, 25, None, None, None, 45],
+     (10, 60, 10), "max", [15, 25, None, 45, None]),
+    ([10, 45, 5, 15, 20, 25, 30, 35, 40, 45], (0, 60, 10), "min", [None, 15, 25, 35, 45, None]),
+    ([10, 45, 5, 15, 20, 25, 30, None, 40, 45], (10, 40, 10), "average", [17.5, 27.5, 40.]),
+])
+def test_array_time_series_downsampling(rrddata, twindow, cf, downsampled):
+    assert ts.ArrayTimeSeries(rrddata).downsample(twindow, cf) == downsampled
+
+
+def test_array_time_series_percentile():
+    assert ts.ArrayTimeSeries([0, 300, 60, 1, None, 3, 2, 4]).percentile(50) == 2.5
+    assert ts.ArrayTimeSeries([0, 120, 60, None, None]).percentile(50) is None
@@ -8,6 +8,8 @@
 
 from cmk.gui.plugins.visuals.utils import Filter
 import copy
+import functools
+import heapq
 from typing import Any, Dict
 
 import pytest  # type: ignore[import]
@@ -23,6 +25,8 @@ from cmk.gui.valuespec import ValueSpec
 import cmk.gui.plugins.views
 from cmk.gui.plugins.views.utils import transform_painter_spec
 from cmk.gui.type_defs import PainterSpec
+import cmk.gui.utils
+import cmk.gui.view_utils
 import cmk.gui.views
 
 
@@ -2354,6 +2358,228 @@ def test_register_sorter(monkeypatch):
     assert sorter.cmp.__name__ == cmpfunc.__name__
 
 
+def _service_rows():
+    return [{
+        "site": "site%d" % (number % 3),
+        "host_name": "host%d" % (number % 12),
+        "host_address": "10.0.%d.%d" % (number % 4, number % 12),
+        "service_description": ["Check_MK", "CPU load", "Interface 2", "Interface 10"][number % 4],
+        "service_state": number % 4,
+        "service_has_been_checked": int(number % 7 != 0),
+        "service_plugin_output": ["OK", "ok", "Critical", "WARN"][number % 5 % 4],
+        "service_last_state_change": number % 5,
+        "JOIN": {} if number % 6 == 0 else {
+            "Uptime": {
+                "service_description": "Uptime",
+                "service_state": number % 3,
+                "service_has_been_checked": 1,
+            }
+        },
+    } for number in range(60)]
+
+
+def _sorter_entries(sorter_specs):
+    return [
+        cmk.gui.plugins.views.utils.SorterEntry(
+            sorter=cmk.gui.plugins.views.sorter_registry[sorter_name](),
+            negate=negate,
+            join_key=join_key,
+        ) for sorter_name, negate, join_key in sorter_specs
+    ]
+
+
+@pytest.mark.parametrize("sorter_specs", [
+    [("svcstate", False, None)],
+    [("svcstate", True, None), ("site_host", False, None)],
+    [("site", False, None), ("host_name", True, None), ("svcdescr", False, None)],
+    [("host_address", True, None), ("svcoutput", False, None), ("stateage", True, None)],
+    [("svcstate", False, "Uptime"), ("svcdescr", True, None)],
+    [("svcstate", True, "Uptime"), ("host_name", False, None)],
+])
+def test_sort_data(view, sorter_specs):
+    sorters = _sorter_entries(sorter_specs)
+
+    def multisort(row1, row2):
+        # How the rows have been compared pairwise before the sorters had keys
+        for entry in sorters:
+            neg = -1 if entry.negate else 1
+            if entry.join_key:
+                join_row1 = row1["JOIN"].get(entry.join_key)
+                join_row2 = row2["JOIN"].get(entry.join_key)
+                if join_row1 is None or join_row2 is None:
+                    c = neg * ((join_row1 is not None) - (join_row2 is not None))
+                else:
+                    c = neg * entry.sorter.cmp(join_row1, join_row2)
+            else:
+                c = neg * entry.sorter.cmp(row1, row2)
+            if c != 0:
+                return c
+        return 0
+
+    rows = _service_rows()
+    expected = sorted(rows, key=functools.cmp_to_key(multisort))
+    cmk.gui.views._sort_data(view, rows, sorters)
+    assert rows == expected
+
+
+def test_sort_data_without_key(view):
+    class SorterWithoutKey(cmk.gui.plugins.views.utils.Sorter):
+        @property
+        def ident(self):
+            return "without_key"
+
+        @property
+        def title(self):
+            return "Without key"
+
+        @property
+        def columns(self):
+            return ["service_last_state_change"]
+
+        def cmp(self, r1, r2):
+            return cmk.gui.plugins.views.cmp_simple_number("service_last_state_change", r1, r2)
+
+    rows = _service_rows()
+    cmk.gui.views._sort_data(view, rows, [
+        cmk.gui.plugins.views.utils.SorterEntry(SorterWithoutKey(), True, None),
+        cmk.gui.plugins.views.utils.SorterEntry(
+            cmk.gui.plugins.views.sorter_registry["host_name"](), False, None),
+    ])
+    assert [(row["service_last_state_change"], row["host_name"]) for row in rows] == sorted(
+        ((row["service_last_state_change"], row["host_name"]) for row in rows),
+        key=lambda entry: (-entry[0], cmk.gui.utils.key_num_split(entry[1])))
+
+
+def test_sorter_keys_order_like_cmp():
+    values = ["", "a", "A", "b", "B", "abc", "10.0.0.2", "10.0.0.10", "host2", "host10", "Check_MK"]
+    for sorter_function, key_function in cmk.gui.plugins.views.utils._sorter_key_functions.items():
+        rows = [{"col": value} for value in values]
+        if sorter_function.__name__ in ["cmp_simple_number", "cmp_simple_state"]:
+            rows = [{"col": value} for value in [3, 0, 1.5, 2, -1, 10]]
+        elif sorter_function.__name__ == "cmp_date":
+            rows = [{"col": value} for value in [0, 3600, 86400 * 3, 86400 * 2 + 3600]]
+        elif sorter_function.__name__ == "cmp_string_list":
+            rows = [{"col": [value, value]} for value in values]
+        for row1 in rows:
+            for row2 in rows:
+                key1, key2 = key_function("col", row1), key_function("col", row2)
+                assert sorter_function("col", row1, row2) == (key1 > key2) - (key1 < key2)
+
+
+@pytest.mark.parametrize("sorter_specs", [
+    [("svcstate", True, None), ("site_host", False, None)],
+    [("host_address", True, None), ("svcoutput", False, None), ("stateage", True, None)],
+    [("svcstate", True, "Uptime"), ("host_name", False, None)],
+])
+def test_combined_sort_key(view, sorter_specs):
+    sorters = _sorter_entries(sorter_specs)
+    expected = _service_rows()
+    cmk.gui.views._sort_data(view, expected, sorters)
+
+    key = cmk.gui.views._combined_sort_key(sorters)
+    assert sorted(_service_rows(), key=key) == expected
+    assert heapq.nsmallest(10, _service_rows(), key=key) == expected[:10]
+
+
+@pytest.mark.parametrize("page_number,page_size,sorters,expected_limits,expected_has_next", [
+    (1, 2, [], [2], True),
+    (1, 10, [], [10, None], True),
+    (5, 10, [], [50, None], False),
+    (2, 10, [("svcstate", True, None), ("host_name", False, None)], [None], True),
+    (5, 10, [("svcstate", True, None), ("host_name", False, None)], [None], False),
+])
+def test_get_view_page_rows(monkeypatch, view, page_number, page_size, sorters, expected_limits,
+                            expected_has_next):
+    limits = []
+
+    def iter_view_rows(view, all_active_filters, limit):
+        limits.append(limit)
+        rows = _service_rows()[:None if limit is None else limit + 1]
+        view.process_tracking.amount_unfiltered_rows = len(rows)
+        # A filter of the view removes the unknown services
+        yield from (row for row in rows if row["service_state"] != 3)
+
+    monkeypatch.setattr(cmk.gui.views, "_can_stream_view_rows",
+                        lambda view, all_active_filters: True)
+    monkeypatch.setattr(cmk.gui.views, "_iter_view_rows", iter_view_rows)
+    view.spec["sorters"] = sorters
+    page = cmk.gui.views.ViewPage(number=page_number, size=page_size)
+
+    _unfiltered_amount_of_rows, rows = cmk.gui.views._get_view_page_rows(view, [], page)
+
+    expected = [row for row in _service_rows() if row["service_state"] != 3]
+    cmk.gui.views._sort_data(view, expected, view.sorters)
+    assert rows == expected[page.offset:page.offset + page.size]
+    assert page.has_next is expected_has_next
+    assert limits == expected_limits
+
+
+@pytest.mark.parametrize("sorters", [
+    [],
+    [("svcstate", True, None), ("host_name", False, None)],
+])
+def test_get_view_page_rows_row_limit(monkeypatch, view, sorters):
+    def iter_view_rows(view, all_active_filters, limit):
+        rows = _service_rows()[:None if limit is None else limit + 1]
+        view.process_tracking.amount_unfiltered_rows = len(rows)
+        yield from rows
+
+    monkeypatch.setattr(cmk.gui.views, "_can_stream_view_rows",
+                        lambda view, all_active_filters: True)
+    monkeypatch.setattr(cmk.gui.views, "_iter_view_rows", iter_view_rows)
+    view.spec["sorters"] = sorters
+    view.row_limit = 15
+    page = cmk.gui.views.ViewPage(number=2, size=10)
+
+    unfiltered_amount_of_rows, rows = cmk.gui.views._get_view_page_rows(view, [], page)
+
+    assert cmk.gui.view_utils.row_limit_exceeded(unfiltered_amount_of_rows, view.row_limit)
+    assert len(rows) == 5
+    assert page.has_next is False
+
+
+def test_can_render_streamed_rows(view):
+    assert cmk.gui.views._can_render_streamed_rows(view)
+
+    view_spec = copy.deepcopy(view.spec)
+    view_spec["painters"].append(PainterSpec('host_pnpgraph', None, None, None))
+    view = cmk.gui.views.View(view.name, view_spec, view_spec.get("context", {}))
+    assert not cmk.gui.views._can_render_streamed_rows(view)
+
+
+def test_painter_streamable():
+    painter_registry = cmk.gui.plugins.views.painter_registry
+
+    class PainterOfLocalPlugin(painter_registry["host_state"]):  # type: ignore[valid-type,misc]
+        pass
+
+    assert painter_registry["host_state"]().streamable
+    assert not painter_registry["host_pnpgraph"]().streamable
+    # Only the painters shipped with Checkmk are known to be safe
+    assert not PainterOfLocalPlugin().streamable
+
+
+def test_can_stream_view_rows(view):
+    class FilterWithAllRows(Filter):
+        def display(self):
+            return
+
+        def filters_rows_independently(self, context):
+            return False
+
+    assert cmk.gui.views._can_stream_view_rows(view, [])
+    assert not cmk.gui.views._can_stream_view_rows(view, [
+        FilterWithAllRows(
+            ident="all_rows",
+            title="All rows",
+            sort_index=1,
+            info="host",
+            htmlvars=[],
+            link_columns=[],
+        )
+    ])
+
+
 def test_get_needed_regular_columns(view):
     class SomeFilter(Filter):
         def display(self):
@@ -2434,6 +2660,64 @@ def test_get_needed_join_columns(view):
     assert sorted(columns) == sorted(expected_columns)
 
 
+def test_do_table_join(monkeypatch, view):
+    view_spec = copy.deepcopy(view.spec)
+    view_spec["painters"].append(PainterSpec('service_state', None, None, u'CPU load'))
+    view_spec["painters"].append(PainterSpec('service_state', None, None, u'Uptime'))
+    view = cmk.gui.views.View(view.name, view_spec, view_spec.get("context", {}))
+
+    # The rows of the join table are not grouped by their host
+    join_table = [
+        ("site1", "host1", "Uptime", 0),
+        ("site1", "host2", "CPU load", 2),
+        ("site1", "host1", "CPU load", 1),
+        ("site2", "host1", "CPU load", 3),
+        ("site1", "host3", "CPU load", 0),
+    ]
+    queries = []
+
+    def query_livestatus_iter(query, only_sites, limit, auth_domain):
+        queries.append(query)
+        columns = query.split("\n")[1].split(": ")[1].split()
+        for site, host_name, service_description, state in join_table:
+            row = {
+                "host_name": host_name,
+                "service_description": service_description,
+                "service_has_been_checked": 1,
+                "service_state": state,
+            }
+            yield [site] + [row.get(column) for column in columns]
+
+    monkeypatch.setattr(cmk.gui.plugins.views.utils, "query_livestatus_iter",
+                        query_livestatus_iter)
+
+    rows = [
+        {"site": "site1", "host_name": "host1"},
+        {"site": "site2", "host_name": "host1"},
+        {"site": "site1", "host_name": "host2"},
+        {"site": "site1", "host_name": "host4"},
+    ]
+    cmk.gui.views._do_table_join(view, rows, "Filter: host_name ~ host\n", view.sorters)
+
+    assert len(queries) == 1
+    assert queries[0].startswith("GET services\nColumns: host_name service_description ")
+    assert "host_state" not in queries[0]
+    assert queries[0].endswith("\nFilter: host_name ~ host\n"
+                               "Filter: service_description = CPU load\n"
+                               "Filter: service_description = Uptime\n"
+                               "Or: 2\n")
+    assert [{
+        service_description: join_row["service_state"]
+        for service_description, join_row in row["JOIN"].items()
+    } for row in rows] == [
+        {"Uptime": 0, "CPU load": 1},
+        {"CPU load": 3},
+        {"CPU load": 2},
+        {},
+    ]
+    assert view.process_tracking.amount_joined_rows == 4
+
+
 def test_create_view_basics():
     view_name = "allhosts"
     view_spec = cmk.gui.views.multisite_builtin_views[view_name]
@@ -2480,6 +2764,18 @@ def test_gui_view_row_limit(register_builtin_html, monkeypatch, mocker, limit, p
     assert cmk.gui.views.get_limit() == result
 
 
+def test_view_page_of_rows(view):
+    assert view.page is None
+    view.page = cmk.gui.views.ViewPage(number=2, size=50)
+    assert view.page.offset == 50
+
+
+def test_get_view_page(register_builtin_html, monkeypatch):
+    assert cmk.gui.views.get_view_page() is None
+    monkeypatch.setitem(html.request._vars, "page", "3")
+    assert cmk.gui.views.get_view_page() == cmk.gui.views.ViewPage(number=3, size=100)
+
+
 def test_view_only_sites(view):
     assert view.only_sites is None
     view.only_sites = ["unit"]
@@ -85,8 +85,12 @@ def test_registered_configvars():
         'auth_by_http_header',
         'builtin_icon_visibility',
         'bulk_discovery_default_settings',
+        'cache_file_memory_size',
         'check_mk_perfdata_with_times',
         'cluster_max_cachefile_age',
+        'config_snapshot',
+        'core_config_incremental',
+        'core_config_processes',
         'crash_report_target',
         'crash_report_url',
         'custom_service_attributes',
@@ -96,11 +100,13 @@ def test_registered_configvars():
         'default_user_profile',
         'default_bi_layout',
         'delay_precompile',
+        'discovery_concurrency',
         'diskspace_cleanup',
         'enable_rulebased_notifications',
         'enable_sounds',
         'escape_plugin_output',
         'event_limit',
+        'event_workers',
         'eventsocket_queue_len',
         'failed_notification_horizon',
         'hard_query_limit',
@@ -112,6 +118,7 @@ def test_registered_configvars():
         'inventory_check_autotrigger',
         'inventory_check_interval',
         'inventory_check_severity',
+        'item_state_storage_format',
         'lock_on_logon_failures',
         'log_level',
         'log_levels',
@@ -164,6 +171,7 @@ def test_registered_configvars():
         'staleness_threshold',
         'start_url',
         'statistics_interval',
+        'status_persistence',
         'table_row_limit',
         'tcp_connect_timeout',
         'translate_snmptraps',
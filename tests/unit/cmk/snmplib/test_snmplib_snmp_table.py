@@ -86,6 +86,41 @@ def test_get_snmp_table(monkeypatch, snmp_info, expected_values):
     assert get_all_snmp_tables(snmp_info) == expected_values
 
 
+@pytest.mark.parametrize("columns, expected", [
+    ([], []),
+    (
+        [(".1.2", [], "string"), (".1.3", [], "string")],
+        [([], "string"), ([], "string")],
+    ),
+    (
+        # gaps are filled with empty values
+        [
+            (".1.2", [(".1.2.1", b"a1"), (".1.2.3", b"a3")], "string"),
+            (".1.3", [(".1.3.1", b"b1"), (".1.3.2", b"b2"), (".1.3.3", b"b3")], "binary"),
+        ],
+        [([b"a1", b"", b"a3"], "string"), ([b"b1", b"b2", b"b3"], "binary")],
+    ),
+    (
+        # end OIDs are sorted numerically, not lexicographically
+        [
+            (".1.2", [(".1.2.10", b"a10"), (".1.2.9.1", b"a9.1")], "string"),
+            (".1.3", [(".1.3.9.1", b"b9.1"), (".1.3.2", b"b2"), (".1.3.10", b"b10")], "string"),
+        ],
+        [([b"", b"a9.1", b"a10"], "string"), ([b"b2", b"b9.1", b"b10"], "string")],
+    ),
+])
+def test_sanitize_snmp_table_columns(columns, expected):
+    assert snmp_table._sanitize_snmp_table_columns(columns) == expected
+
+
+def test_construct_snmp_table_of_rows():
+    assert snmp_table._construct_snmp_table_of_rows([]) == []
+    assert snmp_table._construct_snmp_table_of_rows([["1", "2"], [[1], [2]]]) == [
+        ["1", [1]],
+        ["2", [2]],
+    ]
+
+
 @pytest.mark.parametrize(
     "encoding,columns,expected",
     [
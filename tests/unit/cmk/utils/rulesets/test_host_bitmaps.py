@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2019 tribe29 GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import pytest  # type: ignore[import]
+
+from cmk.utils.rulesets.host_bitmaps import HostBitmaps
+from cmk.utils.rulesets.ruleset_matcher import matches_tag_spec
+
+HOST_TAG_LISTS = {
+    "prod-lan": {"prod", "lan", "/wato/dc1/"},
+    "prod-wan": {"prod", "wan", "/wato/dc1/sub/"},
+    "test-lan": {"test", "lan", "/wato/dc10/"},
+    "test-dmz": {"test", "dmz", "/wato/"},
+}
+
+HOST_PATHS = {
+    "prod-lan": "/wato/dc1/",
+    "prod-wan": "/wato/dc1/sub/",
+    "test-lan": "/wato/dc10/",
+    "test-dmz": "/wato/",
+}
+
+
+@pytest.fixture(name="host_bitmaps")
+def fixture_host_bitmaps():
+    return HostBitmaps(HOST_TAG_LISTS, HOST_TAG_LISTS, HOST_PATHS)
+
+
+def test_host_bitmaps_hosts(host_bitmaps):
+    assert host_bitmaps.hosts(host_bitmaps.all) == set(HOST_TAG_LISTS)
+    assert host_bitmaps.hosts(0) == set()
+    assert host_bitmaps.hosts(host_bitmaps.of_hosts(["test-dmz", "prod-lan", "unknown"])) == {
+        "test-dmz",
+        "prod-lan",
+    }
+    assert "prod-lan" in host_bitmaps
+    assert "unknown" not in host_bitmaps
+
+
+def test_host_bitmaps_many_hosts():
+    hostnames = ["host%d" % number for number in range(1000)]
+    host_bitmaps = HostBitmaps(hostnames, {}, {})
+    some_hosts = set(hostnames[::7])
+    assert host_bitmaps.hosts(host_bitmaps.of_hosts(some_hosts)) == some_hosts
+    assert host_bitmaps.hosts(host_bitmaps.all & ~host_bitmaps.of_hosts(some_hosts)) == set(
+        hostnames) - some_hosts
+
+
+@pytest.mark.parametrize("folder_path, expected", [
+    ("/", {"prod-lan", "prod-wan", "test-lan", "test-dmz"}),
+    ("/wato/dc1/", {"prod-lan", "prod-wan"}),
+    ("/wato/dc1", {"prod-lan", "prod-wan", "test-lan"}),
+    ("/wato/dc1/sub/", {"prod-wan"}),
+    ("/wato/other/", set()),
+])
+def test_host_bitmaps_within_folder(host_bitmaps, folder_path, expected):
+    assert host_bitmaps.hosts(host_bitmaps.within_folder(folder_path)) == expected
+
+
+@pytest.mark.parametrize("tag_spec", [
+    "prod",
+    "unknown",
+    {
+        "$ne": "lan"
+    },
+    {
+        "$ne": "unknown"
+    },
+    {
+        "$or": ["lan", "dmz"]
+    },
+    {
+        "$or": [{
+            "$ne": "lan"
+        }, "prod"]
+    },
+    {
+        "$nor": ["lan", "dmz"]
+    },
+    {
+        "$nor": []
+    },
+])
+def test_host_bitmaps_matching_tag_spec(host_bitmaps, tag_spec):
+    assert host_bitmaps.hosts(host_bitmaps.matching_tag_spec(tag_spec)) == {
+        hostname for hostname, tags in HOST_TAG_LISTS.items() if matches_tag_spec(tag_spec, tags)
+    }
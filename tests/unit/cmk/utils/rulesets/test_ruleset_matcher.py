@@ -516,6 +516,110 @@ def test_ruleset_matcher_get_service_ruleset_values_labels(monkeypatch, hostname
                                            is_binary=False)) == expected_result
 
 
+service_description_ruleset = [
+    {
+        "value": "prefix",
+        "condition": {
+            "service_description": ["CPU"],
+        },
+        "options": {},
+    },
+    {
+        "value": "regex",
+        "condition": {
+            "service_description": [{
+                "$regex": "Interface [0-9]+$"
+            }, "Memory"],
+        },
+        "options": {},
+    },
+    {
+        "value": "negated",
+        "condition": {
+            "service_description": {
+                "$nor": ["CPU"]
+            },
+        },
+        "options": {},
+    },
+    {
+        "value": "backreference",
+        "condition": {
+            "service_description": [{
+                "$regex": "(.)\\1"
+            }],
+        },
+        "options": {},
+    },
+    {
+        "value": "host2 only",
+        "condition": {
+            "host_name": ["host2"],
+            "service_description": ["CPU"],
+        },
+        "options": {},
+    },
+]
+
+
+@pytest.mark.parametrize("hostname,service_description,expected_result", [
+    ("host1", "CPU load", ["prefix"]),
+    ("host1", "Interface 2", ["regex", "negated"]),
+    ("host1", "Interface 2 errors", ["negated"]),
+    ("host1", "Memory", ["regex", "negated"]),
+    ("host1", "OOM killer", ["negated", "backreference"]),
+    ("host2", "CPU utilization", ["prefix", "host2 only"]),
+    ("host3", "CPU load", []),
+])
+def test_ruleset_matcher_get_service_ruleset_values_service_description(
+        monkeypatch, hostname, service_description, expected_result):
+    ts = Scenario()
+    ts.add_host("host1")
+    ts.add_host("host2")
+    config_cache = ts.apply(monkeypatch)
+    matcher = config_cache.ruleset_matcher
+
+    for _repetition in range(2):  # the second time from the cache
+        assert list(
+            matcher.get_service_ruleset_values(RulesetMatchObject(
+                host_name=hostname, service_description=service_description),
+                                               ruleset=service_description_ruleset,
+                                               is_binary=False)) == expected_result
+
+
+@pytest.mark.parametrize("conditional_pattern", ["(O)?(?(1)OM|Swap)", "(?P<o>O)?(?(o)OM|Swap)"])
+@pytest.mark.parametrize("service_description,expected_result", [
+    ("CPU load", ["prefix"]),
+    ("OOM killer", ["conditional reference"]),
+    ("Swap", ["conditional reference"]),
+])
+def test_ruleset_matcher_get_service_ruleset_values_conditional_reference(
+        monkeypatch, conditional_pattern, service_description, expected_result):
+    ts = Scenario()
+    ts.add_host("host1")
+    config_cache = ts.apply(monkeypatch)
+    matcher = config_cache.ruleset_matcher
+    ruleset = [
+        service_description_ruleset[0],
+        {
+            "value": "conditional reference",
+            "condition": {
+                # The group numbers change when combining the patterns
+                "service_description": [{
+                    "$regex": conditional_pattern
+                }],
+            },
+            "options": {},
+        },
+    ]
+
+    assert list(
+        matcher.get_service_ruleset_values(RulesetMatchObject(
+            host_name="host1", service_description=service_description),
+                                           ruleset=ruleset,
+                                           is_binary=False)) == expected_result
+
+
 def test_ruleset_optimizer_clear_ruleset_caches(monkeypatch):
     config_cache = Scenario().apply(monkeypatch)
     ruleset_optimizer = config_cache.ruleset_matcher.ruleset_optimizer
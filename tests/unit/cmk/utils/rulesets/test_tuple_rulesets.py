@@ -201,6 +201,18 @@ def test_all_matching_hosts(ts):
     assert config_cache.ruleset_matcher.ruleset_optimizer._all_matching_hosts({"host_tags": {"agent": "no-agent"}, "host_name": [{"$regex": "2"}]}, with_foreign_hosts=False) == \
     set([])
 
+    assert config_cache.ruleset_matcher.ruleset_optimizer._all_matching_hosts({"host_tags": {"criticality": {"$or": ["test", "prod"]}}}, with_foreign_hosts=True) == \
+    {"host1", "host2", "host3"}
+
+    assert config_cache.ruleset_matcher.ruleset_optimizer._all_matching_hosts({"host_tags": {"criticality": {"$nor": ["test"]}}}, with_foreign_hosts=False) == \
+    {"host2"}
+
+    assert config_cache.ruleset_matcher.ruleset_optimizer._all_matching_hosts({"host_name": {"$nor": ["host1"]}}, with_foreign_hosts=False) == \
+    {"host2"}
+
+    assert config_cache.ruleset_matcher.ruleset_optimizer._all_matching_hosts({"host_name": {"$nor": [{"$regex": "host1"}]}}, with_foreign_hosts=True) == \
+    {"host2", "host3"}
+
 
 def test_in_extraconf_hostlist():
     assert tuple_rulesets.in_extraconf_hostlist(tuple_rulesets.ALL_HOSTS, "host1") is True
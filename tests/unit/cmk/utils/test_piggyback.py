@@ -6,6 +6,7 @@
 
 import time
 import os
+import shutil
 import pytest  # type: ignore[import]
 import cmk.utils.paths
 import cmk.utils.log
@@ -22,6 +23,8 @@ def test_config():
 
     for f1 in piggyback_dir.glob("*/*"):
         f1.unlink()
+    # Let the piggyback index be created from the files again
+    shutil.rmtree(str(cmk.utils.paths.piggyback_index_dir), ignore_errors=True)
 
     source_file = piggyback_dir / "test-host" / "source1"
     with source_file.open(mode="wb") as f2:
@@ -432,3 +435,82 @@ def test_get_piggyback_matching_time_settings(time_settings, expected_time_setti
         piggyback._get_matching_time_settings(
             ["source-host"], "piggybacked-host",
             time_settings).keys()) == sorted(expected_time_setting_keys)
+
+
+def test_piggyback_index():
+    time_settings: piggyback.PiggybackTimeSettings = [(None, "max_cache_age",
+                                                       piggyback_max_cachefile_age)]
+
+    # Created from the existing files
+    assert piggyback.PiggybackIndex.load().source_hostnames() == ["source1"]
+
+    piggyback.store_piggyback_raw_data("source2", {
+        "test-host": [b"<<<check_mk>>>", b"source2"],
+        "test-host2": [b"<<<check_mk>>>", b"source2"],
+    })
+    piggyback.store_piggyback_raw_data("source2", {
+        "test-host2": [b"<<<check_mk>>>", b"source2"],
+    })
+
+    index = piggyback.PiggybackIndex.load()
+    assert sorted(index.piggybacked_hostnames()) == ["test-host", "test-host2"]
+    assert sorted(index.stored_at("test-host")) == ["source1", "source2"]
+    # No matter the modification times: test-host has not been updated by the last data
+    assert sorted((file_info.source_hostname, file_info.successfully_processed)
+                  for file_info in index.processed_file_infos("test-host", time_settings)) == [
+                      ("source1", True),
+                      ("source2", False),
+                  ]
+
+    piggyback.cleanup_piggyback_files(time_settings)
+
+    assert not (cmk.utils.paths.piggyback_dir / "test-host" / "source2").exists()
+    assert sorted(piggyback.PiggybackIndex.load().stored_at("test-host")) == ["source1"]
+    assert sorted(piggyback.get_source_and_piggyback_hosts(time_settings)) == [
+        ("source1", "test-host"),
+        ("source2", "test-host2"),
+    ]
+
+
+def test_piggyback_index_renamed_host():
+    time_settings: piggyback.PiggybackTimeSettings = [(None, "max_cache_age",
+                                                       piggyback_max_cachefile_age)]
+    piggyback.store_piggyback_raw_data("source1", {
+        "test-host": [b"<<<check_mk>>>", b"source1"],
+    })
+    piggyback.store_piggyback_raw_data("test-host", {
+        "test-host2": [b"<<<check_mk>>>", b"test-host"],
+    })
+    assert sorted(piggyback.get_source_and_piggyback_hosts(time_settings)) == [
+        ("source1", "test-host"),
+        ("test-host", "test-host2"),
+    ]
+
+    # Like the automation renaming test-host to renamed-host
+    piggyback_dir = cmk.utils.paths.piggyback_dir
+    (piggyback_dir / "test-host").rename(piggyback_dir / "renamed-host")
+    (piggyback_dir / "test-host2" / "test-host").rename(piggyback_dir / "test-host2" /
+                                                       "renamed-host")
+    piggyback.rename_host_in_index("test-host", "renamed-host")
+
+    index = piggyback.PiggybackIndex.load()
+    assert sorted(index.piggybacked_hostnames()) == ["renamed-host", "test-host2"]
+    assert sorted(index.source_hostnames()) == ["renamed-host", "source1"]
+
+
+def test_piggyback_index_removed_host():
+    time_settings: piggyback.PiggybackTimeSettings = [(None, "max_cache_age",
+                                                       piggyback_max_cachefile_age)]
+    piggyback.store_piggyback_raw_data("source1", {
+        "test-host": [b"<<<check_mk>>>", b"source1"],
+        "test-host2": [b"<<<check_mk>>>", b"source1"],
+    })
+
+    # Like the automation deleting test-host
+    shutil.rmtree(str(cmk.utils.paths.piggyback_dir / "test-host"))
+    piggyback.remove_piggybacked_host_from_index("test-host")
+
+    assert piggyback.PiggybackIndex.load().piggybacked_hostnames() == ["test-host2"]
+    assert list(piggyback.get_source_and_piggyback_hosts(time_settings)) == [
+        ("source1", "test-host2"),
+    ]
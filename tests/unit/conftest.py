@@ -18,6 +18,8 @@ import cmk.utils.redis as redis
 import cmk.utils.store as store
 import cmk.utils.version as cmk_version
 
+import cmk.core_helpers.cache
+
 # The openapi import below pulls a huge part of our GUI code indirectly into the process.  We need
 # to have the default permissions loaded before that to fix some implicit dependencies.
 # TODO: Extract the livestatus mock to some other place to reduce the dependencies here.
@@ -95,6 +97,9 @@ def cleanup_after_test():
         except OSError as e:
             logger.debug("Failed to cleanup %s after test: %s. Keep going anyway", entry, e)
 
+    # ... and no content of these files left over in memory
+    cmk.core_helpers.cache.MemoryCache.instance.clear()
+
 
 # Unit tests should not be executed in site.
 # -> Disabled site fixture for them
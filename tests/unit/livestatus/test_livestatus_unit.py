@@ -7,12 +7,15 @@
 # pylint: disable=redefined-outer-name
 
 import errno
+import json
 import socket
 import ssl
 from contextlib import closing
 
 import pytest  # type: ignore[import]
 
+from testlib.livestatus_server import FakeLivestatusServer  # type: ignore[import]
+
 import omdlib.certs as certs
 import livestatus
 
@@ -212,3 +215,144 @@ def test_local_connection(mock_livestatus):
     live.expect_query("GET status\nColumns: program_start\nColumnHeaders: off")
     with mock_livestatus(expect_status_query=False):
         livestatus.LocalConnection().query_value("GET status\nColumns: program_start")
+
+
+@pytest.fixture
+def fake_sites():
+    with FakeLivestatusServer([["a", 1]], delay=0.3) as slow, \
+         FakeLivestatusServer([["b", 2], ["c", 3]]) as fast:
+        yield {"slow": slow, "fast": fast}
+
+
+def _multisite_connection(servers, **site_config):
+    return livestatus.MultiSiteConnection({
+        livestatus.SiteId(sitename): dict(site_config, socket=server.url)
+        for sitename, server in servers.items()
+    })
+
+
+@pytest.mark.parametrize("output_format", ["python3", "json"])
+def test_multisite_query_parallel(fake_sites, output_format):
+    live = _multisite_connection(fake_sites)
+    live.set_output_format(output_format)
+    live.set_prepend_site(True)
+    # The slow site answers last, but its rows are still the first ones
+    assert live.query("GET hosts\nColumns: name num\n") == [
+        ["slow", "a", 1],
+        ["fast", "b", 2],
+        ["fast", "c", 3],
+    ]
+    assert live.dead_sites() == {}
+    for server in fake_sites.values():
+        assert "OutputFormat: %s" % output_format in server.queries[0]
+
+
+def test_multisite_query_parallel_timeout(fake_sites):
+    live = _multisite_connection(fake_sites, query_timeout=0.1)
+    assert live.query("GET hosts\nColumns: name num\n") == [["b", 2], ["c", 3]]
+    assert live.alive_sites() == ["fast"]
+    assert "Timeout" in str(live.dead_sites()["slow"]["exception"])
+
+
+def test_multisite_query_parallel_suppressed_exception():
+    with FakeLivestatusServer([], code=404) as missing_table, \
+         FakeLivestatusServer([["b", 2]]) as other:
+        live = _multisite_connection({"missing_table": missing_table, "other": other})
+        assert live.query("GET hosts\nColumns: name num\n") == [["b", 2]]
+        assert sorted(live.alive_sites()) == ["missing_table", "other"]
+
+
+def test_set_output_format_invalid():
+    with pytest.raises(livestatus.MKLivestatusConfigError):
+        livestatus.SingleSiteConnection("unix:/tmp/xyz").set_output_format("csv")
+
+
+ROWS = [["a\nb", 1, [1, 2]], ["x,\n", 2.5, {"k": "v"}], ["]", None, []]] * 100
+
+
+@pytest.mark.parametrize("output_format, response", [
+    ("python3", ("[" + ",\n".join(repr(row) for row in ROWS) + "]\n").encode("utf-8")),
+    ("json", ("[" + ",\n".join(json.dumps(row) for row in ROWS) + "]\n").encode("utf-8")),
+    ("python3", repr(ROWS).encode("utf-8")),
+],
+                         ids=["python3", "json", "not-one-row-per-line"])
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096, 10**6])
+def test_iter_response_rows(output_format, response, chunk_size):
+    chunks = (response[i:i + chunk_size] for i in range(0, len(response), chunk_size))
+    parse = livestatus._response_parsers[output_format]
+    assert list(livestatus._iter_response_rows(chunks, parse)) == parse(response)
+
+
+@pytest.mark.parametrize("response", [b"[]\n", b"[]"])
+def test_iter_response_rows_empty(response):
+    parse = livestatus._response_parsers["python3"]
+    assert list(livestatus._iter_response_rows([response[:1], response[1:]], parse)) == []
+
+
+def test_multisite_query_iter(fake_sites):
+    live = _multisite_connection(fake_sites)
+    live.set_prepend_site(True)
+    expected = [["slow", "a", 1], ["fast", "b", 2], ["fast", "c", 3]]
+    assert list(live.query_iter("GET hosts\nColumns: name num\n")) == expected
+
+    # Stop in the middle: the connections must not be confused by the rest of the response
+    rows = live.query_iter("GET hosts\nColumns: name num\n")
+    assert next(rows) == expected[0]
+    rows.close()
+    assert list(live.query_iter("GET hosts\nColumns: name num\n")) == expected
+    assert live.query("GET hosts\nColumns: name num\n") == expected
+    assert live.dead_sites() == {}
+
+
+def test_multisite_query_iter_options(fake_sites):
+    live = _multisite_connection(fake_sites)
+    live.set_auth_user("read", livestatus.UserId("hans"))
+    live.set_auth_domain("read")
+    options = livestatus.QueryOptions(only_sites=["fast"], limit=1, prepend_site=True,
+                                      auth_domain="action")
+    assert list(live.query_iter("GET hosts\nColumns: name num\n", options=options)) == [
+        ["fast", "b", 2],
+        ["fast", "c", 3],
+    ]
+    assert "Limit: 1" in fake_sites["fast"].queries[-1]
+    assert "AuthUser" not in fake_sites["fast"].queries[-1]
+    assert fake_sites["slow"].queries == []
+
+    # The settings of the connection are not changed
+    assert live.query("GET hosts\nColumns: name num\n") == [["a", 1], ["b", 2], ["c", 3]]
+    for server in fake_sites.values():
+        assert "Limit" not in server.queries[-1]
+        assert "AuthUser: hans" in server.queries[-1]
+
+
+def test_multisite_query_iter_in_progress(fake_sites):
+    live = _multisite_connection(fake_sites)
+    rows = live.query_iter("GET hosts\nColumns: name num\n")
+    assert next(rows) == ["a", 1]
+
+    with pytest.raises(livestatus.MKLivestatusQueryInProgressError):
+        live.query("GET hosts\nColumns: name num\n")
+    with pytest.raises(livestatus.MKLivestatusQueryInProgressError):
+        next(live.query_iter("GET hosts\nColumns: name num\n"))
+    with pytest.raises(livestatus.MKLivestatusQueryInProgressError):
+        live.command("[1] DISABLE_NOTIFICATIONS", livestatus.SiteId("fast"))
+    with pytest.raises(livestatus.MKLivestatusQueryInProgressError):
+        live.get_connection(livestatus.SiteId("fast")).query("GET hosts\nColumns: name num\n")
+
+    assert list(rows) == [["b", 2], ["c", 3]]
+    assert live.query("GET hosts\nColumns: name num\n") == [["a", 1], ["b", 2], ["c", 3]]
+    assert live.dead_sites() == {}
+
+
+def test_multisite_query_iter_errors():
+    with FakeLivestatusServer([], code=404) as missing_table, \
+         FakeLivestatusServer([], code=400) as broken, \
+         FakeLivestatusServer([["b", 2]]) as other:
+        live = _multisite_connection({
+            "missing_table": missing_table,
+            "broken": broken,
+            "other": other,
+        })
+        assert list(live.query_iter("GET hosts\nColumns: name num\n")) == [["b", 2]]
+        assert sorted(live.alive_sites()) == ["missing_table", "other"]
+        assert list(live.dead_sites()) == ["broken"]